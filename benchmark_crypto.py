@@ -0,0 +1,766 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for CoresAI Crypto Trading Backend components
+Usage: python benchmark_crypto.py [benchmark ...]
+"""
+
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from crypto_alerts import PriceAlertEngine
+from crypto_analytics import PortfolioAnalytics, PriceHistory
+from crypto_behavior import WalletBehaviorClassifier, extract_features
+from crypto_hashbench import HashBenchmark
+from crypto_jobs import JobQueue
+from crypto_metrics import percentile
+from crypto_multicall import AGGREGATE3_SELECTOR, MulticallBalanceScanner
+from crypto_orderbook import L2Book
+from crypto_pools import PoolProber
+from crypto_profit import ProfitEngine
+from crypto_routing import QuoteAggregator
+from crypto_signals import SignalScheduler
+from crypto_state import MemoryStateBackend, RedisStateBackend
+from crypto_storage import TradeHistoryStore
+from crypto_stratum import StratumClient
+from crypto_streaming import Broadcaster
+from crypto_telemetry import TelemetryStore
+
+
+def bench_price_alerts(alert_count: int = 1_000_000, tick_count: int = 10_000) -> None:
+    """Evaluate alert_count alerts across 10 tokens against a random-walk tick stream"""
+    print(f"🔍 Price alerts: {alert_count:,} alerts, {tick_count:,} ticks")
+    rng = random.Random(42)
+    tokens = ["BTC", "ETH", "SOL", "BNB", "XRP", "ADA", "DOGE", "AVAX", "DOT", "LINK"]
+    prices = {token: 100.0 for token in tokens}
+
+    engine = PriceAlertEngine()
+    start = time.perf_counter()
+    for i in range(alert_count):
+        token = tokens[i % len(tokens)]
+        condition = "above" if i % 2 else "below"
+        offset = rng.uniform(1, 60)
+        engine.add(str(i), token, condition, 100.0 + offset if condition == "above" else 100.0 - offset)
+    add_seconds = time.perf_counter() - start
+    print(f"   add:      {add_seconds:.2f}s ({alert_count / add_seconds:,.0f} alerts/s)")
+
+    triggered = 0
+    start = time.perf_counter()
+    for _ in range(tick_count):
+        token = rng.choice(tokens)
+        prices[token] *= 1 + rng.gauss(0, 0.01)
+        triggered += len(engine.evaluate(token, prices[token]))
+    tick_seconds = time.perf_counter() - start
+    print(f"   evaluate: {tick_seconds:.2f}s ({tick_count / tick_seconds:,.0f} ticks/s, "
+          f"{tick_seconds / tick_count * 1e6:.1f}µs/tick), {triggered:,} alerts fired")
+
+    start = time.perf_counter()
+    removed = sum(engine.remove(str(i)) for i in range(0, alert_count, 10))
+    remove_seconds = time.perf_counter() - start
+    print(f"   remove:   {removed:,} alerts in {remove_seconds:.2f}s")
+
+
+def bench_trade_history(trade_count: int = 200_000) -> None:
+    """Memory per trade: dict-per-trade list vs. TradeHistoryStore columns"""
+    print(f"🔍 Trade history: {trade_count:,} trades")
+    tokens = ["ETH", "USDC", "BTC", "SOL", "LINK"]
+    now = time.time()
+    trades = [
+        (
+            "0x" + hashlib.sha256(str(i).encode()).hexdigest(),
+            tokens[i % 5],
+            tokens[(i + 1) % 5],
+            random.uniform(0.01, 10),
+            now + i,
+        )
+        for i in range(trade_count)
+    ]
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    history = {"user": []}
+    for tx_hash, token_in, token_out, amount, ts in trades:
+        history["user"].append({
+            "transaction_hash": tx_hash,
+            "token_in": token_in,
+            "token_out": token_out,
+            "amount_in": amount,
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "status": "completed"
+        })
+    dict_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    del history
+
+    baseline = tracemalloc.get_traced_memory()[0]
+    store = TradeHistoryStore()
+    start = time.perf_counter()
+    for tx_hash, token_in, token_out, amount, ts in trades:
+        store.append("user", tx_hash, token_in, token_out, amount, ts)
+    append_seconds = time.perf_counter() - start
+    store_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    cursor, pages = None, 0
+    while True:
+        _, cursor = store.page("user", cursor=cursor, limit=100)
+        pages += 1
+        if cursor is None or pages >= 1000:
+            break
+    page_seconds = time.perf_counter() - start
+
+    print(f"   dict-per-trade: {dict_bytes / trade_count:,.0f} bytes/trade")
+    print(f"   columnar store: {store_bytes / trade_count:,.0f} bytes/trade "
+          f"({store.memory_bytes() / trade_count:.0f} bytes of column data)")
+    print(f"   append: {trade_count / append_seconds:,.0f} trades/s, "
+          f"page(100): {page_seconds / pages * 1e6:.0f}µs")
+
+
+def bench_market_stream(subscriber_count: int = 5_000, updates: int = 200, slow_every: int = 100) -> None:
+    """Fan-out of encoded updates to subscriber_count consumer tasks on one event loop"""
+    print(f"🔍 Market stream: {subscriber_count:,} subscribers, {updates:,} updates "
+          f"(every {slow_every}th subscriber never reads)")
+
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=32, max_dropped=50)
+        latencies = []
+
+        async def consume(subscription):
+            async for message in subscription:
+                latencies.append(time.perf_counter() - json.loads(message)["sent"])
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        consumers = []
+        for i in range(subscriber_count):
+            subscription = broadcaster.subscribe()
+            if i % slow_every:
+                consumers.append(asyncio.ensure_future(consume(subscription)))
+        await asyncio.sleep(0)
+        subscriber_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+
+        rows = [{"symbol": f"T{i}", "price": 100.0 + i} for i in range(20)]
+        publish_seconds = 0.0
+        start = time.perf_counter()
+        for _ in range(updates):
+            sent = time.perf_counter()
+            broadcaster.publish(json.dumps({"type": "update", "data": rows, "sent": sent}))
+            publish_seconds += time.perf_counter() - sent
+            await asyncio.sleep(0)
+        while len(latencies) < len(consumers) * updates and time.perf_counter() - start < 60:
+            await asyncio.sleep(0.01)
+        total_seconds = time.perf_counter() - start
+
+        for task in consumers:
+            task.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+        return broadcaster.get_stats(), latencies, publish_seconds, total_seconds, subscriber_bytes
+
+    stats, latencies, publish_seconds, total_seconds, subscriber_bytes = asyncio.run(scenario())
+    print(f"   memory:   {subscriber_bytes / subscriber_count:,.0f} bytes/subscriber")
+    print(f"   publish:  {publish_seconds / updates * 1000:.2f}ms/update "
+          f"({stats['delivered'] / total_seconds:,.0f} deliveries/s end to end)")
+    print(f"   latency:  p50 {percentile(latencies, 50) * 1000:.1f}ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.1f}ms")
+    print(f"   slow:     {stats['dropped']:,} messages dropped, "
+          f"{stats['disconnected']:,} subscribers disconnected, {stats['subscribers']:,} still connected")
+
+
+def _state_worker(url: str, seconds: float, concurrency: int, results) -> None:
+    """One backend worker: pool deposit + status requests against shared state"""
+    async def run() -> int:
+        state = RedisStateBackend(url) if url else MemoryStateBackend()
+        rows = [{"symbol": f"T{i}", "price": 100.0 + i, "change_24h": 1.5, "volume_24h": 1e9} for i in range(20)]
+        deadline = time.perf_counter() + seconds
+        handled = 0
+
+        async def client(pool_id: str) -> None:
+            nonlocal handled
+            while time.perf_counter() < deadline:
+                await state.increment("pools", pool_id, "size", 1)
+                pool = await state.get("pools", pool_id)
+                json.dumps({"pool": pool, "market": rows})  # response rendering
+                handled += 1
+
+        await asyncio.gather(*(client(str(i % 16)) for i in range(concurrency)))
+        await state.close()
+        return handled
+
+    results.put(asyncio.run(run()))
+
+
+def bench_state_workers(seconds: float = 3.0, concurrency: int = 32) -> None:
+    """Request throughput against Redis shared state as worker processes are added"""
+    url = os.getenv("REDIS_URL", "redis://localhost:6379")
+    print(f"🔍 Shared state: {seconds:.0f}s per run, {concurrency} concurrent clients per worker, {url}")
+    try:
+        asyncio.run(RedisStateBackend(url).redis.ping())
+    except Exception as e:
+        print(f"   ⚠️ Redis not reachable ({e}); set REDIS_URL to run this benchmark")
+        return
+
+    worker_counts = sorted({1, 2, 4, os.cpu_count() or 1})
+    for workers in [0] + worker_counts:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=_state_worker, args=(url if workers else "", seconds, concurrency, results))
+            for _ in range(max(workers, 1))
+        ]
+        for process in processes:
+            process.start()
+        handled = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+        label = f"{workers} worker(s), redis" if workers else "1 worker, in-process"
+        print(f"   {label:<24} {handled / seconds:>10,.0f} requests/s")
+
+
+def bench_order_book(levels: int = 1_000, diff_count: int = 200_000, walk_count: int = 10_000) -> None:
+    """Diff application rate and walk-the-book latency on a levels-deep book"""
+    print(f"🔍 Order book: {levels:,} levels per side, {diff_count:,} diffs, {walk_count:,} walks")
+    rng = random.Random(42)
+    book = L2Book("ETH/USDT")
+    book.apply_snapshot(
+        [[2000 - i * 0.01, rng.uniform(0.1, 5)] for i in range(levels)],
+        [[2000.01 + i * 0.01, rng.uniform(0.1, 5)] for i in range(levels)],
+        sequence=0,
+    )
+
+    # Depth streams mostly touch levels near the top of the book
+    diffs = []
+    for sequence in range(1, diff_count + 1):
+        bids, asks = [], []
+        for _ in range(rng.randint(1, 3)):
+            side = bids if rng.random() < 0.5 else asks
+            offset = round(min(rng.expovariate(1 / 20), levels - 1)) * 0.01
+            price = round(2000 - offset if side is bids else 2000.01 + offset, 2)
+            side.append([price, 0.0 if rng.random() < 0.15 else rng.uniform(0.1, 5)])
+        diffs.append((bids, asks, sequence))
+
+    start = time.perf_counter()
+    for bids, asks, sequence in diffs:
+        book.apply_diff(bids, asks, sequence)
+    diff_seconds = time.perf_counter() - start
+    print(f"   diffs:  {diff_count / diff_seconds:,.0f} diffs/s ({diff_seconds / diff_count * 1e6:.1f}µs/diff), "
+          f"{len(book.bids):,} bids / {len(book.asks):,} asks after")
+
+    start = time.perf_counter()
+    for _ in range(walk_count):
+        book.best_bid()
+        book.best_ask()
+    top_seconds = time.perf_counter() - start
+    amounts = [rng.uniform(1, 500) for _ in range(walk_count)]
+    start = time.perf_counter()
+    for amount in amounts:
+        book.walk("buy", amount)
+    walk_seconds = time.perf_counter() - start
+    print(f"   top:    {top_seconds / walk_count * 1e9:,.0f}ns for best bid + ask")
+    print(f"   walk:   {walk_seconds / walk_count * 1e6:.1f}µs per market-order estimate")
+
+
+class _BenchVenue:
+    """Venue with lognormal latency; a hung venue never answers"""
+
+    def __init__(self, name: str, price: float, median_ms: float, rng: random.Random):
+        self.name = name
+        self.price = price
+        self.median_ms = median_ms
+        self.rng = rng
+
+    async def quote(self, token_in: str, token_out: str, amount_in: float):
+        await asyncio.sleep(self.rng.lognormvariate(0, 0.8) * self.median_ms / 1000)
+        return {"output": amount_in * self.price, "complete": True, "slippage_pct": 0.1}
+
+
+def bench_routing(route_count: int = 5_000, concurrency: int = 200, deadline_ms: float = 250) -> None:
+    """Route latency against the deadline with one hung and several long-tailed venues"""
+    print(f"🔍 Routing: {route_count:,} routes, {concurrency} concurrent, deadline {deadline_ms:.0f}ms")
+    rng = random.Random(42)
+    venues = [_BenchVenue(f"venue_{i}", 100 + i, median_ms=20 + 15 * i, rng=rng) for i in range(6)]
+    venues.append(_BenchVenue("hung", 200, median_ms=60_000, rng=rng))
+
+    async def run():
+        aggregator = QuoteAggregator(venues, deadline=deadline_ms / 1000, cache_ttl=0.3)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, winners = [], {}
+
+        async def one(index: int):
+            async with semaphore:
+                started = time.perf_counter()
+                route = await aggregator.best_route(f"T{index % 50}", "USDT", rng.uniform(1, 1000))
+                latencies.append((time.perf_counter() - started) * 1000)
+                name = route["best"]["venue"] if route["best"] else "none"
+                winners[name] = winners.get(name, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(index) for index in range(route_count)))
+        return aggregator, latencies, winners, time.perf_counter() - start
+
+    aggregator, latencies, winners, seconds = asyncio.run(run())
+    stats = aggregator.get_stats()
+    print(f"   routes: {route_count / seconds:,.0f}/s, {stats['fanouts']:,} fan-outs "
+          f"({stats['cache']['hits'] + stats['cache']['coalesced']:,} served from cache)")
+    print(f"   latency: p50 {percentile(latencies, 50):.1f}ms, p99 {percentile(latencies, 99):.1f}ms, "
+          f"max {max(latencies):.1f}ms (deadline {deadline_ms:.0f}ms)")
+    print(f"   late venue answers: {stats['late']:,}; best venue: "
+          + ", ".join(f"{name} {count:,}" for name, count in sorted(winners.items())))
+
+
+class _CountingRPC:
+    """In-process node: answers every aggregate3 sub-call with a uint and counts eth_calls"""
+
+    def __init__(self):
+        self.eth_calls = 0
+
+    async def eth_call(self, to: str, data: str, block: str = "latest") -> str:
+        self.eth_calls += 1
+        if data[2:10] != AGGREGATE3_SELECTOR:
+            return "0x" + (10 ** 18).to_bytes(32, "big").hex()
+        count = int(data[74:138], 16)
+        item = (1).to_bytes(32, "big") + (0x40).to_bytes(32, "big") + (32).to_bytes(32, "big") + (10 ** 18).to_bytes(32, "big")
+        offsets = b"".join((32 * count + index * len(item)).to_bytes(32, "big") for index in range(count))
+        return "0x" + ((0x20).to_bytes(32, "big") + count.to_bytes(32, "big") + offsets + item * count).hex()
+
+
+def bench_multicall(wallet_count: int = 100, token_counts=(50, 200, 500), chunk: int = 500) -> None:
+    """eth_calls per wallet for token balance discovery: one call per token vs Multicall3 chunks"""
+    print(f"🔍 Multicall balances: {wallet_count} wallets, {', '.join(map(str, token_counts))} tokens, chunks of {chunk}")
+
+    async def per_token(rpc: _CountingRPC, wallets, tokens):
+        for wallet in wallets:
+            await asyncio.gather(*(rpc.eth_call(token, "0x70a08231" + wallet[2:].rjust(64, "0")) for token in tokens))
+
+    async def run(tokens):
+        wallets = [f"0x{index:040x}" for index in range(1, wallet_count + 1)]
+        naive = _CountingRPC()
+        await per_token(naive, wallets, tokens)
+
+        single = _CountingRPC()
+        scanner = MulticallBalanceScanner(single, max_calls=chunk)
+        start = time.perf_counter()
+        for wallet in wallets:
+            await scanner.balances([wallet], tokens)
+        single_seconds = time.perf_counter() - start
+
+        batched = _CountingRPC()
+        scanner = MulticallBalanceScanner(batched, max_calls=chunk, batch_window=0.001)
+        start = time.perf_counter()
+        await asyncio.gather(*(scanner.wallet_balances(wallet, tokens) for wallet in wallets))
+        batched_seconds = time.perf_counter() - start
+        return naive.eth_calls, single.eth_calls, single_seconds, batched.eth_calls, batched_seconds
+
+    for token_count in token_counts:
+        tokens = [f"0x{0xabc000 + index:040x}" for index in range(token_count)]
+        naive, single, single_seconds, batched, batched_seconds = asyncio.run(run(tokens))
+        print(f"   {token_count:>4} tokens: per-token {naive / wallet_count:>6.1f} calls/wallet, "
+              f"multicall {single / wallet_count:>5.2f} calls/wallet ({single_seconds / wallet_count * 1000:.2f}ms encode+decode), "
+              f"{wallet_count} wallets batched {batched / wallet_count:.2f} calls/wallet ({batched_seconds * 1000:.0f}ms)")
+
+
+def _synthetic_trades(trade_count: int, seed: int = 7):
+    """Random-walk prices for four tokens, each trade buying or selling one against USDT"""
+    rng = np.random.default_rng(seed)
+    tokens = ["ETH", "BTC", "SOL", "LINK"]
+    start_prices = np.array([2000.0, 40000.0, 60.0, 15.0])
+    steps = rng.normal(0, 0.002, size=(trade_count, len(tokens)))
+    prices = start_prices * np.exp(np.cumsum(steps, axis=0))
+    picks = rng.integers(0, len(tokens), trade_count)
+    sells = rng.random(trade_count) < 0.5
+    usd = rng.uniform(50, 500, trade_count)
+    times = time.time() - 365 * 24 * 3600 + np.arange(trade_count) * (365 * 24 * 3600 / trade_count)
+    trades = []
+    for i in range(trade_count):
+        token, price = tokens[picks[i]], prices[i, picks[i]]
+        if sells[i]:
+            trades.append((times[i], usd[i] / price, usd[i] * 0.997, token, "USDT", "completed"))
+        else:
+            trades.append((times[i], usd[i], usd[i] / price * 0.997, "USDT", token, "completed"))
+    return trades
+
+
+def bench_portfolio_analytics(trade_count: int = 1_000_000, new_trades: int = 100, requests: int = 20) -> None:
+    """Portfolio analytics over trade_count trades: full recompute vs incremental updates"""
+    print(f"🔍 Portfolio analytics: {trade_count:,} trades, {new_trades} new trades per request")
+    trades = _synthetic_trades(trade_count + new_trades * requests)
+    history, arrivals = trades[:trade_count], trades[trade_count:]
+    now = arrivals[-1][0] + 1
+
+    start = time.perf_counter()
+    engine = PortfolioAnalytics(PriceHistory())
+    engine.ingest("user", history)
+    ingest_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    result = engine.analytics("user", now=now)
+    compute_seconds = time.perf_counter() - start
+
+    full, incremental = [], []
+    ingested = trade_count
+    for request in range(requests):
+        batch = arrivals[request * new_trades:(request + 1) * new_trades]
+        ingested += len(batch)
+        start = time.perf_counter()
+        engine.ingest("user", batch)
+        engine.analytics("user", now=now)
+        incremental.append(time.perf_counter() - start)
+        if request < 3:
+            start = time.perf_counter()
+            fresh = PortfolioAnalytics(PriceHistory())
+            fresh.ingest("user", trades[:ingested])
+            fresh.analytics("user", now=now)
+            full.append(time.perf_counter() - start)
+
+    print(f"   initial ingest: {ingest_seconds:.2f}s ({trade_count / ingest_seconds:,.0f} trades/s), "
+          f"metrics: {compute_seconds * 1000:.1f}ms")
+    print(f"   full recompute per request: {sum(full) / len(full) * 1000:,.0f}ms")
+    print(f"   incremental per request:    {sum(incremental) / len(incremental) * 1000:,.1f}ms "
+          f"(p99 {percentile(incremental, 99) * 1000:.1f}ms)")
+    print(f"   win rate {result['win_rate']}%, sharpe {result['sharpe_ratio']}, "
+          f"max drawdown {result['max_drawdown_percent']}%, diversity {result['portfolio_diversity_score']}")
+
+
+def bench_wallet_behavior(wallet_count: int = 1_000, transfers: int = 50, changed: int = 10) -> None:
+    """Wallet feature extraction one wallet at a time vs one batch, and a refresh with few changed wallets"""
+    print(f"🔍 Wallet behavior: {wallet_count:,} wallets x {transfers} transfers, {changed} changed per refresh")
+    rng = random.Random(11)
+    tokens = ["ETH", "USDC", "WBTC", "LINK", "UNI", "PEPE"]
+    prices = {"ETH": 2000.0, "USDC": 1.0, "WBTC": 40000.0, "LINK": 15.0, "UNI": 6.0}
+    now = time.time()
+
+    def history(wallet: int, offset: int = 0):
+        rows, ts = [], now - rng.uniform(1, 365) * 86400
+        for index in range(transfers):
+            ts += rng.expovariate(1 / 3600)
+            rows.append({
+                "hash": f"0x{wallet:032x}{index + offset:032x}",
+                "log_index": 0,
+                "token": rng.choice(tokens),
+                "value": str(rng.uniform(0.01, 10)),
+                "type": rng.choice(("send", "receive")),
+                "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            })
+        rows.reverse()
+        return rows
+
+    histories = {f"0x{wallet:040x}": history(wallet) for wallet in range(wallet_count)}
+    start = time.perf_counter()
+    for address, rows in histories.items():
+        extract_features({address: rows}, prices, now)
+    single_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    extract_features(histories, prices, now)
+    batch_seconds = time.perf_counter() - start
+
+    classifier = WalletBehaviorClassifier()
+    start = time.perf_counter()
+    classifier.classify(histories, prices, now)
+    cold_seconds = time.perf_counter() - start
+    for wallet in range(changed):
+        histories[f"0x{wallet:040x}"] = history(wallet, offset=transfers)
+    start = time.perf_counter()
+    results = classifier.classify(histories, prices, now)
+    refresh_seconds = time.perf_counter() - start
+    profiles = {}
+    for result in results.values():
+        profiles[result["profile"]] = profiles.get(result["profile"], 0) + 1
+
+    print(f"   per-wallet extraction: {single_seconds * 1000:,.0f}ms, one batch: {batch_seconds * 1000:,.0f}ms")
+    print(f"   classify cold: {cold_seconds * 1000:,.0f}ms, refresh with {changed} changed: {refresh_seconds * 1000:,.1f}ms")
+    print(f"   profiles: {profiles}")
+
+
+def bench_signals(universe_sizes=(10, 100, 1_000), bars: int = 200, cycles: int = 5) -> None:
+    """Signal refresh cost (incremental fetch + vectorized indicators) as the symbol universe grows"""
+    print(f"📡 Trading signals: {bars} bars per symbol, {cycles} refresh cycles per universe")
+    step_ms = 3_600_000
+    start_ms = 1_700_000_000_000
+
+    for size in universe_sizes:
+        rng = np.random.default_rng(size)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (size, bars + cycles)), axis=1))
+        symbols = [f"T{index}" for index in range(size)]
+        clock = [bars]  # candles published so far
+
+        async def fetch(symbol, timeframe, since, limit, closes=closes, clock=clock):
+            row = closes[int(symbol[1:])]
+            first = 0 if since is None else (since - start_ms) // step_ms
+            return [
+                [start_ms + i * step_ms, row[i], row[i] * 1.002, row[i] * 0.998, row[i], 1.0]
+                for i in range(max(first, clock[0] - limit), clock[0])
+            ]
+
+        scheduler = SignalScheduler(fetch, symbols, timeframe="1h", bars=bars)
+        compute = []
+
+        async def run():
+            await scheduler.refresh()
+            for cycle in range(cycles):
+                clock[0] = bars + cycle + 1
+                await scheduler.refresh()
+                compute.append(scheduler.get_stats()["last_compute_ms"])
+
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        stats = scheduler.get_stats()
+        print(
+            f"   {size:>5,} symbols: compute {np.mean(compute):,.1f}ms/cycle, "
+            f"cycle {stats['last_cycle_ms']:,.1f}ms, {stats['signals']} signals, total {elapsed:,.2f}s"
+        )
+
+
+def bench_jobs(job_count: int = 10_000, job_seconds: float = 0.05, workers: int = 64) -> None:
+    """Request-side cost of submitting long jobs vs running them inline, and pool throughput"""
+    print(f"🧵 Background jobs: {job_count:,} jobs of {job_seconds * 1000:.0f}ms on {workers} workers")
+
+    async def work(index, progress=None):
+        progress(50)
+        await asyncio.sleep(job_seconds)
+        return index
+
+    async def run():
+        start = time.perf_counter()
+        await work(0, progress=lambda percent: None)
+        inline_ms = (time.perf_counter() - start) * 1000
+
+        queue = JobQueue(workers=workers, max_queued=job_count, max_per_user=job_count)
+        queue.start()
+        submit_us = []
+        start = time.perf_counter()
+        for index in range(job_count):
+            submitted = time.perf_counter()
+            job = queue.submit(f"user{index % 100}", "bench", work, index)
+            submit_us.append((time.perf_counter() - submitted) * 1_000_000)
+        while not job.finished:
+            await job.wait_changed()
+        while queue.get_stats()["running"]:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        stats = queue.get_stats()
+        await queue.stop()
+        print(f"   inline request: {inline_ms:,.1f}ms, submit p50 {percentile(submit_us, 50):,.1f}µs p99 {percentile(submit_us, 99):,.1f}µs")
+        print(f"   drained in {elapsed:,.2f}s ({stats['completed'] / elapsed:,.0f} jobs/s, ideal {workers / job_seconds:,.0f}), queue wait p99 {stats['queue_wait_p99_ms']:,.0f}ms")
+
+    asyncio.run(run())
+
+
+def bench_telemetry(sessions: int = 100, seconds: int = 3_600, batch: int = 60, target_rate: int = 10_000) -> None:
+    """Telemetry ingest rate per sample and batched, plus latest/history query latency"""
+    print(f"📈 Mining telemetry: {sessions} sessions x {seconds:,} samples, batches of {batch}")
+    rng = np.random.default_rng(5)
+    start_time = 1_700_006_400.0
+    values = rng.uniform(0, 100, (seconds, 6))
+    times = start_time + np.arange(seconds, dtype=float)
+
+    store = TelemetryStore(max_sessions=sessions)
+    count = sessions * 300
+    start = time.perf_counter()
+    for index in range(count):
+        offset = index // sessions
+        store.ingest(f"s{index % sessions}", times[offset:offset + 1], values[offset:offset + 1])
+    single_rate = count / (time.perf_counter() - start)
+
+    store = TelemetryStore(max_sessions=sessions)
+    start = time.perf_counter()
+    for offset in range(0, seconds, batch):
+        for session in range(sessions):
+            store.ingest(f"s{session}", times[offset:offset + batch], values[offset:offset + batch])
+    batch_rate = sessions * seconds / (time.perf_counter() - start)
+
+    latest_us, history_us = [], []
+    for index in range(2_000):
+        session = f"s{index % sessions}"
+        query = time.perf_counter()
+        store.latest(session)
+        latest_us.append((time.perf_counter() - query) * 1_000_000)
+        query = time.perf_counter()
+        store.history(session, "1m", start=start_time + 1_800)
+        history_us.append((time.perf_counter() - query) * 1_000_000)
+
+    verdict = "✅" if single_rate >= target_rate else "❌"
+    print(f"   {verdict} one sample per call: {single_rate:,.0f} samples/s (target {target_rate:,})")
+    print(f"   batched: {batch_rate:,.0f} samples/s, memory {store.get_stats()['memory_bytes'] / 1e6:,.1f}MB")
+    print(f"   latest p99 {percentile(latest_us, 99):,.1f}µs, 30-minute 1m history p99 {percentile(history_us, 99):,.1f}µs")
+
+
+def bench_profit_switching(fleet_sizes=(1_000, 10_000, 100_000), ticks: int = 50) -> None:
+    """Profit re-evaluation of whole fleets against every pool on a price tick"""
+    print(f"⛏️ Profit switching: {ticks} price ticks per fleet")
+    for size in fleet_sizes:
+        engine = ProfitEngine(min_dwell=0)  # hysteresis from the 5% switch threshold only
+        rng = np.random.default_rng(size)
+        width = len(engine.algorithms)
+        hashrates = rng.uniform(1e6, 1e8, (size, width))
+        hashrates[rng.random((size, width)) < 0.3] = np.nan  # not every device mines every algorithm
+        engine.set_fleet([f"rig{index}" for index in range(size)], hashrates, rng.uniform(100, 500, (size, width)))
+        prices = {"BTC": 60_000.0, "LTC": 80.0, "ETC": 25.0, "RVN": 0.02, "XMR": 160.0}
+        engine.on_prices(prices)
+        for index, device_id in enumerate(engine.device_ids):
+            coin = engine.pools[index % len(engine.pools)]
+            engine.assign(device_id, coin[1], coin[0], now=0)
+
+        tick_ms, switches = [], 0
+        for tick in range(ticks):
+            moved = {coin: price * (1 + rng.normal(0, 0.02)) for coin, price in prices.items()}
+            start = time.perf_counter()
+            applied = engine.on_prices(moved, now=1_000 + tick)
+            engine.apply(applied, now=1_000 + tick)  # auto-switch mode
+            tick_ms.append((time.perf_counter() - start) * 1000)
+            switches += len(applied)
+        stats = engine.get_stats()
+        print(
+            f"   {size:>7,} devices x {stats['pools']} pools: evaluate p99 {stats['p99_eval_ms']:,.2f}ms, "
+            f"tick with switches p50 {percentile(tick_ms, 50):,.2f}ms p99 {percentile(tick_ms, 99):,.2f}ms, "
+            f"{switches / ticks:,.0f} switches/tick"
+        )
+
+
+def bench_hashing(trials: int = 3, trial_seconds: float = 1.0) -> None:
+    """CPU hashrate per kernel on one core and on every core, with trial-to-trial variation"""
+    benchmark = HashBenchmark(trials=trials, trial_seconds=trial_seconds)
+    print(f"🔨 CPU hashing: {trials} x {trial_seconds:g}s trials per kernel on {benchmark.processes} processes")
+    result = asyncio.run(benchmark.run())
+    for kernel, entry in result["kernels"].items():
+        per_core, aggregate = entry["per_core_hps"], entry["aggregate_hps"]
+        print(
+            f"   {kernel:<12} ({entry['algorithm']}): {per_core['mean']:>12,.1f} H/s per core (cv {per_core['cv']:.1%}), "
+            f"{aggregate['mean']:>12,.1f} H/s aggregate (cv {aggregate['cv']:.1%}), scaling {entry['scaling']:.2f}"
+        )
+    print(f"   total {result['duration_seconds']:.1f}s")
+
+
+def bench_pool_probe(pool_count: int = 50, silent: int = 5, rounds: int = 3, timeout: float = 0.5) -> None:
+    """One probe run over many local stratum endpoints with injected delays and a few silent ones"""
+    print(f"📡 Pool probe: {pool_count} endpoints ({silent} silent), {rounds} rounds, timeout {timeout:g}s")
+    rng = random.Random(7)
+    delays = [rng.uniform(0.005, 0.2) for _ in range(pool_count - silent)] + [None] * silent
+
+    async def run():
+        async def serve(delay, reader, writer):
+            try:
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+                    if delay is not None:
+                        await asyncio.sleep(delay)
+                        request = json.loads(line)
+                        writer.write(json.dumps({"id": request["id"], "result": [[], "00", 4], "error": None}).encode() + b"\n")
+                        await writer.drain()
+            finally:
+                writer.close()
+
+        servers, endpoints = [], []
+        for index, delay in enumerate(delays):
+            server = await asyncio.start_server(lambda r, w, delay=delay: serve(delay, r, w), "127.0.0.1", 0)
+            servers.append(server)
+            endpoints.append((f"pool{index}", "ETC", "127.0.0.1", server.sockets[0].getsockname()[1], 1.0))
+        prober = PoolProber(endpoints, rounds=rounds, timeout=timeout)
+        start = time.perf_counter()
+        ranked = await prober.probe()
+        seconds = time.perf_counter() - start
+        for server in servers:
+            server.close()
+        return ranked, seconds
+
+    ranked, seconds = asyncio.run(run())
+    sequential = sum(delay if delay is not None else timeout for delay in delays) * rounds
+    reachable = [entry for entry in ranked if entry["reachable"]]
+    by_delay = sorted(reachable, key=lambda entry: delays[int(entry["name"][4:])])
+    in_order = sum(1 for entry, expected in zip(reachable, by_delay) if entry["name"] == expected["name"])
+    print(f"   run: {seconds:.2f}s for {pool_count * rounds} probes (sequential would take {sequential:.1f}s)")
+    print(f"   reachable {len(reachable)}/{pool_count}; {in_order}/{len(reachable)} ranked exactly by injected delay")
+
+
+def bench_stratum(share_count: int = 5_000, slow_every: int = 100, slow_ms: float = 200, ack_ms: float = 5) -> None:
+    """Share throughput over one pipelined stratum connection when some acks are slow"""
+    print(f"⛏️ Stratum: {share_count:,} shares, ack {ack_ms:g}ms, every {slow_every}th ack {slow_ms:g}ms")
+
+    async def run():
+        async def ack(writer, request):
+            await asyncio.sleep((slow_ms if int(request["params"][4], 16) % slow_every == 0 else ack_ms) / 1000)
+            writer.write(json.dumps({"id": request["id"], "result": True, "error": None}).encode() + b"\n")
+
+        closed = asyncio.Event()
+
+        async def pool(reader, writer):
+            acks = []
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                request = json.loads(line)
+                if request["method"] == "mining.submit":
+                    acks.append(asyncio.ensure_future(ack(writer, request)))
+                else:
+                    result = [[], "00", 4] if request["method"] == "mining.subscribe" else True
+                    writer.write(json.dumps({"id": request["id"], "result": result, "error": None}).encode() + b"\n")
+            writer.close()
+            closed.set()
+
+        server = await asyncio.start_server(pool, "127.0.0.1", 0)
+        client = StratumClient([("127.0.0.1", server.sockets[0].getsockname()[1])], "bench")
+        client.start()
+        await client.wait_ready(5)
+        start = time.perf_counter()
+        await asyncio.gather(*(client.submit("job", "00000000", "00000000", f"{nonce:08x}") for nonce in range(share_count)))
+        pipelined = time.perf_counter() - start
+        start = time.perf_counter()
+        for nonce in range(200):  # one ack at a time, as a miner without pipelining would
+            await client.submit("job", "00000000", "00000000", f"{nonce:08x}")
+        serial = (time.perf_counter() - start) / 200 * share_count
+        stats = client.get_stats()
+        await client.stop()
+        await closed.wait()
+        server.close()
+        return pipelined, serial, stats
+
+    pipelined, serial, stats = asyncio.run(run())
+    print(f"   pipelined: {share_count / pipelined:,.0f} shares/s ({pipelined:.2f}s); "
+          f"one at a time: ~{share_count / serial:,.0f} shares/s (~{serial:.1f}s)")
+    print(f"   ack p50 {stats['ack_p50_ms']:.1f}ms, p99 {stats['ack_p99_ms']:.1f}ms, accepted {stats['accepted']:,}")
+
+
+BENCHMARKS = {
+    "price_alerts": bench_price_alerts,
+    "trade_history": bench_trade_history,
+    "market_stream": bench_market_stream,
+    "state_workers": bench_state_workers,
+    "order_book": bench_order_book,
+    "routing": bench_routing,
+    "multicall": bench_multicall,
+    "portfolio_analytics": bench_portfolio_analytics,
+    "wallet_behavior": bench_wallet_behavior,
+    "signals": bench_signals,
+    "jobs": bench_jobs,
+    "telemetry": bench_telemetry,
+    "profit_switching": bench_profit_switching,
+    "hashing": bench_hashing,
+    "pool_probe": bench_pool_probe,
+    "stratum": bench_stratum,
+}
+
+
+def main():
+    """Run the selected (default: all) benchmarks"""
+    print("⏱️ CoresAI Crypto Component Benchmarks")
+    print("=" * 60)
+    for name in sys.argv[1:] or list(BENCHMARKS):
+        if name not in BENCHMARKS:
+            print(f"❌ Unknown benchmark: {name} (choose from {', '.join(BENCHMARKS)})")
+            continue
+        BENCHMARKS[name]()
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Price Alert Engine
+Indexed evaluation of "above"/"below" price alerts against price ticks
+"""
+
+import bisect
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONDITIONS = ("above", "below")
+
+
+class _ThresholdIndex:
+    """Alerts for one token and condition, sorted by threshold.
+
+    Pairs are kept in bounded, sorted chunks (thresholds and ids in parallel
+    lists) with each chunk's maximum in ``maxes``. Add and remove binary
+    search ``maxes`` and then one chunk, so they cost O(log n) plus a shift
+    of at most ``2 * CHUNK`` items. A tick pops whole chunks and slices at
+    most one, so evaluation cost tracks the alerts fired, not the alerts held.
+    """
+
+    __slots__ = ("thresholds", "ids", "maxes", "size")
+
+    CHUNK = 512
+
+    def __init__(self):
+        self.thresholds: List[List[float]] = []
+        self.ids: List[List[str]] = []
+        self.maxes: List[float] = []
+        self.size = 0
+
+    def add(self, threshold: float, alert_id: str) -> None:
+        self.size += 1
+        if not self.maxes:
+            self.thresholds.append([threshold])
+            self.ids.append([alert_id])
+            self.maxes.append(threshold)
+            return
+
+        chunk = min(bisect.bisect_left(self.maxes, threshold), len(self.maxes) - 1)
+        thresholds, ids = self.thresholds[chunk], self.ids[chunk]
+        index = bisect.bisect_right(thresholds, threshold)
+        thresholds.insert(index, threshold)
+        ids.insert(index, alert_id)
+        self.maxes[chunk] = thresholds[-1]
+
+        if len(thresholds) > 2 * self.CHUNK:
+            self.thresholds.insert(chunk + 1, thresholds[self.CHUNK:])
+            self.ids.insert(chunk + 1, ids[self.CHUNK:])
+            self.maxes.insert(chunk + 1, thresholds[-1])
+            del thresholds[self.CHUNK:]
+            del ids[self.CHUNK:]
+            self.maxes[chunk] = thresholds[-1]
+
+    def remove(self, threshold: float, alert_id: str) -> bool:
+        chunk = bisect.bisect_left(self.maxes, threshold)
+        # Equal thresholds may span several chunks
+        while chunk < len(self.maxes) and self.thresholds[chunk][0] <= threshold:
+            thresholds, ids = self.thresholds[chunk], self.ids[chunk]
+            start = bisect.bisect_left(thresholds, threshold)
+            end = bisect.bisect_right(thresholds, threshold)
+            for position in range(start, end):
+                if ids[position] == alert_id:
+                    del thresholds[position]
+                    del ids[position]
+                    self.size -= 1
+                    if thresholds:
+                        self.maxes[chunk] = thresholds[-1]
+                    else:
+                        self._drop_chunk(chunk)
+                    return True
+            chunk += 1
+        return False
+
+    def pop_at_or_below(self, price: float) -> List[str]:
+        """Remove and return ids with threshold <= price ("above" alerts that fired)"""
+        fired: List[str] = []
+        while self.maxes and self.maxes[0] <= price:
+            fired.extend(self.ids[0])
+            self._drop_chunk(0)
+        if self.maxes:
+            thresholds, ids = self.thresholds[0], self.ids[0]
+            cut = bisect.bisect_right(thresholds, price)
+            fired.extend(ids[:cut])
+            del thresholds[:cut]
+            del ids[:cut]
+        self.size -= len(fired)
+        return fired
+
+    def pop_at_or_above(self, price: float) -> List[str]:
+        """Remove and return ids with threshold >= price ("below" alerts that fired)"""
+        fired: List[str] = []
+        while self.maxes and self.thresholds[-1][0] >= price:
+            fired.extend(self.ids[-1])
+            self._drop_chunk(len(self.maxes) - 1)
+        if self.maxes:
+            thresholds, ids = self.thresholds[-1], self.ids[-1]
+            cut = bisect.bisect_left(thresholds, price)
+            fired.extend(ids[cut:])
+            del thresholds[cut:]
+            del ids[cut:]
+            self.maxes[-1] = thresholds[-1]
+        self.size -= len(fired)
+        return fired
+
+    def _drop_chunk(self, chunk: int) -> None:
+        del self.thresholds[chunk]
+        del self.ids[chunk]
+        del self.maxes[chunk]
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class PriceAlertEngine:
+    """One-shot price alerts indexed per token.
+
+    An "above" alert fires once the price is at or above its threshold, a
+    "below" alert once it is at or below. Fired alerts are removed from the
+    index and returned with the payload they were registered with.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], _ThresholdIndex] = {}
+        self._alerts: Dict[str, Tuple[str, str, float, Any]] = {}  # id -> (token, condition, threshold, payload)
+        self.stats = {"added": 0, "removed": 0, "triggered": 0, "ticks": 0}
+
+    def add(self, alert_id: str, token: str, condition: str, threshold: float, payload: Any = None) -> None:
+        """Register an alert; re-adding an id replaces the previous alert"""
+        if condition not in CONDITIONS:
+            raise ValueError(f"Invalid alert condition: {condition}")
+        if alert_id in self._alerts:
+            self.remove(alert_id)
+        token = token.upper()
+        key = (token, condition)
+        if key not in self._indexes:
+            self._indexes[key] = _ThresholdIndex()
+        self._indexes[key].add(threshold, alert_id)
+        self._alerts[alert_id] = (token, condition, threshold, payload)
+        self.stats["added"] += 1
+
+    def remove(self, alert_id: str) -> bool:
+        """Unregister an alert; returns False if it was unknown or already fired"""
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return False
+        token, condition, threshold, _ = alert
+        self._indexes[(token, condition)].remove(threshold, alert_id)
+        self.stats["removed"] += 1
+        return True
+
+    def evaluate(self, token: str, price: float) -> List[Tuple[str, Any]]:
+        """Fire every alert on token crossed by price and return (id, payload) pairs"""
+        self.stats["ticks"] += 1
+        token = token.upper()
+        fired: List[str] = []
+        above = self._indexes.get((token, "above"))
+        if above:
+            fired.extend(above.pop_at_or_below(price))
+        below = self._indexes.get((token, "below"))
+        if below:
+            fired.extend(below.pop_at_or_above(price))
+
+        triggered = []
+        for alert_id in fired:
+            _, _, _, payload = self._alerts.pop(alert_id)
+            triggered.append((alert_id, payload))
+        self.stats["triggered"] += len(triggered)
+        return triggered
+
+    def evaluate_prices(self, prices: Dict[str, float]) -> List[Tuple[str, Any]]:
+        """Evaluate a snapshot of token prices"""
+        triggered = []
+        for token, price in prices.items():
+            triggered.extend(self.evaluate(token, price))
+        return triggered
+
+    def get(self, alert_id: str) -> Optional[Any]:
+        alert = self._alerts.get(alert_id)
+        return alert[3] if alert is not None else None
+
+    def __len__(self) -> int:
+        return len(self._alerts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "active": len(self._alerts), "tokens": len({token for token, _ in self._indexes})}
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Portfolio Analytics
+Performance metrics from trade history, updated incrementally per user
+"""
+
+import logging
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+STABLECOINS = frozenset({"USD", "USDT", "USDC", "DAI", "BUSD", "TUSD", "USDP", "FDUSD"})
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+# (timestamp, amount_in, amount_out, token_in, token_out, status), as trade history ``since`` returns them
+Trade = Tuple[float, float, float, str, str, str]
+Series = Tuple[np.ndarray, np.ndarray]
+
+
+def _extend(column: array, values: np.ndarray) -> None:
+    column.frombytes(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+
+
+def _view(column: array) -> np.ndarray:
+    return np.frombuffer(column, dtype=np.float64) if len(column) else np.empty(0)
+
+
+class PriceHistory:
+    """Recorded USD prices per symbol, oldest first.
+
+    A point closer than ``min_interval`` seconds to a symbol's previous one
+    is dropped; once a series exceeds ``max_points``, its older half is
+    discarded. ``version`` changes whenever a point is kept.
+    """
+
+    def __init__(self, min_interval: float = 60.0, max_points: int = 50_000):
+        self.min_interval = min_interval
+        self.max_points = max_points
+        self.version = 0
+        self._series: Dict[str, Tuple[array, array]] = {}
+
+    def record(self, prices: Dict[str, float], timestamp: Optional[float] = None) -> None:
+        timestamp = time.time() if timestamp is None else timestamp
+        for symbol, price in prices.items():
+            if not price or price <= 0:
+                continue
+            times, values = self._series.setdefault(symbol.upper(), (array("d"), array("d")))
+            if times and timestamp - times[-1] < self.min_interval:
+                continue
+            times.append(timestamp)
+            values.append(price)
+            if len(times) > self.max_points:
+                del times[:len(times) // 2]
+                del values[:len(values) // 2]
+            self.version += 1
+
+    def series(self, symbol: str) -> Optional[Series]:
+        series = self._series.get(symbol)
+        if series is None or not series[0]:
+            return None
+        return _view(series[0]), _view(series[1])
+
+    def candles(
+        self,
+        symbol: str,
+        seconds: float,
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[List[float]]:
+        """Recorded points resampled into [ms, open, high, low, close, 0] candles (buckets without points are skipped)"""
+        series = self.series(symbol.upper())
+        if series is None:
+            return []
+        times, values = series
+        buckets = np.floor(times / seconds).astype(np.int64)
+        starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+        ends = np.append(starts[1:], len(values)) - 1
+        stamps = buckets[starts] * seconds * 1000
+        rows = np.column_stack([
+            stamps,
+            values[starts],
+            np.maximum.reduceat(values, starts),
+            np.minimum.reduceat(values, starts),
+            values[ends],
+            np.zeros(len(starts)),
+        ])
+        if since is not None:
+            rows = rows[stamps >= since]
+        if limit:
+            rows = rows[-limit:]
+        return rows.tolist()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"symbols": len(self._series), "points": sum(len(times) for times, _ in self._series.values())}
+
+
+class _TokenLedger:
+    """One token's balance changes, implied prices and open positions for one user"""
+
+    __slots__ = ("flow_times", "flow_balance", "low", "price_times", "prices", "open_times", "open_amounts", "open_costs")
+
+    def __init__(self):
+        self.flow_times = array("d")
+        self.flow_balance = array("d")  # running balance change since the first trade
+        self.low = 0.0  # lowest running balance; its negative is the inferred starting holding
+        self.price_times = array("d")
+        self.prices = array("d")
+        self.open_times = array("d")
+        self.open_amounts = array("d")
+        self.open_costs = array("d")  # USD value given up to open the position
+
+
+class _Portfolio:
+    __slots__ = ("trades", "first_time", "ledgers", "closed", "wins", "hold_seconds", "token_returns", "cache_key", "cache")
+
+    def __init__(self):
+        self.trades = 0  # history rows ingested, whatever their status
+        self.first_time: Optional[float] = None
+        self.ledgers: Dict[str, _TokenLedger] = {}
+        self.closed = 0
+        self.wins = 0
+        self.hold_seconds = 0.0
+        self.token_returns: Dict[str, List[float]] = {}  # symbol -> [sum of returns, positions]
+        self.cache_key: Optional[Tuple[int, int, int]] = None
+        self.cache: Optional[Dict[str, Any]] = None
+
+
+class PortfolioAnalytics:
+    """Return, win rate, hold time, Sharpe, drawdown and diversity per user.
+
+    New trades are ingested in batches with array operations: each token
+    keeps its running balance, the prices implied by trades against
+    stablecoins and the positions still open. A position is the amount
+    received by one trade; it closes at the next trade selling that token
+    and its return is the value at exit over the USD value given up, so
+    closed positions are folded into running totals and never revisited.
+    Holdings the history cannot explain (sold before they were bought) are
+    treated as held from the first trade. The equity curve is sampled every
+    ``bucket_seconds`` (coarser for long histories, at most ``max_points``
+    samples) at the last known price, and results are cached per user until
+    new trades, new prices or the next bucket arrive.
+    """
+
+    def __init__(
+        self,
+        prices: PriceHistory,
+        stablecoins: Iterable[str] = STABLECOINS,
+        aliases: Optional[Dict[str, str]] = None,
+        bucket_seconds: float = 3600.0,
+        max_points: int = 2000,
+        max_users: int = 1000,
+    ):
+        self.prices = prices
+        self.stablecoins = frozenset(symbol.upper() for symbol in stablecoins)
+        self.aliases = {key.upper(): value.upper() for key, value in (aliases or {}).items()}
+        self.bucket_seconds = bucket_seconds
+        self.max_points = max_points
+        self.max_users = max_users
+        self._users: "OrderedDict[str, _Portfolio]" = OrderedDict()
+        self.stats = {"ingested": 0, "computed": 0, "cache_hits": 0, "evicted": 0}
+
+    def trade_count(self, user: str) -> int:
+        """History rows already ingested for user"""
+        portfolio = self._users.get(user)
+        return portfolio.trades if portfolio is not None else 0
+
+    def reset(self, user: str) -> None:
+        self._users.pop(user, None)
+
+    def _portfolio(self, user: str) -> _Portfolio:
+        portfolio = self._users.get(user)
+        if portfolio is None:
+            portfolio = self._users[user] = _Portfolio()
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.stats["evicted"] += 1
+        self._users.move_to_end(user)
+        return portfolio
+
+    def _is_stable(self, symbol: str) -> bool:
+        return self.aliases.get(symbol, symbol) in self.stablecoins
+
+    def _prices_at(self, symbol: str, ledger: Optional[_TokenLedger], times: np.ndarray) -> np.ndarray:
+        """Last known price of symbol at each time (the first known one before that)"""
+        if self._is_stable(symbol):
+            return np.ones(len(times))
+        sources: List[Series] = []
+        if ledger is not None and ledger.price_times:
+            sources.append((_view(ledger.price_times), _view(ledger.prices)))
+        market = self.prices.series(self.aliases.get(symbol, symbol))
+        if market is not None:
+            sources.append(market)
+        if not sources:
+            return np.zeros(len(times))
+
+        result = np.zeros(len(times))
+        seen_at = np.full(len(times), -np.inf)
+        for source_times, source_prices in sources:
+            index = np.searchsorted(source_times, times, side="right") - 1
+            clipped = np.maximum(index, 0)
+            observed = np.where(index >= 0, source_times[clipped], -np.inf)
+            newer = observed > seen_at
+            result[newer] = source_prices[clipped[newer]]
+            seen_at = np.maximum(seen_at, observed)
+        unseen = seen_at == -np.inf
+        if unseen.any():
+            earliest = min(sources, key=lambda source: source[0][0])
+            result[unseen] = earliest[1][0]
+        return result
+
+    def _trade_prices(self, portfolio: _Portfolio, symbols: List[str], ids: np.ndarray, times: np.ndarray) -> np.ndarray:
+        result = np.zeros(len(times))
+        for symbol_id, symbol in enumerate(symbols):
+            mask = ids == symbol_id
+            if mask.any():
+                result[mask] = self._prices_at(symbol, portfolio.ledgers.get(symbol), times[mask])
+        return result
+
+    def ingest(self, user: str, trades: Sequence[Trade]) -> None:
+        """Fold trades (oldest first, following those already ingested) into user's portfolio"""
+        portfolio = self._portfolio(user)
+        portfolio.trades += len(trades)
+        completed = [trade for trade in trades if trade[5] == "completed"]
+        if not completed:
+            return
+        self.stats["ingested"] += len(completed)
+
+        timestamps, amounts_in, amounts_out, tokens_in, tokens_out, _ = zip(*completed)
+        times = np.array(timestamps, dtype=np.float64)
+        amount_in = np.array(amounts_in, dtype=np.float64)
+        amount_out = np.array(amounts_out, dtype=np.float64)
+        names = set(tokens_in) | set(tokens_out)
+        symbols = sorted({name.upper() for name in names})
+        symbol_ids = {name: symbols.index(name.upper()) for name in names}
+        token_in = np.fromiter((symbol_ids[name] for name in tokens_in), dtype=np.int64, count=len(completed))
+        token_out = np.fromiter((symbol_ids[name] for name in tokens_out), dtype=np.int64, count=len(completed))
+        stable = np.array([self._is_stable(symbol) for symbol in symbols])
+        if portfolio.first_time is None:
+            portfolio.first_time = float(times[0])
+
+        # Trades against a stablecoin price the other side
+        priced = (amount_in > 0) & (amount_out > 0)
+        bought_for_stable = priced & stable[token_in] & ~stable[token_out]
+        sold_for_stable = priced & stable[token_out] & ~stable[token_in]
+        for symbol_id, symbol in enumerate(symbols):
+            bought = bought_for_stable & (token_out == symbol_id)
+            sold = sold_for_stable & (token_in == symbol_id)
+            mask = bought | sold
+            if mask.any():
+                ledger = portfolio.ledgers.setdefault(symbol, _TokenLedger())
+                implied = np.where(bought, amount_in / np.where(priced, amount_out, 1.0), amount_out / np.where(priced, amount_in, 1.0))
+                _extend(ledger.price_times, times[mask])
+                _extend(ledger.prices, implied[mask])
+
+        price_in = self._trade_prices(portfolio, symbols, token_in, times)
+        cost = amount_in * price_in
+        unknown = amount_out <= 0
+        if unknown.any():
+            # Rows recorded without amount_out: value the output at its market price
+            price_out = self._trade_prices(portfolio, symbols, token_out, times)
+            amount_out = np.where(unknown & (price_out > 0), cost / np.where(price_out > 0, price_out, 1.0), amount_out)
+
+        for symbol_id, symbol in enumerate(symbols):
+            received, spent = token_out == symbol_id, token_in == symbol_id
+            ledger = portfolio.ledgers.setdefault(symbol, _TokenLedger())
+            flow_times = np.concatenate([times[received], times[spent]])
+            flow = np.concatenate([amount_out[received], -amount_in[spent]])
+            order = np.argsort(flow_times, kind="stable")
+            balance = np.cumsum(flow[order]) + (ledger.flow_balance[-1] if ledger.flow_balance else 0.0)
+            _extend(ledger.flow_times, flow_times[order])
+            _extend(ledger.flow_balance, balance)
+            ledger.low = min(ledger.low, float(balance.min()))
+            if not stable[symbol_id]:
+                self._update_positions(portfolio, symbol, ledger, times[received], amount_out[received], cost[received], times[spent])
+
+    def _update_positions(
+        self,
+        portfolio: _Portfolio,
+        symbol: str,
+        ledger: _TokenLedger,
+        buy_times: np.ndarray,
+        buy_amounts: np.ndarray,
+        buy_costs: np.ndarray,
+        sell_times: np.ndarray,
+    ) -> None:
+        if len(sell_times):
+            sell_prices = self._prices_at(symbol, ledger, sell_times)
+            if ledger.open_times:
+                # Everything still open from earlier batches exits at the first sale
+                opened = len(ledger.open_times)
+                self._close(
+                    portfolio, symbol, _view(ledger.open_times), _view(ledger.open_amounts), _view(ledger.open_costs),
+                    np.full(opened, sell_times[0]), np.full(opened, sell_prices[0]),
+                )
+                ledger.open_times, ledger.open_amounts, ledger.open_costs = array("d"), array("d"), array("d")
+            exits = np.searchsorted(sell_times, buy_times, side="right")
+            closed = exits < len(sell_times)
+            if closed.any():
+                self._close(
+                    portfolio, symbol, buy_times[closed], buy_amounts[closed], buy_costs[closed],
+                    sell_times[exits[closed]], sell_prices[exits[closed]],
+                )
+                buy_times, buy_amounts, buy_costs = buy_times[~closed], buy_amounts[~closed], buy_costs[~closed]
+        _extend(ledger.open_times, buy_times)
+        _extend(ledger.open_amounts, buy_amounts)
+        _extend(ledger.open_costs, buy_costs)
+
+    @staticmethod
+    def _close(
+        portfolio: _Portfolio,
+        symbol: str,
+        times: np.ndarray,
+        amounts: np.ndarray,
+        costs: np.ndarray,
+        exit_times: np.ndarray,
+        exit_prices: np.ndarray,
+    ) -> None:
+        valid = (costs > 0) & (exit_prices > 0)
+        if not valid.any():
+            return
+        returns = amounts[valid] * exit_prices[valid] / costs[valid] - 1
+        portfolio.closed += len(returns)
+        portfolio.wins += int((returns > 0).sum())
+        portfolio.hold_seconds += float((exit_times[valid] - times[valid]).sum())
+        totals = portfolio.token_returns.setdefault(symbol, [0.0, 0])
+        totals[0] += float(returns.sum())
+        totals[1] += len(returns)
+
+    def analytics(self, user: str, now: Optional[float] = None) -> Dict[str, Any]:
+        """Performance metrics over everything ingested for user"""
+        now = time.time() if now is None else now
+        portfolio = self._users.get(user)
+        if portfolio is None or portfolio.first_time is None:
+            return self._empty(portfolio.trades if portfolio is not None else 0)
+        key = (portfolio.trades, self.prices.version, int(now // self.bucket_seconds))
+        if portfolio.cache_key == key:
+            self.stats["cache_hits"] += 1
+            return portfolio.cache
+        self.stats["computed"] += 1
+
+        first = portfolio.first_time
+        step = max(self.bucket_seconds, (now - first) / self.max_points)
+        grid = np.append(np.arange(first, now, step), now)
+        grid[0] = first - 1e-3  # the portfolio just before the first trade
+
+        equity = np.zeros(len(grid))
+        current: Dict[str, float] = {}
+        token_returns = {symbol: list(totals) for symbol, totals in portfolio.token_returns.items()}
+        open_positions = open_wins = 0
+        open_age = 0.0
+        for symbol, ledger in portfolio.ledgers.items():
+            flow_times, balance = _view(ledger.flow_times), _view(ledger.flow_balance)
+            index = np.searchsorted(flow_times, grid, side="right") - 1
+            held = np.where(index >= 0, balance[np.maximum(index, 0)], 0.0) - ledger.low
+            prices = self._prices_at(symbol, ledger, grid)
+            value = held * prices
+            equity += value
+            current[symbol] = float(value[-1])
+
+            if ledger.open_times and prices[-1] > 0:
+                costs = _view(ledger.open_costs)
+                valid = costs > 0
+                returns = _view(ledger.open_amounts)[valid] * prices[-1] / costs[valid] - 1
+                open_positions += len(returns)
+                open_wins += int((returns > 0).sum())
+                open_age += float((now - _view(ledger.open_times)[valid]).sum())
+                totals = token_returns.setdefault(symbol, [0.0, 0])
+                totals[0] += float(returns.sum())
+                totals[1] += len(returns)
+
+        start_value, end_value = float(equity[0]), float(equity[-1])
+        base = equity[:-1]
+        returns = np.diff(equity)[base > 0] / base[base > 0]
+        periods_per_year = SECONDS_PER_YEAR / step
+        deviation = float(returns.std()) if len(returns) > 1 else 0.0
+        sharpe = float(returns.mean()) / deviation * float(np.sqrt(periods_per_year)) if deviation > 0 else 0.0
+        volatility = deviation * float(np.sqrt(periods_per_year))
+        peaks = np.maximum.accumulate(equity)
+        drawdown = np.where(peaks > 0, equity / np.where(peaks > 0, peaks, 1.0) - 1, 0.0)
+
+        positions = portfolio.closed + open_positions
+        if portfolio.closed:
+            hold_hours = portfolio.hold_seconds / portfolio.closed / 3600
+        else:
+            hold_hours = open_age / open_positions / 3600 if open_positions else 0.0
+        averages = {symbol: total / count * 100 for symbol, (total, count) in token_returns.items() if count}
+        best = max(averages, key=averages.get) if averages else None
+        worst = min(averages, key=averages.get) if averages else None
+        values = np.array([value for value in current.values() if value > 0])
+        weights = values / values.sum() if len(values) else values
+
+        result = {
+            "total_return_percent": round((end_value / start_value - 1) * 100, 2) if start_value > 0 else 0.0,
+            "total_return_usd": round(end_value - start_value, 2),
+            "best_performing_token": {"symbol": best, "return": round(averages[best], 2)} if best else None,
+            "worst_performing_token": {"symbol": worst, "return": round(averages[worst], 2)} if worst else None,
+            "total_trades": portfolio.trades,
+            "win_rate": round((portfolio.wins + open_wins) / positions * 100, 1) if positions else 0.0,
+            "avg_hold_time_hours": round(hold_hours, 1),
+            "sharpe_ratio": round(sharpe, 2),
+            "max_drawdown_percent": round(float(drawdown.min()) * 100, 2),
+            "portfolio_diversity_score": round(10 * (1 - float((weights ** 2).sum())), 1) if len(weights) else 0.0,
+            "risk_score": "Low" if volatility < 0.3 else "Medium" if volatility < 0.8 else "High",
+            "portfolio_value_usd": round(end_value, 2),
+            "generated_at": datetime.fromtimestamp(now).isoformat(),
+        }
+        portfolio.cache_key, portfolio.cache = key, result
+        return result
+
+    @staticmethod
+    def _empty(trades: int) -> Dict[str, Any]:
+        return {
+            "total_return_percent": 0.0,
+            "total_return_usd": 0.0,
+            "best_performing_token": None,
+            "worst_performing_token": None,
+            "total_trades": trades,
+            "win_rate": 0.0,
+            "avg_hold_time_hours": 0.0,
+            "sharpe_ratio": 0.0,
+            "max_drawdown_percent": 0.0,
+            "portfolio_diversity_score": 0.0,
+            "risk_score": "Low",
+            "portfolio_value_usd": 0.0,
+            "generated_at": datetime.now().isoformat(),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "users": len(self._users), "prices": self.prices.get_stats()}
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Wallet Behavior
+Batched transfer-history features and profile classification for many wallets
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FEATURES = (
+    "log_tx_per_day",  # log1p of transfers per active day
+    "log_size_usd",  # mean log10(1 + USD value) of priced transfers
+    "size_dispersion",  # standard deviation of the same
+    "large_share",  # share of priced transfers worth LARGE_TRANSFER_USD or more
+    "log_tokens",  # log1p of distinct tokens moved
+    "token_concentration",  # Herfindahl index of transfers per token
+    "swap_ratio",  # transactions that both send and receive a token (DEX swaps) over all transactions
+    "send_share",  # outgoing transfers over all transfers
+    "log_hold_hours",  # mean log1p hours from receiving a token to next sending it (or now)
+    "held_share",  # received tokens not sent on since
+)
+LARGE_TRANSFER_USD = 10_000.0
+
+# Profile -> (insight, prototype feature vector); wallets get the nearest profile
+PROFILES: Dict[str, Tuple[str, Sequence[float]]] = {
+    "high_frequency": (
+        "High-frequency trading pattern detected with focus on momentum strategies",
+        (3.4, 3.0, 0.5, 0.05, 1.6, 0.4, 0.8, 0.5, 1.4, 0.1),
+    ),
+    "hodler": (
+        "Long-term HODLer with occasional profit-taking during market peaks",
+        (0.05, 3.5, 0.5, 0.1, 1.1, 0.7, 0.1, 0.2, 8.0, 0.8),
+    ),
+    "yield_farmer": (
+        "Active yield farmer rotating between protocols for optimal returns",
+        (1.1, 3.5, 0.6, 0.1, 2.4, 0.2, 0.4, 0.5, 5.5, 0.4),
+    ),
+    "memecoin_trader": (
+        "Memecoin trader with quick entry/exit strategies and high risk tolerance",
+        (1.8, 2.0, 1.0, 0.0, 2.8, 0.15, 0.9, 0.5, 2.2, 0.3),
+    ),
+    "conservative_defi": (
+        "This wallet demonstrates conservative DeFi strategies with consistent staking rewards",
+        (0.26, 2.5, 0.4, 0.0, 1.1, 0.6, 0.1, 0.1, 7.3, 0.9),
+    ),
+}
+# Typical spread of each feature, so no single feature dominates the distance
+FEATURE_SCALES = (1.0, 1.0, 0.5, 0.3, 0.7, 0.3, 0.3, 0.3, 2.0, 0.3)
+MINIMAL_ACTIVITY = "Conservative long-term holder with minimal trading activity"
+
+
+def _timestamp(value: Any) -> float:
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    return datetime.fromisoformat(value).timestamp()
+
+
+def extract_features(
+    histories: Mapping[str, Sequence[Dict[str, Any]]],
+    prices: Optional[Mapping[str, float]] = None,
+    now: Optional[float] = None,
+) -> np.ndarray:
+    """Feature matrix, one row per wallet in histories order.
+
+    Transfers are dicts as wallet transaction history returns them
+    (``hash``, ``token``, ``value``, ``type``, ``timestamp``). Every wallet's
+    transfers are flattened into shared columns and aggregated per wallet
+    with grouped array operations. Features that cannot be measured (no
+    priced or timestamped transfers) are NaN.
+    """
+    now = time.time() if now is None else now
+    prices = prices or {}
+    wallet_count = len(histories)
+    wallet_ids, times, usd, tokens, sends, transactions = [], [], [], [], [], []
+    token_ids: Dict[str, int] = {}
+    transaction_ids: Dict[Tuple[int, str], int] = {}
+    for wallet, transfers in enumerate(histories.values()):
+        for transfer in transfers:
+            token = str(transfer.get("token", "")).upper()
+            wallet_ids.append(wallet)
+            times.append(_timestamp(transfer.get("timestamp")))
+            price = prices.get(token)
+            try:
+                usd.append(float(transfer.get("value")) * price if price else math.nan)
+            except (TypeError, ValueError):
+                usd.append(math.nan)
+            tokens.append(token_ids.setdefault(token, len(token_ids)))
+            sends.append(transfer.get("type") == "send")
+            key = (wallet, transfer.get("hash", ""))
+            transactions.append(transaction_ids.setdefault(key, len(transaction_ids)))
+
+    matrix = np.full((wallet_count, len(FEATURES)), np.nan)
+    if not wallet_ids:
+        return matrix
+    wallet = np.array(wallet_ids)
+    times = np.array(times)
+    usd = np.array(usd)
+    token = np.array(tokens)
+    send = np.array(sends)
+    transaction = np.array(transactions)
+    counts = np.bincount(wallet, minlength=wallet_count).astype(float)
+    active = counts > 0
+
+    def per_wallet(values: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        selected = wallet if mask is None else wallet[mask]
+        return np.bincount(selected, weights=values if mask is None else values[mask], minlength=wallet_count)
+
+    def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        return np.divide(numerator, denominator, out=np.full(wallet_count, np.nan), where=denominator > 0)
+
+    # Frequency over the active span (at least a day)
+    timed = ~np.isnan(times)
+    first = np.full(wallet_count, np.inf)
+    last = np.full(wallet_count, -np.inf)
+    np.minimum.at(first, wallet[timed], times[timed])
+    np.maximum.at(last, wallet[timed], times[timed])
+    span_days = np.where(last >= first, np.maximum((last - first) / 86400, 1.0), np.nan)
+    matrix[:, 0] = np.log1p(counts / span_days)
+
+    # Size distribution of priced transfers
+    priced = ~np.isnan(usd)
+    sizes = np.log10(1 + np.abs(np.where(priced, usd, 0.0)))
+    priced_counts = per_wallet(priced.astype(float))
+    mean_size = ratio(per_wallet(sizes, priced), priced_counts)
+    matrix[:, 1] = mean_size
+    variance = ratio(per_wallet(sizes ** 2, priced), priced_counts) - mean_size ** 2
+    matrix[:, 2] = np.sqrt(np.maximum(variance, 0.0))
+    matrix[:, 3] = ratio(per_wallet((np.abs(usd) >= LARGE_TRANSFER_USD).astype(float), priced), priced_counts)
+
+    # Token diversity: distinct tokens and how concentrated transfers are among them
+    pairs, pair_counts = np.unique(wallet * len(token_ids) + token, return_counts=True)
+    pair_wallet = pairs // len(token_ids)
+    matrix[:, 4] = np.where(active, np.log1p(np.bincount(pair_wallet, minlength=wallet_count)), np.nan)
+    shares = pair_counts / counts[pair_wallet]
+    matrix[:, 5] = np.where(active, np.bincount(pair_wallet, weights=shares ** 2, minlength=wallet_count), np.nan)
+
+    # A transaction that sends one token and receives another is a swap
+    transaction_count = len(transaction_ids)
+    has_send = np.zeros(transaction_count, dtype=bool)
+    has_receive = np.zeros(transaction_count, dtype=bool)
+    np.logical_or.at(has_send, transaction, send)
+    np.logical_or.at(has_receive, transaction, ~send)
+    transaction_wallet = np.zeros(transaction_count, dtype=np.int64)
+    transaction_wallet[transaction] = wallet
+    swaps = np.bincount(transaction_wallet, weights=has_send & has_receive, minlength=wallet_count)
+    matrix[:, 6] = ratio(swaps, np.bincount(transaction_wallet, minlength=wallet_count).astype(float))
+    matrix[:, 7] = ratio(per_wallet(send.astype(float)), counts)
+
+    # Holding periods: each receipt is held until the next send of that token (or now)
+    pair = wallet * len(token_ids) + token
+    sent, received = send & timed, ~send & timed
+    order = np.lexsort((times[sent], pair[sent]))
+    send_pair, send_time = pair[sent][order], times[sent][order]
+    receive_pair, receive_time = pair[received], times[received]
+    # Pairs are whole numbers and times are bounded, so (pair, time) sorts as pair + time fraction
+    low, high = np.nanmin(times) if timed.any() else 0.0, (np.nanmax(times) if timed.any() else 0.0) + 1
+    send_key = send_pair + (send_time - low) / (high - low)
+    receive_key = receive_pair + (receive_time - low) / (high - low)
+    following = np.searchsorted(send_key, receive_key, side="right")
+    matched = following < len(send_key)
+    matched[matched] = send_pair[following[matched]] == receive_pair[matched]
+    released = np.full(len(receive_time), now)
+    released[matched] = send_time[following[matched]]
+    hours = np.maximum(released - receive_time, 0.0) / 3600
+    receive_wallet = wallet[received]
+    receive_counts = np.bincount(receive_wallet, minlength=wallet_count).astype(float)
+    matrix[:, 8] = ratio(np.bincount(receive_wallet, weights=np.log1p(hours), minlength=wallet_count), receive_counts)
+    matrix[:, 9] = ratio(np.bincount(receive_wallet, weights=~matched, minlength=wallet_count), receive_counts)
+    return matrix
+
+
+class WalletBehaviorClassifier:
+    """Classifies wallets by their transfer history, many at a time.
+
+    Feature rows are cached per (address, newest transaction hash), so a
+    batch only extracts features for wallets with new activity. Every
+    wallet in a batch is then matched to its nearest profile in one array
+    operation: distance is measured in ``FEATURE_SCALES`` units and ignores
+    features a wallet has no data for. Wallets with fewer than
+    ``min_transactions`` transfers are reported as minimal activity.
+    """
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, Tuple[str, Sequence[float]]]] = None,
+        scales: Sequence[float] = FEATURE_SCALES,
+        min_transactions: int = 5,
+        cache_size: int = 10_000,
+    ):
+        profiles = profiles or PROFILES
+        self.profile_names = list(profiles)
+        self.insights = [profiles[name][0] for name in self.profile_names]
+        self.prototypes = np.array([profiles[name][1] for name in self.profile_names], dtype=np.float64)
+        self.scales = np.array(scales, dtype=np.float64)
+        self.min_transactions = min_transactions
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[Optional[str], np.ndarray, int]]" = OrderedDict()
+        self.stats = {"batches": 0, "wallets": 0, "extracted": 0, "cache_hits": 0}
+
+    @staticmethod
+    def _cache_key(transfers: Sequence[Dict[str, Any]]) -> Optional[str]:
+        if not transfers:
+            return None
+        newest = transfers[0]
+        return f"{newest.get('hash')}:{newest.get('log_index')}"
+
+    def features(
+        self,
+        histories: Mapping[str, Sequence[Dict[str, Any]]],
+        prices: Optional[Mapping[str, float]] = None,
+        now: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(feature matrix, transfer counts) for histories, extracting only uncached wallets"""
+        addresses = list(histories)
+        keys = {address: self._cache_key(histories[address]) for address in addresses}
+        stale = {}
+        for address in addresses:
+            cached = self._cache.get(address.lower())
+            if cached is not None and cached[0] == keys[address]:
+                self._cache.move_to_end(address.lower())
+                self.stats["cache_hits"] += 1
+            else:
+                stale[address] = histories[address]
+        if stale:
+            extracted = extract_features(stale, prices, now)
+            self.stats["extracted"] += len(stale)
+            for row, address in zip(extracted, stale):
+                self._cache[address.lower()] = (keys[address], row, len(stale[address]))
+                self._cache.move_to_end(address.lower())
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        matrix = np.full((len(addresses), len(FEATURES)), np.nan)
+        counts = np.zeros(len(addresses), dtype=np.int64)
+        for index, address in enumerate(addresses):
+            _, row, count = self._cache[address.lower()]
+            matrix[index] = row
+            counts[index] = count
+        return matrix, counts
+
+    def classify(
+        self,
+        histories: Mapping[str, Sequence[Dict[str, Any]]],
+        prices: Optional[Mapping[str, float]] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Profile, insight and confidence for every wallet in histories"""
+        self.stats["batches"] += 1
+        self.stats["wallets"] += len(histories)
+        if not histories:
+            return {}
+        matrix, counts = self.features(histories, prices, now)
+        # (wallets, profiles) squared distances; missing features count as a match
+        offsets = (matrix[:, None, :] - self.prototypes[None, :, :]) / self.scales
+        distances = np.nansum(offsets ** 2, axis=2)
+        nearest = distances.argmin(axis=1)
+        weights = np.exp(-(distances - distances.min(axis=1, keepdims=True)) / 2)
+        confidence = weights.max(axis=1) / weights.sum(axis=1)
+
+        results = {}
+        for index, address in enumerate(histories):
+            if counts[index] < self.min_transactions:
+                results[address] = {"profile": "minimal_activity", "insight": MINIMAL_ACTIVITY, "confidence": 1.0}
+                continue
+            results[address] = {
+                "profile": self.profile_names[nearest[index]],
+                "insight": self.insights[nearest[index]],
+                "confidence": round(float(confidence[index]), 3),
+                "features": {
+                    name: None if np.isnan(value) else round(float(value), 4)
+                    for name, value in zip(FEATURES, matrix[index])
+                },
+            }
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cached_wallets": len(self._cache)}
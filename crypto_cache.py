@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Caching Utilities
+In-process caches used by the crypto trading backend
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightCache:
+    """TTL cache with stale-while-revalidate and single-flight loading.
+
+    A fresh entry (younger than ``ttl``) is served directly. A stale entry
+    (younger than ``ttl + stale_ttl``) is served immediately while one
+    background refresh runs. Concurrent misses for the same key share a
+    single in-flight load instead of each calling the loader.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, loading it at most once concurrently"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if key not in self._inflight:
+                    self.stats["refreshes"] += 1
+                    self._start_load(key, loader)
+                return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._start_load(key, loader)
+
+        # Shield so a cancelled caller does not cancel the shared load
+        return await asyncio.shield(task)
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return the last stored value for key regardless of age"""
+        entry = self._entries.get(key)
+        return entry[1] if entry is not None else None
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a cached entry"""
+        self._entries.pop(key, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return counters plus current size"""
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "ttl_seconds": self.ttl,
+            "stale_ttl_seconds": self.stale_ttl,
+        }
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader))
+        task.add_done_callback(self._consume_exception)
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+            self._store(key, value)
+            return value
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic(), value)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            del self._entries[oldest]
+
+    @staticmethod
+    def _consume_exception(task: asyncio.Task) -> None:
+        # Background refreshes have no awaiter; log instead of leaking the error
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Cache load failed: {task.exception()}")
+
+
+class BlockAwareCache:
+    """LRU cache of per-address values keyed by the block they were read at.
+
+    Entries stay valid across new blocks until a block touches their address,
+    at which point they are invalidated. ``on_new_block`` is fed by a head
+    tracker; ``max_age_blocks`` bounds how far behind the head an entry may
+    be served, which covers balance changes the tracker cannot see (such as
+    internal transfers). Without a known head nothing is cached.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_age_blocks: int = 50, touch_history: int = 64):
+        self.max_entries = max_entries
+        self.max_age_blocks = max_age_blocks
+        self.touch_history = touch_history
+        self.head: Optional[int] = None
+        self._entries: "OrderedDict[str, Tuple[int, float, Any]]" = OrderedDict()  # key -> (block, stored_at, value)
+        self._recent_touches: "OrderedDict[int, Set[str]]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "resets": 0}
+        self._staleness_blocks_total = 0
+        self._staleness_seconds_total = 0.0
+        self._staleness_blocks_max = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value if it is still valid at the current head"""
+        key = key.lower()
+        entry = self._entries.get(key)
+        if entry is None or self.head is None or self.head - entry[0] > self.max_age_blocks:
+            if entry is not None:
+                del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        behind = self.head - entry[0]
+        self._staleness_blocks_total += behind
+        self._staleness_blocks_max = max(self._staleness_blocks_max, behind)
+        self._staleness_seconds_total += time.time() - entry[1]
+        return entry[2]
+
+    def put(self, key: str, value: Any, block: Optional[int]) -> None:
+        """Store a value read at block, unless the key was touched since"""
+        if block is None or self.head is None:
+            return
+        key = key.lower()
+        for touched_block in range(block + 1, self.head + 1):
+            touched = self._recent_touches.get(touched_block)
+            if touched is None or key in touched:
+                return
+        self._entries[key] = (block, time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def on_new_block(self, block: int, touched: Optional[Set[str]]) -> None:
+        """Advance the head; ``touched=None`` means the touched set is unknown"""
+        if touched is None:
+            self.stats["resets"] += 1
+            self._entries.clear()
+            self._recent_touches.clear()
+            self.head = block
+            return
+        touched = {address.lower() for address in touched}
+        for address in touched:
+            if self._entries.pop(address, None) is not None:
+                self.stats["invalidations"] += 1
+        self._recent_touches[block] = touched
+        while len(self._recent_touches) > self.touch_history:
+            self._recent_touches.popitem(last=False)
+        self.head = block if self.head is None else max(self.head, block)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        hits = self.stats["hits"]
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "head": self.head,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "avg_staleness_blocks": round(self._staleness_blocks_total / hits, 3) if hits else 0.0,
+            "max_staleness_blocks": self._staleness_blocks_max,
+            "avg_staleness_seconds": round(self._staleness_seconds_total / hits, 3) if hits else 0.0,
+        }
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Exchange Pool
+Long-lived async ccxt clients behind a rate-limit aware request scheduler
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import ccxt.async_support as ccxt_async
+    CCXT_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    ccxt_async = None
+    CCXT_AVAILABLE = False
+
+# Lower runs first
+PRIORITY_ORDER = 0
+PRIORITY_ACCOUNT = 1
+PRIORITY_MARKET_DATA = 2
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, cost: float = 1.0) -> float:
+        """Seconds until cost tokens are available (0 if they are now)"""
+        self._refill()
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def take(self, cost: float = 1.0) -> None:
+        self._refill()
+        self.tokens -= cost
+
+
+class ExchangeScheduler:
+    """Queues calls to one exchange client and releases them under its rate limit.
+
+    Pending calls wait in a priority heap, so an order placed behind a burst of
+    ticker requests is sent as soon as the next token is available. Read calls
+    marked ``coalesce`` share the pending or in-flight request for the same
+    method and arguments instead of spending another token.
+    """
+
+    def __init__(self, name: str, client: Any, rate: float, burst: float = 1.0):
+        self.name = name
+        self.client = client
+        self.bucket = TokenBucket(rate, max(burst, 1.0))
+        self._queue: List[Tuple[int, int, float, str, tuple, dict, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._shared: Dict[Hashable, asyncio.Future] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self.stats = {"requests": 0, "sent": 0, "coalesced": 0, "errors": 0, "throttled_seconds": 0.0}
+
+    async def call(
+        self,
+        method: str,
+        *args: Any,
+        priority: int = PRIORITY_MARKET_DATA,
+        cost: float = 1.0,
+        coalesce: bool = False,
+        **kwargs: Any,
+    ) -> Any:
+        """Run client.<method>(*args, **kwargs) once the rate limit allows"""
+        self.stats["requests"] += 1
+        key = (method, args, tuple(sorted(kwargs.items()))) if coalesce else None
+        if key is not None and key in self._shared:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(self._shared[key])
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), cost, method, args, kwargs, future))
+        if key is not None:
+            self._shared[key] = future
+            future.add_done_callback(lambda _: self._shared.pop(key, None))
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        # Shared futures are shielded so one cancelled caller does not cancel the others
+        return await (asyncio.shield(future) if key is not None else future)
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def _ensure_dispatcher(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+    async def _dispatch(self) -> None:
+        while True:
+            if not self._queue:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            priority, _, cost, method, args, kwargs, future = self._queue[0]
+            if future.done():  # cancelled while queued
+                heapq.heappop(self._queue)
+                continue
+            wait = self.bucket.delay(cost)
+            if wait > 0:
+                # Re-check the head afterwards: a more urgent call may have arrived
+                self.stats["throttled_seconds"] += wait
+                await asyncio.sleep(wait)
+                continue
+            heapq.heappop(self._queue)
+            self.bucket.take(cost)
+            self.stats["sent"] += 1
+            task = asyncio.ensure_future(self._run(method, args, kwargs, future))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, method: str, args: tuple, kwargs: dict, future: asyncio.Future) -> None:
+        try:
+            result = await getattr(self.client, method)(*args, **kwargs)
+        except Exception as e:
+            self.stats["errors"] += 1
+            if not future.done():
+                future.set_exception(e)
+                # Nobody may be awaiting a coalesced future any more
+                future.add_done_callback(lambda f: f.exception())
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def aclose(self) -> None:
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+        for _, _, _, _, _, _, future in self._queue:
+            future.cancel()
+        self._queue.clear()
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            await close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "throttled_seconds": round(self.stats["throttled_seconds"], 3),
+            "pending": len(self._queue),
+            "in_flight": len(self._running),
+            "rate_per_second": self.bucket.rate,
+        }
+
+
+class ExchangePool:
+    """One long-lived async client and scheduler per exchange"""
+
+    def __init__(self, burst: float = 5.0):
+        self.burst = burst
+        self._schedulers: Dict[str, ExchangeScheduler] = {}
+
+    def add(self, name: str, client: Any, rate: Optional[float] = None) -> ExchangeScheduler:
+        """Register a client; rate defaults to ccxt's ``rateLimit`` (ms between calls)"""
+        if rate is None:
+            rate = 1000.0 / getattr(client, "rateLimit", 1000)
+        scheduler = ExchangeScheduler(name, client, rate=rate, burst=self.burst)
+        self._schedulers[name] = scheduler
+        return scheduler
+
+    def add_ccxt(self, exchange_id: str, config: Optional[Dict[str, Any]] = None, sandbox: bool = False) -> ExchangeScheduler:
+        """Create an async ccxt client; its own throttle is off since the scheduler does the pacing"""
+        if not CCXT_AVAILABLE:
+            raise RuntimeError("ccxt is not installed; pip install ccxt")
+        exchange_class = getattr(ccxt_async, exchange_id, None)
+        if exchange_class is None:
+            raise ValueError(f"Unknown ccxt exchange: {exchange_id}")
+        client = exchange_class({**(config or {}), "enableRateLimit": False})
+        if sandbox:
+            client.set_sandbox_mode(True)
+        return self.add(exchange_id, client)
+
+    def scheduler(self, name: str) -> ExchangeScheduler:
+        scheduler = self._schedulers.get(name)
+        if scheduler is None:
+            raise KeyError(f"Exchange not configured: {name}")
+        return scheduler
+
+    def names(self) -> List[str]:
+        return list(self._schedulers)
+
+    async def fetch_ticker(self, exchange: str, symbol: str) -> Dict[str, Any]:
+        return await self.scheduler(exchange).call("fetch_ticker", symbol, coalesce=True)
+
+    async def fetch_order_book(self, exchange: str, symbol: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        return await self.scheduler(exchange).call("fetch_order_book", symbol, limit, coalesce=True)
+
+    async def fetch_ohlcv(
+        self,
+        exchange: str,
+        symbol: str,
+        timeframe: str = "1h",
+        since: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> List[List[float]]:
+        return await self.scheduler(exchange).call("fetch_ohlcv", symbol, timeframe, since, limit, coalesce=True)
+
+    async def fetch_balance(self, exchange: str) -> Dict[str, Any]:
+        return await self.scheduler(exchange).call("fetch_balance", priority=PRIORITY_ACCOUNT)
+
+    async def create_order(
+        self,
+        exchange: str,
+        symbol: str,
+        order_type: str,
+        side: str,
+        amount: float,
+        price: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        return await self.scheduler(exchange).call(
+            "create_order", symbol, order_type, side, amount, price, priority=PRIORITY_ORDER
+        )
+
+    async def aclose(self) -> None:
+        for scheduler in self._schedulers.values():
+            try:
+                await scheduler.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing {scheduler.name} client: {e}")
+
+    def __len__(self) -> int:
+        return len(self._schedulers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: scheduler.get_stats() for name, scheduler in self._schedulers.items()}
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Hash Benchmark
+Multi-process CPU hashing benchmark (sha256d, scrypt, memory-hard) with persisted results
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from crypto_jobs import no_progress
+
+logger = logging.getLogger(__name__)
+
+_HEADER = bytes(range(76))  # block header without the 4-byte nonce
+_BATCH = {"sha256d": 512, "scrypt": 8, "memory_hard": 1}
+_MEMORY_HARD_MAXMEM = 64 * 1024 * 1024
+
+
+def _sha256d(first: int, count: int) -> None:
+    """Bitcoin-style double SHA-256 over consecutive nonces (header midstate reused)"""
+    midstate = hashlib.sha256(_HEADER)
+    for nonce in range(first, first + count):
+        inner = midstate.copy()
+        inner.update(nonce.to_bytes(4, "little"))
+        hashlib.sha256(inner.digest()).digest()
+
+
+def _scrypt(first: int, count: int) -> None:
+    """Litecoin-style scrypt (N=1024, r=1, p=1)"""
+    for nonce in range(first, first + count):
+        header = _HEADER + nonce.to_bytes(4, "little")
+        hashlib.scrypt(header, salt=header, n=1024, r=1, p=1, dklen=32)
+
+
+def _memory_hard(first: int, count: int) -> None:
+    """Memory-hard scrypt (N=16384, r=8) with a 16 MiB scratchpad per hash"""
+    for nonce in range(first, first + count):
+        header = _HEADER + nonce.to_bytes(4, "little")
+        hashlib.scrypt(header, salt=header, n=16384, r=8, p=1, maxmem=_MEMORY_HARD_MAXMEM, dklen=32)
+
+
+# Kernel name -> (hash function, algorithm it measures for profit switching). The
+# memory-hard kernel only approximates RandomX's memory profile, so its rate is
+# reported but kept out of profitability until a real RandomX measurement exists
+KERNELS: Dict[str, Tuple[Callable[[int, int], None], Optional[str]]] = {
+    "sha256d": (_sha256d, "SHA-256"),
+    "scrypt": (_scrypt, "Scrypt"),
+    "memory_hard": (_memory_hard, None),
+}
+
+
+def hash_for(kernel: str, seconds: float) -> Tuple[int, float]:
+    """Hash with ``kernel`` for about ``seconds``; returns (hashes, elapsed). Runs in a worker process"""
+    function = KERNELS[kernel][0]
+    batch = _BATCH[kernel]
+    hashes = 0
+    start = time.perf_counter()
+    while True:
+        function(hashes, batch)
+        hashes += batch
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return hashes, elapsed
+
+
+def profit_hashrates(result: Dict[str, Any]) -> Dict[str, float]:
+    """Aggregate H/s per algorithm from a CPU benchmark result, for kernels that map to a real algorithm"""
+    return {
+        KERNELS[kernel][1]: entry["aggregate_hps"]["mean"]
+        for kernel, entry in result.get("kernels", {}).items()
+        if kernel in KERNELS and KERNELS[kernel][1] is not None
+    }
+
+
+def _summary(rates: List[float]) -> Dict[str, float]:
+    mean = statistics.fmean(rates)
+    stdev = statistics.stdev(rates) if len(rates) > 1 else 0.0
+    return {
+        "mean": round(mean, 2),
+        "stdev": round(stdev, 2),
+        "cv": round(stdev / mean, 4) if mean else 0.0,
+        "trials": [round(rate, 2) for rate in rates],
+    }
+
+
+class HashBenchmark:
+    """Measures CPU hashrate per kernel on a pool of ``processes`` worker processes.
+
+    Each kernel gets a ``warmup`` run that is discarded, then ``trials`` runs
+    of ``trial_seconds`` on one process (per-core rate) and ``trials`` runs
+    on every process at once (aggregate rate). Reported rates are means with
+    their standard deviation and coefficient of variation. Runs are
+    serialized so two benchmarks never compete for the same cores.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        kernels: Optional[List[str]] = None,
+        trials: int = 3,
+        trial_seconds: float = 1.0,
+        warmup: float = 0.5,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.kernels = kernels or [kernel for kernel in KERNELS if kernel == "sha256d" or hasattr(hashlib, "scrypt")]
+        self.trials = trials
+        self.trial_seconds = trial_seconds
+        self.warmup = warmup
+        self._lock: Optional[asyncio.Lock] = None
+        self.stats = {"runs": 0, "last_run_seconds": 0.0}
+
+    async def run(self, progress: Callable[..., None] = no_progress) -> Dict[str, Any]:
+        """Benchmark every kernel; returns per-kernel rates in hashes/second"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            started = time.perf_counter()
+            loop = asyncio.get_event_loop()
+            executor = ProcessPoolExecutor(max_workers=self.processes)
+            steps = len(self.kernels) * (1 + 2 * self.trials)
+            step = 0
+
+            async def measure(kernel: str, workers: int, seconds: float) -> float:
+                runs = await asyncio.gather(*(
+                    loop.run_in_executor(executor, hash_for, kernel, seconds) for _ in range(workers)
+                ))
+                return sum(hashes / elapsed for hashes, elapsed in runs)
+
+            results = {}
+            try:
+                for kernel in self.kernels:
+                    progress(100 * step / steps, f"Warming up {kernel}")
+                    await measure(kernel, self.processes, self.warmup)
+                    step += 1
+                    per_core, aggregate = [], []
+                    for trial in range(self.trials):
+                        progress(100 * step / steps, f"{kernel}: single-core trial {trial + 1}/{self.trials}")
+                        per_core.append(await measure(kernel, 1, self.trial_seconds))
+                        step += 1
+                    for trial in range(self.trials):
+                        progress(100 * step / steps, f"{kernel}: {self.processes}-process trial {trial + 1}/{self.trials}")
+                        aggregate.append(await measure(kernel, self.processes, self.trial_seconds))
+                        step += 1
+                    per_core_summary, aggregate_summary = _summary(per_core), _summary(aggregate)
+                    results[kernel] = {
+                        "algorithm": KERNELS[kernel][1],
+                        "per_core_hps": per_core_summary,
+                        "aggregate_hps": aggregate_summary,
+                        "scaling": round(aggregate_summary["mean"] / (per_core_summary["mean"] * self.processes), 3)
+                        if per_core_summary["mean"] else 0.0,
+                    }
+            finally:
+                executor.shutdown(wait=False)
+
+            elapsed = time.perf_counter() - started
+            self.stats["runs"] += 1
+            self.stats["last_run_seconds"] = round(elapsed, 2)
+            return {
+                "mode": "cpu",
+                "processes": self.processes,
+                "trials": self.trials,
+                "trial_seconds": self.trial_seconds,
+                "kernels": results,
+                "duration_seconds": round(elapsed, 2),
+                "timestamp": datetime.now().isoformat(),
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "processes": self.processes, "kernels": list(self.kernels)}
+
+
+class BenchmarkStore:
+    """Latest benchmark result per device in SQLite (``:memory:`` keeps them for the process only)"""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS hash_benchmarks ("
+            "device TEXT PRIMARY KEY, result TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def save(self, device: str, result: Dict[str, Any]) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO hash_benchmarks (device, result, updated_at) VALUES (?, ?, ?)",
+            (device, json.dumps(result), time.time()),
+        )
+        self._db.commit()
+
+    def get(self, device: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute("SELECT result FROM hash_benchmarks WHERE device = ?", (device,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        return {device: json.loads(result) for device, result in self._db.execute("SELECT device, result FROM hash_benchmarks")}
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
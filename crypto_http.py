@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto HTTP Client Pool
+Shared, keep-alive httpx clients for all outbound calls of the crypto backend
+"""
+
+import importlib.util
+import logging
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def parse_host_timeouts(spec: str) -> Dict[str, float]:
+    """Parse "host=seconds,host=seconds" into a timeout map"""
+    timeouts = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, seconds = item.split("=", 1)
+        try:
+            timeouts[host.strip().lower()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid host timeout: {item}")
+    return timeouts
+
+
+class HTTPClientPool:
+    """One pooled ``httpx.AsyncClient`` per upstream origin.
+
+    Clients are created lazily (or eagerly via ``start``) and reused for the
+    lifetime of the process so connections and TLS sessions are kept alive.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        default_timeout: float = 10.0,
+        host_timeouts: Optional[Dict[str, float]] = None,
+        http2: Optional[bool] = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.default_timeout = default_timeout
+        self.host_timeouts = {host.lower(): t for host, t in (host_timeouts or {}).items()}
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but h2 is not installed; using HTTP/1.1")
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self.request_counts: Dict[str, int] = {}
+
+    async def start(self, *urls: str) -> None:
+        """Pre-create clients for known upstreams"""
+        for url in urls:
+            self.client_for(url)
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for the origin of url"""
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}".lower()
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            timeout = self.host_timeouts.get((parts.hostname or "").lower(), self.default_timeout)
+            client = httpx.AsyncClient(
+                base_url=origin,
+                limits=self.limits,
+                timeout=httpx.Timeout(timeout),
+                http2=self.http2,
+            )
+            self._clients[origin] = client
+            logger.info(f"Opened pooled HTTP client for {origin} (timeout={timeout}s, http2={self.http2})")
+        return client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the pooled client for its origin"""
+        client = self.client_for(url)
+        origin = str(client.base_url).rstrip("/")
+        self.request_counts[origin] = self.request_counts.get(origin, 0) + 1
+        return await client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        """Close every pooled client"""
+        for origin, client in list(self._clients.items()):
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Error closing HTTP client for {origin}: {e}")
+        self._clients.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "origins": sorted(self._clients),
+            "requests": dict(self.request_counts),
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+        }
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Transfer Indexer
+Background ERC-20 Transfer indexing into SQLite for fast wallet history lookups
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from crypto_rpc import TRANSFER_TOPIC, AsyncRPCClient, RPCError
+
+logger = logging.getLogger(__name__)
+
+TokenInfo = Dict[str, Tuple[str, int]]  # lowercase token address -> (symbol, decimals)
+
+
+def _address_bytes(address: str) -> bytes:
+    return bytes.fromhex(address[-40:])
+
+
+def _address_hex(raw: bytes) -> str:
+    return "0x" + bytes(raw).hex()
+
+
+def format_units(value: int, decimals: int) -> str:
+    """Exact decimal string of value / 10**decimals"""
+    whole, fraction = divmod(value, 10 ** decimals)
+    fraction_text = f"{fraction:0{decimals}d}".rstrip("0") if decimals else ""
+    return f"{whole}.{fraction_text}" if fraction_text else str(whole)
+
+
+class TransferStore:
+    """ERC-20 Transfers in SQLite, indexed by participant address and block.
+
+    Every transfer is one row keyed by (block, log_index); a WITHOUT ROWID
+    ``address_transfers`` table clusters (address, block, log_index) so a
+    wallet's newest-first page is a single index range scan. The indexer's
+    checkpoint is written in the same transaction as the logs it covers, so
+    a crash never leaves a gap or a double count.
+    """
+
+    def __init__(self, db_path: str = ":memory:"):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS transfers ("
+            "block INTEGER NOT NULL, log_index INTEGER NOT NULL, tx_hash BLOB NOT NULL, token BLOB NOT NULL, "
+            "sender BLOB NOT NULL, recipient BLOB NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (block, log_index)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS address_transfers ("
+            "address BLOB NOT NULL, block INTEGER NOT NULL, log_index INTEGER NOT NULL, "
+            "PRIMARY KEY (address, block, log_index)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS blocks (block INTEGER PRIMARY KEY, timestamp INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, block INTEGER NOT NULL);"
+        )
+
+    def checkpoint(self, name: str = "transfers") -> Optional[int]:
+        """Last fully indexed block, or None before the first range"""
+        row = self._db.execute("SELECT block FROM checkpoints WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def add_range(self, logs: Iterable[Dict[str, Any]], to_block: int, name: str = "transfers") -> int:
+        """Store the Transfer logs of one block range and advance the checkpoint to to_block"""
+        transfers, participants, block_times = [], [], {}
+        for log in logs:
+            topics = log.get("topics") or []
+            # ERC-721 Transfers index the token id as a fourth topic
+            if len(topics) != 3 or topics[0] != TRANSFER_TOPIC or log.get("removed"):
+                continue
+            block, log_index = int(log["blockNumber"], 16), int(log["logIndex"], 16)
+            sender, recipient = _address_bytes(topics[1]), _address_bytes(topics[2])
+            data = log.get("data") or "0x"
+            transfers.append((
+                block,
+                log_index,
+                bytes.fromhex(log["transactionHash"][2:]),
+                _address_bytes(log["address"]),
+                sender,
+                recipient,
+                str(int(data, 16) if len(data) > 2 else 0),
+            ))
+            participants.append((sender, block, log_index))
+            participants.append((recipient, block, log_index))
+            if log.get("blockTimestamp"):
+                block_times[block] = int(log["blockTimestamp"], 16)
+
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO transfers VALUES (?, ?, ?, ?, ?, ?, ?)", transfers)
+            self._db.executemany("INSERT OR IGNORE INTO address_transfers VALUES (?, ?, ?)", participants)
+            self._db.executemany("INSERT OR IGNORE INTO blocks VALUES (?, ?)", block_times.items())
+            self._db.execute(
+                "INSERT INTO checkpoints VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET block = excluded.block",
+                (name, to_block),
+            )
+        return len(transfers)
+
+    def put_block_times(self, block_times: Dict[int, int]) -> None:
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO blocks VALUES (?, ?)", block_times.items())
+
+    def block_times(self, blocks: Iterable[int]) -> Dict[int, int]:
+        blocks = list(set(blocks))
+        if not blocks:
+            return {}
+        placeholders = ",".join("?" * len(blocks))
+        return dict(self._db.execute(f"SELECT block, timestamp FROM blocks WHERE block IN ({placeholders})", blocks))
+
+    def page(
+        self,
+        address: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Transfers to or from address, newest first, plus the cursor of the next (older) page"""
+        if limit <= 0:
+            return [], None
+        position = (1 << 62, 0)
+        if cursor is not None:
+            block, _, log_index = cursor.partition(":")
+            position = (int(block), int(log_index))
+        rows = self._db.execute(
+            "SELECT t.block, t.log_index, t.tx_hash, t.token, t.sender, t.recipient, t.value "
+            "FROM address_transfers a JOIN transfers t ON t.block = a.block AND t.log_index = a.log_index "
+            "WHERE a.address = ? AND (a.block, a.log_index) < (?, ?) "
+            "ORDER BY a.block DESC, a.log_index DESC LIMIT ?",
+            (_address_bytes(address), position[0], position[1], limit + 1),
+        ).fetchall()
+        more = len(rows) > limit
+        rows = rows[:limit]
+        transfers = [
+            {
+                "block": block,
+                "log_index": log_index,
+                "hash": "0x" + bytes(tx_hash).hex(),
+                "token_address": _address_hex(token),
+                "from": _address_hex(sender),
+                "to": _address_hex(recipient),
+                "raw_value": value,  # uint256 as a decimal string
+            }
+            for block, log_index, tx_hash, token, sender, recipient, value in rows
+        ]
+        next_cursor = f"{rows[-1][0]}:{rows[-1][1]}" if more else None
+        return transfers, next_cursor
+
+    def count(self, address: str) -> int:
+        return self._db.execute(
+            "SELECT COUNT(*) FROM address_transfers WHERE address = ?", (_address_bytes(address),)
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class TransferIndexer:
+    """Follows the chain with ``eth_getLogs`` and feeds a ``TransferStore``.
+
+    Ranges adapt to log density: a range that returns fewer than half of
+    ``target_logs`` doubles the next one, a denser one shrinks it in
+    proportion, and a range the node rejects (result limit, timeout) is
+    halved and retried. Only blocks ``confirmations`` behind the head are
+    indexed so reorgs do not need unwinding. ``tokens`` limits indexing to
+    those token contracts; empty indexes every ERC-20.
+    """
+
+    def __init__(
+        self,
+        rpc: AsyncRPCClient,
+        store: TransferStore,
+        tokens: Optional[List[str]] = None,
+        start_block: Optional[int] = None,
+        backfill_blocks: int = 10_000,
+        confirmations: int = 12,
+        initial_range: int = 500,
+        max_range: int = 10_000,
+        target_logs: int = 2_000,
+        poll_interval: float = 12.0,
+    ):
+        self.rpc = rpc
+        self.store = store
+        self.tokens = [token.lower() for token in tokens or []]
+        self.start_block = start_block
+        self.backfill_blocks = backfill_blocks
+        self.confirmations = confirmations
+        self.range = initial_range
+        self.max_range = max_range
+        self.target_logs = target_logs
+        self.poll_interval = poll_interval
+        self.safe_head: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"ranges": 0, "splits": 0, "logs": 0, "transfers": 0, "last_range_ms": 0.0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.index_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Transfer indexer pass failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def index_once(self) -> int:
+        """Index every confirmed block after the checkpoint; returns transfers stored"""
+        self.safe_head = await self.rpc.block_number() - self.confirmations
+        checkpoint = self.store.checkpoint()
+        if checkpoint is None:
+            start = self.start_block if self.start_block is not None else self.safe_head - self.backfill_blocks
+            checkpoint = max(start, 0) - 1
+        stored = 0
+        while checkpoint < self.safe_head:
+            from_block = checkpoint + 1
+            to_block = min(from_block + self.range - 1, self.safe_head)
+            logs = await self._get_logs(from_block, to_block)
+            if logs is None:
+                continue  # range was halved
+            stored += self.store.add_range(logs, to_block)
+            self.stats["logs"] += len(logs)
+            checkpoint = to_block
+            self._adapt(len(logs))
+        self.stats["transfers"] += stored
+        return stored
+
+    async def _get_logs(self, from_block: int, to_block: int) -> Optional[List[Dict[str, Any]]]:
+        query: Dict[str, Any] = {"fromBlock": hex(from_block), "toBlock": hex(to_block), "topics": [TRANSFER_TOPIC]}
+        if self.tokens:
+            query["address"] = self.tokens
+        started = time.perf_counter()
+        try:
+            logs = await self.rpc.call("eth_getLogs", [query])
+        except (RPCError, httpx.TimeoutException, asyncio.TimeoutError) as e:
+            if to_block == from_block:
+                raise
+            self.stats["splits"] += 1
+            self.range = max((to_block - from_block + 1) // 2, 1)
+            logger.debug(f"eth_getLogs {from_block}-{to_block} rejected ({e}), retrying with {self.range} blocks")
+            return None
+        self.stats["ranges"] += 1
+        self.stats["last_range_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return logs or []
+
+    def _adapt(self, log_count: int) -> None:
+        if log_count > self.target_logs:
+            self.range = max(self.range * self.target_logs // log_count, 1)
+        elif log_count < self.target_logs // 2:
+            self.range = min(self.range * 2, self.max_range)
+
+    async def history(
+        self,
+        address: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        token_info: Optional[TokenInfo] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of address's transfers with block timestamps and known token units"""
+        transfers, next_cursor = self.store.page(address, cursor, limit)
+        times = self.store.block_times(transfer["block"] for transfer in transfers)
+        missing = sorted({transfer["block"] for transfer in transfers} - set(times))
+        if missing:
+            # One batched round trip for the page's unseen blocks, remembered for next time
+            headers = await asyncio.gather(
+                *(self.rpc.call("eth_getBlockByNumber", [hex(block), False]) for block in missing)
+            )
+            fetched = {block: int(header["timestamp"], 16) for block, header in zip(missing, headers) if header}
+            self.store.put_block_times(fetched)
+            times.update(fetched)
+
+        address = address.lower()
+        token_info = token_info or {}
+        for transfer in transfers:
+            symbol, decimals = token_info.get(transfer["token_address"], (None, None))
+            timestamp = times.get(transfer["block"])
+            transfer.update({
+                "token": symbol or transfer["token_address"],
+                "value": format_units(int(transfer["raw_value"]), decimals) if decimals is not None else transfer["raw_value"],
+                "type": "send" if transfer["from"] == address else "receive",
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat() if timestamp is not None else None,
+                "status": "success",
+            })
+        return transfers, next_cursor
+
+    def get_stats(self) -> Dict[str, Any]:
+        checkpoint = self.store.checkpoint()
+        return {
+            **self.stats,
+            "range_blocks": self.range,
+            "checkpoint": checkpoint,
+            "lag_blocks": self.safe_head - checkpoint if self.safe_head is not None and checkpoint is not None else None,
+        }
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Jobs
+Bounded background worker pool for long-running requests, with progress and cancellation
+"""
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from crypto_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+# A job body receives its arguments plus ``progress=report`` where
+# ``report(percent, message)`` publishes progress to pollers and subscribers
+JobFunction = Callable[..., Awaitable[Any]]
+
+
+def no_progress(percent: float, message: str = "") -> None:
+    """Progress callback for job bodies called outside the queue"""
+
+
+class JobLimitError(Exception):
+    """A job was refused because the owner or the queue is at capacity"""
+
+    def __init__(self, message: str, per_user: bool):
+        self.per_user = per_user
+        super().__init__(message)
+
+
+class Job:
+    """One unit of background work and its observable state"""
+
+    def __init__(self, job_id: str, owner: str, kind: str, func: JobFunction, args: tuple):
+        self.id = job_id
+        self.owner = owner
+        self.kind = kind
+        self.func = func
+        self.args = args
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.version = 0
+        self.on_change: Optional[Callable[["Job"], None]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def report(self, percent: float, message: str = "") -> None:
+        """Progress callback handed to the job body"""
+        self.progress = max(0.0, min(100.0, float(percent)))
+        if message:
+            self.message = message
+        self._touch()
+
+    def _touch(self) -> None:
+        self.version += 1
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        if self.on_change is not None:
+            self.on_change(self)
+
+    async def wait_changed(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the next update; False on timeout"""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def to_dict(self) -> Dict[str, Any]:
+        def iso(ts: Optional[float]) -> Optional[str]:
+            return datetime.fromtimestamp(ts).isoformat() if ts else None
+
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": round(self.progress, 1),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": iso(self.created_at),
+            "started_at": iso(self.started_at),
+            "finished_at": iso(self.finished_at),
+            "version": self.version,
+        }
+
+
+class JobQueue:
+    """Runs submitted coroutines on ``workers`` background tasks.
+
+    ``submit`` only enqueues, so the request that creates a job returns
+    immediately whatever the job's duration. At most ``max_queued`` jobs wait
+    for a worker and each owner may have ``max_per_user`` jobs queued or
+    running; beyond that ``submit`` raises ``JobLimitError``. Finished jobs
+    stay queryable for ``retention`` seconds (at most ``max_finished`` of
+    them). Jobs are held in process memory, so each backend worker has its own;
+    ``on_change(job)`` is called after every status or progress change, for
+    mirroring jobs somewhere other workers can see them.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queued: int = 1000,
+        max_per_user: int = 2,
+        retention: float = 3600.0,
+        max_finished: int = 10000,
+        on_change: Optional[Callable[[Job], None]] = None,
+    ):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.max_per_user = max_per_user
+        self.retention = retention
+        self.max_finished = max_finished
+        self.on_change = on_change
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+        self._queue: "Optional[asyncio.Queue[Job]]" = None  # created on the serving event loop
+        self._ids = itertools.count(1)
+        self._prefix = os.urandom(4).hex()
+        self._tasks: List[asyncio.Task] = []
+        self._wait_ms: Deque[float] = deque(maxlen=1000)
+        self._run_ms: Deque[float] = deque(maxlen=1000)
+        self.stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def _pending(self) -> "asyncio.Queue[Job]":
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        return self._queue
+
+    def start(self) -> None:
+        self._pending()
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.ensure_future(self._run()))
+
+    async def stop(self) -> None:
+        """Stop the workers, cancelling running and queued jobs"""
+        for task in self._tasks:
+            task.cancel()  # each worker cancels the job it is running
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        self._queue = None
+
+    def submit(self, owner: str, kind: str, func: JobFunction, *args: Any) -> Job:
+        """Queue ``func(*args, progress=...)`` for ``owner``; raises JobLimitError at capacity"""
+        if self._active.get(owner, 0) >= self.max_per_user:
+            self.stats["rejected"] += 1
+            raise JobLimitError(f"At most {self.max_per_user} jobs may be queued or running per user", per_user=True)
+        if self._pending().qsize() >= self.max_queued:
+            self.stats["rejected"] += 1
+            raise JobLimitError("Job queue is full, retry later", per_user=False)
+        job = Job(f"{self._prefix}{next(self._ids):08x}", owner, kind, func, args)
+        job.on_change = self.on_change
+        self._jobs[job.id] = job
+        self._active[owner] = self._active.get(owner, 0) + 1
+        self._queue.put_nowait(job)
+        self.stats["submitted"] += 1
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[Job]:
+        """The job, or None when unknown, expired or owned by someone else"""
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def jobs(self, owner: str) -> List[Job]:
+        """The owner's jobs, newest first"""
+        self._expire()
+        return sorted((job for job in self._jobs.values() if job.owner == owner), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str, owner: Optional[str] = None) -> bool:
+        """Cancel a queued or running job; False when it already finished or is not found"""
+        job = self.get(job_id, owner)
+        if job is None or job.finished:
+            return False
+        if job._task is not None:
+            job._task.cancel()  # the worker records the cancellation
+        else:
+            self._finish(job, CANCELLED)  # the worker skips it when dequeued
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            job = await self._pending().get()
+            if job.finished:
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            job._touch()
+            self._wait_ms.append((job.started_at - job.created_at) * 1000)
+            task = job._task = asyncio.ensure_future(job.func(*job.args, progress=job.report))
+            try:
+                # Unlike awaiting the task, wait() only raises when this worker is cancelled
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                self._finish(job, CANCELLED)
+                raise
+            if task.cancelled():
+                self._finish(job, CANCELLED)
+            elif task.exception() is not None:
+                e = task.exception()
+                logger.error(f"Job {job.id} ({job.kind}) failed: {e}")
+                self._finish(job, FAILED, error=str(e) or type(e).__name__)
+            else:
+                self._finish(job, COMPLETED, result=task.result())
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        if job.finished:
+            return
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = time.time()
+        if status == COMPLETED:
+            job.progress = 100.0
+        if job.started_at is not None:
+            self._run_ms.append((job.finished_at - job.started_at) * 1000)
+        job._task = None
+        job._touch()
+        self.stats[status] += 1
+        remaining = self._active.get(job.owner, 1) - 1
+        if remaining > 0:
+            self._active[job.owner] = remaining
+        else:
+            self._active.pop(job.owner, None)
+        self._finished[job.id] = job
+        self._expire()
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.retention
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_finished and job.finished_at >= cutoff:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self._jobs.values() if job.status == RUNNING)
+        return {
+            **self.stats,
+            "queued": sum(1 for job in self._jobs.values() if job.status == QUEUED),
+            "running": running,
+            "workers": self.workers,
+            "retained": len(self._jobs),
+            "queue_wait_p99_ms": round(percentile(self._wait_ms, 99), 3),
+            "run_p99_ms": round(percentile(self._run_ms, 99), 3),
+        }
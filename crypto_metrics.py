@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Runtime Metrics
+Event-loop lag and per-endpoint latency tracking for the crypto backend
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 when empty)"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class LoopLagMonitor:
+    """Measures how long the event loop was blocked.
+
+    A background task sleeps for ``interval`` seconds; any extra time before
+    it wakes up is time the loop spent running something else without
+    yielding. Samples are kept in a fixed-size window.
+    """
+
+    def __init__(self, interval: float = 0.05, window: int = 2000):
+        self.interval = interval
+        self.samples: Deque[Tuple[float, float]] = deque(maxlen=window)  # (woke_at, lag)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            woke_at = time.perf_counter()
+            self.samples.append((woke_at, max(0.0, woke_at - started - self.interval)))
+
+    def max_lag_between(self, start: float, end: float) -> float:
+        """Largest lag sample whose blocked period overlaps [start, end]"""
+        worst = 0.0
+        for woke_at, lag in reversed(self.samples):
+            if woke_at < start:
+                break
+            if woke_at - lag <= end and lag > worst:
+                worst = lag
+        return worst
+
+    def get_stats(self) -> Dict[str, float]:
+        lags = [lag for _, lag in self.samples]
+        return {
+            "samples": len(lags),
+            "p50_ms": round(percentile(lags, 50) * 1000, 3),
+            "p99_ms": round(percentile(lags, 99) * 1000, 3),
+            "max_ms": round(max(lags, default=0.0) * 1000, 3),
+        }
+
+
+class EndpointMetrics:
+    """Per-endpoint latency and loop-blocked time over a sliding window"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._latency: Dict[str, Deque[float]] = {}
+        self._blocked: Dict[str, Deque[float]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, latency: float, blocked: float) -> None:
+        if endpoint not in self._latency:
+            self._latency[endpoint] = deque(maxlen=self.window)
+            self._blocked[endpoint] = deque(maxlen=self.window)
+            self.counts[endpoint] = 0
+        self._latency[endpoint].append(latency)
+        self._blocked[endpoint].append(blocked)
+        self.counts[endpoint] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for endpoint, latencies in self._latency.items():
+            blocked: List[float] = list(self._blocked[endpoint])
+            stats[endpoint] = {
+                "count": self.counts[endpoint],
+                "latency_p50_ms": round(percentile(latencies, 50) * 1000, 3),
+                "latency_p99_ms": round(percentile(latencies, 99) * 1000, 3),
+                "loop_blocked_p50_ms": round(percentile(blocked, 50) * 1000, 3),
+                "loop_blocked_p99_ms": round(percentile(blocked, 99) * 1000, 3),
+            }
+        return stats
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Multicall
+ERC-20 balance discovery packed into Multicall3 aggregate calls
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from crypto_rpc import AsyncRPCClient, RPCError
+
+logger = logging.getLogger(__name__)
+
+# Multicall3 is deployed at the same address on mainnet and most EVM chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+AGGREGATE3_SELECTOR = "82ad56cb"  # aggregate3((address,bool,bytes)[])
+GET_ETH_BALANCE_SELECTOR = "4d2301cc"  # getEthBalance(address)
+BALANCE_OF_SELECTOR = "70a08231"  # balanceOf(address)
+DECIMALS_SELECTOR = "313ce567"  # decimals()
+SYMBOL_SELECTOR = "95d89b41"  # symbol()
+
+Call = Tuple[str, bytes]  # (target contract, calldata)
+
+# Node errors meaning the call was too big to run, as opposed to rate limits or outages
+_CAPACITY_ERRORS = ("gas", "too large", "too big", "size limit", "response size", "payload")
+
+
+def is_capacity_error(error: RPCError) -> bool:
+    """True when the node refused the call for its gas or size; smaller chunks may succeed"""
+    message = error.error_message.lower()
+    return any(marker in message for marker in _CAPACITY_ERRORS)
+
+
+def _word(value: int) -> bytes:
+    return value.to_bytes(32, "big")
+
+
+def _address_call(selector: str, address: str) -> bytes:
+    return bytes.fromhex(selector) + bytes(12) + bytes.fromhex(address[-40:])
+
+
+def encode_aggregate3(calls: Sequence[Call]) -> str:
+    """ABI-encode aggregate3 with allowFailure set on every call"""
+    encoded = []
+    for target, data in calls:
+        padded = data + bytes(-len(data) % 32)
+        encoded.append(bytes(12) + bytes.fromhex(target[-40:]) + _word(1) + _word(0x60) + _word(len(data)) + padded)
+    offsets, position = [], 32 * len(calls)
+    for item in encoded:
+        offsets.append(_word(position))
+        position += len(item)
+    payload = _word(0x20) + _word(len(calls)) + b"".join(offsets) + b"".join(encoded)
+    return "0x" + AGGREGATE3_SELECTOR + payload.hex()
+
+
+def decode_aggregate3(result: str) -> List[Tuple[bool, bytes]]:
+    """Decode aggregate3's (bool success, bytes returnData)[]"""
+    data = bytes.fromhex(result[2:] if result.startswith("0x") else result)
+    start = int.from_bytes(data[:32], "big")
+    count = int.from_bytes(data[start:start + 32], "big")
+    base = start + 32
+    results = []
+    for index in range(count):
+        item = base + int.from_bytes(data[base + 32 * index:base + 32 * (index + 1)], "big")
+        success = int.from_bytes(data[item:item + 32], "big") != 0
+        offset = item + int.from_bytes(data[item + 32:item + 64], "big")
+        length = int.from_bytes(data[offset:offset + 32], "big")
+        results.append((success, data[offset + 32:offset + 32 + length]))
+    return results
+
+
+def decode_uint(data: bytes) -> Optional[int]:
+    return int.from_bytes(data[:32], "big") if len(data) >= 32 else None
+
+
+def decode_symbol(data: bytes) -> Optional[str]:
+    """ABI string, or the bytes32 some older tokens (e.g. MKR) return"""
+    if len(data) == 32:
+        return data.rstrip(b"\0").decode("utf-8", "replace") or None
+    if len(data) < 64:
+        return None
+    offset = int.from_bytes(data[:32], "big")
+    length = int.from_bytes(data[offset:offset + 32], "big")
+    return data[offset + 32:offset + 32 + length].decode("utf-8", "replace") or None
+
+
+class MulticallBalanceScanner:
+    """Reads ETH and ERC-20 balances for many wallets with few ``eth_call``s.
+
+    Every (wallet, token) ``balanceOf`` plus each wallet's ``getEthBalance``
+    is packed into Multicall3 ``aggregate3`` calls of at most ``max_calls``
+    sub-calls and ``max_gas`` estimated gas; a chunk the node rejects for gas
+    or size is split in half and retried, while any other RPC error (rate
+    limits, outages) is raised to the caller. Only sub-calls that
+    aggregate3 reports as failed come back as None. Token symbols and decimals never change, so
+    they are fetched once per contract and kept. Concurrent
+    ``wallet_balances`` calls within ``batch_window`` seconds share one scan.
+    """
+
+    def __init__(
+        self,
+        rpc: AsyncRPCClient,
+        multicall_address: str = MULTICALL3_ADDRESS,
+        max_calls: int = 500,
+        max_gas: int = 25_000_000,
+        gas_per_call: int = 30_000,
+        batch_window: float = 0.005,
+    ):
+        self.rpc = rpc
+        self.multicall_address = multicall_address
+        self.chunk_size = max(1, min(max_calls, max_gas // gas_per_call))
+        self.batch_window = batch_window
+        self._metadata: Dict[str, Optional[Tuple[str, int]]] = {}
+        self._pending: Dict[Hashable, Tuple[List[str], Dict[str, asyncio.Future]]] = {}
+        self.stats = {"multicalls": 0, "calls_packed": 0, "splits": 0, "scans": 0, "wallets": 0, "metadata_fetched": 0}
+
+    def seed_metadata(self, token_info: Dict[str, Tuple[str, int]]) -> None:
+        """Preload known (symbol, decimals) per token address"""
+        for token, info in token_info.items():
+            self._metadata[token.lower()] = info
+
+    async def aggregate(self, calls: Sequence[Call], block: str = "latest") -> List[Optional[bytes]]:
+        """Run calls through Multicall3; a failed sub-call yields None, a failed RPC raises RPCError"""
+        chunks = [calls[start:start + self.chunk_size] for start in range(0, len(calls), self.chunk_size)]
+        results = await asyncio.gather(*(self._aggregate_chunk(chunk, block) for chunk in chunks))
+        return [result for chunk in results for result in chunk]
+
+    async def _aggregate_chunk(self, calls: Sequence[Call], block: str) -> List[Optional[bytes]]:
+        self.stats["multicalls"] += 1
+        self.stats["calls_packed"] += len(calls)
+        try:
+            result = await self.rpc.eth_call(self.multicall_address, encode_aggregate3(calls), block)
+        except RPCError as e:
+            if len(calls) == 1 or not is_capacity_error(e):
+                raise
+            # Out of gas or over the node's size limit: halve and retry
+            self.stats["splits"] += 1
+            middle = len(calls) // 2
+            halves = await asyncio.gather(
+                self._aggregate_chunk(calls[:middle], block), self._aggregate_chunk(calls[middle:], block)
+            )
+            return halves[0] + halves[1]
+        return [data if success else None for success, data in decode_aggregate3(result)]
+
+    async def metadata(self, tokens: Iterable[str]) -> Dict[str, Optional[Tuple[str, int]]]:
+        """(symbol, decimals) per token; None for contracts that are not ERC-20s"""
+        tokens = [token.lower() for token in tokens]
+        missing = list(dict.fromkeys(token for token in tokens if token not in self._metadata))
+        if missing:
+            calls = [
+                call
+                for token in missing
+                for call in ((token, bytes.fromhex(SYMBOL_SELECTOR)), (token, bytes.fromhex(DECIMALS_SELECTOR)))
+            ]
+            results = await self.aggregate(calls)
+            for index, token in enumerate(missing):
+                symbol_data, decimals_data = results[2 * index], results[2 * index + 1]
+                decimals = decode_uint(decimals_data) if decimals_data is not None else None
+                if decimals is None or decimals > 77:
+                    self._metadata[token] = None
+                    continue
+                symbol = decode_symbol(symbol_data) if symbol_data is not None else None
+                self._metadata[token] = (symbol or token, decimals)
+            self.stats["metadata_fetched"] += len(missing)
+        return {token: self._metadata[token] for token in tokens}
+
+    async def balances(
+        self,
+        wallets: Sequence[str],
+        tokens: Sequence[str],
+        block: str = "latest",
+    ) -> Dict[str, Dict[str, int]]:
+        """{wallet: {"ETH": wei, token: raw balance}} for every wallet and token"""
+        wallets = [wallet.lower() for wallet in wallets]
+        tokens = [token.lower() for token in tokens]
+        calls: List[Call] = []
+        for wallet in wallets:
+            calls.append((self.multicall_address, _address_call(GET_ETH_BALANCE_SELECTOR, wallet)))
+            calls.extend((token, _address_call(BALANCE_OF_SELECTOR, wallet)) for token in tokens)
+        results = await self.aggregate(calls, block)
+        self.stats["scans"] += 1
+        self.stats["wallets"] += len(wallets)
+
+        balances = {}
+        stride = len(tokens) + 1
+        for index, wallet in enumerate(wallets):
+            row = results[index * stride:(index + 1) * stride]
+            holdings = {"ETH": decode_uint(row[0]) if row[0] is not None else 0}
+            for token, data in zip(tokens, row[1:]):
+                holdings[token] = (decode_uint(data) or 0) if data is not None else 0
+            balances[wallet] = holdings
+        return balances
+
+    async def wallet_balances(self, wallet: str, tokens: Sequence[str], block: str = "latest") -> Dict[str, int]:
+        """Balances of one wallet, scanned together with wallets requested at the same time"""
+        key = (tuple(token.lower() for token in tokens), block)
+        wallet = wallet.lower()
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = ([], {})
+            asyncio.get_running_loop().call_later(self.batch_window, self._flush, key)
+        wallets, futures = pending
+        future = futures.get(wallet)
+        if future is None:
+            future = futures[wallet] = asyncio.get_running_loop().create_future()
+            # Every waiter may have been cancelled by the time the scan fails
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            wallets.append(wallet)
+        return await asyncio.shield(future)
+
+    def _flush(self, key: Hashable) -> None:
+        wallets, futures = self._pending.pop(key)
+        task = asyncio.ensure_future(self.balances(wallets, list(key[0]), key[1]))
+
+        def deliver(task: asyncio.Task) -> None:
+            for wallet, future in futures.items():
+                if future.done():
+                    continue
+                if task.cancelled():
+                    future.cancel()
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result()[wallet])
+
+        task.add_done_callback(deliver)
+
+    def get_stats(self) -> Dict[str, Any]:
+        known = sum(1 for info in self._metadata.values() if info is not None)
+        return {
+            **self.stats,
+            "chunk_size": self.chunk_size,
+            "tokens_known": known,
+            "non_erc20": len(self._metadata) - known,
+        }
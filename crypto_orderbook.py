@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Order Books
+Local L2 order-book replicas kept current with snapshot + diff updates
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from array import array
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Levels = Iterable[Sequence[float]]  # [[price, size], ...] as ccxt returns them
+
+
+class SequenceGap(Exception):
+    """A diff skipped sequence numbers; the book must be resynced from a snapshot"""
+
+
+class _BookSide:
+    """Price levels in ascending price order, as parallel double arrays"""
+
+    __slots__ = ("prices", "sizes")
+
+    def __init__(self):
+        self.prices = array("d")
+        self.sizes = array("d")
+
+    def replace(self, levels: Levels) -> None:
+        merged = {}
+        for price, size, *_ in levels:
+            if size > 0:
+                merged[float(price)] = float(size)
+        ordered = sorted(merged.items())
+        self.prices = array("d", (price for price, _ in ordered))
+        self.sizes = array("d", (size for _, size in ordered))
+
+    def set(self, price: float, size: float) -> None:
+        """Set a level's size; size 0 removes the level"""
+        index = bisect.bisect_left(self.prices, price)
+        if index < len(self.prices) and self.prices[index] == price:
+            if size > 0:
+                self.sizes[index] = size
+            else:
+                del self.prices[index]
+                del self.sizes[index]
+        elif size > 0:
+            self.prices.insert(index, price)
+            self.sizes.insert(index, size)
+
+    def truncate(self, depth: int, keep_high: bool) -> None:
+        if len(self.prices) > depth:
+            if keep_high:
+                del self.prices[:-depth]
+                del self.sizes[:-depth]
+            else:
+                del self.prices[depth:]
+                del self.sizes[depth:]
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+
+class L2Book:
+    """Aggregated price levels for one symbol.
+
+    Bids and asks are sorted arrays, so a level update is a binary search
+    plus an array shift, the best bid/ask are the array ends, and
+    ``walk`` runs over NumPy views of the arrays without copying them.
+    """
+
+    def __init__(self, symbol: str, depth: int = 0):
+        self.symbol = symbol
+        self.depth = depth
+        self.bids = _BookSide()
+        self.asks = _BookSide()
+        self.sequence: Optional[int] = None
+        self.synced = False
+        self.updated_at = 0.0
+
+    def apply_snapshot(self, bids: Levels, asks: Levels, sequence: Optional[int] = None) -> None:
+        self.bids.replace(bids)
+        self.asks.replace(asks)
+        self._truncate()
+        self.sequence = sequence
+        self.synced = True
+        self.updated_at = time.time()
+
+    def apply_diff(
+        self,
+        bids: Levels,
+        asks: Levels,
+        last_sequence: int,
+        first_sequence: Optional[int] = None,
+    ) -> bool:
+        """Apply changed levels covering [first_sequence, last_sequence].
+
+        Returns False for a diff already contained in the book and raises
+        ``SequenceGap`` if updates between the book and the diff are missing.
+        """
+        if first_sequence is None:
+            first_sequence = last_sequence
+        if self.sequence is not None:
+            if last_sequence <= self.sequence:
+                return False
+            if first_sequence > self.sequence + 1:
+                self.synced = False
+                raise SequenceGap(f"{self.symbol}: book at {self.sequence}, diff starts at {first_sequence}")
+        for price, size, *_ in bids:
+            self.bids.set(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.set(float(price), float(size))
+        self._truncate()
+        self.sequence = last_sequence
+        self.updated_at = time.time()
+        return True
+
+    def _truncate(self) -> None:
+        if self.depth:
+            self.bids.truncate(self.depth, keep_high=True)
+            self.asks.truncate(self.depth, keep_high=False)
+
+    def best_bid(self) -> Optional[Tuple[float, float]]:
+        return (self.bids.prices[-1], self.bids.sizes[-1]) if len(self.bids) else None
+
+    def best_ask(self) -> Optional[Tuple[float, float]]:
+        return (self.asks.prices[0], self.asks.sizes[0]) if len(self.asks) else None
+
+    def mid_price(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def walk(self, side: str, amount: float, in_quote: bool = False) -> Dict[str, Any]:
+        """Fill a market order against the book.
+
+        ``side="buy"`` consumes asks from the lowest price, ``"sell"`` bids
+        from the highest. ``amount`` is in the base currency, or in the quote
+        currency with ``in_quote`` (e.g. "spend 1000 USDT").
+        """
+        if side not in ("buy", "sell"):
+            raise ValueError(f"Invalid side: {side}")
+        book_side = self.asks if side == "buy" else self.bids
+        prices = np.frombuffer(book_side.prices, dtype=np.float64)
+        sizes = np.frombuffer(book_side.sizes, dtype=np.float64)
+        if side == "sell":
+            prices, sizes = prices[::-1], sizes[::-1]
+        if not len(prices) or amount <= 0:
+            return {"filled_base": 0.0, "filled_quote": 0.0, "average_price": None, "worst_price": None,
+                    "slippage_pct": None, "levels": 0, "complete": amount <= 0}
+
+        notionals = prices * sizes
+        consumed = np.cumsum(notionals if in_quote else sizes)
+        levels = int(np.searchsorted(consumed, amount, side="left"))
+        complete = levels < len(prices)
+        full = min(levels, len(prices))
+        base = float(sizes[:full].sum())
+        quote = float(notionals[:full].sum())
+        if complete:
+            remaining = amount - (consumed[levels - 1] if levels else 0.0)
+            base += remaining / prices[levels] if in_quote else remaining
+            quote += remaining if in_quote else remaining * prices[levels]
+        worst = float(prices[min(levels, len(prices) - 1)])
+        average = quote / base if base else None
+        best = float(prices[0])
+        return {
+            "filled_base": base,
+            "filled_quote": quote,
+            "average_price": average,
+            "worst_price": worst,
+            "slippage_pct": abs(average - best) / best * 100 if average else None,
+            "levels": min(levels + 1, len(prices)),
+            "complete": complete,
+        }
+
+    def to_dict(self, depth: int = 20) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "sequence": self.sequence,
+            "bids": [list(level) for level in zip(reversed(self.bids.prices[-depth:]), reversed(self.bids.sizes[-depth:]))],
+            "asks": [list(level) for level in zip(self.asks.prices[:depth], self.asks.sizes[:depth])],
+            "updated_at": self.updated_at,
+        }
+
+
+class OrderBookReplica:
+    """Keeps an ``L2Book`` per symbol in sync from snapshots and diffs.
+
+    ``loader(symbol)`` returns a ccxt-style order book (``bids``, ``asks`` and
+    an optional ``nonce`` sequence). Diffs that arrive while a book is
+    unsynced are buffered and replayed over the next snapshot, the usual
+    exchange resync procedure. Without a diff feed, ``max_age`` makes ``get``
+    reload books older than that many seconds.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Awaitable[Dict[str, Any]]],
+        depth: int = 0,
+        max_age: float = 0.0,
+        max_buffer: int = 1000,
+    ):
+        self.loader = loader
+        self.depth = depth
+        self.max_age = max_age
+        self.max_buffer = max_buffer
+        self._books: Dict[str, L2Book] = {}
+        self._buffers: Dict[str, List[Tuple[Levels, Levels, int, Optional[int]]]] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self.stats = {"snapshots": 0, "diffs": 0, "stale_diffs": 0, "gaps": 0, "buffered": 0}
+
+    async def get(self, symbol: str) -> L2Book:
+        """Return a synced book, loading or refreshing its snapshot if needed"""
+        book = self._books.get(symbol)
+        if book is None or not book.synced or (self.max_age and time.time() - book.updated_at > self.max_age):
+            await self._resync(symbol)
+            book = self._books[symbol]
+        return book
+
+    def peek(self, symbol: str) -> Optional[L2Book]:
+        return self._books.get(symbol)
+
+    def apply_diff(self, symbol: str, bids: Levels, asks: Levels, last_sequence: int, first_sequence: Optional[int] = None) -> None:
+        """Feed one diff from a depth stream"""
+        book = self._books.get(symbol)
+        if book is None or not book.synced:
+            self._buffer(symbol, bids, asks, last_sequence, first_sequence)
+            return
+        try:
+            if book.apply_diff(bids, asks, last_sequence, first_sequence):
+                self.stats["diffs"] += 1
+            else:
+                self.stats["stale_diffs"] += 1
+        except SequenceGap as e:
+            logger.info(f"Order book gap, resyncing: {e}")
+            self.stats["gaps"] += 1
+            self._buffer(symbol, bids, asks, last_sequence, first_sequence)
+
+    def _buffer(self, symbol: str, bids: Levels, asks: Levels, last_sequence: int, first_sequence: Optional[int]) -> None:
+        buffer = self._buffers.setdefault(symbol, [])
+        buffer.append((list(bids), list(asks), last_sequence, first_sequence))
+        del buffer[:-self.max_buffer]
+        self.stats["buffered"] += 1
+        if symbol not in self._loading:
+            task = asyncio.ensure_future(self._resync(symbol))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def _resync(self, symbol: str) -> None:
+        task = self._loading.get(symbol)
+        if task is None:
+            task = self._loading[symbol] = asyncio.ensure_future(self._load(symbol))
+            task.add_done_callback(lambda _: self._loading.pop(symbol, None))
+        await asyncio.shield(task)
+
+    async def _load(self, symbol: str) -> None:
+        snapshot = await self.loader(symbol)
+        book = self._books.get(symbol) or L2Book(symbol, depth=self.depth)
+        book.apply_snapshot(snapshot.get("bids", []), snapshot.get("asks", []), snapshot.get("nonce"))
+        self._books[symbol] = book
+        self.stats["snapshots"] += 1
+        buffered = self._buffers.pop(symbol, [])
+        for index, (bids, asks, last_sequence, first_sequence) in enumerate(buffered):
+            if book.sequence is not None and last_sequence <= book.sequence:
+                continue
+            try:
+                book.apply_diff(bids, asks, last_sequence, first_sequence)
+                self.stats["diffs"] += 1
+            except SequenceGap as e:
+                # Snapshot is older than the buffered diffs: keep them for the next resync
+                logger.info(f"Order book still behind after snapshot: {e}")
+                self.stats["gaps"] += 1
+                self._buffers[symbol] = buffered[index:] + self._buffers.get(symbol, [])
+                break
+
+    def symbols(self) -> List[str]:
+        return list(self._books)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "books": len(self._books), "synced": sum(1 for book in self._books.values() if book.synced)}
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Pool Prober
+Concurrent stratum latency probes per pool endpoint, ranked by latency, fee and reject rate
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from crypto_cache import SingleFlightCache
+from crypto_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+# (pool, coin, host, port, fee %) for the pools in crypto_profit.DEFAULT_POOLS
+DEFAULT_POOL_ENDPOINTS = [
+    ("Ethermine", "ETC", "etc.ethermine.org", 4444, 1.0),
+    ("2Miners", "ETC", "etc.2miners.com", 1010, 1.0),
+    ("2Miners", "RVN", "rvn.2miners.com", 6060, 1.0),
+    ("F2Pool", "ETC", "etc.f2pool.com", 8118, 2.5),
+    ("F2Pool", "BTC", "btc.f2pool.com", 1314, 2.5),
+    ("NiceHash", "RVN", "kawpow.auto.nicehash.com", 9200, 2.0),
+    ("ViaBTC", "LTC", "ltc.viabtc.io", 3333, 2.0),
+    ("SupportXMR", "XMR", "pool.supportxmr.com", 3333, 0.6),
+]
+
+PoolEndpoint = Tuple[str, str, str, int, float]
+
+
+def parse_pool_endpoints(spec: str) -> List[PoolEndpoint]:
+    """Parse "pool/coin=host:port/fee,..." into endpoint tuples (fee defaults to 0)"""
+    endpoints = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, target = item.partition("=")
+        pool, _, coin = name.partition("/")
+        address, _, fee = target.partition("/")
+        host, _, port = address.rpartition(":")
+        if not (pool and coin and host and port.isdigit()):
+            raise ValueError(f"Invalid pool entry (expected pool/coin=host:port/fee): {item}")
+        endpoints.append((pool.strip(), coin.strip().upper(), host.strip(), int(port), float(fee or 0)))
+    return endpoints
+
+
+class PoolProber:
+    """Measures how quickly every pool endpoint answers a stratum client.
+
+    A probe opens a TCP connection (connect latency), sends
+    ``mining.subscribe`` and waits for the first line back (response
+    latency); any reply counts, so pools speaking a different stratum
+    dialect are still timed. A run probes every endpoint concurrently for
+    ``rounds`` rounds and folds each success into a per-endpoint EWMA with
+    weight ``alpha``. Endpoints are ranked by cost: fee plus reject rate plus
+    the share of work a miner loses to latency, taken as latency over
+    ``job_interval`` seconds (roughly how often a pool sends new work).
+    Endpoints that failed every probe of the last run rank last. Runs are
+    cached for ``cache_ttl`` seconds and a stale ranking is served for
+    ``stale_ttl`` more while one run refreshes it.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[PoolEndpoint],
+        rounds: int = 3,
+        timeout: float = 3.0,
+        alpha: float = 0.3,
+        job_interval: float = 10.0,
+        cache_ttl: float = 60.0,
+        stale_ttl: float = 300.0,
+    ):
+        self.endpoints = list(endpoints)
+        self.rounds = rounds
+        self.timeout = timeout
+        self.alpha = alpha
+        self.job_interval = job_interval
+        self.cache = SingleFlightCache(ttl=cache_ttl, stale_ttl=stale_ttl, max_entries=1)
+        self._connect_ewma: Dict[Tuple[str, str], float] = {}
+        self._response_ewma: Dict[Tuple[str, str], float] = {}
+        self._shares: Dict[str, List[int]] = {}  # pool -> [accepted, rejected]
+        self._run_ms: List[float] = []
+        self.stats = {"runs": 0, "probes": 0, "failures": 0, "timeouts": 0}
+
+    async def ranking(self) -> List[Dict[str, Any]]:
+        """Ranked endpoints from the latest run, probing when the cache has expired"""
+        return await self.cache.get("ranking", self.probe)
+
+    def record_shares(self, pool: str, accepted: int, rejected: int) -> None:
+        """Count shares a pool accepted or rejected; feeds its reject rate"""
+        counts = self._shares.setdefault(pool, [0, 0])
+        counts[0] += max(0, accepted)
+        counts[1] += max(0, rejected)
+
+    def reject_rate(self, pool: str) -> float:
+        accepted, rejected = self._shares.get(pool, (0, 0))
+        return rejected / (accepted + rejected) if accepted + rejected else 0.0
+
+    async def probe(self) -> List[Dict[str, Any]]:
+        """Probe every endpoint ``rounds`` times and return them ranked"""
+        started = time.perf_counter()
+        successes = {endpoint[:2]: 0 for endpoint in self.endpoints}
+        errors: Dict[Tuple[str, str], str] = {}
+        for _ in range(self.rounds):
+            results = await asyncio.gather(*(self._probe_one(endpoint) for endpoint in self.endpoints))
+            for endpoint, (latencies, error) in zip(self.endpoints, results):
+                key = endpoint[:2]
+                self.stats["probes"] += 1
+                if latencies is None:
+                    self.stats["failures"] += 1
+                    errors[key] = error
+                    continue
+                successes[key] += 1
+                for ewma, value in zip((self._connect_ewma, self._response_ewma), latencies):
+                    previous = ewma.get(key)
+                    ewma[key] = value if previous is None else previous + self.alpha * (value - previous)
+        self.stats["runs"] += 1
+        self._run_ms.append((time.perf_counter() - started) * 1000)
+        del self._run_ms[:-100]
+        return self._rank(successes, errors)
+
+    async def _probe_one(self, endpoint: PoolEndpoint) -> Tuple[Optional[Tuple[float, float]], Optional[str]]:
+        """(connect_ms, response_ms) for one endpoint, or (None, error)"""
+        host, port = endpoint[2], endpoint[3]
+        writer = None
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+            connected = time.perf_counter()
+            request = {"id": 1, "method": "mining.subscribe", "params": ["CoresAI/1.0"]}
+            writer.write(json.dumps(request).encode() + b"\n")
+            await writer.drain()
+            line = await asyncio.wait_for(reader.readline(), self.timeout - (connected - started))
+            if not line:
+                return None, "connection closed before the first response"
+            answered = time.perf_counter()
+            return ((connected - started) * 1000, (answered - connected) * 1000), None
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            return None, f"no response within {self.timeout:g}s"
+        except (OSError, ValueError) as e:
+            return None, str(e) or type(e).__name__
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _rank(self, successes: Dict[Tuple[str, str], int], errors: Dict[Tuple[str, str], str]) -> List[Dict[str, Any]]:
+        ranked = []
+        for pool, coin, host, port, fee in self.endpoints:
+            key = (pool, coin)
+            reachable = successes[key] > 0
+            connect_ms = self._connect_ewma.get(key)
+            response_ms = self._response_ewma.get(key)
+            reject_rate = self.reject_rate(pool)
+            cost = None
+            if reachable:
+                latency_penalty = (connect_ms + response_ms) / 1000 / self.job_interval
+                cost = fee + 100 * (reject_rate + latency_penalty)
+            ranked.append({
+                "name": pool,
+                "coin": coin,
+                "url": host,
+                "port": port,
+                "fee": fee,
+                "reachable": reachable,
+                "connect_ms": round(connect_ms, 2) if connect_ms is not None else None,
+                "latency_ms": round(response_ms, 2) if response_ms is not None else None,
+                "success_rate": round(successes[key] / self.rounds, 3) if self.rounds else 0.0,
+                "reject_rate": round(reject_rate, 4),
+                "cost_pct": round(cost, 3) if cost is not None else None,
+                "error": None if reachable else errors.get(key),
+            })
+        ranked.sort(key=lambda entry: (not entry["reachable"], entry["cost_pct"] if entry["reachable"] else 0.0))
+        for rank, entry in enumerate(ranked, 1):
+            entry["rank"] = rank
+        return ranked
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "endpoints": len(self.endpoints),
+            "p99_run_ms": round(percentile(self._run_ms, 99), 3),
+            "cache": self.cache.get_stats(),
+        }
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Profit Switching
+Vectorized mining profitability per (device, coin, pool) with hysteresis-gated switching
+"""
+
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from crypto_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+# coin -> (algorithm, block reward, network difficulty, hashes per unit of difficulty);
+# expected coins per hash = reward / (difficulty * hashes per unit)
+DEFAULT_COINS = {
+    "BTC": ("SHA-256", 3.125, 9.0e13, 2 ** 32),
+    "LTC": ("Scrypt", 6.25, 3.0e7, 2 ** 32),
+    "ETC": ("Ethash", 2.56, 2.5e15, 1),
+    "RVN": ("KawPow", 2500.0, 8.0e4, 2 ** 32),
+    "XMR": ("RandomX", 0.6, 3.0e11, 1),
+}
+
+# (pool, coin, fee %)
+DEFAULT_POOLS = [
+    ("Ethermine", "ETC", 1.0),
+    ("2Miners", "ETC", 1.0),
+    ("2Miners", "RVN", 1.0),
+    ("F2Pool", "ETC", 2.5),
+    ("F2Pool", "BTC", 2.5),
+    ("NiceHash", "RVN", 2.0),
+    ("ViaBTC", "LTC", 2.0),
+    ("SupportXMR", "XMR", 0.6),
+]
+
+
+class ProfitEngine:
+    """Expected profit for every device on every pool, recomputed in one pass.
+
+    Devices are rows of a hashrate matrix and a power matrix (H/s and W per
+    algorithm, NaN where a device cannot mine an algorithm). Coins carry an
+    algorithm, expected coins per hash (from block reward and difficulty) and
+    a USD price; pools carry a coin and a fee. ``profits()`` is the (devices x
+    pools) matrix of USD/day:
+
+        hashrate * coins_per_hash * price * (1 - fee) * 86400 - watts * 24 / 1000 * electricity_price
+
+    ``evaluate()`` picks each device's best pool and recommends a switch only
+    when it beats the current pool by more than ``switch_threshold`` (a
+    fraction of the current profit, at least ``min_gain`` USD/day) and the
+    device has stayed ``min_dwell`` seconds on its current pool.
+    """
+
+    def __init__(
+        self,
+        coins: Optional[Dict[str, Tuple[str, float, float, float]]] = None,
+        pools: Optional[Iterable[Tuple[str, str, float]]] = None,
+        electricity_price: float = 0.12,
+        switch_threshold: float = 0.05,
+        min_gain: float = 0.01,
+        min_dwell: float = 600.0,
+    ):
+        coins = DEFAULT_COINS if coins is None else coins
+        pools = DEFAULT_POOLS if pools is None else list(pools)
+        self.electricity_price = electricity_price
+        self.switch_threshold = switch_threshold
+        self.min_gain = min_gain
+        self.min_dwell = min_dwell
+
+        self.coins = list(coins)
+        self._coin_index = {coin: index for index, coin in enumerate(self.coins)}
+        self.algorithms = sorted({spec[0] for spec in coins.values()})
+        self._algorithm_index = {algorithm.lower(): index for index, algorithm in enumerate(self.algorithms)}
+        self.coin_algorithm = np.array([self._algorithm_index[coins[coin][0].lower()] for coin in self.coins])
+        self.block_reward = np.array([coins[coin][1] for coin in self.coins], dtype=float)
+        self.difficulty = np.array([coins[coin][2] for coin in self.coins], dtype=float)
+        self.difficulty_unit = np.array([coins[coin][3] for coin in self.coins], dtype=float)
+        self.prices = np.full(len(self.coins), np.nan)
+
+        self.pools = [(name, coin) for name, coin, _ in pools]
+        self._pool_index = {(name.lower(), coin): index for index, (name, coin) in enumerate(self.pools)}
+        self.pool_coin = np.array([self._coin_index[coin] for _, coin in self.pools], dtype=int)
+        self.pool_fee = np.array([fee / 100 for _, _, fee in pools], dtype=float)
+
+        width = len(self.algorithms)
+        self.device_ids: List[str] = []
+        self._device_index: Dict[str, int] = {}
+        self._hashrates = np.full((0, width), np.nan)
+        self._watts = np.full((0, width), np.nan)
+        self._assigned = np.full(0, -1, dtype=int)
+        self._switched_at = np.zeros(0)
+        self._last: Optional[Dict[str, np.ndarray]] = None
+        self._eval_ms: Deque[float] = deque(maxlen=1000)
+        self.stats = {"evaluations": 0, "switches_recommended": 0, "switches_applied": 0, "last_eval_ms": 0.0}
+
+    # Fleet
+    def set_device(self, device_id: str, hashrates: Dict[str, float], watts: Dict[str, float]) -> None:
+        """Register or update a device's benchmarked hashrate (H/s) and power draw (W) per algorithm"""
+        index = self._device_index.get(device_id)
+        if index is None:
+            index = len(self.device_ids)
+            if index == len(self._hashrates):
+                self._grow()
+            self.device_ids.append(device_id)
+            self._device_index[device_id] = index
+            self._assigned[index] = -1
+            self._switched_at[index] = 0.0
+        self._hashrates[index] = np.nan
+        self._watts[index] = np.nan
+        for algorithm, hashrate in hashrates.items():
+            column = self._algorithm_index.get(algorithm.lower())
+            if column is not None:
+                self._hashrates[index, column] = hashrate
+                self._watts[index, column] = watts.get(algorithm, 0.0)
+        self._last = None
+
+    def has_device(self, device_id: str) -> bool:
+        return device_id in self._device_index
+
+    def set_fleet(self, device_ids: List[str], hashrates: np.ndarray, watts: np.ndarray) -> None:
+        """Replace the whole fleet at once: (devices x algorithms) arrays ordered as ``algorithms``"""
+        count = len(device_ids)
+        self.device_ids = list(device_ids)
+        self._device_index = {device_id: index for index, device_id in enumerate(device_ids)}
+        self._hashrates = np.array(hashrates, dtype=float).reshape(count, len(self.algorithms))
+        self._watts = np.array(watts, dtype=float).reshape(count, len(self.algorithms))
+        self._assigned = np.full(count, -1, dtype=int)
+        self._switched_at = np.zeros(count)
+        self._last = None
+
+    def _grow(self) -> None:
+        capacity = max(16, 2 * len(self._hashrates))
+        extra = capacity - len(self._hashrates)
+        self._hashrates = np.vstack([self._hashrates, np.full((extra, len(self.algorithms)), np.nan)])
+        self._watts = np.vstack([self._watts, np.full((extra, len(self.algorithms)), np.nan)])
+        self._assigned = np.concatenate([self._assigned, np.full(extra, -1, dtype=int)])
+        self._switched_at = np.concatenate([self._switched_at, np.zeros(extra)])
+
+    def assign(self, device_id: str, coin: Optional[str], pool: Optional[str], now: Optional[float] = None) -> None:
+        """Record where a device is mining (None when it stopped)"""
+        index = self._device_index.get(device_id)
+        if index is None:
+            return
+        pool_index = self._pool_index.get(((pool or "").lower(), (coin or "").upper()), -1)
+        if pool_index != self._assigned[index]:
+            self._assigned[index] = pool_index
+            self._switched_at[index] = time.time() if now is None else now
+            self._last = None
+
+    # Market inputs
+    def set_prices(self, prices: Dict[str, float]) -> None:
+        """USD prices by coin symbol; symbols that are not mined are ignored"""
+        for symbol, price in prices.items():
+            index = self._coin_index.get(symbol.upper())
+            if index is not None and price is not None:
+                self.prices[index] = price
+        self._last = None
+
+    def set_difficulty(self, coin: str, difficulty: float) -> None:
+        self.difficulty[self._coin_index[coin.upper()]] = difficulty
+        self._last = None
+
+    def algorithm_for(self, coin: str) -> Optional[str]:
+        index = self._coin_index.get(coin.upper())
+        return self.algorithms[self.coin_algorithm[index]] if index is not None else None
+
+    # Evaluation
+    def profits(self) -> np.ndarray:
+        """USD/day for every (device, pool); -inf where a device cannot mine or a price is unknown"""
+        count = len(self.device_ids)
+        algorithm = self.coin_algorithm[self.pool_coin]
+        coins_per_hash = self.block_reward / (self.difficulty * self.difficulty_unit)
+        usd_per_hash = (coins_per_hash * self.prices)[self.pool_coin] * (1 - self.pool_fee)
+        profit = (
+            self._hashrates[:count, algorithm] * usd_per_hash * SECONDS_PER_DAY
+            - self._watts[:count, algorithm] * (24 / 1000) * self.electricity_price
+        )
+        return np.where(np.isnan(profit), -np.inf, profit)
+
+    def evaluate(self, now: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Best pool per device and which devices should switch"""
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        count = len(self.device_ids)
+        profit = self.profits()
+        rows = np.arange(count)
+        best = profit.argmax(axis=1)
+        best_profit = profit[rows, best]
+        assigned = self._assigned[:count]
+        current_profit = np.where(assigned >= 0, profit[rows, np.maximum(assigned, 0)], -np.inf)
+        margin = np.where(
+            np.isfinite(current_profit),
+            np.maximum(self.switch_threshold * np.abs(current_profit), self.min_gain),
+            0.0,
+        )
+        with np.errstate(invalid="ignore"):  # -inf - -inf where neither pool is priced
+            gain = best_profit - current_profit
+        switch = (
+            (assigned >= 0)
+            & (best != assigned)
+            & np.isfinite(best_profit)
+            & (gain > margin)
+            & (now - self._switched_at[:count] >= self.min_dwell)
+        )
+        self._last = {"best": best, "best_profit": best_profit, "current_profit": current_profit, "switch": switch}
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._eval_ms.append(elapsed_ms)
+        self.stats["evaluations"] += 1
+        self.stats["switches_recommended"] += int(switch.sum())
+        self.stats["last_eval_ms"] = round(elapsed_ms, 3)
+        return self._last
+
+    def on_prices(self, prices: Dict[str, float], now: Optional[float] = None) -> List[Tuple[str, str, str]]:
+        """Price tick: re-evaluate the fleet; returns (device, coin, pool) switches recommended"""
+        self.set_prices(prices)
+        result = self.evaluate(now)
+        return [self._target(index, result["best"][index]) for index in np.flatnonzero(result["switch"])]
+
+    def apply(self, switches: List[Tuple[str, str, str]], now: Optional[float] = None) -> None:
+        """Record recommended switches as carried out (restarts each device's dwell time)"""
+        for device_id, coin, pool in switches:
+            self.assign(device_id, coin, pool, now)
+        self.stats["switches_applied"] += len(switches)
+
+    def _target(self, device: int, pool: int) -> Tuple[str, str, str]:
+        name, coin = self.pools[pool]
+        return self.device_ids[device], coin, name
+
+    def recommendation(self, device_id: str, now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Best pool for one device, its profit and whether switching to it is recommended"""
+        index = self._device_index.get(device_id)
+        if index is None:
+            return None
+        result = self._last if self._last is not None else self.evaluate(now)
+        best_profit = float(result["best_profit"][index])
+        if not np.isfinite(best_profit):
+            return None
+        _, coin, pool = self._target(index, result["best"][index])
+        current = float(result["current_profit"][index])
+        return {
+            "coin": coin,
+            "pool": pool,
+            "algorithm": self.algorithm_for(coin),
+            "profit_per_day": round(best_profit, 4),
+            "current_profit_per_day": round(current, 4) if np.isfinite(current) else None,
+            "gain_percent": round((best_profit - current) / abs(current) * 100, 2) if np.isfinite(current) and current else None,
+            "switch": bool(result["switch"][index]),
+        }
+
+    def options(self, device_id: str) -> List[Dict[str, Any]]:
+        """Every (coin, pool) the device can mine with a known price, most profitable first"""
+        index = self._device_index.get(device_id)
+        if index is None:
+            return []
+        profit = self.profits()[index]
+        order = np.argsort(-profit, kind="stable")
+        return [
+            {
+                "coin": self.pools[pool][1],
+                "pool": self.pools[pool][0],
+                "algorithm": self.algorithm_for(self.pools[pool][1]),
+                "fee": round(float(self.pool_fee[pool]) * 100, 2),
+                "profit_per_day": round(float(profit[pool]), 4),
+            }
+            for pool in order
+            if np.isfinite(profit[pool])
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "devices": len(self.device_ids),
+            "pools": len(self.pools),
+            "priced_coins": int(np.isfinite(self.prices).sum()),
+            "p99_eval_ms": round(percentile(self._eval_ms, 99), 3),
+        }
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Trade Routing
+Concurrent quotes from CEX and DEX venues under a deadline, best route wins
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from crypto_cache import SingleFlightCache
+
+logger = logging.getLogger(__name__)
+
+# Uniswap V2 style router: getAmountsOut(uint256 amountIn, address[] path)
+GET_AMOUNTS_OUT_SELECTOR = "0xd06ca61f"
+
+# Mainnet ERC-20s quoted on DEX routers (symbol -> (address, decimals)); ETH trades as WETH
+DEFAULT_DEX_TOKENS = {
+    "ETH": ("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2", 18),
+    "WETH": ("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2", 18),
+    "USDC": ("0xA0b86991c6218b36c1d19D4a2e9Eb0cE3606eB48", 6),
+    "USDT": ("0xdAC17F958D2ee523a2206206994597C13D831ec7", 6),
+    "DAI": ("0x6B175474E89094C44Da98b954EedeAC495271d0F", 18),
+    "WBTC": ("0x2260FAC5E5542a773Aa44fBC8C10d0ebc2EBF3c6", 8),
+}
+
+
+def parse_dex_routers(spec: str) -> Dict[str, str]:
+    """Parse "name=0xrouter,..." into {name: router address}"""
+    routers = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, address = item.partition("=")
+        if not address:
+            raise ValueError(f"Invalid router entry (expected name=address): {item}")
+        routers[name.strip()] = address.strip()
+    return routers
+
+
+def encode_get_amounts_out(amount_in: int, path: List[str]) -> str:
+    """ABI-encode getAmountsOut(amountIn, path)"""
+    words = [amount_in, 0x40, len(path)] + [int(address, 16) for address in path]
+    return GET_AMOUNTS_OUT_SELECTOR + "".join(f"{word:064x}" for word in words)
+
+
+def decode_last_amount(result: str) -> int:
+    """Last element of an ABI-encoded uint256[] return value"""
+    data = result[2:] if result.startswith("0x") else result
+    length = int(data[64:128], 16)
+    if length == 0:
+        raise ValueError("Empty amounts array")
+    return int(data[64 * (1 + length):64 * (2 + length)], 16)
+
+
+class CexVenue:
+    """Quotes a centralized exchange by walking its local order book.
+
+    ``estimate(token_in, token_out, amount_in)`` returns the order-book fill
+    estimate (``output``, ``slippage_pct``, ``complete``...) or None when the
+    exchange lists neither pair.
+    """
+
+    def __init__(self, name: str, estimate: Callable[[str, str, float], Awaitable[Optional[Dict[str, Any]]]]):
+        self.name = name
+        self.estimate = estimate
+
+    async def quote(self, token_in: str, token_out: str, amount_in: float) -> Optional[Dict[str, Any]]:
+        fill = await self.estimate(token_in, token_out, amount_in)
+        if fill is None:
+            return None
+        return {
+            "output": fill["output"],
+            "complete": fill["complete"],
+            "slippage_pct": fill["slippage_pct"],
+            "symbol": fill["symbol"],
+            "side": fill["side"],
+        }
+
+
+class DexVenue:
+    """Quotes a Uniswap V2 style router with ``eth_call(getAmountsOut)``.
+
+    Price impact is measured against a second quote for a tiny amount; both
+    calls go out together so the RPC client can batch them.
+    """
+
+    def __init__(self, name: str, rpc: Any, router: str, tokens: Optional[Dict[str, Tuple[str, int]]] = None):
+        self.name = name
+        self.rpc = rpc
+        self.router = router
+        self.tokens = tokens or DEFAULT_DEX_TOKENS
+
+    async def quote(self, token_in: str, token_out: str, amount_in: float) -> Optional[Dict[str, Any]]:
+        source, target = self.tokens.get(token_in.upper()), self.tokens.get(token_out.upper())
+        if source is None or target is None or source[0] == target[0]:
+            return None
+        units_in = int(amount_in * 10 ** source[1])
+        probe_in = max(units_in // 10_000, 1)
+        path = [source[0], target[0]]
+        results = await asyncio.gather(
+            self.rpc.eth_call(self.router, encode_get_amounts_out(units_in, path)),
+            self.rpc.eth_call(self.router, encode_get_amounts_out(probe_in, path)),
+        )
+        units_out, probe_out = (decode_last_amount(result) for result in results)
+        if units_out == 0 or probe_out == 0:
+            return None
+        impact = 1 - (units_out / units_in) / (probe_out / probe_in)
+        return {
+            "output": units_out / 10 ** target[1],
+            "complete": True,
+            "slippage_pct": max(impact, 0.0) * 100,
+            "router": self.router,
+        }
+
+
+class QuoteAggregator:
+    """Asks every venue for a quote at once and keeps what arrives in time.
+
+    Venues still running at ``deadline`` seconds are cancelled and reported
+    as late, so a slow venue never delays the response. A venue without
+    enough liquidity for the whole amount is reported as partial and never
+    chosen. Results are cached for ``cache_ttl`` seconds per (pair, size
+    bucket); buckets are ``bucket_ratio`` wide on a log scale and cached
+    outputs are rescaled to the requested amount. Concurrent identical
+    requests share one fan-out.
+    """
+
+    def __init__(self, venues: List[Any], deadline: float = 0.5, cache_ttl: float = 0.3, bucket_ratio: float = 1.05):
+        self.venues = list(venues)
+        self.deadline = deadline
+        self.bucket_ratio = bucket_ratio
+        self.cache = SingleFlightCache(ttl=cache_ttl, max_entries=4096)
+        self.stats = {"routes": 0, "fanouts": 0, "late": 0, "errors": 0, "no_route": 0}
+        self._venue_latency: Dict[str, List[float]] = {}
+
+    def size_bucket(self, amount: float) -> int:
+        return int(math.floor(math.log(amount) / math.log(self.bucket_ratio))) if amount > 0 else 0
+
+    async def best_route(self, token_in: str, token_out: str, amount_in: float) -> Dict[str, Any]:
+        """Best quote across venues plus every venue's status and latency"""
+        self.stats["routes"] += 1
+        token_in, token_out = token_in.upper(), token_out.upper()
+        key = (token_in, token_out, self.size_bucket(amount_in))
+        loaded = []
+
+        def fan_out() -> Awaitable[Dict[str, Any]]:
+            loaded.append(True)
+            return self._fan_out(token_in, token_out, amount_in)
+
+        result = await self.cache.get(key, fan_out)
+        return self._scaled(result, amount_in, cached=not loaded)
+
+    @staticmethod
+    def _scaled(result: Dict[str, Any], amount_in: float, cached: bool) -> Dict[str, Any]:
+        scale = amount_in / result["amount_in"]
+        quotes = [{**quote, "output": quote["output"] * scale} for quote in result["quotes"]]
+        return {
+            **result,
+            "amount_in": amount_in,
+            "quotes": quotes,
+            "best": quotes[0] if quotes else None,
+            "cached": cached,
+        }
+
+    async def _fan_out(self, token_in: str, token_out: str, amount_in: float) -> Dict[str, Any]:
+        self.stats["fanouts"] += 1
+        started = time.perf_counter()
+        tasks = {
+            asyncio.ensure_future(self._ask(venue, token_in, token_out, amount_in, started)): venue.name
+            for venue in self.venues
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+
+        venues: Dict[str, Dict[str, Any]] = {}
+        quotes = []
+        for task in done:
+            outcome = task.result()
+            venues[outcome["venue"]] = {key: value for key, value in outcome.items() if key not in ("venue", "quote")}
+            if outcome["status"] == "ok":
+                quotes.append({"venue": outcome["venue"], "latency_ms": outcome["latency_ms"], **outcome["quote"]})
+        for task in pending:
+            self.stats["late"] += 1
+            self._record_latency(tasks[task], self.deadline)
+            venues[tasks[task]] = {"status": "late", "latency_ms": round(self.deadline * 1000, 3)}
+
+        quotes.sort(key=lambda quote: quote["output"], reverse=True)
+        if not quotes:
+            self.stats["no_route"] += 1
+        return {
+            "token_in": token_in,
+            "token_out": token_out,
+            "amount_in": amount_in,
+            "quotes": quotes,
+            "venues": venues,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+            "quoted_at": time.time(),
+        }
+
+    async def _ask(self, venue: Any, token_in: str, token_out: str, amount_in: float, started: float) -> Dict[str, Any]:
+        try:
+            quote = await venue.quote(token_in, token_out, amount_in)
+            if quote is None:
+                status = "no_quote"
+            else:
+                status = "ok" if quote.get("complete", True) else "partial"
+            error = None
+        except Exception as e:
+            logger.debug(f"Quote from {venue.name} failed: {e}")
+            self.stats["errors"] += 1
+            quote, status, error = None, "error", str(e)
+        latency = time.perf_counter() - started
+        self._record_latency(venue.name, latency)
+        outcome = {"venue": venue.name, "status": status, "latency_ms": round(latency * 1000, 3), "quote": quote}
+        if error:
+            outcome["error"] = error
+        return outcome
+
+    def _record_latency(self, venue: str, seconds: float) -> None:
+        samples = self._venue_latency.setdefault(venue, [])
+        samples.append(seconds)
+        del samples[:-100]
+
+    def get_stats(self) -> Dict[str, Any]:
+        latency = {
+            name: round(sum(samples) / len(samples) * 1000, 3)
+            for name, samples in self._venue_latency.items() if samples
+        }
+        return {
+            **self.stats,
+            "venues": [venue.name for venue in self.venues],
+            "avg_venue_latency_ms": latency,
+            "cache": self.cache.get_stats(),
+        }
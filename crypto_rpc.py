@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto JSON-RPC Client
+Non-blocking Ethereum JSON-RPC access over the shared HTTP client pool
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from crypto_http import HTTPClientPool
+
+logger = logging.getLogger(__name__)
+
+
+class RPCError(Exception):
+    """JSON-RPC error returned by the node"""
+
+    def __init__(self, error: Dict[str, Any]):
+        self.code = error.get("code")
+        self.error_message = error.get("message", "")
+        super().__init__(f"RPC error {self.code}: {self.error_message}")
+
+
+class AsyncRPCClient:
+    """Async Ethereum JSON-RPC client with request batching.
+
+    Requests go through the shared ``HTTPClientPool`` so they never block the
+    event loop; ``max_concurrency`` bounds in-flight HTTP requests to the node.
+    Calls arriving within ``batch_window`` seconds of each other (up to
+    ``max_batch_size`` of them) are sent as one JSON-RPC batch and each
+    caller gets its own result back. ``max_batch_size=1`` disables batching.
+    """
+
+    def __init__(
+        self,
+        http_pool: HTTPClientPool,
+        url: str,
+        max_concurrency: int = 32,
+        batch_window: float = 0.005,
+        max_batch_size: int = 50,
+    ):
+        self.http_pool = http_pool
+        self.url = url
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._ids = itertools.count(1)
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        self.stats = {"calls": 0, "round_trips": 0, "batches": 0, "batched_calls": 0, "errors": 0}
+
+    async def call(self, method: str, params: Optional[List[Any]] = None) -> Any:
+        """Send one JSON-RPC request (possibly inside a batch) and return its result"""
+        self.stats["calls"] += 1
+        request = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params or []}
+        if self.max_batch_size <= 1:
+            return self._unwrap(await self._post(request))
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _send_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                replies = [await self._post(batch[0][0])]
+            else:
+                self.stats["batches"] += 1
+                self.stats["batched_calls"] += len(batch)
+                replies = await self._post([request for request, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # A node may reject a whole batch with a single error object
+        if isinstance(replies, dict):
+            replies = [{**replies, "id": request["id"]} for request, _ in batch]
+        if not isinstance(replies, list) or not all(isinstance(reply, dict) for reply in replies):
+            # Nothing can be matched to a caller, and an unanswered future would hang forever
+            self.stats["errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RPCError({"code": -32603, "message": f"malformed batch response: {replies!r:.100}"}))
+            return
+        by_id = {reply.get("id"): reply for reply in replies}
+        for request, future in batch:
+            if future.done():
+                continue
+            reply = by_id.get(request["id"])
+            if reply is None:
+                future.set_exception(RPCError({"code": -32603, "message": "missing response in batch"}))
+                continue
+            try:
+                future.set_result(self._unwrap(reply))
+            except RPCError as e:
+                future.set_exception(e)
+
+    def _unwrap(self, reply: Any) -> Any:
+        if not isinstance(reply, dict):
+            self.stats["errors"] += 1
+            raise RPCError({"code": -32603, "message": f"malformed response: {reply!r:.100}"})
+        if "error" in reply:
+            self.stats["errors"] += 1
+            raise RPCError(reply["error"])
+        return reply.get("result")
+
+    async def _post(self, payload: Any) -> Any:
+        async with self._semaphore:
+            self.stats["round_trips"] += 1
+            try:
+                response = await self.http_pool.post(self.url, json=payload)
+                response.raise_for_status()
+                return response.json()
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+
+    async def get_balance(self, address: str, block: str = "latest") -> int:
+        """Return the wei balance of address"""
+        return int(await self.call("eth_getBalance", [address, block]), 16)
+
+    async def eth_call(self, to: str, data: str, block: str = "latest") -> str:
+        """Execute a read-only contract call and return the raw hex result"""
+        return await self.call("eth_call", [{"to": to, "data": data}, block])
+
+    async def block_number(self) -> int:
+        return int(await self.call("eth_blockNumber"), 16)
+
+    async def is_connected(self) -> bool:
+        try:
+            await self.block_number()
+            return True
+        except Exception as e:
+            logger.debug(f"RPC node unreachable: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+
+
+def topic_to_address(topic: str) -> str:
+    """Convert a 32-byte indexed topic into a 0x-prefixed address"""
+    return "0x" + topic[-40:].lower()
+
+
+class HeadTracker:
+    """Polls the node for new blocks and reports the addresses each one touched.
+
+    Listeners are called as ``listener(block_number, touched)`` for every new
+    block, where ``touched`` holds the miner, transaction senders/recipients
+    and ERC-20 Transfer participants. After a gap larger than ``max_catchup``
+    blocks listeners get ``touched=None`` and should drop their state.
+    """
+
+    def __init__(self, rpc: AsyncRPCClient, poll_interval: float = 4.0, max_catchup: int = 32):
+        self.rpc = rpc
+        self.poll_interval = poll_interval
+        self.max_catchup = max_catchup
+        self.head: Optional[int] = None
+        self.last_poll_at: Optional[float] = None
+        self.listeners: List[Callable[[int, Optional[Set[str]]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, listener: Callable[[int, Optional[Set[str]]], None]) -> None:
+        self.listeners.append(listener)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Head tracker poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def poll_once(self) -> None:
+        """Fetch the current head and publish every block since the last poll"""
+        head = await self.rpc.block_number()
+        self.last_poll_at = time.time()
+        if self.head is not None and head <= self.head:
+            return
+        if self.head is None or head - self.head > self.max_catchup:
+            self._publish(head, None)
+            self.head = head
+            return
+
+        numbers = list(range(self.head + 1, head + 1))
+        touched_sets = await asyncio.gather(*(self._touched_addresses(n) for n in numbers))
+        for number, touched in zip(numbers, touched_sets):
+            self._publish(number, touched)
+        self.head = head
+
+    async def _touched_addresses(self, number: int) -> Set[str]:
+        block, logs = await asyncio.gather(
+            self.rpc.call("eth_getBlockByNumber", [hex(number), True]),
+            self.rpc.call("eth_getLogs", [{"fromBlock": hex(number), "toBlock": hex(number), "topics": [TRANSFER_TOPIC]}]),
+        )
+        touched = set()
+        if block:
+            if block.get("miner"):
+                touched.add(block["miner"].lower())
+            for tx in block.get("transactions", []):
+                for field in ("from", "to"):
+                    if tx.get(field):
+                        touched.add(tx[field].lower())
+        for log in logs or []:
+            topics = log.get("topics", [])
+            touched.update(topic_to_address(topic) for topic in topics[1:3])
+        return touched
+
+    def _publish(self, number: int, touched: Optional[Set[str]]) -> None:
+        for listener in self.listeners:
+            try:
+                listener(number, touched)
+            except Exception as e:
+                logger.error(f"Head tracker listener failed: {e}")
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Trading Signals
+Scheduled indicator signals for a symbol universe, served as versioned snapshots
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import time
+import warnings
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from crypto_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+TIMEFRAME_SECONDS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "4h": 14400, "12h": 43200, "1d": 86400}
+SIGNAL_DISCLAIMER = "Trading signals are for informational purposes only. Always DYOR."
+
+# fetch_ohlcv(symbol, timeframe, since_ms, limit) -> [[ms, open, high, low, close, volume], ...]
+OHLCVFetcher = Callable[[str, str, Optional[int], int], Awaitable[List[List[float]]]]
+
+
+class OHLCVCache:
+    """The last ``bars`` candles per symbol.
+
+    ``since`` is the open time of the newest cached candle: it is still
+    forming, so a refresh fetches it again along with anything newer and
+    replaces it.
+    """
+
+    def __init__(self, bars: int = 200):
+        self.bars = bars
+        self._candles: Dict[str, np.ndarray] = {}
+
+    def since(self, symbol: str) -> Optional[int]:
+        candles = self._candles.get(symbol)
+        return int(candles[-1, 0]) if candles is not None and len(candles) else None
+
+    def merge(self, symbol: str, rows: Sequence[Sequence[float]]) -> None:
+        if not rows:
+            return
+        fresh = np.array([row[:6] for row in rows], dtype=np.float64)
+        fresh[np.isnan(fresh[:, 5]), 5] = 0.0  # some venues report no volume
+        cached = self._candles.get(symbol)
+        if cached is not None:
+            fresh = np.concatenate([cached[cached[:, 0] < fresh[0, 0]], fresh])
+        self._candles[symbol] = fresh[-self.bars:]
+
+    def count(self, symbol: str) -> int:
+        candles = self._candles.get(symbol)
+        return len(candles) if candles is not None else 0
+
+    def matrix(self, symbols: Sequence[str]) -> np.ndarray:
+        """(symbols, bars, 6) array, each symbol's candles right-aligned and NaN-padded"""
+        result = np.full((len(symbols), self.bars, 6), np.nan)
+        for index, symbol in enumerate(symbols):
+            candles = self._candles.get(symbol)
+            if candles is not None and len(candles):
+                result[index, -len(candles):] = candles
+        return result
+
+
+def smooth(values: np.ndarray, alpha: float) -> np.ndarray:
+    """Exponential smoothing along axis 1, for every row at once; NaN-padded starts seed at the first value"""
+    result = np.full_like(values, np.nan)
+    state = np.full(values.shape[0], np.nan)
+    for column in range(values.shape[1]):
+        current = values[:, column]
+        state = np.where(np.isnan(state), current, np.where(np.isnan(current), state, alpha * current + (1 - alpha) * state))
+        result[:, column] = state
+    return result
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    return smooth(values, 2.0 / (span + 1))
+
+
+def compute_indicators(candles: np.ndarray) -> Dict[str, np.ndarray]:
+    """Latest indicator values per symbol from a (symbols, bars, 6) candle array"""
+    high, low, close, volume = candles[:, :, 2], candles[:, :, 3], candles[:, :, 4], candles[:, :, 5]
+    previous = np.concatenate([np.full((close.shape[0], 1), np.nan), close[:, :-1]], axis=1)
+
+    fast, slow = ema(close, 12), ema(close, 26)
+    macd = fast - slow
+    histogram = macd - ema(macd, 9)
+
+    change = close - previous
+    gains = smooth(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)), 1 / 14)
+    losses = smooth(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)), 1 / 14)
+    gain, loss = gains[:, -1], losses[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(loss > 0, 100 - 100 / (1 + gain / loss), np.where(gain > 0, 100.0, 50.0))
+
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    atr = smooth(true_range, 1 / 14)[:, -1]
+
+    window = close[:, -20:]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # symbols without enough candles
+        middle = np.nanmean(window, axis=1)
+        deviation = np.nanstd(window, axis=1)
+        average_volume = np.nanmean(volume[:, -21:-1], axis=1)
+    band = 2 * deviation
+    percent_b = np.where(band > 0, (close[:, -1] - (middle - band)) / np.where(band > 0, 2 * band, 1.0), 0.5)
+
+    return {
+        "close": close[:, -1],
+        "ema_fast": fast[:, -1],
+        "ema_slow": slow[:, -1],
+        "macd_histogram": histogram[:, -1],
+        "macd_histogram_previous": histogram[:, -2],
+        "rsi": rsi,
+        "atr": atr,
+        "percent_b": percent_b,
+        "volume_ratio": np.where(average_volume > 0, volume[:, -1] / np.where(average_volume > 0, average_volume, 1.0), np.nan),
+        "bars": np.sum(~np.isnan(close), axis=1),
+    }
+
+
+def score_signals(indicators: Dict[str, np.ndarray]) -> np.ndarray:
+    """Score in [-1, 1] per symbol: trend, momentum, RSI and Bollinger position, weighted"""
+    atr = np.where(indicators["atr"] > 0, indicators["atr"], np.nan)
+    trend = np.sign(indicators["ema_fast"] - indicators["ema_slow"])
+    momentum = np.clip(indicators["macd_histogram"] / atr, -1, 1)
+    rsi = indicators["rsi"]
+    oscillator = np.where(rsi >= 70, -1.0, np.where(rsi <= 30, 1.0, (rsi - 50) / 40))
+    reversion = np.clip(1 - 2 * indicators["percent_b"], -1, 1)
+    score = 0.3 * trend + 0.3 * momentum + 0.25 * oscillator + 0.15 * reversion
+    return np.nan_to_num(score)
+
+
+def _label(score: float) -> str:
+    if score >= 0.5:
+        return "strong_buy"
+    if score >= 0.15:
+        return "buy"
+    if score <= -0.5:
+        return "strong_sell"
+    if score <= -0.15:
+        return "sell"
+    return "neutral"
+
+
+def _reasoning(values: Dict[str, float]) -> str:
+    reasons = ["EMA12 above EMA26" if values["ema_fast"] > values["ema_slow"] else "EMA12 below EMA26"]
+    rising = values["macd_histogram"] > values["macd_histogram_previous"]
+    reasons.append(f"MACD histogram {'rising' if rising else 'falling'}")
+    rsi = values["rsi"]
+    reasons.append(f"RSI {rsi:.0f}" + (" overbought" if rsi >= 70 else " oversold" if rsi <= 30 else ""))
+    if values["percent_b"] >= 1:
+        reasons.append("price above upper Bollinger band")
+    elif values["percent_b"] <= 0:
+        reasons.append("price below lower Bollinger band")
+    if not math.isnan(values["volume_ratio"]) and values["volume_ratio"] >= 1.5:
+        reasons.append(f"volume {values['volume_ratio']:.1f}x average")
+    return ", ".join(reasons)
+
+
+def build_signals(symbols: Sequence[str], candles: np.ndarray, timeframe: str, min_bars: int = 35) -> List[Dict[str, Any]]:
+    """One signal per symbol with at least min_bars candles"""
+    indicators = compute_indicators(candles)
+    scores = score_signals(indicators)
+    signals = []
+    for index, symbol in enumerate(symbols):
+        if indicators["bars"][index] < min_bars:
+            continue
+        values = {name: float(column[index]) for name, column in indicators.items()}
+        label = _label(float(scores[index]))
+        close, atr = values["close"], values["atr"]
+        direction = 1 if label.endswith("buy") else -1 if label.endswith("sell") else 0
+        signals.append({
+            "token": symbol,
+            "signal": label,
+            "confidence": int(round(50 + 45 * abs(float(scores[index])))),
+            "reasoning": _reasoning(values),
+            "timeframe": timeframe,
+            "entry_price": round(close, 8),
+            "targets": [round(close + direction * atr * multiple, 8) for multiple in (1, 2, 3)] if direction else [],
+            "stop_loss": round(close - direction * atr * 1.5, 8) if direction else 0,
+            "indicators": {
+                "rsi": round(values["rsi"], 2),
+                "macd_histogram": round(values["macd_histogram"], 8),
+                "atr": round(atr, 8),
+                "percent_b": round(values["percent_b"], 4),
+            },
+        })
+    return signals
+
+
+class SignalSnapshot:
+    """One published set of signals, pre-serialized with its ETag"""
+
+    __slots__ = ("version", "etag", "body", "signals", "generated_at")
+
+    def __init__(self, version: int, signals: List[Dict[str, Any]], timeframe: str, digest: str):
+        self.version = version
+        self.signals = signals
+        self.generated_at = datetime.now().isoformat()
+        self.etag = f'"{version}-{digest[:16]}"'
+        self.body = json.dumps({
+            "signals": signals,
+            "version": version,
+            "timeframe": timeframe,
+            "generated_at": self.generated_at,
+            "disclaimer": SIGNAL_DISCLAIMER,
+        }).encode()
+
+
+class SignalScheduler:
+    """Recomputes trading signals for a symbol universe every ``interval`` seconds.
+
+    Each cycle fetches only the candles since the last cycle for every
+    symbol concurrently, computes indicators for all symbols at once and
+    publishes a new snapshot version when the signals changed. Readers get
+    the current snapshot without any computation. Fetch, compute and whole
+    cycle durations are kept per cycle to size the universe against the
+    interval.
+    """
+
+    def __init__(
+        self,
+        fetch_ohlcv: OHLCVFetcher,
+        symbols: Sequence[str],
+        timeframe: str = "1h",
+        bars: int = 200,
+        interval: float = 60.0,
+        min_bars: int = 35,
+    ):
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe: {timeframe} (choose from {', '.join(TIMEFRAME_SECONDS)})")
+        self.fetch_ohlcv = fetch_ohlcv
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.timeframe = timeframe
+        self.interval = interval
+        self.min_bars = min_bars
+        self.cache = OHLCVCache(bars=bars)
+        self.snapshot = SignalSnapshot(0, [], timeframe, hashlib.sha1(b"[]").hexdigest())
+        self._digest: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._compute_ms: List[float] = []
+        self.stats = {"cycles": 0, "fetch_errors": 0, "last_fetch_ms": 0.0, "last_compute_ms": 0.0, "last_cycle_ms": 0.0}
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Trading signal refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> SignalSnapshot:
+        """Run one cycle and return the current snapshot"""
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.fetch_ohlcv(symbol, self.timeframe, self.cache.since(symbol), self.cache.bars) for symbol in self.symbols),
+            return_exceptions=True,
+        )
+        for symbol, rows in zip(self.symbols, results):
+            if isinstance(rows, Exception):
+                self.stats["fetch_errors"] += 1
+                logger.debug(f"OHLCV fetch for {symbol} failed: {rows}")
+            else:
+                self.cache.merge(symbol, rows)
+        fetched = time.perf_counter()
+
+        signals = build_signals(self.symbols, self.cache.matrix(self.symbols), self.timeframe, self.min_bars)
+        computed = time.perf_counter()
+        digest = hashlib.sha1(json.dumps(signals, sort_keys=True).encode()).hexdigest()
+        if digest != self._digest:
+            self._digest = digest
+            self.snapshot = SignalSnapshot(self.snapshot.version + 1, signals, self.timeframe, digest)
+
+        compute_ms = (computed - fetched) * 1000
+        self._compute_ms.append(compute_ms)
+        del self._compute_ms[:-100]
+        self.stats["cycles"] += 1
+        self.stats["last_fetch_ms"] = round((fetched - started) * 1000, 3)
+        self.stats["last_compute_ms"] = round(compute_ms, 3)
+        self.stats["last_cycle_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return self.snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "symbols": len(self.symbols),
+            "signals": len(self.snapshot.signals),
+            "version": self.snapshot.version,
+            "p99_compute_ms": round(percentile(self._compute_ms, 99), 3),
+            "interval": self.interval,
+        }
@@ -0,0 +1,911 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Shared State
+Pluggable state layer: in-process backend for one worker, Redis for many
+"""
+
+import asyncio
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from crypto_jobs import FAILED, FINISHED as FINISHED_STATUSES, Job, JobFunction, JobLimitError, JobQueue
+from crypto_storage import PoolActivityLog, TradeHistoryStore
+
+logger = logging.getLogger(__name__)
+
+try:
+    import redis.asyncio as redis_asyncio
+    REDIS_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on the environment
+    redis_asyncio = None
+    REDIS_AVAILABLE = False
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _decode(value: Any) -> Any:
+    return json.loads(value)
+
+
+BATCH_METHODS = ("get", "update", "increment", "append", "slice", "trim")
+
+
+class StateBackend(ABC):
+    """Storage primitives shared by every backend worker.
+
+    Three kinds of keys live in separate key spaces per namespace:
+
+    - documents: flat field -> JSON value maps, updated field by field
+    - members: insertion-ordered sets of strings
+    - lists: append-only sequences of JSON values addressed by index
+
+    Values are JSON-encoded per field in both backends so an in-process
+    deployment behaves exactly like a Redis one, and documents returned are
+    always copies: mutate through ``update``/``increment``, not in place.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.stats = {"reads": 0, "writes": 0, "round_trips": 0}
+
+    async def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        return (await self.get_many(namespace, [key]))[0]
+
+    @abstractmethod
+    async def get_many(self, namespace: str, keys: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """Documents for keys in order (None where missing)"""
+
+    @abstractmethod
+    async def put(self, namespace: str, key: str, document: Dict[str, Any]) -> None:
+        """Replace a document"""
+
+    async def update(self, namespace: str, key: str, fields: Dict[str, Any]) -> None:
+        """Set some fields of a document, creating it if needed"""
+        await self.update_many(namespace, {key: fields})
+
+    @abstractmethod
+    async def update_many(self, namespace: str, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Set fields of several documents in one round trip"""
+
+    @abstractmethod
+    async def increment(self, namespace: str, key: str, field: str, amount: float = 1) -> float:
+        """Atomically add amount to a numeric document field and return the new value"""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str) -> bool:
+        """Delete a document; False if it did not exist"""
+
+    @abstractmethod
+    async def keys(self, namespace: str) -> List[str]:
+        """Keys of every document in namespace"""
+
+    @abstractmethod
+    async def next_id(self, namespace: str) -> int:
+        """Next value of a counter shared by all workers (starts at 1)"""
+
+    @abstractmethod
+    async def add_member(self, namespace: str, key: str, member: str) -> bool:
+        """Add member to an ordered set; False if it was already present"""
+
+    @abstractmethod
+    async def remove_member(self, namespace: str, key: str, member: str) -> bool:
+        """Remove member from an ordered set; False if it was absent"""
+
+    @abstractmethod
+    async def members(self, namespace: str, key: str) -> List[str]:
+        """Members of an ordered set in insertion order"""
+
+    @abstractmethod
+    async def append(self, namespace: str, key: str, item: Any) -> int:
+        """Append to a list and return the item's index"""
+
+    @abstractmethod
+    async def slice(self, namespace: str, key: str, start: int, stop: int) -> List[Any]:
+        """Items [start, stop) of a list"""
+
+    @abstractmethod
+    async def length(self, namespace: str, key: str) -> int:
+        """Number of items in a list"""
+
+    @abstractmethod
+    async def trim(self, namespace: str, key: str, count: int) -> None:
+        """Drop the first count items of a list"""
+
+    async def batch(self, operations: Iterable[Tuple[Any, ...]]) -> List[Any]:
+        """Run ``(method, namespace, key, *args)`` operations in order and return their results.
+
+        ``method`` is one of ``BATCH_METHODS``. The Redis backend sends the
+        whole batch as one MULTI/EXEC round trip, so other workers see all of
+        its writes or none, and its reads see no other worker's writes.
+        """
+        results = []
+        for method, *args in operations:
+            if method not in BATCH_METHODS:
+                raise ValueError(f"{method} cannot be batched")
+            results.append(await getattr(self, method)(*args))
+        return results
+
+    async def close(self) -> None:
+        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, **self.stats}
+
+
+class MemoryStateBackend(StateBackend):
+    """Single-process backend: dictionaries of encoded fields"""
+
+    name = "memory"
+
+    def __init__(self):
+        super().__init__()
+        self._documents: Dict[str, Dict[str, Dict[str, str]]] = {}
+        self._members: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self._lists: Dict[Tuple[str, str], List[str]] = {}
+        self._counters: Dict[str, int] = {}
+
+    async def get_many(self, namespace: str, keys: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        documents = self._documents.get(namespace, {})
+        results = []
+        for key in keys:
+            self.stats["reads"] += 1
+            fields = documents.get(key)
+            results.append({name: _decode(value) for name, value in fields.items()} if fields else None)
+        return results
+
+    async def put(self, namespace: str, key: str, document: Dict[str, Any]) -> None:
+        self.stats["writes"] += 1
+        self._documents.setdefault(namespace, {})[key] = {name: _encode(value) for name, value in document.items()}
+
+    async def update_many(self, namespace: str, updates: Dict[str, Dict[str, Any]]) -> None:
+        documents = self._documents.setdefault(namespace, {})
+        for key, fields in updates.items():
+            self.stats["writes"] += 1
+            document = documents.setdefault(key, {})
+            for name, value in fields.items():
+                document[name] = _encode(value)
+
+    async def increment(self, namespace: str, key: str, field: str, amount: float = 1) -> float:
+        self.stats["writes"] += 1
+        document = self._documents.setdefault(namespace, {}).setdefault(key, {})
+        value = _decode(document.get(field, "0")) + amount
+        document[field] = _encode(value)
+        return value
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        self.stats["writes"] += 1
+        return self._documents.get(namespace, {}).pop(key, None) is not None
+
+    async def keys(self, namespace: str) -> List[str]:
+        self.stats["reads"] += 1
+        return list(self._documents.get(namespace, {}))
+
+    async def next_id(self, namespace: str) -> int:
+        self.stats["writes"] += 1
+        self._counters[namespace] = self._counters.get(namespace, 0) + 1
+        return self._counters[namespace]
+
+    async def add_member(self, namespace: str, key: str, member: str) -> bool:
+        self.stats["writes"] += 1
+        members = self._members.setdefault((namespace, key), {})
+        if member in members:
+            return False
+        members[member] = None
+        return True
+
+    async def remove_member(self, namespace: str, key: str, member: str) -> bool:
+        self.stats["writes"] += 1
+        members = self._members.get((namespace, key), {})
+        if member not in members:
+            return False
+        del members[member]
+        return True
+
+    async def members(self, namespace: str, key: str) -> List[str]:
+        self.stats["reads"] += 1
+        return list(self._members.get((namespace, key), {}))
+
+    async def append(self, namespace: str, key: str, item: Any) -> int:
+        self.stats["writes"] += 1
+        items = self._lists.setdefault((namespace, key), [])
+        items.append(_encode(item))
+        return len(items) - 1
+
+    async def slice(self, namespace: str, key: str, start: int, stop: int) -> List[Any]:
+        self.stats["reads"] += 1
+        return [_decode(item) for item in self._lists.get((namespace, key), [])[max(start, 0):max(stop, 0)]]
+
+    async def length(self, namespace: str, key: str) -> int:
+        self.stats["reads"] += 1
+        return len(self._lists.get((namespace, key), []))
+
+    async def trim(self, namespace: str, key: str, count: int) -> None:
+        self.stats["writes"] += 1
+        del self._lists.get((namespace, key), [])[:max(count, 0)]
+
+
+class RedisStateBackend(StateBackend):
+    """Redis backend for running several workers behind a load balancer.
+
+    Documents are hashes (one JSON value per field, so ``update`` and
+    ``increment`` touch single fields atomically), members are sorted sets
+    scored by insertion time, and lists are Redis lists. Multi-key reads and
+    writes go out as one pipelined round trip.
+    """
+
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379", prefix: str = "coresai", client: Any = None):
+        super().__init__()
+        if client is None:
+            if not REDIS_AVAILABLE:
+                raise RuntimeError("redis is not installed; pip install redis")
+            client = redis_asyncio.from_url(url, decode_responses=True)
+        self.redis = client
+        self.prefix = prefix
+
+    def _document_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:doc:{namespace}:{key}"
+
+    def _index_key(self, namespace: str) -> str:
+        return f"{self.prefix}:keys:{namespace}"
+
+    def _members_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:members:{namespace}:{key}"
+
+    def _list_key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:list:{namespace}:{key}"
+
+    async def get_many(self, namespace: str, keys: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        keys = list(keys)
+        if not keys:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.hgetall(self._document_key(namespace, key))
+            replies = await pipe.execute()
+        self.stats["reads"] += len(keys)
+        self.stats["round_trips"] += 1
+        return [{name: _decode(value) for name, value in fields.items()} if fields else None for fields in replies]
+
+    async def put(self, namespace: str, key: str, document: Dict[str, Any]) -> None:
+        document_key = self._document_key(namespace, key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(document_key)
+            if document:
+                pipe.hset(document_key, mapping={name: _encode(value) for name, value in document.items()})
+            pipe.sadd(self._index_key(namespace), key)
+            await pipe.execute()
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+
+    async def update_many(self, namespace: str, updates: Dict[str, Dict[str, Any]]) -> None:
+        if not updates:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, fields in updates.items():
+                pipe.hset(self._document_key(namespace, key), mapping={name: _encode(value) for name, value in fields.items()})
+            pipe.sadd(self._index_key(namespace), *updates)
+            await pipe.execute()
+        self.stats["writes"] += len(updates)
+        self.stats["round_trips"] += 1
+
+    async def increment(self, namespace: str, key: str, field: str, amount: float = 1) -> float:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hincrbyfloat(self._document_key(namespace, key), field, amount)
+            pipe.sadd(self._index_key(namespace), key)
+            value, _ = await pipe.execute()
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        return _decode(value) if isinstance(value, str) else value
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._document_key(namespace, key))
+            pipe.srem(self._index_key(namespace), key)
+            deleted, _ = await pipe.execute()
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        return bool(deleted)
+
+    async def keys(self, namespace: str) -> List[str]:
+        self.stats["reads"] += 1
+        self.stats["round_trips"] += 1
+        return sorted(await self.redis.smembers(self._index_key(namespace)))
+
+    async def next_id(self, namespace: str) -> int:
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        return int(await self.redis.incr(f"{self.prefix}:id:{namespace}"))
+
+    async def add_member(self, namespace: str, key: str, member: str) -> bool:
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        return bool(await self.redis.zadd(self._members_key(namespace, key), {member: time.time()}, nx=True))
+
+    async def remove_member(self, namespace: str, key: str, member: str) -> bool:
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        return bool(await self.redis.zrem(self._members_key(namespace, key), member))
+
+    async def members(self, namespace: str, key: str) -> List[str]:
+        self.stats["reads"] += 1
+        self.stats["round_trips"] += 1
+        return list(await self.redis.zrange(self._members_key(namespace, key), 0, -1))
+
+    async def append(self, namespace: str, key: str, item: Any) -> int:
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        return int(await self.redis.rpush(self._list_key(namespace, key), _encode(item))) - 1
+
+    async def slice(self, namespace: str, key: str, start: int, stop: int) -> List[Any]:
+        start, stop = max(start, 0), max(stop, 0)
+        if stop <= start:
+            return []
+        self.stats["reads"] += 1
+        self.stats["round_trips"] += 1
+        return [_decode(item) for item in await self.redis.lrange(self._list_key(namespace, key), start, stop - 1)]
+
+    async def length(self, namespace: str, key: str) -> int:
+        self.stats["reads"] += 1
+        self.stats["round_trips"] += 1
+        return int(await self.redis.llen(self._list_key(namespace, key)))
+
+    async def trim(self, namespace: str, key: str, count: int) -> None:
+        self.stats["writes"] += 1
+        self.stats["round_trips"] += 1
+        await self.redis.ltrim(self._list_key(namespace, key), max(count, 0), -1)
+
+    async def batch(self, operations: Iterable[Tuple[Any, ...]]) -> List[Any]:
+        operations = list(operations)
+        if not operations:
+            return []
+        positions = []  # index of each operation's reply among the queued commands
+        queued = 0
+        async with self.redis.pipeline(transaction=True) as pipe:
+            for method, namespace, key, *args in operations:
+                positions.append(queued)
+                if method == "get":
+                    pipe.hgetall(self._document_key(namespace, key))
+                elif method == "update":
+                    if args[0]:
+                        pipe.hset(self._document_key(namespace, key), mapping={name: _encode(value) for name, value in args[0].items()})
+                        queued += 1
+                    pipe.sadd(self._index_key(namespace), key)
+                elif method == "increment":
+                    pipe.hincrbyfloat(self._document_key(namespace, key), args[0], args[1] if len(args) > 1 else 1)
+                    pipe.sadd(self._index_key(namespace), key)
+                    queued += 1
+                elif method == "append":
+                    pipe.rpush(self._list_key(namespace, key), _encode(args[0]))
+                elif method == "slice":
+                    start, stop = max(args[0], 0), max(args[1], 0)
+                    pipe.lrange(self._list_key(namespace, key), *((start, stop - 1) if stop > start else (1, 0)))
+                elif method == "trim":
+                    pipe.ltrim(self._list_key(namespace, key), max(args[0], 0), -1)
+                else:
+                    raise ValueError(f"{method} cannot be batched")
+                queued += 1
+            replies = await pipe.execute()
+        self.stats["round_trips"] += 1
+
+        results: List[Any] = []
+        for (method, *_), position in zip(operations, positions):
+            reply = replies[position]
+            if method in ("get", "slice"):
+                self.stats["reads"] += 1
+            else:
+                self.stats["writes"] += 1
+            if method == "get":
+                results.append({name: _decode(value) for name, value in reply.items()} if reply else None)
+            elif method == "increment":
+                results.append(_decode(reply) if isinstance(reply, str) else reply)
+            elif method == "append":
+                results.append(int(reply) - 1)
+            elif method == "slice":
+                results.append([_decode(item) for item in reply])
+            else:
+                results.append(None)
+        return results
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+def create_state_backend(url: str) -> StateBackend:
+    """``memory`` (or empty) for in-process state, a redis:// URL for shared state"""
+    if not url or url == "memory":
+        return MemoryStateBackend()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        logger.info(f"Using Redis shared state at {url.split('@')[-1]}")
+        return RedisStateBackend(url)
+    raise ValueError(f"Unsupported state backend URL: {url}")
+
+
+class SharedTradeHistory:
+    """Trade history in state-backend lists, one list per user.
+
+    Row shape and cursor semantics match ``TradeHistoryStore``: newest first,
+    the cursor is the sequence number to continue below, and time bounds are
+    found by binary search since each list is in append (time) order.
+    """
+
+    NAMESPACE = "trade_history"
+
+    def __init__(self, state: StateBackend):
+        self.state = state
+
+    async def append(
+        self,
+        user: str,
+        transaction_hash: str,
+        token_in: str,
+        token_out: str,
+        amount_in: float,
+        timestamp: float,
+        status: str = "completed",
+        amount_out: float = 0.0,
+    ) -> int:
+        """Append a trade and return its sequence number"""
+        return await self.state.append(
+            self.NAMESPACE, user, [timestamp, amount_in, token_in, token_out, status, transaction_hash, amount_out]
+        )
+
+    async def page(
+        self,
+        user: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return trades newest first, plus the cursor for the next (older) page"""
+        count = await self.count(user)
+        if count == 0 or limit <= 0:
+            return [], None
+
+        low = await self._seq_at_time(user, count, start) if start is not None else 0
+        high = await self._seq_at_time(user, count, end) if end is not None else count
+        if cursor is not None:
+            high = min(high, int(cursor))
+        first = max(low, high - limit)
+        if first >= high:
+            return [], None
+
+        items = await self.state.slice(self.NAMESPACE, user, first, high)
+        rows = [
+            {
+                "seq": first + offset,
+                "transaction_hash": item[5],
+                "token_in": item[2],
+                "token_out": item[3],
+                "amount_in": item[1],
+                "amount_out": item[6] if len(item) > 6 else 0.0,  # rows written before amount_out was recorded
+                "timestamp": datetime.fromtimestamp(item[0]).isoformat(),
+                "status": item[4],
+            }
+            for offset, item in enumerate(items)
+        ]
+        rows.reverse()
+        return rows, (str(first) if first > low else None)
+
+    async def since(self, user: str, seq: int) -> List[Tuple[float, float, float, str, str, str]]:
+        """Trades from sequence number seq on, oldest first, as
+        (timestamp, amount_in, amount_out, token_in, token_out, status)"""
+        count = await self.count(user)
+        if seq >= count:
+            return []
+        items = await self.state.slice(self.NAMESPACE, user, seq, count)
+        return [
+            (item[0], item[1], item[6] if len(item) > 6 else 0.0, item[2], item[3], item[4])
+            for item in items
+        ]
+
+    async def _seq_at_time(self, user: str, count: int, timestamp: float) -> int:
+        """First sequence number whose timestamp is >= timestamp"""
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            item = (await self.state.slice(self.NAMESPACE, user, mid, mid + 1))[0]
+            if item[0] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    async def count(self, user: str) -> int:
+        return await self.state.length(self.NAMESPACE, user)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": self.state.name}
+
+    def close(self) -> None:
+        pass
+
+
+class LocalTradeHistory:
+    """Async facade over an in-process ``TradeHistoryStore``"""
+
+    def __init__(self, store: TradeHistoryStore):
+        self.store = store
+
+    async def append(self, user: str, *args: Any, **kwargs: Any) -> int:
+        return self.store.append(user, *args, **kwargs)
+
+    async def page(self, user: str, **kwargs: Any) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return self.store.page(user, **kwargs)
+
+    async def since(self, user: str, seq: int) -> List[Tuple[float, float, float, str, str, str]]:
+        return self.store.since(user, seq)
+
+    async def count(self, user: str) -> int:
+        return self.store.count(user)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self.store.get_stats()}
+
+    def close(self) -> None:
+        self.store.close()
+
+
+class SharedPoolActivityLog:
+    """Pool activity in state-backend lists, one list per pool.
+
+    Entry shape, cursors, compaction and the summary match
+    ``PoolActivityLog``: entries fill ``segment_size``-entry segments and,
+    with ``max_segments`` set, the oldest segment is trimmed from the list
+    once exceeded and counted under ``compacted_entries``. The summary
+    document holds the counters and ``base``, the sequence number of the
+    first item still in the list. Each append is one batched round trip.
+    """
+
+    NAMESPACE = "pool_activity"
+    SUMMARY_NAMESPACE = "pool_activity_summary"
+
+    def __init__(self, state: StateBackend, segment_size: int = 500, max_segments: int = 0):
+        self.state = state
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+
+    async def append(self, pool_id: str, action: str, timestamp: float, **fields: Any) -> Dict[str, Any]:
+        """Append an entry and return it"""
+        iso_time = datetime.fromtimestamp(timestamp).isoformat()
+        operations = [
+            ("append", self.NAMESPACE, pool_id, [timestamp, action, fields]),
+            ("increment", self.SUMMARY_NAMESPACE, pool_id, "entries", 1),
+            ("increment", self.SUMMARY_NAMESPACE, pool_id, f"action:{action}", 1),
+            ("update", self.SUMMARY_NAMESPACE, pool_id, {"last_activity": iso_time}),
+        ]
+        if action in ("deposit", "withdraw"):
+            total = "deposited" if action == "deposit" else "withdrawn"
+            operations.append(("increment", self.SUMMARY_NAMESPACE, pool_id, total, fields.get("amount", 0)))
+        seq = int((await self.state.batch(operations))[1]) - 1
+        if seq == 0:
+            await self.state.update(self.SUMMARY_NAMESPACE, pool_id, {"first_activity": iso_time})
+        if self.max_segments and seq % self.segment_size == 0 and seq >= self.max_segments * self.segment_size:
+            # This entry opened one segment too many; exactly one appender sees that seq
+            await self.state.batch([
+                ("trim", self.NAMESPACE, pool_id, self.segment_size),
+                ("increment", self.SUMMARY_NAMESPACE, pool_id, "base", self.segment_size),
+            ])
+        return self._entry(seq, [timestamp, action, fields])
+
+    async def page(
+        self,
+        pool_id: str,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        since: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return up to limit entries from cursor/since onwards and the next cursor"""
+        base, count = await self._bounds(pool_id)
+        if count == 0:
+            return [], 0
+        seq = max(cursor or 0, base)
+        if since is not None:
+            seq = max(seq, await self._seq_at_time(pool_id, base, count, since))
+        seq, items = await self._slice(pool_id, base, seq, min(count, seq + limit))
+        return [self._entry(seq + offset, item) for offset, item in enumerate(items)], seq + len(items)
+
+    async def _bounds(self, pool_id: str) -> Tuple[int, int]:
+        """First stored and next sequence numbers"""
+        document = await self.state.get(self.SUMMARY_NAMESPACE, pool_id) or {}
+        return int(document.get("base", 0)), int(document.get("entries", 0))
+
+    async def _slice(self, pool_id: str, base: int, first: int, stop: int) -> Tuple[int, List[Any]]:
+        """Items with sequence numbers [first, stop), clamped to the first stored one"""
+        while True:
+            first = max(first, base)
+            if stop <= first:
+                return first, []
+            items, document = await self.state.batch([
+                ("slice", self.NAMESPACE, pool_id, first - base, stop - base),
+                ("get", self.SUMMARY_NAMESPACE, pool_id),
+            ])
+            current = int((document or {}).get("base", 0))
+            if current == base:
+                return first, items
+            base = current  # another worker trimmed the list since base was read
+
+    async def _seq_at_time(self, pool_id: str, base: int, count: int, timestamp: float) -> int:
+        """First sequence number whose timestamp is >= timestamp"""
+        low, high = base, count
+        while low < high:
+            mid = (low + high) // 2
+            items = await self.state.slice(self.NAMESPACE, pool_id, mid - base, mid - base + 1)
+            if not items or items[0][0] < timestamp:  # an empty probe was trimmed away meanwhile
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    async def count(self, pool_id: str) -> int:
+        return (await self._bounds(pool_id))[1]
+
+    async def first_available(self, pool_id: str) -> int:
+        """Lowest sequence number still stored (entries before it were compacted)"""
+        return (await self._bounds(pool_id))[0]
+
+    async def recent(self, pool_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Newest entries, newest first"""
+        base, count = await self._bounds(pool_id)
+        first, items = await self._slice(pool_id, base, count - limit, count)
+        return [self._entry(first + offset, item) for offset, item in reversed(list(enumerate(items)))]
+
+    async def summary(self, pool_id: str) -> Dict[str, Any]:
+        document = await self.state.get(self.SUMMARY_NAMESPACE, pool_id) or {}
+        return {
+            "entries": int(document.get("entries", 0)),
+            "action_counts": {
+                name[len("action:"):]: int(value) for name, value in document.items() if name.startswith("action:")
+            },
+            "deposited": float(document.get("deposited", 0.0)),
+            "withdrawn": float(document.get("withdrawn", 0.0)),
+            "first_activity": document.get("first_activity"),
+            "last_activity": document.get("last_activity"),
+            "compacted_entries": int(document.get("base", 0)),
+        }
+
+    @staticmethod
+    def _entry(seq: int, item: List[Any]) -> Dict[str, Any]:
+        timestamp, action, fields = item
+        return {"seq": seq, "action": action, "timestamp": datetime.fromtimestamp(timestamp).isoformat(), **fields}
+
+
+class LocalPoolActivityLog:
+    """Async facade over an in-process ``PoolActivityLog``"""
+
+    def __init__(self, log: PoolActivityLog):
+        self.log = log
+
+    async def append(self, pool_id: str, action: str, timestamp: float, **fields: Any) -> Dict[str, Any]:
+        return self.log.append(pool_id, action, timestamp, **fields)
+
+    async def page(self, pool_id: str, **kwargs: Any) -> Tuple[List[Dict[str, Any]], int]:
+        return self.log.page(pool_id, **kwargs)
+
+    async def count(self, pool_id: str) -> int:
+        return self.log.count(pool_id)
+
+    async def first_available(self, pool_id: str) -> int:
+        return self.log.first_available(pool_id)
+
+    async def recent(self, pool_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return self.log.recent(pool_id, limit=limit)
+
+    async def summary(self, pool_id: str) -> Dict[str, Any]:
+        return self.log.summary(pool_id)
+
+
+class SharedJobs:
+    """Background jobs every worker can see, on top of a per-worker ``JobQueue``.
+
+    A job runs on the queue of the worker that accepted it, and each change
+    is mirrored to its "jobs" document, so any worker can list, poll and
+    stream it. Per-user limits count the owner's unfinished documents whose
+    ``lease_until`` has not passed; the owning worker renews that lease every
+    ``poll_interval`` seconds, so jobs of a worker that died stop counting
+    (and read as failed) ``lease`` seconds later. The check is not atomic, so
+    submits racing on different workers can briefly exceed the limit.
+    Cancelling a job held by another worker sets ``cancel_requested`` on its
+    document; the owning worker checks for that every ``poll_interval``
+    seconds, which is also how often remote streams poll for progress.
+    Finished documents expire ``queue.retention`` seconds after finishing.
+    """
+
+    NAMESPACE = "jobs"
+    OWNERS = "job_owners"
+
+    def __init__(
+        self,
+        state: StateBackend,
+        queue: JobQueue,
+        max_per_user: int = 2,
+        poll_interval: float = 0.5,
+        lease: float = 10.0,
+    ):
+        self.state = state
+        self.queue = queue
+        self.max_per_user = max_per_user
+        self.poll_interval = poll_interval
+        self.lease = max(lease, 2 * poll_interval)
+        queue.on_change = self._changed
+        self._local: Set[str] = set()  # jobs of this worker whose final state is not yet published
+        self._dirty: Set[str] = set()
+        self._publishers: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"publishes": 0, "publish_errors": 0, "remote_cancels": 0}
+
+    def start(self) -> None:
+        self.queue.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._watch_cancellations())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.queue.stop()
+        # Publish the cancellations so other workers stop reporting the jobs as running
+        while self._publishers:
+            await asyncio.wait(list(self._publishers.values()))
+
+    async def submit(self, owner: str, kind: str, func: JobFunction, *args: Any) -> Dict[str, Any]:
+        """Queue ``func`` on this worker; raises JobLimitError at capacity"""
+        if await self.active(owner) >= self.max_per_user:
+            self.queue.stats["rejected"] += 1
+            raise JobLimitError(f"At most {self.max_per_user} jobs may be queued or running per user", per_user=True)
+        job = self.queue.submit(owner, kind, func, *args)
+        self._local.add(job.id)
+        self._changed(job)
+        await self._publishers[job.id]  # the document exists before listings can find the job
+        await self.state.add_member(self.OWNERS, owner, job.id)
+        return job.to_dict()
+
+    async def active(self, owner: str) -> int:
+        """The owner's queued or running jobs on live workers"""
+        job_ids = await self.state.members(self.OWNERS, owner)
+        documents = await self.state.get_many(self.NAMESPACE, job_ids) if job_ids else []
+        return sum(
+            1 for document in documents
+            if document is not None and document["status"] not in FINISHED_STATUSES and not self._abandoned(document)
+        )
+
+    async def get(self, job_id: str, owner: str) -> Optional[Dict[str, Any]]:
+        """The job, or None when unknown, expired or owned by someone else"""
+        job = self.queue.get(job_id, owner)
+        if job is not None:
+            return job.to_dict()
+        document = await self.state.get(self.NAMESPACE, job_id)
+        if document is None or document.get("owner") != owner or self._expired(document):
+            return None
+        return self._public(document)
+
+    async def jobs(self, owner: str) -> List[Dict[str, Any]]:
+        """The owner's jobs on every worker, newest first"""
+        job_ids = await self.state.members(self.OWNERS, owner)
+        jobs = []
+        for job_id, document in zip(job_ids, await self.state.get_many(self.NAMESPACE, job_ids)):
+            if document is None or self._expired(document):
+                await self.state.remove_member(self.OWNERS, owner, job_id)
+                await self.state.delete(self.NAMESPACE, job_id)
+                continue
+            local = self.queue.get(job_id, owner)
+            jobs.append(local.to_dict() if local is not None else self._public(document))
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    async def cancel(self, job_id: str, owner: str) -> bool:
+        """Cancel a queued or running job on any worker; False when it already finished or is not found"""
+        if self.queue.get(job_id, owner) is not None:
+            return self.queue.cancel(job_id, owner)
+        job = await self.get(job_id, owner)
+        if job is None or job["status"] in FINISHED_STATUSES:
+            return False
+        await self.state.update(self.NAMESPACE, job_id, {"cancel_requested": True})
+        return True
+
+    async def watch(self, job_id: str, owner: str, heartbeat: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield the job on every change until it finishes, and None after ``heartbeat`` idle seconds"""
+        version, idle = -1, 0.0
+        while True:
+            local = self.queue.get(job_id, owner)
+            job = local.to_dict() if local is not None else await self.get(job_id, owner)
+            if job is None:
+                return
+            if job["version"] != version:
+                version, idle = job["version"], 0.0
+                yield job
+                if job["status"] in FINISHED_STATUSES:
+                    return
+            elif local is not None:
+                if not await local.wait_changed(timeout=heartbeat):
+                    yield None
+            else:
+                await asyncio.sleep(self.poll_interval)
+                idle += self.poll_interval
+                if idle >= heartbeat:
+                    idle = 0.0
+                    yield None
+
+    def _changed(self, job: Job) -> None:
+        # One publisher per job writes the latest state, so updates never land out of order
+        self._dirty.add(job.id)
+        if job.id not in self._publishers:
+            self._publishers[job.id] = asyncio.ensure_future(self._publish(job))
+
+    async def _publish(self, job: Job) -> None:
+        try:
+            while job.id in self._dirty:
+                self._dirty.discard(job.id)
+                document = {**job.to_dict(), "owner": job.owner}
+                if job.finished:
+                    document["expires_at"] = job.finished_at + self.queue.retention
+                else:
+                    document["lease_until"] = time.time() + self.lease
+                await self.state.update(self.NAMESPACE, job.id, document)
+                self.stats["publishes"] += 1
+                if job.finished:
+                    self._local.discard(job.id)
+        except Exception as e:
+            self.stats["publish_errors"] += 1
+            logger.error(f"Failed to publish job {job.id}: {e}")
+        finally:
+            self._publishers.pop(job.id, None)
+
+    async def _watch_cancellations(self) -> None:
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            running = []
+            for job_id in list(self._local):
+                job = self.queue.get(job_id)
+                if job is None:
+                    self._local.discard(job_id)
+                elif not job.finished:
+                    running.append(job_id)
+                elif job_id not in self._publishers:
+                    self._changed(job)  # the final publish failed; retry so the job stops counting
+            if not running:
+                continue
+            try:
+                documents = await self.state.get_many(self.NAMESPACE, running)
+                lease_until = time.time() + self.lease
+                await self.state.update_many(self.NAMESPACE, {job_id: {"lease_until": lease_until} for job_id in running})
+            except Exception as e:
+                logger.error(f"Failed to check for job cancellations: {e}")
+                continue
+            for job_id, document in zip(running, documents):
+                if document and document.get("cancel_requested") and self.queue.cancel(job_id):
+                    self.stats["remote_cancels"] += 1
+
+    def _abandoned(self, document: Dict[str, Any]) -> bool:
+        """An unfinished job whose worker stopped renewing its lease"""
+        return document["status"] not in FINISHED_STATUSES and document.get("lease_until", 0) < time.time()
+
+    def _expired(self, document: Dict[str, Any]) -> bool:
+        expires_at = document.get("expires_at")
+        if expires_at is None and self._abandoned(document):
+            expires_at = document.get("lease_until", 0) + self.queue.retention
+        return expires_at is not None and expires_at < time.time()
+
+    def _public(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        public = {
+            name: value for name, value in document.items()
+            if name not in ("owner", "expires_at", "cancel_requested", "lease_until")
+        }
+        if self._abandoned(document):
+            public.update(status=FAILED, error="worker stopped before the job finished")
+        return public
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.queue.get_stats(), **self.stats, "backend": self.state.name}
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Storage
+Compact, append-only stores for the crypto trading backend
+"""
+
+import bisect
+import logging
+import sqlite3
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HASH_BYTES = 32
+
+
+class SymbolTable:
+    """Interns strings (token symbols, statuses) as small integer ids"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def intern(self, name: str) -> int:
+        symbol_id = self._ids.get(name)
+        if symbol_id is None:
+            symbol_id = len(self.names)
+            self._ids[name] = symbol_id
+            self.names.append(name)
+        return symbol_id
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class _TradeColumns:
+    """In-memory columns for one user's most recent trades"""
+
+    __slots__ = ("base", "timestamps", "amounts", "amounts_out", "tokens_in", "tokens_out", "statuses", "hashes")
+
+    def __init__(self, base: int = 0):
+        self.base = base  # sequence number of the first in-memory row
+        self.timestamps = array("d")
+        self.amounts = array("d")
+        self.amounts_out = array("d")
+        self.tokens_in = array("I")
+        self.tokens_out = array("I")
+        self.statuses = array("B")
+        self.hashes = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def drop_prefix(self, count: int) -> None:
+        for column in (self.timestamps, self.amounts, self.amounts_out, self.tokens_in, self.tokens_out, self.statuses):
+            del column[:count]
+        del self.hashes[:count * HASH_BYTES]
+        self.base += count
+
+    def nbytes(self) -> int:
+        return sum(
+            column.buffer_info()[1] * column.itemsize
+            for column in (self.timestamps, self.amounts, self.amounts_out, self.tokens_in, self.tokens_out, self.statuses)
+        ) + len(self.hashes)
+
+
+class TradeHistoryStore:
+    """Append-only, columnar per-user trade history.
+
+    Each trade is stored as fixed-width columns (float64 timestamp and
+    amounts, uint32 interned token ids, uint8 status id and a 32-byte hash):
+    65 bytes per trade instead of a dict of Python objects. Rows get a
+    per-user sequence number; pages are addressed by an opaque cursor and can
+    be limited to a time range. With ``db_path`` set, the oldest
+    ``segment_size`` rows are spilled to SQLite whenever two segments are
+    held in memory, and every remaining row is spilled on ``close()``.
+    """
+
+    def __init__(self, segment_size: int = 4096, db_path: Optional[str] = None):
+        self.segment_size = segment_size
+        self.symbols = SymbolTable()
+        self.statuses = SymbolTable()
+        self._users: Dict[str, _TradeColumns] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS trades ("
+                "user TEXT NOT NULL, seq INTEGER NOT NULL, ts REAL NOT NULL, amount REAL NOT NULL, "
+                "token_in TEXT NOT NULL, token_out TEXT NOT NULL, status TEXT NOT NULL, tx_hash BLOB NOT NULL, "
+                "amount_out REAL NOT NULL DEFAULT 0, PRIMARY KEY (user, seq))"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(trades)")]
+            if "amount_out" not in columns:  # files written before amount_out was recorded
+                self._db.execute("ALTER TABLE trades ADD COLUMN amount_out REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS trades_user_ts ON trades (user, ts)")
+            for user, spilled in self._db.execute("SELECT user, MAX(seq) + 1 FROM trades GROUP BY user"):
+                self._users[user] = _TradeColumns(base=spilled)
+
+    def append(
+        self,
+        user: str,
+        transaction_hash: str,
+        token_in: str,
+        token_out: str,
+        amount_in: float,
+        timestamp: float,
+        status: str = "completed",
+        amount_out: float = 0.0,
+    ) -> int:
+        """Append a trade and return its sequence number"""
+        tx_hash = bytes.fromhex(transaction_hash[2:] if transaction_hash.startswith("0x") else transaction_hash)
+        if len(tx_hash) != HASH_BYTES:
+            raise ValueError("transaction_hash must be 32 bytes")
+
+        columns = self._users.get(user)
+        if columns is None:
+            columns = self._users[user] = _TradeColumns()
+        if len(columns) and timestamp < columns.timestamps[-1]:
+            timestamp = columns.timestamps[-1]  # keep time order for range queries
+
+        columns.timestamps.append(timestamp)
+        columns.amounts.append(amount_in)
+        columns.amounts_out.append(amount_out)
+        columns.tokens_in.append(self.symbols.intern(token_in))
+        columns.tokens_out.append(self.symbols.intern(token_out))
+        columns.statuses.append(self.statuses.intern(status))
+        columns.hashes += tx_hash
+
+        if self._db is not None and len(columns) >= 2 * self.segment_size:
+            self._spill(user, columns)
+        return columns.base + len(columns) - 1
+
+    def count(self, user: str) -> int:
+        columns = self._users.get(user)
+        return columns.base + len(columns) if columns is not None else 0
+
+    def page(
+        self,
+        user: str,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return trades newest first, plus the cursor for the next (older) page"""
+        columns = self._users.get(user)
+        if columns is None or limit <= 0:
+            return [], None
+
+        low = self._seq_at_time(user, columns, start) if start is not None else 0
+        high = self._seq_at_time(user, columns, end) if end is not None else self.count(user)
+        if cursor is not None:
+            high = min(high, int(cursor))
+        first = max(low, high - limit)
+        if first >= high:
+            return [], None
+
+        rows = self._read(user, columns, first, high)
+        rows.reverse()
+        return rows, (str(first) if first > low else None)
+
+    def _seq_at_time(self, user: str, columns: _TradeColumns, timestamp: float) -> int:
+        """First sequence number whose timestamp is >= timestamp"""
+        if columns.base and self._db is not None:
+            row = self._db.execute(
+                "SELECT MIN(seq) FROM trades WHERE user = ? AND ts >= ?", (user, timestamp)
+            ).fetchone()
+            if row[0] is not None:
+                return row[0]
+        return columns.base + bisect.bisect_left(columns.timestamps, timestamp)
+
+    def _read(self, user: str, columns: _TradeColumns, first: int, high: int) -> List[Dict[str, Any]]:
+        rows = []
+        if first < columns.base and self._db is not None:
+            for seq, ts, amount, amount_out, token_in, token_out, status, tx_hash in self._db.execute(
+                "SELECT seq, ts, amount, amount_out, token_in, token_out, status, tx_hash FROM trades "
+                "WHERE user = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (user, first, min(high, columns.base)),
+            ):
+                rows.append(self._row(seq, ts, amount, amount_out, token_in, token_out, status, tx_hash))
+
+        for seq in range(max(first, columns.base), high):
+            index = seq - columns.base
+            rows.append(self._row(
+                seq,
+                columns.timestamps[index],
+                columns.amounts[index],
+                columns.amounts_out[index],
+                self.symbols.names[columns.tokens_in[index]],
+                self.symbols.names[columns.tokens_out[index]],
+                self.statuses.names[columns.statuses[index]],
+                columns.hashes[index * HASH_BYTES:(index + 1) * HASH_BYTES],
+            ))
+        return rows
+
+    def since(self, user: str, seq: int) -> List[Tuple[float, float, float, str, str, str]]:
+        """Trades from sequence number seq on, oldest first, as
+        (timestamp, amount_in, amount_out, token_in, token_out, status)"""
+        columns = self._users.get(user)
+        if columns is None:
+            return []
+        trades: List[Tuple[float, float, float, str, str, str]] = []
+        if seq < columns.base and self._db is not None:
+            trades.extend(self._db.execute(
+                "SELECT ts, amount, amount_out, token_in, token_out, status FROM trades "
+                "WHERE user = ? AND seq >= ? ORDER BY seq",
+                (user, seq),
+            ))
+        start = max(seq - columns.base, 0)
+        symbols, statuses = self.symbols.names, self.statuses.names
+        trades.extend(zip(
+            columns.timestamps[start:],
+            columns.amounts[start:],
+            columns.amounts_out[start:],
+            [symbols[token] for token in columns.tokens_in[start:]],
+            [symbols[token] for token in columns.tokens_out[start:]],
+            [statuses[status] for status in columns.statuses[start:]],
+        ))
+        return trades
+
+    @staticmethod
+    def _row(
+        seq: int,
+        ts: float,
+        amount: float,
+        amount_out: float,
+        token_in: str,
+        token_out: str,
+        status: str,
+        tx_hash: bytes,
+    ) -> Dict[str, Any]:
+        return {
+            "seq": seq,
+            "transaction_hash": "0x" + bytes(tx_hash).hex(),
+            "token_in": token_in,
+            "token_out": token_out,
+            "amount_in": amount,
+            "amount_out": amount_out,
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "status": status,
+        }
+
+    def _spill(self, user: str, columns: _TradeColumns, count: Optional[int] = None) -> None:
+        count = self.segment_size if count is None else count
+        rows = [
+            (
+                user,
+                columns.base + index,
+                columns.timestamps[index],
+                columns.amounts[index],
+                self.symbols.names[columns.tokens_in[index]],
+                self.symbols.names[columns.tokens_out[index]],
+                self.statuses.names[columns.statuses[index]],
+                bytes(columns.hashes[index * HASH_BYTES:(index + 1) * HASH_BYTES]),
+                columns.amounts_out[index],
+            )
+            for index in range(count)
+        ]
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO trades "
+                "(user, seq, ts, amount, token_in, token_out, status, tx_hash, amount_out) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        columns.drop_prefix(count)
+        logger.debug(f"Spilled {count} trades for {user} to disk")
+
+    def memory_bytes(self) -> int:
+        """Bytes held by in-memory trade columns"""
+        return sum(columns.nbytes() for columns in self._users.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        in_memory = sum(len(columns) for columns in self._users.values())
+        total = sum(columns.base + len(columns) for columns in self._users.values())
+        return {
+            "users": len(self._users),
+            "trades": total,
+            "trades_in_memory": in_memory,
+            "trades_on_disk": total - in_memory,
+            "memory_bytes": self.memory_bytes(),
+            "symbols": len(self.symbols),
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            for user, columns in self._users.items():
+                if len(columns):
+                    self._spill(user, columns, len(columns))
+            self._db.close()
+            self._db = None
+
+
+class _LogSegment:
+    __slots__ = ("first_seq", "timestamps", "entries")
+
+    def __init__(self, first_seq: int):
+        self.first_seq = first_seq
+        self.timestamps: List[float] = []
+        self.entries: List[Dict[str, Any]] = []
+
+
+class _PoolLog:
+    __slots__ = ("segments", "next_seq", "summary")
+
+    def __init__(self):
+        self.segments: List[_LogSegment] = []
+        self.next_seq = 0
+        self.summary = {
+            "entries": 0,
+            "action_counts": {},
+            "deposited": 0.0,
+            "withdrawn": 0.0,
+            "first_activity": None,
+            "last_activity": None,
+            "compacted_entries": 0,
+        }
+
+
+class PoolActivityLog:
+    """Per-pool activity log stored as size-capped segments.
+
+    Entries get a per-pool sequence number and are read forward from a
+    cursor (the next sequence number to read), optionally starting at a
+    timestamp. A running summary (counts per action, deposit/withdraw totals)
+    is kept on append so status reads never touch the entries. With
+    ``max_segments`` set, the oldest segments are dropped once exceeded; their
+    entries remain counted in the summary under ``compacted_entries``.
+    """
+
+    def __init__(self, segment_size: int = 500, max_segments: int = 0):
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        self._pools: Dict[str, _PoolLog] = {}
+
+    def append(self, pool_id: str, action: str, timestamp: float, **fields: Any) -> Dict[str, Any]:
+        """Append an entry and return it"""
+        log = self._pools.get(pool_id)
+        if log is None:
+            log = self._pools[pool_id] = _PoolLog()
+        if not log.segments or len(log.segments[-1].entries) >= self.segment_size:
+            log.segments.append(_LogSegment(log.next_seq))
+            if self.max_segments and len(log.segments) > self.max_segments:
+                self._compact(log, len(log.segments) - self.max_segments)
+
+        segment = log.segments[-1]
+        if segment.timestamps and timestamp < segment.timestamps[-1]:
+            timestamp = segment.timestamps[-1]  # keep time order for since= lookups
+        iso_time = datetime.fromtimestamp(timestamp).isoformat()
+        entry = {"seq": log.next_seq, "action": action, "timestamp": iso_time, **fields}
+        segment.timestamps.append(timestamp)
+        segment.entries.append(entry)
+        log.next_seq += 1
+
+        summary = log.summary
+        summary["entries"] += 1
+        summary["action_counts"][action] = summary["action_counts"].get(action, 0) + 1
+        if action == "deposit":
+            summary["deposited"] += fields.get("amount", 0)
+        elif action == "withdraw":
+            summary["withdrawn"] += fields.get("amount", 0)
+        summary["first_activity"] = summary["first_activity"] or iso_time
+        summary["last_activity"] = iso_time
+        return entry
+
+    def page(
+        self,
+        pool_id: str,
+        cursor: Optional[int] = None,
+        limit: int = 100,
+        since: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Return up to limit entries from cursor/since onwards and the next cursor"""
+        log = self._pools.get(pool_id)
+        if log is None:
+            return [], 0
+        if not log.segments:
+            return [], log.next_seq
+
+        seq = max(cursor or 0, log.segments[0].first_seq)
+        if since is not None:
+            seq = max(seq, self._seq_at_time(log, since))
+
+        first_seqs = [segment.first_seq for segment in log.segments]
+        index = max(0, bisect.bisect_right(first_seqs, seq) - 1)
+        entries: List[Dict[str, Any]] = []
+        while index < len(log.segments) and len(entries) < limit:
+            segment = log.segments[index]
+            offset = max(0, seq - segment.first_seq)
+            taken = segment.entries[offset:offset + limit - len(entries)]
+            entries.extend(taken)
+            if taken:
+                seq = taken[-1]["seq"] + 1
+            index += 1
+        return entries, seq
+
+    def _seq_at_time(self, log: _PoolLog, timestamp: float) -> int:
+        last_times = [segment.timestamps[-1] for segment in log.segments if segment.timestamps]
+        index = bisect.bisect_left(last_times, timestamp)
+        if index >= len(last_times):
+            return log.next_seq
+        segment = log.segments[index]
+        return segment.first_seq + bisect.bisect_left(segment.timestamps, timestamp)
+
+    def compact(self, pool_id: str, keep_segments: int) -> int:
+        """Drop all but the newest keep_segments segments; returns entries dropped"""
+        log = self._pools.get(pool_id)
+        if log is None or len(log.segments) <= keep_segments:
+            return 0
+        return self._compact(log, len(log.segments) - keep_segments)
+
+    @staticmethod
+    def _compact(log: _PoolLog, count: int) -> int:
+        dropped = sum(len(segment.entries) for segment in log.segments[:count])
+        del log.segments[:count]
+        log.summary["compacted_entries"] += dropped
+        return dropped
+
+    def count(self, pool_id: str) -> int:
+        log = self._pools.get(pool_id)
+        return log.next_seq if log is not None else 0
+
+    def first_available(self, pool_id: str) -> int:
+        """Lowest sequence number still stored (entries before it were compacted)"""
+        log = self._pools.get(pool_id)
+        if log is None or not log.segments:
+            return self.count(pool_id)
+        return log.segments[0].first_seq
+
+    def recent(self, pool_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Newest entries, newest first"""
+        log = self._pools.get(pool_id)
+        entries: List[Dict[str, Any]] = []
+        for segment in reversed(log.segments if log is not None else []):
+            entries.extend(reversed(segment.entries[-(limit - len(entries)):]))
+            if len(entries) >= limit:
+                break
+        return entries
+
+    def summary(self, pool_id: str) -> Dict[str, Any]:
+        log = self._pools.get(pool_id)
+        if log is None:
+            return _PoolLog().summary
+        return {**log.summary, "action_counts": dict(log.summary["action_counts"])}
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Stratum Client
+Stratum v1 pool connection with pipelined share submission, reconnect backoff and failover
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from crypto_metrics import percentile
+
+logger = logging.getLogger(__name__)
+
+
+class StratumError(Exception):
+    """The pool answered a request with an error"""
+
+    def __init__(self, code: Any, message: str):
+        self.code = code
+        self.message = message
+        super().__init__(f"Stratum error {code}: {message}")
+
+
+def _error(error: Any) -> StratumError:
+    # Pools send [code, message, traceback], {"code", "message"} or a bare string
+    if isinstance(error, (list, tuple)) and error:
+        return StratumError(error[0], str(error[1]) if len(error) > 1 else "")
+    if isinstance(error, dict):
+        return StratumError(error.get("code"), str(error.get("message", "")))
+    return StratumError(None, str(error))
+
+
+def _subscription(result: Any) -> Tuple[str, int]:
+    # [subscriptions, extranonce1, extranonce2_size]
+    try:
+        if isinstance(result, list) and len(result) >= 3 and isinstance(result[1], str):
+            return result[1], int(result[2])
+    except (TypeError, ValueError):
+        pass
+    raise StratumError(None, f"malformed mining.subscribe result: {result!r}")
+
+
+class StratumClient:
+    """One miner's connection to a pool over stratum v1.
+
+    ``start`` runs the connection in the background: connect, subscribe,
+    authorize, then follow ``mining.notify`` jobs and difficulty changes.
+    When the connection drops it reconnects with exponential backoff from
+    ``backoff`` up to ``max_backoff`` seconds; after ``retries`` failed
+    attempts on one endpoint it fails over to the next in ``endpoints``
+    (primary first, then backups). Requests are matched to replies by id, so
+    ``submit`` calls are pipelined: each share is written as soon as it is
+    submitted and a slow ack only delays its own caller. Shares still
+    waiting for an ack when the connection drops fail with ConnectionError
+    and are counted as lost.
+    """
+
+    def __init__(
+        self,
+        endpoints: List[Tuple[str, int]],
+        username: str,
+        password: str = "x",
+        agent: str = "CoresAI/1.0",
+        timeout: float = 10.0,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        on_job: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_share: Optional[Callable[[bool, float], None]] = None,
+    ):
+        if not endpoints:
+            raise ValueError("At least one pool endpoint is required")
+        self.endpoints = list(endpoints)
+        self.username = username
+        self.password = password
+        self.agent = agent
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.on_job = on_job
+        self.on_share = on_share
+        self.job: Optional[Dict[str, Any]] = None
+        self.difficulty: Optional[float] = None
+        self.extranonce1: Optional[str] = None
+        self.extranonce2_size: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self._index = 0
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ack_ms: Deque[float] = deque(maxlen=1000)
+        self.stats = {
+            "connects": 0,
+            "reconnects": 0,
+            "failovers": 0,
+            "jobs": 0,
+            "submitted": 0,
+            "accepted": 0,
+            "rejected": 0,
+            "lost": 0,
+        }
+
+    @property
+    def endpoint(self) -> Tuple[str, int]:
+        return self.endpoints[self._index]
+
+    @property
+    def connected(self) -> bool:
+        return self._ready is not None and self._ready.is_set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._disconnect()
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until subscribed and authorized; False on timeout"""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def set_endpoints(self, endpoints: List[Tuple[str, int]]) -> None:
+        """Move to a new primary (and backups), dropping the current connection"""
+        if not endpoints:
+            raise ValueError("At least one pool endpoint is required")
+        self.endpoints = list(endpoints)
+        self._index = 0
+        if self._writer is not None:
+            self._writer.close()  # the read loop ends and the run loop reconnects
+
+    async def submit(self, job_id: str, extranonce2: str, ntime: str, nonce: str) -> Dict[str, Any]:
+        """Submit one share; returns {"accepted", "error", "latency_ms"}"""
+        started = time.perf_counter()
+        self.stats["submitted"] += 1
+        try:
+            accepted = bool(await self._call("mining.submit", [self.username, job_id, extranonce2, ntime, nonce]))
+            error = None if accepted else "rejected"
+        except StratumError as e:
+            accepted, error = False, e.message or str(e.code)
+        except (ConnectionError, asyncio.TimeoutError):
+            self.stats["lost"] += 1
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        self._ack_ms.append(latency_ms)
+        self.stats["accepted" if accepted else "rejected"] += 1
+        if self.on_share is not None:
+            self.on_share(accepted, latency_ms)
+        return {"accepted": accepted, "error": error, "latency_ms": round(latency_ms, 2)}
+
+    async def _run(self) -> None:
+        attempts = 0  # consecutive failures since the last authorized connection
+        failures = 0  # consecutive failures on the current endpoint
+        while True:
+            host, port = self.endpoint
+            try:
+                await self._session(host, port)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Whatever ended this session (including a pool breaking protocol), the client keeps reconnecting
+                self.last_error = str(e) or type(e).__name__
+                logger.warning(f"Stratum connection to {host}:{port} ended: {self.last_error}")
+            was_ready = self.connected
+            self._disconnect()
+            if was_ready:
+                attempts, failures = 0, 0
+            attempts += 1
+            failures += 1
+            if failures >= self.retries and len(self.endpoints) > 1:
+                self._index = (self._index + 1) % len(self.endpoints)
+                self.stats["failovers"] += 1
+                failures = 0
+                logger.warning(f"Stratum failing over to {self.endpoint[0]}:{self.endpoint[1]}")
+            await asyncio.sleep(min(self.max_backoff, self.backoff * 2 ** (attempts - 1)))
+            self.stats["reconnects"] += 1
+
+    async def _session(self, host: str, port: int) -> None:
+        """One connection: handshake, then read until it ends (always by an exception)"""
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), self.timeout)
+        self._writer = writer
+        self.stats["connects"] += 1
+        reading = asyncio.ensure_future(self._read(reader))
+        try:
+            subscribed = await self._call("mining.subscribe", [self.agent], reading)
+            self.extranonce1, self.extranonce2_size = _subscription(subscribed)
+            authorized = await self._call("mining.authorize", [self.username, self.password], reading)
+            if not isinstance(authorized, bool):
+                raise StratumError(None, f"malformed mining.authorize result: {authorized!r}")
+            if not authorized:
+                raise StratumError(None, f"authorization refused for {self.username}")
+            self.last_error = None
+            self._ready.set()
+            await reading
+        finally:
+            reading.cancel()
+            writer.close()
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("pool closed the connection")
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise StratumError(None, f"malformed stratum message: {line[:100]!r}")
+            method = message.get("method")
+            if method is not None:
+                self._notify(method, message.get("params") or [])
+                continue
+            future = self._pending.pop(message.get("id"), None)
+            if future is None or future.done():
+                continue
+            if message.get("error"):
+                future.set_exception(_error(message["error"]))
+            else:
+                future.set_result(message.get("result"))
+
+    def _notify(self, method: str, params: List[Any]) -> None:
+        if method == "mining.notify" and params:
+            self.job = {
+                "job_id": params[0],
+                "params": params,
+                "clean_jobs": bool(params[-1]) if len(params) >= 9 else False,
+                "received_at": time.time(),
+            }
+            self.stats["jobs"] += 1
+            if self.on_job is not None:
+                self.on_job(self.job)
+        elif method == "mining.set_difficulty" and params:
+            self.difficulty = float(params[0])
+        elif method == "mining.set_extranonce" and len(params) >= 2:
+            self.extranonce1, self.extranonce2_size = params[0], int(params[1])
+        else:
+            logger.debug(f"Ignoring stratum message {method}")
+
+    async def _call(self, method: str, params: List[Any], reading: Optional[asyncio.Task] = None) -> Any:
+        """Send a request and wait for its reply (or for ``reading`` to fail)"""
+        if self._writer is None or self._writer.is_closing():
+            raise ConnectionError("Not connected to a pool")
+        request_id = next(self._ids)
+        future = asyncio.get_event_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            async with self._write_lock:
+                self._writer.write(json.dumps({"id": request_id, "method": method, "params": params}).encode() + b"\n")
+                await self._writer.drain()
+            if reading is None:
+                return await asyncio.wait_for(future, self.timeout)
+            # During the handshake nobody else watches the read loop, so a dropped connection must end the wait
+            done, _ = await asyncio.wait({future, reading}, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if future in done:
+                return future.result()
+            if reading in done:
+                reading.result()  # raises why the connection ended
+                raise ConnectionError("pool closed the connection")
+            raise asyncio.TimeoutError(f"{method} timed out after {self.timeout:g}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _disconnect(self) -> None:
+        if self._ready is not None:
+            self._ready.clear()
+        self._writer = None
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Connection to the pool was lost"))
+
+    def get_stats(self) -> Dict[str, Any]:
+        host, port = self.endpoint
+        return {
+            **self.stats,
+            "connected": self.connected,
+            "endpoint": f"{host}:{port}",
+            "difficulty": self.difficulty,
+            "job_id": self.job["job_id"] if self.job else None,
+            "ack_p50_ms": round(percentile(self._ack_ms, 50), 3),
+            "ack_p99_ms": round(percentile(self._ack_ms, 99), 3),
+            "last_error": self.last_error,
+        }
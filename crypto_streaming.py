@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Streaming
+Fan-out of market data updates to WebSocket/SSE subscribers
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A subscriber's bounded queue of encoded messages"""
+
+    def __init__(self, broadcaster: "Broadcaster", queue_size: int):
+        self.broadcaster = broadcaster
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, message: str) -> bool:
+        """Enqueue without blocking; when full, resyncs or drops the oldest message"""
+        if self.closed:
+            return False
+        if self.queue.full():
+            resync = self.broadcaster.resync() if self.broadcaster.resync is not None else None
+            if resync is not None:
+                # The backlog is superseded by one message with the current state
+                while not self.queue.empty():
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                self.queue.put_nowait(resync)
+                return True
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+        return True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Next message; None once closed. Raises asyncio.TimeoutError on timeout"""
+        if timeout is None:
+            return await self.queue.get()
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+        self.broadcaster.unsubscribe(self)
+
+    def __aiter__(self) -> "Subscription":
+        return self
+
+    async def __anext__(self) -> str:
+        message = await self.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class Broadcaster:
+    """Publishes each message once to every subscriber's bounded queue.
+
+    Messages are encoded by the caller once and shared by reference, so a
+    publish is a non-blocking enqueue per subscriber. A subscriber that falls
+    behind loses its oldest messages, unless ``resync`` returns a message
+    holding the full current state (including the message being published):
+    then its whole backlog is replaced by that message, so it re-converges
+    however many updates it missed. After ``max_dropped`` drops it is
+    disconnected as a slow consumer.
+    """
+
+    def __init__(
+        self,
+        queue_size: int = 32,
+        max_dropped: int = 100,
+        resync: Optional[Callable[[], Optional[str]]] = None,
+    ):
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self.resync = resync
+        self._subscribers: Set[Subscription] = set()
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "disconnected": 0}
+
+    def subscribe(self, initial: Optional[str] = None) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        if initial is not None:
+            subscription.offer(initial)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, message: str) -> int:
+        """Fan message out to all subscribers; returns how many received it"""
+        self.stats["published"] += 1
+        delivered = 0
+        for subscription in list(self._subscribers):
+            dropped_before = subscription.dropped
+            if subscription.offer(message):
+                delivered += 1
+            self.stats["dropped"] += subscription.dropped - dropped_before
+            if subscription.dropped > self.max_dropped:
+                logger.info("Disconnecting slow market data subscriber")
+                self.stats["disconnected"] += 1
+                subscription.close()
+        self.stats["delivered"] += delivered
+        return delivered
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "subscribers": len(self._subscribers)}
+
+
+class MarketDataStreamer:
+    """Refreshes market data on an interval and publishes what changed.
+
+    ``fetch`` returns rows keyed by ``key`` (the symbol). The first refresh
+    publishes a full snapshot; later ones publish only rows whose values
+    changed. New subscribers should be seeded with ``snapshot_message()``;
+    a subscriber whose queue overflows is sent it in place of its backlog.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[List[Dict[str, Any]]]],
+        broadcaster: Broadcaster,
+        interval: float = 5.0,
+        key: str = "symbol",
+    ):
+        self.fetch = fetch
+        self.broadcaster = broadcaster
+        self.interval = interval
+        self.key = key
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._snapshot: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"refreshes": 0, "updates_published": 0, "last_refresh_ms": 0.0}
+        if broadcaster.resync is None:
+            broadcaster.resync = self.snapshot_message
+
+    def snapshot_message(self) -> Optional[str]:
+        return self._snapshot
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Market data stream refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> int:
+        """Fetch once and publish changed rows; returns the number of changed rows"""
+        started = time.perf_counter()
+        rows = await self.fetch()
+        timestamp = datetime.now().isoformat()
+        latest = {row[self.key]: row for row in rows}
+        changed = [row for symbol, row in latest.items() if self._rows.get(symbol) != row]
+        first = not self._rows
+        self._rows = latest
+        self._snapshot = json.dumps({"type": "snapshot", "data": rows, "timestamp": timestamp})
+
+        self.stats["refreshes"] += 1
+        self.stats["last_refresh_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if first:
+            self.broadcaster.publish(self._snapshot)
+        elif changed:
+            self.stats["updates_published"] += 1
+            self.broadcaster.publish(json.dumps({"type": "update", "data": changed, "timestamp": timestamp}))
+        return len(changed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+CoresAI Crypto Telemetry
+Fixed-memory mining telemetry per session with 1m/1h/1d min/avg/max rollups
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("hashrate", "power_consumption", "temperature", "fan_speed", "accepted_shares", "rejected_shares")
+# Rollup resolution name -> bucket width in seconds
+ROLLUPS = {"1m": 60, "1h": 3600, "1d": 86400}
+RESOLUTIONS = ("raw",) + tuple(ROLLUPS)
+
+
+class _Ring:
+    """Time-ordered rows in preallocated NumPy columns; the oldest rows are overwritten.
+
+    ``columns`` maps a name to (per-row shape, dtype). Appends and the latest
+    row are O(1) per row; a time window is two binary searches plus a copy of
+    the rows returned.
+    """
+
+    def __init__(self, capacity: int, columns: Dict[str, Tuple[Tuple[int, ...], Any]]):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.columns = {name: np.zeros((capacity,) + shape, dtype=dtype) for name, (shape, dtype) in columns.items()}
+        self.start = 0
+        self.size = 0
+
+    @property
+    def last(self) -> int:
+        """Array index of the newest row (size must be > 0)"""
+        return (self.start + self.size - 1) % self.capacity
+
+    def extend(self, times: np.ndarray, **columns: np.ndarray) -> None:
+        count = len(times)
+        if count > self.capacity:
+            times = times[-self.capacity:]
+            columns = {name: values[-self.capacity:] for name, values in columns.items()}
+            count = self.capacity
+        index = (self.start + self.size + np.arange(count)) % self.capacity
+        self.times[index] = times
+        for name, values in columns.items():
+            self.columns[name][index] = values
+        overflow = max(0, self.size + count - self.capacity)
+        self.size = min(self.capacity, self.size + count)
+        self.start = (self.start + overflow) % self.capacity
+
+    def append(self, time: float, **columns: Any) -> int:
+        """Add one row; returns its array index"""
+        index = (self.start + self.size) % self.capacity
+        self.times[index] = time
+        for name, value in columns.items():
+            self.columns[name][index] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+        return index
+
+    def window(self, start: Optional[float], end: Optional[float], limit: Optional[int]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Rows with start <= time <= end, oldest first, keeping the newest ``limit``"""
+        first = self.start
+        wrapped = max(0, first + self.size - self.capacity)
+        segments = [(first, min(first + self.size, self.capacity)), (0, wrapped)]
+        picked = []
+        for lo, hi in segments:
+            if hi <= lo:
+                continue
+            times = self.times[lo:hi]
+            left = lo + (int(np.searchsorted(times, start, side="left")) if start is not None else 0)
+            right = lo + (int(np.searchsorted(times, end, side="right")) if end is not None else hi - lo)
+            if right > left:
+                picked.append((left, right))
+        if limit is not None:
+            trimmed, remaining = [], limit
+            for left, right in reversed(picked):
+                take = min(right - left, remaining)
+                if take > 0:
+                    trimmed.append((right - take, right))
+                remaining -= take
+            picked = trimmed[::-1]
+        if not picked:
+            return self.times[:0].copy(), {name: values[:0].copy() for name, values in self.columns.items()}
+        return (
+            np.concatenate([self.times[left:right] for left, right in picked]),
+            {name: np.concatenate([values[left:right] for left, right in picked]) for name, values in self.columns.items()},
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + sum(values.nbytes for values in self.columns.values())
+
+
+class _SessionSeries:
+    """Raw samples plus one rollup ring per resolution for one mining session"""
+
+    def __init__(self, raw_points: int, rollup_points: Dict[str, int]):
+        width = len(FIELDS)
+        self.raw = _Ring(raw_points, {"values": ((width,), np.float32)})
+        self.rollups = {
+            name: _Ring(rollup_points[name], {
+                "min": ((width,), np.float32),
+                "max": ((width,), np.float32),
+                "sum": ((width,), np.float64),
+                "count": ((), np.int64),
+            })
+            for name in ROLLUPS
+        }
+        self.last_time = -np.inf
+
+    def ingest(self, times: np.ndarray, values: np.ndarray) -> None:
+        if len(times) == 1:
+            self._ingest_one(float(times[0]), values[0])
+            return
+        self.raw.extend(times, values=values)
+        for name, seconds in ROLLUPS.items():
+            ring = self.rollups[name]
+            buckets = np.floor(times / seconds) * seconds
+            starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+            lows = np.minimum.reduceat(values, starts, axis=0)
+            highs = np.maximum.reduceat(values, starts, axis=0)
+            sums = np.add.reduceat(values, starts, axis=0)
+            counts = np.diff(np.r_[starts, len(times)])
+            bucket_times = buckets[starts]
+            if ring.size and ring.times[ring.last] == bucket_times[0]:
+                # The batch continues the open bucket: fold its first group in
+                last = ring.last
+                columns = ring.columns
+                columns["min"][last] = np.minimum(columns["min"][last], lows[0])
+                columns["max"][last] = np.maximum(columns["max"][last], highs[0])
+                columns["sum"][last] += sums[0]
+                columns["count"][last] += counts[0]
+                bucket_times, lows, highs, sums, counts = bucket_times[1:], lows[1:], highs[1:], sums[1:], counts[1:]
+            if len(bucket_times):
+                ring.extend(bucket_times, min=lows, max=highs, sum=sums, count=counts)
+        self.last_time = float(times[-1])
+
+    def _ingest_one(self, time: float, row: np.ndarray) -> None:
+        """Single-sample path for agents that push every sample as it is taken"""
+        self.raw.append(time, values=row)
+        for name, seconds in ROLLUPS.items():
+            ring = self.rollups[name]
+            bucket = time // seconds * seconds
+            columns = ring.columns
+            if ring.size and ring.times[ring.last] == bucket:
+                last = ring.last
+                np.minimum(columns["min"][last], row, out=columns["min"][last], casting="unsafe")
+                np.maximum(columns["max"][last], row, out=columns["max"][last], casting="unsafe")
+                columns["sum"][last] += row
+                columns["count"][last] += 1
+            else:
+                ring.append(bucket, min=row, max=row, sum=row, count=1)
+        self.last_time = time
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes + sum(ring.nbytes for ring in self.rollups.values())
+
+
+class TelemetryStore:
+    """Mining telemetry per session in fixed memory.
+
+    Each session keeps its last ``raw_points`` samples and, per rollup
+    resolution, the last ``rollup_points[name]`` buckets of min/avg/max for
+    every field in ``FIELDS``, so memory per session is fixed however long a
+    miner reports. Samples must arrive in time order per session; samples
+    older than the newest one already stored are dropped and counted as late.
+    At most ``max_sessions`` sessions are kept; the least recently updated is
+    evicted first.
+    """
+
+    def __init__(
+        self,
+        raw_points: int = 3600,
+        rollup_points: Optional[Dict[str, int]] = None,
+        max_sessions: int = 200,
+    ):
+        self.raw_points = raw_points
+        self.rollup_points = {"1m": 1440, "1h": 720, "1d": 730, **(rollup_points or {})}
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, _SessionSeries]" = OrderedDict()
+        self.stats = {"batches": 0, "samples": 0, "late": 0, "evicted": 0}
+
+    def ingest(self, session_id: str, times: Sequence[float], values: Iterable[Sequence[float]]) -> int:
+        """Store samples (rows ordered as ``FIELDS``); returns how many were accepted"""
+        times = np.asarray(times, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(times), len(FIELDS))
+        if len(times) > 1 and np.any(times[1:] < times[:-1]):
+            order = np.argsort(times, kind="stable")
+            times, values = times[order], values[order]
+        series = self._sessions.get(session_id)
+        if series is None:
+            series = self._sessions[session_id] = _SessionSeries(self.raw_points, self.rollup_points)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.stats["evicted"] += 1
+        else:
+            self._sessions.move_to_end(session_id)
+        fresh = times >= series.last_time
+        if not fresh.all():
+            self.stats["late"] += int((~fresh).sum())
+            times, values = times[fresh], values[fresh]
+        self.stats["batches"] += 1
+        if len(times):
+            series.ingest(times, values)
+            self.stats["samples"] += len(times)
+        return len(times)
+
+    def latest(self, session_id: str) -> Optional[Dict[str, float]]:
+        """Newest sample as {"timestamp", field: value}, or None"""
+        series = self._sessions.get(session_id)
+        if series is None or not series.raw.size:
+            return None
+        last = series.raw.last
+        sample = {"timestamp": float(series.raw.times[last])}
+        sample.update(zip(FIELDS, series.raw.columns["values"][last].tolist()))
+        return sample
+
+    def history(
+        self,
+        session_id: str,
+        resolution: str = "1m",
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Column-oriented series: raw values, or min/avg/max per rollup bucket"""
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution} (choose from {', '.join(RESOLUTIONS)})")
+        result: Dict[str, Any] = {"resolution": resolution, "timestamps": []}
+        series = self._sessions.get(session_id)
+        if series is None:
+            result.update({field: [] if resolution == "raw" else {"min": [], "avg": [], "max": []} for field in FIELDS})
+            return result
+        if resolution == "raw":
+            times, columns = series.raw.window(start, end, limit)
+            result["timestamps"] = times.tolist()
+            for index, field in enumerate(FIELDS):
+                result[field] = np.round(columns["values"][:, index], 4).tolist()
+            return result
+        if start is not None:
+            start = np.floor(start / ROLLUPS[resolution]) * ROLLUPS[resolution]  # include the bucket holding start
+        times, columns = series.rollups[resolution].window(start, end, limit)
+        averages = columns["sum"] / np.maximum(columns["count"], 1)[:, None]
+        result["timestamps"] = times.tolist()
+        result["samples"] = columns["count"].tolist()
+        for index, field in enumerate(FIELDS):
+            result[field] = {
+                "min": np.round(columns["min"][:, index], 4).tolist(),
+                "avg": np.round(averages[:, index], 4).tolist(),
+                "max": np.round(columns["max"][:, index], 4).tolist(),
+            }
+        return result
+
+    def drop(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "sessions": len(self._sessions),
+            "memory_bytes": sum(series.nbytes for series in self._sessions.values()),
+        }
@@ -11,19 +11,42 @@ import hashlib
 import hmac
 import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from decimal import Decimal
 import os
 
-from fastapi import FastAPI, HTTPException, Depends, Security, BackgroundTasks, Body
+from fastapi import FastAPI, HTTPException, Depends, Security, BackgroundTasks, Body, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field
-import httpx
-import aioredis
 from web3 import Web3
-import ccxt
+
+from crypto_alerts import CONDITIONS, PriceAlertEngine
+from crypto_analytics import PortfolioAnalytics, PriceHistory
+from crypto_behavior import WalletBehaviorClassifier
+from crypto_cache import BlockAwareCache, SingleFlightCache
+from crypto_exchanges import ExchangePool
+from crypto_hashbench import BenchmarkStore, HashBenchmark, profit_hashrates
+from crypto_http import HTTPClientPool, parse_host_timeouts
+from crypto_indexer import TransferIndexer, TransferStore, format_units
+from crypto_jobs import JobLimitError, JobQueue, no_progress
+from crypto_metrics import EndpointMetrics, LoopLagMonitor
+from crypto_multicall import MULTICALL3_ADDRESS, MulticallBalanceScanner
+from crypto_orderbook import OrderBookReplica
+from crypto_pools import DEFAULT_POOL_ENDPOINTS, PoolProber, parse_pool_endpoints
+from crypto_profit import ProfitEngine
+from crypto_routing import DEFAULT_DEX_TOKENS, CexVenue, DexVenue, QuoteAggregator, parse_dex_routers
+from crypto_rpc import AsyncRPCClient, HeadTracker
+from crypto_signals import TIMEFRAME_SECONDS, SignalScheduler
+from crypto_state import (
+    LocalPoolActivityLog, LocalTradeHistory, SharedJobs, SharedPoolActivityLog, SharedTradeHistory, create_state_backend
+)
+from crypto_storage import PoolActivityLog, TradeHistoryStore
+from crypto_stratum import StratumClient
+from crypto_streaming import Broadcaster, MarketDataStreamer
+from crypto_telemetry import FIELDS as TELEMETRY_FIELDS, TelemetryStore
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -50,13 +73,158 @@ security = HTTPBearer()
 
 # Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")  # "memory" for one worker, "redis" to share state across workers
 ETH_RPC_URL = os.getenv("ETH_RPC_URL", "https://mainnet.infura.io/v3/YOUR_PROJECT_ID")
 COINGECKO_API_URL = "https://api.coingecko.com/api/v3"
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
-
-# Web3 connection
+MARKET_DATA_TTL = float(os.getenv("MARKET_DATA_TTL", "30"))  # seconds a snapshot is fresh
+MARKET_DATA_STALE_TTL = float(os.getenv("MARKET_DATA_STALE_TTL", "120"))  # extra seconds served while refreshing
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+HTTP_HOST_TIMEOUTS = os.getenv("HTTP_HOST_TIMEOUTS", "api.coingecko.com=10")  # host=seconds,...
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+FRIEND_FETCH_CONCURRENCY = int(os.getenv("FRIEND_FETCH_CONCURRENCY", "10"))  # friends loaded at once per request
+FRIEND_FETCH_TIMEOUT = float(os.getenv("FRIEND_FETCH_TIMEOUT", "5"))  # seconds per friend before returning partial data
+BEHAVIOR_CACHE_SIZE = int(os.getenv("BEHAVIOR_CACHE_SIZE", "10000"))  # wallets whose behavior features are kept (LRU)
+BEHAVIOR_MIN_TRANSACTIONS = int(os.getenv("BEHAVIOR_MIN_TRANSACTIONS", "5"))  # fewer transfers are reported as minimal activity
+RPC_MAX_CONCURRENCY = int(os.getenv("RPC_MAX_CONCURRENCY", "32"))  # in-flight JSON-RPC requests to the node
+RPC_BATCH_WINDOW_MS = float(os.getenv("RPC_BATCH_WINDOW_MS", "5"))  # collect calls this long before sending a batch
+RPC_MAX_BATCH_SIZE = int(os.getenv("RPC_MAX_BATCH_SIZE", "50"))  # 1 disables JSON-RPC batching
+HEAD_POLL_INTERVAL = float(os.getenv("HEAD_POLL_INTERVAL", "4"))  # seconds between new-block polls
+BALANCE_CACHE_SIZE = int(os.getenv("BALANCE_CACHE_SIZE", "10000"))  # wallets kept in the balance cache (LRU)
+BALANCE_CACHE_MAX_AGE_BLOCKS = int(os.getenv("BALANCE_CACHE_MAX_AGE_BLOCKS", "50"))  # re-read untouched wallets after this many blocks
+TRADE_HISTORY_DB = os.getenv("TRADE_HISTORY_DB", "")  # SQLite file for spilled trade history; empty keeps it in memory
+TRADE_HISTORY_SEGMENT_SIZE = int(os.getenv("TRADE_HISTORY_SEGMENT_SIZE", "4096"))  # trades per spilled segment
+POOL_LOG_SEGMENT_SIZE = int(os.getenv("POOL_LOG_SEGMENT_SIZE", "500"))  # pool log entries per segment
+POOL_LOG_MAX_SEGMENTS = int(os.getenv("POOL_LOG_MAX_SEGMENTS", "0"))  # compact older segments into the summary; 0 keeps all
+MARKET_STREAM_INTERVAL = float(os.getenv("MARKET_STREAM_INTERVAL", "5"))  # seconds between pushed market data refreshes
+MARKET_STREAM_QUEUE_SIZE = int(os.getenv("MARKET_STREAM_QUEUE_SIZE", "32"))  # messages buffered per stream subscriber
+MARKET_STREAM_MAX_DROPPED = int(os.getenv("MARKET_STREAM_MAX_DROPPED", "100"))  # drops before a slow subscriber is disconnected
+MARKET_STREAM_HEARTBEAT = float(os.getenv("MARKET_STREAM_HEARTBEAT", "15"))  # seconds between SSE keep-alive comments
+EXCHANGES = os.getenv("EXCHANGES", "")  # comma-separated ccxt exchange ids, e.g. "binance,kraken"
+EXCHANGE_SANDBOX = os.getenv("EXCHANGE_SANDBOX", "true").lower() == "true"
+EXCHANGE_BURST = float(os.getenv("EXCHANGE_BURST", "5"))  # requests an exchange may receive back to back before pacing
+ORDER_BOOK_DEPTH = int(os.getenv("ORDER_BOOK_DEPTH", "100"))  # price levels kept per side
+ORDER_BOOK_MAX_AGE = float(os.getenv("ORDER_BOOK_MAX_AGE", "5"))  # seconds before a book without diff updates is reloaded
+DEX_ROUTERS = os.getenv("DEX_ROUTERS", "")  # Uniswap V2 style routers quoted for trades: name=0xrouter,...
+ROUTE_DEADLINE_MS = float(os.getenv("ROUTE_DEADLINE_MS", "300"))  # venues slower than this are left out of a route
+ROUTE_CACHE_MS = float(os.getenv("ROUTE_CACHE_MS", "250"))  # routes reused per (pair, size bucket) for this long
+BALANCE_TOKENS = os.getenv("BALANCE_TOKENS", "")  # ERC-20 contracts checked per wallet (comma-separated); defaults to the DEX token list
+MULTICALL_ADDRESS = os.getenv("MULTICALL_ADDRESS", MULTICALL3_ADDRESS)
+MULTICALL_MAX_CALLS = int(os.getenv("MULTICALL_MAX_CALLS", "500"))  # balanceOf calls packed into one aggregate3
+MULTICALL_MAX_GAS = int(os.getenv("MULTICALL_MAX_GAS", "25000000"))  # stay under the node's eth_call gas cap
+INDEXER_ENABLED = os.getenv("INDEXER_ENABLED", "false").lower() == "true"  # index ERC-20 Transfers for wallet history
+INDEXER_DB = os.getenv("INDEXER_DB", "")  # SQLite file for indexed transfers; empty keeps them in memory
+INDEXER_TOKENS = os.getenv("INDEXER_TOKENS", "")  # token contracts to index (comma-separated); defaults to the DEX token list, "*" for all
+INDEXER_START_BLOCK = os.getenv("INDEXER_START_BLOCK", "")  # first block on an empty store; defaults to head - INDEXER_BACKFILL_BLOCKS
+INDEXER_BACKFILL_BLOCKS = int(os.getenv("INDEXER_BACKFILL_BLOCKS", "10000"))
+INDEXER_CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", "12"))  # blocks behind head before a block is indexed
+INDEXER_TARGET_LOGS = int(os.getenv("INDEXER_TARGET_LOGS", "2000"))  # eth_getLogs ranges adapt towards this many logs
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", "12"))  # seconds between indexing passes
+PRICE_HISTORY_INTERVAL = float(os.getenv("PRICE_HISTORY_INTERVAL", "60"))  # seconds between recorded market prices per token
+ANALYTICS_BUCKET_SECONDS = float(os.getenv("ANALYTICS_BUCKET_SECONDS", "3600"))  # equity curve sampling for portfolio analytics
+ANALYTICS_MAX_USERS = int(os.getenv("ANALYTICS_MAX_USERS", "1000"))  # portfolios kept incrementally up to date (LRU)
+SIGNAL_SYMBOLS = os.getenv("SIGNAL_SYMBOLS", "BTC,ETH,SOL,BNB,XRP,ADA,DOGE,AVAX,LINK,DOT")  # trading-signal universe
+SIGNAL_QUOTE = os.getenv("SIGNAL_QUOTE", "USDT")  # quote currency of the exchange pairs signals are computed on
+SIGNAL_EXCHANGE = os.getenv("SIGNAL_EXCHANGE", "")  # exchange OHLCV comes from; defaults to the first in EXCHANGES
+SIGNAL_TIMEFRAME = os.getenv("SIGNAL_TIMEFRAME", "1h")
+SIGNAL_BARS = int(os.getenv("SIGNAL_BARS", "200"))  # candles kept per symbol for indicators
+SIGNAL_INTERVAL = float(os.getenv("SIGNAL_INTERVAL", "60"))  # seconds between signal recomputations
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))  # background jobs (mining start, benchmarks) run at once
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "1000"))  # jobs waiting for a worker before new ones are refused
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", "2"))  # queued or running jobs per user
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "3600"))  # seconds finished jobs stay queryable
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))  # seconds between checks for jobs changed on other workers
+JOB_LEASE = float(os.getenv("JOB_LEASE", "10"))  # seconds a job outlives its worker before it stops counting and reads as failed
+TELEMETRY_RAW_POINTS = int(os.getenv("TELEMETRY_RAW_POINTS", "3600"))  # raw samples kept per mining session
+TELEMETRY_MAX_SESSIONS = int(os.getenv("TELEMETRY_MAX_SESSIONS", "200"))  # sessions with telemetry kept (LRU)
+TELEMETRY_CLAIM_TTL = float(os.getenv("TELEMETRY_CLAIM_TTL", "120"))  # seconds without pushes before another worker may take over a session's telemetry
+ELECTRICITY_PRICE = float(os.getenv("ELECTRICITY_PRICE", "0.12"))  # USD per kWh in mining profit
+MINING_DEVICE_WATTS = float(os.getenv("MINING_DEVICE_WATTS", "420"))  # power draw assumed for a benchmarked rig
+PROFIT_SWITCH_THRESHOLD = float(os.getenv("PROFIT_SWITCH_THRESHOLD", "0.05"))  # switch only for this much more profit (fraction)
+PROFIT_MIN_DWELL = float(os.getenv("PROFIT_MIN_DWELL", "600"))  # seconds on a pool before switching again
+PROFIT_AUTO_SWITCH = os.getenv("PROFIT_AUTO_SWITCH", "false").lower() == "true"  # apply switches instead of recommending them
+HASH_BENCHMARK_PROCESSES = int(os.getenv("HASH_BENCHMARK_PROCESSES", "0"))  # worker processes for the CPU benchmark; 0 uses every core
+HASH_BENCHMARK_TRIALS = int(os.getenv("HASH_BENCHMARK_TRIALS", "3"))  # timed trials per kernel, single-core and all-core
+HASH_BENCHMARK_SECONDS = float(os.getenv("HASH_BENCHMARK_SECONDS", "1.0"))  # seconds per trial
+HASH_BENCHMARK_DB = os.getenv("HASH_BENCHMARK_DB", "")  # SQLite copy of benchmark results, restored into state at startup; empty keeps them in state only
+MINING_POOL_ENDPOINTS = os.getenv("MINING_POOL_ENDPOINTS", "")  # stratum endpoints probed for /mining/pools: pool/coin=host:port/fee,...; empty uses the built-in list
+POOL_PROBE_ROUNDS = int(os.getenv("POOL_PROBE_ROUNDS", "3"))  # probe rounds per endpoint per refresh
+POOL_PROBE_TIMEOUT = float(os.getenv("POOL_PROBE_TIMEOUT", "3.0"))  # seconds to connect and get the first stratum response
+POOL_PROBE_TTL = float(os.getenv("POOL_PROBE_TTL", "60"))  # seconds a pool ranking is served before re-probing
+STRATUM_ENABLED = os.getenv("STRATUM_ENABLED", "false").lower() == "true"  # connect mining sessions to their pool over stratum v1
+STRATUM_PASSWORD = os.getenv("STRATUM_PASSWORD", "x")  # worker password sent with mining.authorize
+STRATUM_TIMEOUT = float(os.getenv("STRATUM_TIMEOUT", "10"))  # seconds to connect and authorize, and per share ack
+STRATUM_MAX_BACKOFF = float(os.getenv("STRATUM_MAX_BACKOFF", "30"))  # longest wait between reconnect attempts
+STRATUM_POLL_INTERVAL = float(os.getenv("STRATUM_POLL_INTERVAL", "1.0"))  # seconds between checks for sessions stopped or switched on other workers
+STRATUM_CLAIM_TTL = float(os.getenv("STRATUM_CLAIM_TTL", "30"))  # seconds without a check-in before other workers may stop a session's stratum connection
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))  # seconds between event-loop lag probes
+
+# Web3 connection (address/unit helpers only; RPC goes through rpc_client)
 w3 = Web3(Web3.HTTPProvider(ETH_RPC_URL))
 
+# Shared outbound HTTP clients (one keep-alive pool per upstream host)
+http_pool = HTTPClientPool(
+    max_connections=HTTP_MAX_CONNECTIONS,
+    max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    default_timeout=HTTP_TIMEOUT,
+    host_timeouts=parse_host_timeouts(HTTP_HOST_TIMEOUTS),
+    http2=HTTP2_ENABLED
+)
+
+# Non-blocking, batched JSON-RPC access to the Ethereum node
+rpc_client = AsyncRPCClient(
+    http_pool,
+    ETH_RPC_URL,
+    max_concurrency=RPC_MAX_CONCURRENCY,
+    batch_window=RPC_BATCH_WINDOW_MS / 1000,
+    max_batch_size=RPC_MAX_BATCH_SIZE
+)
+
+# Block-aware wallet balance cache, invalidated by new heads
+balance_cache = BlockAwareCache(max_entries=BALANCE_CACHE_SIZE, max_age_blocks=BALANCE_CACHE_MAX_AGE_BLOCKS)
+head_tracker = HeadTracker(rpc_client, poll_interval=HEAD_POLL_INTERVAL)
+head_tracker.subscribe(balance_cache.on_new_block)
+
+# Token list, metadata and Multicall3 balance discovery
+token_info = {address.lower(): (symbol, decimals) for symbol, (address, decimals) in DEFAULT_DEX_TOKENS.items() if symbol != "ETH"}
+balance_tokens = [token.strip().lower() for token in BALANCE_TOKENS.split(",") if token.strip()] or sorted(token_info)
+balance_scanner = MulticallBalanceScanner(
+    rpc_client,
+    multicall_address=MULTICALL_ADDRESS,
+    max_calls=MULTICALL_MAX_CALLS,
+    max_gas=MULTICALL_MAX_GAS
+)
+balance_scanner.seed_metadata(token_info)
+# Wrapped tokens are priced as the asset they wrap
+PRICE_ALIASES = {"WETH": "ETH", "WBTC": "BTC"}
+
+# ERC-20 Transfer index behind wallet transaction history
+if INDEXER_TOKENS == "*":
+    indexed_tokens = []
+elif INDEXER_TOKENS:
+    indexed_tokens = [token.strip() for token in INDEXER_TOKENS.split(",") if token.strip()]
+else:
+    indexed_tokens = sorted(token_info)
+transfer_store = TransferStore(INDEXER_DB or ":memory:")
+transfer_indexer = TransferIndexer(
+    rpc_client,
+    transfer_store,
+    tokens=indexed_tokens,
+    start_block=int(INDEXER_START_BLOCK) if INDEXER_START_BLOCK else None,
+    backfill_blocks=INDEXER_BACKFILL_BLOCKS,
+    confirmations=INDEXER_CONFIRMATIONS,
+    target_logs=INDEXER_TARGET_LOGS,
+    poll_interval=INDEXER_POLL_INTERVAL
+)
+
+# Runtime metrics
+loop_lag_monitor = LoopLagMonitor(interval=LOOP_LAG_INTERVAL)
+endpoint_metrics = EndpointMetrics()
+
 # Data Models
 class WalletConnectionRequest(BaseModel):
     address: str = Field(..., description="Wallet address to connect")
@@ -110,6 +278,27 @@ class HardwareInfo(BaseModel):
     total_memory: int
     power_supply: int
 
+class TelemetrySample(BaseModel):
+    timestamp: Optional[float] = Field(default=None, description="Unix time of the sample; defaults to receipt time")
+    hashrate: float = Field(..., ge=0, description="Hashrate in MH/s")
+    power_consumption: float = Field(default=0.0, ge=0, description="Power draw in W")
+    temperature: float = Field(default=0.0, description="Temperature in °C")
+    fan_speed: float = Field(default=0.0, ge=0, description="Fan speed in %")
+    accepted_shares: int = Field(default=0, ge=0, description="Accepted shares since the miner started")
+    rejected_shares: int = Field(default=0, ge=0, description="Rejected shares since the miner started")
+
+class TelemetryBatch(BaseModel):
+    samples: List[TelemetrySample] = Field(..., min_items=1, max_items=10000)
+
+class Share(BaseModel):
+    job_id: str
+    extranonce2: str = Field(..., description="Hex, extranonce2_size bytes")
+    ntime: str = Field(..., description="Hex block time")
+    nonce: str = Field(..., description="Hex nonce")
+
+class ShareBatch(BaseModel):
+    shares: List[Share] = Field(..., min_items=1, max_items=1000)
+
 class MiningStatus(BaseModel):
     is_running: bool
     coin: str
@@ -135,14 +324,19 @@ class MiningEarnings(BaseModel):
 
 class MiningPool(BaseModel):
     name: str
+    coin: str
     url: str
     port: int
     fee: float
-    miners: int
-    hashrate: float
-    luck: int
-    last_block: str
     algorithm: str
+    reachable: bool
+    connect_ms: Optional[float]
+    latency_ms: Optional[float]
+    success_rate: float
+    reject_rate: float
+    cost_pct: Optional[float]  # fee + reject rate + work lost to latency; lower ranks first
+    rank: int
+    error: Optional[str]
 
 class AIRecommendation(BaseModel):
     type: str
@@ -176,6 +370,7 @@ class FriendWalletData(BaseModel):
     recent_transactions: List[Dict[str, Any]]
     ai_insights: str
     last_updated: str
+    partial: bool = False  # True when balance or history did not load in time
 
 class MarketData(BaseModel):
     symbol: str
@@ -192,148 +387,206 @@ class TradeResponse(BaseModel):
     message: str
     estimated_gas: Optional[int]
     estimated_output: Optional[float]
+    estimated_slippage_pct: Optional[float] = None
+    route: Optional[Dict[str, Any]] = None
+
+# Shared state: connected_wallets, friend_wallets, price_alerts, mining_sessions,
+# pools and pool_boosts namespaces live in the state backend
+state = create_state_backend(REDIS_URL if STATE_BACKEND == "redis" else "memory")
+if STATE_BACKEND == "redis":
+    trade_history = SharedTradeHistory(state)
+else:
+    trade_history = LocalTradeHistory(
+        TradeHistoryStore(segment_size=TRADE_HISTORY_SEGMENT_SIZE, db_path=TRADE_HISTORY_DB or None)
+    )
+
+# Portfolio analytics, fed incrementally from trade history and market snapshots
+price_history = PriceHistory(min_interval=PRICE_HISTORY_INTERVAL)
+portfolio_analytics = PortfolioAnalytics(
+    price_history,
+    aliases=PRICE_ALIASES,
+    bucket_seconds=ANALYTICS_BUCKET_SECONDS,
+    max_users=ANALYTICS_MAX_USERS
+)
 
-# In-memory storage (use Redis in production)
-connected_wallets: Dict[str, WalletData] = {}
-friend_wallets: Dict[str, List[str]] = {}
-price_alerts: Dict[str, List[Dict]] = {}
-trade_history: Dict[str, List[Dict]] = {}
-mining_sessions: Dict[str, Dict] = {}  # Track active mining sessions
+async def compute_portfolio_analytics(user: str) -> Dict[str, Any]:
+    """Ingest trades recorded since the last call, then compute the user's metrics"""
+    count = await trade_history.count(user)
+    ingested = portfolio_analytics.trade_count(user)
+    if count < ingested:  # history was reset underneath us
+        portfolio_analytics.reset(user)
+        ingested = 0
+    if count > ingested:
+        portfolio_analytics.ingest(user, await trade_history.since(user, ingested))
+    return portfolio_analytics.analytics(user)
 
 # Crypto Exchange Integration
 class CryptoExchangeManager:
     def __init__(self):
-        self.exchanges = {}
+        self.exchanges = ExchangePool(burst=EXCHANGE_BURST)
+        self.order_books: Dict[str, OrderBookReplica] = {}
+        self.market_data_cache = SingleFlightCache(
+            ttl=MARKET_DATA_TTL,
+            stale_ttl=MARKET_DATA_STALE_TTL
+        )
+        self.last_ticked: Optional[List[MarketData]] = None  # latest snapshot handed to on_market_tick
+        self.router = QuoteAggregator(
+            self._dex_venues(),
+            deadline=ROUTE_DEADLINE_MS / 1000,
+            cache_ttl=ROUTE_CACHE_MS / 1000
+        )
         self.init_exchanges()
     
     def init_exchanges(self):
-        """Initialize crypto exchanges"""
+        """Initialize one async ccxt client per exchange listed in EXCHANGES"""
+        for exchange_id in filter(None, (name.strip().lower() for name in EXCHANGES.split(","))):
+            try:
+                # API keys come from <EXCHANGE>_API_KEY / <EXCHANGE>_SECRET, e.g. BINANCE_API_KEY
+                self.exchanges.add_ccxt(exchange_id, {
+                    'apiKey': os.getenv(f'{exchange_id.upper()}_API_KEY'),
+                    'secret': os.getenv(f'{exchange_id.upper()}_SECRET'),
+                }, sandbox=EXCHANGE_SANDBOX)
+                self.register_exchange(exchange_id)
+                logger.info(f"Initialized exchange {exchange_id} (sandbox={EXCHANGE_SANDBOX})")
+            except Exception as e:
+                logger.error(f"Failed to initialize exchange {exchange_id}: {e}")
+    
+    def register_exchange(self, exchange_id: str):
+        """Give a pooled exchange its order-book replica and a place in trade routing"""
+        self.order_books[exchange_id] = OrderBookReplica(
+            lambda symbol: self._load_order_book(exchange_id, symbol),
+            depth=ORDER_BOOK_DEPTH,
+            max_age=ORDER_BOOK_MAX_AGE
+        )
+        self.router.venues.append(CexVenue(
+            exchange_id,
+            lambda token_in, token_out, amount_in: self.estimate_trade(exchange_id, token_in, token_out, amount_in)
+        ))
+    
+    def _dex_venues(self) -> List[DexVenue]:
+        """One venue per router in DEX_ROUTERS, quoted over the shared RPC client"""
         try:
-            # Example: Binance integration (add API keys in production)
-            # self.exchanges['binance'] = ccxt.binance({
-            #     'apiKey': os.getenv('BINANCE_API_KEY'),
-            #     'secret': os.getenv('BINANCE_SECRET'),
-            #     'sandbox': True,  # Use sandbox for testing
-            # })
-            pass
-        except Exception as e:
-            logger.error(f"Failed to initialize exchanges: {e}")
+            return [DexVenue(name, rpc_client, router) for name, router in parse_dex_routers(DEX_ROUTERS).items()]
+        except ValueError as e:
+            logger.error(f"Ignoring DEX_ROUTERS: {e}")
+            return []
+    
+    async def get_ticker(self, exchange: str, symbol: str) -> Dict[str, Any]:
+        """Get a ticker through the exchange's rate-limited scheduler"""
+        return await self.exchanges.fetch_ticker(exchange, symbol)
+    
+    async def get_order_book(self, exchange: str, symbol: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        """Get an order book through the exchange's rate-limited scheduler"""
+        return await self.exchanges.fetch_order_book(exchange, symbol, limit)
+    
+    async def _load_order_book(self, exchange: str, symbol: str) -> Dict[str, Any]:
+        return await self.exchanges.fetch_order_book(exchange, symbol, ORDER_BOOK_DEPTH or None)
+    
+    async def estimate_trade(self, exchange: str, token_in: str, token_out: str, amount_in: float) -> Optional[Dict[str, Any]]:
+        """Walk exchange's local order book for token_in -> token_out; None if it lists neither pair"""
+        markets = getattr(self.exchanges.scheduler(exchange).client, "markets", None) or {}
+        token_in, token_out = token_in.upper(), token_out.upper()
+        # Selling base for quote, or spending quote on base
+        for symbol, side in ((f"{token_in}/{token_out}", "sell"), (f"{token_out}/{token_in}", "buy")):
+            if markets and symbol not in markets:
+                continue
+            try:
+                book = await self.order_books[exchange].get(symbol)
+            except Exception as e:
+                logger.debug(f"No order book for {symbol} on {exchange}: {e}")
+                continue
+            fill = book.walk(side, amount_in, in_quote=(side == "buy"))
+            return {
+                "symbol": symbol,
+                "side": side,
+                "output": fill["filled_quote"] if side == "sell" else fill["filled_base"],
+                **fill
+            }
+        return None
+    
+    async def best_route(self, token_in: str, token_out: str, amount_in: float) -> Dict[str, Any]:
+        """Best quote across exchanges and DEX routers answering within ROUTE_DEADLINE_MS"""
+        return await self.router.best_route(token_in, token_out, amount_in)
+    
+    def order_book_stats(self) -> Dict[str, Any]:
+        return {exchange: replica.get_stats() for exchange, replica in self.order_books.items()}
     
     async def get_market_data(self) -> List[MarketData]:
-        """Fetch market data from CoinGecko"""
+        """Get market data, served from the TTL cache when possible"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{COINGECKO_API_URL}/coins/markets",
-                    params={
-                        "vs_currency": "usd",
-                        "order": "market_cap_desc",
-                        "per_page": 50,
-                        "page": 1,
-                        "sparkline": False,
-                        "price_change_percentage": "24h"
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return [
-                        MarketData(
-                            symbol=coin["symbol"].upper(),
-                            name=coin["name"],
-                            price=coin["current_price"],
-                            change_24h=coin["price_change_percentage_24h"] or 0,
-                            volume_24h=coin["total_volume"] or 0,
-                            market_cap=coin["market_cap"] or 0,
-                            trend="bullish" if (coin["price_change_percentage_24h"] or 0) > 0 else "bearish"
-                        )
-                        for coin in data
-                    ]
-                else:
-                    logger.error(f"CoinGecko API error: {response.status_code}")
-                    return []
-                    
+            return await self.market_data_cache.get("coins/markets", self._fetch_market_data)
         except Exception as e:
             logger.error(f"Error fetching market data: {e}")
-            return []
+            # Fall back to the last snapshot we have, however old
+            return self.market_data_cache.peek("coins/markets") or []
+    
+    async def _fetch_market_data(self) -> List[MarketData]:
+        """Fetch market data from CoinGecko"""
+        response = await http_pool.get(
+            f"{COINGECKO_API_URL}/coins/markets",
+            params={
+                "vs_currency": "usd",
+                "order": "market_cap_desc",
+                "per_page": 50,
+                "page": 1,
+                "sparkline": False,
+                "price_change_percentage": "24h"
+            }
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"CoinGecko API error: {response.status_code}")
+        
+        data = response.json()
+        market_data = [
+            MarketData(
+                symbol=coin["symbol"].upper(),
+                name=coin["name"],
+                price=coin["current_price"],
+                change_24h=coin["price_change_percentage_24h"] or 0,
+                volume_24h=coin["total_volume"] or 0,
+                market_cap=coin["market_cap"] or 0,
+                trend="bullish" if (coin["price_change_percentage_24h"] or 0) > 0 else "bearish"
+            )
+            for coin in data
+        ]
+        return market_data
 
 # AI Analysis Engine
 class AIAnalysisEngine:
-    @staticmethod
-    async def analyze_wallet_behavior(address: str, transactions: List[Dict]) -> str:
-        """Analyze wallet behavior patterns using AI"""
+    def __init__(self):
+        self.wallet_behavior = WalletBehaviorClassifier(
+            min_transactions=BEHAVIOR_MIN_TRANSACTIONS,
+            cache_size=BEHAVIOR_CACHE_SIZE
+        )
+    
+    async def analyze_wallets(self, histories: Dict[str, List[Dict]]) -> Dict[str, str]:
+        """Classify many wallets' behavior from their transfer histories in one batch"""
         try:
-            # In production, integrate with real AI models
-            patterns = [
-                "This wallet demonstrates conservative DeFi strategies with consistent staking rewards",
-                "High-frequency trading pattern detected with focus on momentum strategies",
-                "Long-term HODLer with occasional profit-taking during market peaks",
-                "Active yield farmer rotating between protocols for optimal returns",
-                "Memecoin trader with quick entry/exit strategies and high risk tolerance",
-                "NFT collector and trader with focus on blue-chip collections",
-                "Cross-chain DeFi user maximizing opportunities across multiple networks"
-            ]
+            market_data = await exchange_manager.get_market_data()
+            prices = {market.symbol: market.price for market in market_data}
+            prices.update({alias: prices[symbol] for alias, symbol in PRICE_ALIASES.items() if symbol in prices})
+            results = self.wallet_behavior.classify(histories, prices)
+            return {address: result["insight"] for address, result in results.items()}
             
-            # Simple analysis based on transaction count and frequency
-            if len(transactions) > 100:
-                return "High-frequency trader with active trading patterns"
-            elif len(transactions) < 10:
-                return "Conservative long-term holder with minimal trading activity"
-            else:
-                return patterns[hash(address) % len(patterns)]
-                
         except Exception as e:
             logger.error(f"Error analyzing wallet behavior: {e}")
-            return "Unable to analyze wallet behavior at this time"
+            return {address: "Unable to analyze wallet behavior at this time" for address in histories}
     
-    @staticmethod
-    async def generate_trading_signals() -> List[Dict[str, Any]]:
-        """Generate AI-powered trading signals"""
-        try:
-            # Mock AI signals (integrate with real AI in production)
-            signals = [
-                {
-                    "token": "ETH",
-                    "signal": "strong_buy",
-                    "confidence": 89,
-                    "reasoning": "Technical indicators show bullish divergence with strong volume support",
-                    "timeframe": "4h",
-                    "entry_price": 2456.78,
-                    "targets": [2580.00, 2720.00, 2850.00],
-                    "stop_loss": 2290.00
-                },
-                {
-                    "token": "BTC",
-                    "signal": "buy",
-                    "confidence": 76,
-                    "reasoning": "Breaking above key resistance with institutional accumulation",
-                    "timeframe": "1d",
-                    "entry_price": 43250.00,
-                    "targets": [45000.00, 47500.00, 50000.00],
-                    "stop_loss": 41000.00
-                },
-                {
-                    "token": "SOL",
-                    "signal": "neutral",
-                    "confidence": 54,
-                    "reasoning": "Consolidating in range, waiting for clear direction",
-                    "timeframe": "12h",
-                    "entry_price": 0,
-                    "targets": [],
-                    "stop_loss": 0
-                }
-            ]
-            
-            return signals
-            
-        except Exception as e:
-            logger.error(f"Error generating trading signals: {e}")
-            return []
+    async def analyze_wallet_behavior(self, address: str, transactions: List[Dict]) -> str:
+        """Analyze one wallet's behavior patterns"""
+        return (await self.analyze_wallets({address: transactions}))[address]
+    
+    async def generate_trading_signals(self) -> List[Dict[str, Any]]:
+        """Latest trading signals computed by the background signal scheduler"""
+        return signal_scheduler.snapshot.signals
 
 # Blockchain Data Manager
 class BlockchainDataManager:
     def __init__(self):
         self.w3 = w3
+        self.rpc = rpc_client
+        self.balance_cache = balance_cache
     
     async def get_wallet_balance(self, address: str) -> WalletData:
         """Get wallet balance and token holdings"""
@@ -342,80 +595,65 @@ class BlockchainDataManager:
             if not self.w3.is_address(address):
                 raise ValueError("Invalid wallet address")
             
-            # Get ETH balance
-            eth_balance = self.w3.eth.get_balance(address)
-            eth_balance_formatted = self.w3.from_wei(eth_balance, 'ether')
+            # Serve from cache unless a block since the last read touched this address
+            cached = self.balance_cache.get(address)
+            if cached is not None:
+                return cached
+            block = self.balance_cache.head
             
-            # In production, integrate with APIs like Alchemy, Moralis for token balances
-            # For now, return mock data
-            mock_tokens = [
-                TokenBalance(
-                    token="ETH",
-                    symbol="ETH",
-                    balance=str(eth_balance_formatted),
-                    value_usd=float(eth_balance_formatted) * 2456.78,
-                    price=2456.78,
-                    change_24h=3.45
-                ),
-                TokenBalance(
-                    token="USDC",
-                    symbol="USDC",
-                    balance="5000.00",
-                    value_usd=5000.00,
-                    price=1.00,
-                    change_24h=0.01
-                )
-            ]
+            # ETH and every token balance in one Multicall3 scan, shared with concurrent lookups
+            holdings, metadata, market_data = await asyncio.gather(
+                balance_scanner.wallet_balances(address, balance_tokens, hex(block) if block is not None else "latest"),
+                balance_scanner.metadata(balance_tokens),
+                exchange_manager.get_market_data()
+            )
+            prices = {coin.symbol: coin for coin in market_data}
+            
+            tokens = []
+            for token, raw_balance in holdings.items():
+                if token == "ETH":
+                    symbol, decimals = "ETH", 18
+                elif raw_balance and metadata.get(token):
+                    symbol, decimals = metadata[token]
+                else:
+                    continue
+                balance = format_units(raw_balance, decimals)
+                market = prices.get(PRICE_ALIASES.get(symbol.upper(), symbol.upper()))
+                price = market.price if market else 0.0
+                tokens.append(TokenBalance(
+                    token=token,
+                    symbol=symbol,
+                    balance=balance,
+                    value_usd=float(balance) * price,
+                    price=price,
+                    change_24h=market.change_24h if market else 0.0
+                ))
             
-            total_value = sum(token.value_usd for token in mock_tokens)
+            total_value = sum(token.value_usd for token in tokens)
+            daily_change = sum(token.value_usd * token.change_24h for token in tokens) / total_value if total_value else 0.0
             
-            return WalletData(
+            wallet_data = WalletData(
                 address=address,
                 total_value_usd=total_value,
-                daily_change_percent=2.34,
-                tokens=mock_tokens,
+                daily_change_percent=daily_change,
+                tokens=tokens,
                 last_updated=datetime.now().isoformat()
             )
+            self.balance_cache.put(address, wallet_data, block)
+            return wallet_data
             
         except Exception as e:
             logger.error(f"Error getting wallet balance: {e}")
             raise HTTPException(status_code=400, detail=f"Failed to get wallet balance: {str(e)}")
     
-    async def get_transaction_history(self, address: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get transaction history for wallet"""
-        try:
-            # In production, use blockchain APIs like Etherscan, Alchemy
-            # Return mock transaction data
-            mock_transactions = [
-                {
-                    "hash": "0x" + "1" * 64,
-                    "from": address,
-                    "to": "0x" + "a" * 40,
-                    "value": "1.5",
-                    "token": "ETH",
-                    "type": "send",
-                    "timestamp": (datetime.now() - timedelta(hours=2)).isoformat(),
-                    "gas_used": 21000,
-                    "status": "success"
-                },
-                {
-                    "hash": "0x" + "2" * 64,
-                    "from": "0x" + "b" * 40,
-                    "to": address,
-                    "value": "100.0",
-                    "token": "USDC",
-                    "type": "receive",
-                    "timestamp": (datetime.now() - timedelta(days=1)).isoformat(),
-                    "gas_used": 65000,
-                    "status": "success"
-                }
-            ]
-            
-            return mock_transactions[:limit]
-            
-        except Exception as e:
-            logger.error(f"Error getting transaction history: {e}")
-            return []
+    async def get_transaction_history(
+        self,
+        address: str,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Get one page of indexed token transfers for wallet, newest first, plus the next cursor"""
+        return await transfer_indexer.history(address, cursor=cursor, limit=limit, token_info=token_info)
 
 # Security Manager
 class SecurityManager:
@@ -479,14 +717,230 @@ class SecurityManager:
 
 # Initialize managers
 exchange_manager = CryptoExchangeManager()
+
+async def fetch_signal_ohlcv(symbol: str, timeframe: str, since: Optional[int], limit: int) -> List[List[float]]:
+    """Candles from SIGNAL_EXCHANGE, or resampled from recorded market prices without an exchange"""
+    exchange = SIGNAL_EXCHANGE or next(iter(exchange_manager.exchanges.names()), None)
+    if exchange is not None:
+        return await exchange_manager.exchanges.fetch_ohlcv(
+            exchange, f"{symbol}/{SIGNAL_QUOTE}", timeframe, since=since, limit=limit
+        )
+    return price_history.candles(symbol, TIMEFRAME_SECONDS[timeframe], since=since, limit=limit)
+
+signal_scheduler = SignalScheduler(
+    fetch_signal_ohlcv,
+    [symbol.strip() for symbol in SIGNAL_SYMBOLS.split(",") if symbol.strip()],
+    timeframe=SIGNAL_TIMEFRAME,
+    bars=SIGNAL_BARS,
+    interval=SIGNAL_INTERVAL
+)
 blockchain_manager = BlockchainDataManager()
 ai_engine = AIAnalysisEngine()
 security_manager = SecurityManager()
+alert_engine = PriceAlertEngine()
+
+async def evaluate_price_alerts(market_data: List[MarketData]) -> None:
+    """Fire price alerts crossed by a fresh market data snapshot"""
+    prices = {coin.symbol: coin.price for coin in market_data if coin.price is not None}
+    triggered = alert_engine.evaluate_prices(prices)
+    if not triggered:
+        return
+    # Another worker may have fired or deleted the alert already
+    current = await state.get_many("price_alerts", [alert_id for alert_id, _ in triggered])
+    triggered_at = datetime.now().isoformat()
+    updates = {}
+    for (alert_id, (user, token)), alert in zip(triggered, current):
+        if alert and alert["active"]:
+            updates[alert_id] = {
+                "active": False,
+                "triggered_at": triggered_at,
+                "triggered_price": prices[token.upper()]
+            }
+            logger.info(f"Price alert {alert_id} for {user} triggered: {token} {alert['condition']} {alert['price_target']}")
+    if updates:
+        await state.update_many("price_alerts", updates)
+
+async def load_price_alerts() -> None:
+    """Index active alerts from shared state (alerts created on other workers included)"""
+    alert_ids = await state.keys("price_alerts")
+    for alert_id, alert in zip(alert_ids, await state.get_many("price_alerts", alert_ids)):
+        if alert and alert["active"]:
+            alert_engine.add(
+                alert_id, alert["token"], alert["condition"], alert["price_target"],
+                payload=(alert["owner"], alert["token"])
+            )
+
+async def on_market_tick(market_data: List[MarketData]) -> None:
+    """Feed a new upstream snapshot to analytics, price alerts and profit switching; each step fails on its own"""
+    price_history.record({market.symbol: market.price for market in market_data})
+    for step in (evaluate_price_alerts, evaluate_mining_profit):
+        try:
+            await step(market_data)
+        except Exception as e:
+            logger.error(f"Market tick step {step.__name__} failed: {e}")
+
+async def fetch_market_rows() -> List[Dict[str, Any]]:
+    """Market data rows for the stream, served from the market data cache.
+
+    Each upstream refresh is one price tick: the first stream refresh that
+    sees a new snapshot runs ``on_market_tick`` after the data is loaded,
+    so a failing alert or switch never fails the refresh itself.
+    """
+    market_data = await exchange_manager.get_market_data()
+    if market_data and market_data is not exchange_manager.last_ticked:
+        exchange_manager.last_ticked = market_data
+        await on_market_tick(market_data)
+    return [coin.dict() for coin in market_data]
+
+# Market data push: one refresh loop fans out to every stream subscriber
+market_broadcaster = Broadcaster(queue_size=MARKET_STREAM_QUEUE_SIZE, max_dropped=MARKET_STREAM_MAX_DROPPED)
+market_streamer = MarketDataStreamer(fetch_market_rows, market_broadcaster, interval=MARKET_STREAM_INTERVAL)
+
+# Mining telemetry pushed by miners, per session in fixed memory. History stays
+# on the worker that records it (claimed in the session document); the latest
+# sample is also kept in the session so every worker reports current status
+telemetry_store = TelemetryStore(raw_points=TELEMETRY_RAW_POINTS, max_sessions=TELEMETRY_MAX_SESSIONS)
+WORKER_ID = f"{os.getpid()}-{os.urandom(4).hex()}"
+
+def telemetry_held_elsewhere(session: Dict[str, Any]) -> bool:
+    """Whether another live worker records this session's telemetry history"""
+    worker = session.get("telemetry_worker")
+    return (
+        worker is not None and worker != WORKER_ID
+        and time.time() - session.get("telemetry_seen", 0) < TELEMETRY_CLAIM_TTL
+    )
+
+# Profit switching across every benchmarked rig (one device per user)
+profit_engine = ProfitEngine(
+    electricity_price=ELECTRICITY_PRICE,
+    switch_threshold=PROFIT_SWITCH_THRESHOLD,
+    min_dwell=PROFIT_MIN_DWELL
+)
+# Benchmark result key -> (algorithm, H/s per reported unit: MH/s for GPU algorithms, kH/s for RandomX)
+BENCHMARK_ALGORITHMS = {"ethash": ("Ethash", 1e6), "kawpow": ("KawPow", 1e6), "randomx": ("RandomX", 1e3)}
+
+def configured_pool_endpoints():
+    """Endpoints from MINING_POOL_ENDPOINTS, or the built-in list when unset or invalid"""
+    if MINING_POOL_ENDPOINTS:
+        try:
+            return parse_pool_endpoints(MINING_POOL_ENDPOINTS)
+        except ValueError as e:
+            logger.error(f"Ignoring MINING_POOL_ENDPOINTS: {e}")
+    return DEFAULT_POOL_ENDPOINTS
+
+# Stratum latency probes behind /mining/pools, cached for POOL_PROBE_TTL
+pool_prober = PoolProber(
+    configured_pool_endpoints(),
+    rounds=POOL_PROBE_ROUNDS,
+    timeout=POOL_PROBE_TIMEOUT,
+    cache_ttl=POOL_PROBE_TTL,
+    stale_ttl=5 * POOL_PROBE_TTL
+)
+
+def stratum_endpoints(coin: str, pool: str) -> List[Tuple[str, int]]:
+    """The pool's endpoint for coin first, then the coin's other pools as backups (best ranked first)"""
+    coin = coin.upper()
+    ranked = pool_prober.cache.peek("ranking") or []
+    rank = {(entry["name"], entry["coin"]): entry["rank"] for entry in ranked if entry["reachable"]}
+    candidates = [endpoint for endpoint in pool_prober.endpoints if endpoint[1] == coin]
+    primary = [endpoint for endpoint in candidates if endpoint[0] == pool]
+    if not primary:
+        raise ValueError(f"No stratum endpoint configured for {pool} ({coin})")
+    backups = sorted(
+        (endpoint for endpoint in candidates if endpoint[0] != pool),
+        key=lambda endpoint: rank.get(endpoint[:2], len(candidates) + 1)
+    )
+    return [(host, port) for _, _, host, port, _ in primary + backups]
+
+# CPU hashing benchmark; the latest result per user is a "mining_benchmarks"
+# document every worker reads, and feeds profit switching. HASH_BENCHMARK_DB
+# keeps a copy on disk, restored into state at startup
+hash_benchmark = HashBenchmark(
+    processes=HASH_BENCHMARK_PROCESSES or None,
+    trials=HASH_BENCHMARK_TRIALS,
+    trial_seconds=HASH_BENCHMARK_SECONDS
+)
+benchmark_store = BenchmarkStore(HASH_BENCHMARK_DB) if HASH_BENCHMARK_DB else None
+rig_benchmarks: Dict[str, Optional[str]] = {}  # device -> timestamp of the benchmark in this worker's profit_engine
+
+def set_benchmarked_rig(device: str, result: Dict[str, Any]) -> None:
+    """Add or update a rig in this worker's profit-switching fleet"""
+    # CPU rates are re-derived so only kernels that measure a real algorithm are priced
+    hashrates = profit_hashrates(result) if result.get("mode") == "cpu" else result.get("hashrates") or {}
+    profit_engine.set_device(device, hashrates, {algorithm: MINING_DEVICE_WATTS for algorithm in hashrates})
+    rig_benchmarks[device] = result.get("timestamp")
+
+async def load_benchmarked_rigs() -> int:
+    """Rejoin benchmark results to the profit-switching fleet"""
+    if benchmark_store is not None:
+        known = set(await state.keys("mining_benchmarks"))
+        for device, result in benchmark_store.all().items():
+            if device not in known:
+                await state.put("mining_benchmarks", device, result)
+    devices = await state.keys("mining_benchmarks")
+    for device, result in zip(devices, await state.get_many("mining_benchmarks", devices)):
+        if result is not None:
+            set_benchmarked_rig(device, result)
+    return len(devices)
+
+async def sync_benchmarked_rig(device: str) -> bool:
+    """Match this worker's row for a rig to its shared benchmark and session; False without a benchmark
+
+    Another worker may have re-run the benchmark or started, switched or
+    stopped the session, so rankings are only served after this sync.
+    """
+    result, session = await state.batch([
+        ("get", "mining_benchmarks", device),
+        ("get", "mining_sessions", device),
+    ])
+    if result is None:
+        return False
+    if not profit_engine.has_device(device) or rig_benchmarks.get(device) != result.get("timestamp"):
+        set_benchmarked_rig(device, result)
+    if session is not None and session["status"] == "running":
+        profit_engine.assign(device, session["coin"], session["pool"])
+    else:
+        profit_engine.assign(device, None, None)
+    return True
+
+async def evaluate_mining_profit(market_data: List[MarketData]) -> None:
+    """Re-rank pools for every rig on a price tick; apply switches when PROFIT_AUTO_SWITCH is on"""
+    switches = profit_engine.on_prices({coin.symbol: coin.price for coin in market_data if coin.price is not None})
+    if not switches or not PROFIT_AUTO_SWITCH:
+        return
+    sessions = await state.get_many("mining_sessions", [device for device, _, _ in switches])
+    updates, applied = {}, []
+    for (device, coin, pool), session in zip(switches, sessions):
+        if session and session["status"] == "running" and mining_manager.switch_stratum(device, coin, pool):
+            updates[device] = {"coin": coin, "pool": pool, "algorithm": profit_engine.algorithm_for(coin)}
+            applied.append((device, coin, pool))
+            logger.info(f"Switching {device} from {session['coin']}@{session['pool']} to {coin}@{pool}")
+    if updates:
+        await state.update_many("mining_sessions", updates)
+        profit_engine.apply(applied)
 
 # Mining Management Classes
 class MiningManager:
-    def __init__(self):
+    def __init__(self, worker_id: str = WORKER_ID):
         self.active_sessions = {}
+        # Stratum connections of this worker's sessions (STRATUM_ENABLED), with the pool each one mines for.
+        # The session document names the owning worker, which polls it and follows stops and switches
+        self.worker_id = worker_id
+        self.stratum_clients: Dict[str, StratumClient] = {}
+        self.stratum_pools: Dict[str, str] = {}
+        self._stratum_watch: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        if self._stratum_watch is None or self._stratum_watch.done():
+            self._stratum_watch = asyncio.ensure_future(self._watch_stratum())
+    
+    def stratum_held_elsewhere(self, session: Dict[str, Any]) -> bool:
+        """Whether another live worker holds this session's stratum connection"""
+        worker = session.get("stratum_worker")
+        return (
+            worker is not None and worker != self.worker_id and session["status"] != "stopped"
+            and time.time() - session.get("stratum_seen", 0) < STRATUM_CLAIM_TTL
+        )
     
     async def detect_hardware(self) -> HardwareInfo:
         """Detect available mining hardware"""
@@ -537,49 +991,65 @@ class MiningManager:
             logger.error(f"Error detecting hardware: {e}")
             raise HTTPException(status_code=500, detail="Failed to detect hardware")
     
-    async def start_mining(self, user_address: str, coin: str, pool: str) -> Dict[str, Any]:
-        """Start mining operation"""
+    async def start_mining(self, user_address: str, coin: str, pool: str, progress=no_progress) -> Dict[str, Any]:
+        """Start mining operation (runs as a background job)"""
+        # In production, start actual mining process
+        session_id = hashlib.md5(f"{user_address}{time.time()}".encode()).hexdigest()[:16]
+        previous = await state.get("mining_sessions", user_address)
+        if previous is not None:
+            telemetry_store.drop(previous["session_id"])
+        
+        mining_session = {
+            "session_id": session_id,
+            "user_address": user_address,
+            "coin": coin,
+            "pool": pool,
+            "algorithm": self._get_algorithm_for_coin(coin),
+            "start_time": datetime.now().isoformat(),
+            "status": "starting"
+        }
+        if STRATUM_ENABLED:
+            mining_session.update(stratum_worker=self.worker_id, stratum_seen=time.time())
+        
+        await state.put("mining_sessions", user_address, mining_session)
+        progress(10, f"Connecting to {pool}")
+        
         try:
-            # In production, start actual mining process
-            session_id = hashlib.md5(f"{user_address}{time.time()}".encode()).hexdigest()[:16]
-            
-            mining_session = {
-                "session_id": session_id,
-                "user_address": user_address,
-                "coin": coin,
-                "pool": pool,
-                "algorithm": self._get_algorithm_for_coin(coin),
-                "start_time": datetime.now().isoformat(),
-                "status": "starting"
-            }
-            
-            mining_sessions[user_address] = mining_session
-            
-            # Simulate mining startup delay
-            await asyncio.sleep(1)
-            
-            mining_sessions[user_address]["status"] = "running"
-            
-            return {
-                "success": True,
-                "session_id": session_id,
-                "message": f"Mining {coin} started successfully"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error starting mining: {e}")
-            raise HTTPException(status_code=400, detail=str(e))
+            if STRATUM_ENABLED:
+                await self._connect_stratum(user_address, coin, pool)
+            else:
+                # Simulate mining startup delay
+                await asyncio.sleep(1)
+        except (asyncio.CancelledError, ConnectionError, ValueError):
+            await self._disconnect_stratum(user_address)
+            await state.update("mining_sessions", user_address, {
+                "status": "stopped",
+                "end_time": datetime.now().isoformat()
+            })
+            raise
+        
+        await state.update("mining_sessions", user_address, {"status": "running"})
+        await sync_benchmarked_rig(user_address)
+        
+        return {
+            "success": True,
+            "session_id": session_id,
+            "message": f"Mining {coin} started successfully"
+        }
     
     async def stop_mining(self, user_address: str) -> Dict[str, Any]:
         """Stop mining operation"""
         try:
-            if user_address in mining_sessions:
-                session = mining_sessions[user_address]
-                session["status"] = "stopped"
-                session["end_time"] = datetime.now().isoformat()
+            session = await state.get("mining_sessions", user_address)
+            if session is not None:
+                await state.update("mining_sessions", user_address, {
+                    "status": "stopped",
+                    "end_time": datetime.now().isoformat()
+                })
                 
-                # In production, stop actual mining process
                 logger.info(f"Stopping mining session {session['session_id']}")
+                await self._disconnect_stratum(user_address)
+                profit_engine.assign(user_address, None, None)
                 
                 return {
                     "success": True,
@@ -595,20 +1065,119 @@ class MiningManager:
             logger.error(f"Error stopping mining: {e}")
             raise HTTPException(status_code=400, detail=str(e))
     
+    async def _connect_stratum(self, user_address: str, coin: str, pool: str) -> None:
+        """Connect the session to its pool (backups from the same coin); raises ConnectionError if it never authorizes"""
+        await self._disconnect_stratum(user_address)
+
+        def record_share(accepted: bool, latency_ms: float) -> None:
+            pool_prober.record_shares(self.stratum_pools.get(user_address, pool), int(accepted), int(not accepted))
+
+        client = StratumClient(
+            stratum_endpoints(coin, pool),
+            username=user_address,
+            password=STRATUM_PASSWORD,
+            timeout=STRATUM_TIMEOUT,
+            max_backoff=STRATUM_MAX_BACKOFF,
+            on_share=record_share
+        )
+        self.stratum_clients[user_address] = client
+        self.stratum_pools[user_address] = pool
+        client.start()
+        if not await client.wait_ready(STRATUM_TIMEOUT):
+            error = client.last_error or "timed out"
+            await self._disconnect_stratum(user_address)
+            raise ConnectionError(f"Could not connect to {pool}: {error}")
+    
+    async def _disconnect_stratum(self, user_address: str) -> None:
+        client = self.stratum_clients.pop(user_address, None)
+        self.stratum_pools.pop(user_address, None)
+        if client is not None:
+            await client.stop()
+    
+    def switch_stratum(self, user_address: str, coin: str, pool: str) -> bool:
+        """Point a session's stratum connection at another pool; False when that pool has no endpoint"""
+        client = self.stratum_clients.get(user_address)
+        if client is None:
+            return True
+        try:
+            client.set_endpoints(stratum_endpoints(coin, pool))
+        except ValueError as e:
+            logger.error(f"Not switching {user_address}: {e}")
+            return False
+        self.stratum_pools[user_address] = pool
+        return True
+    
+    async def _watch_stratum(self) -> None:
+        """Check in for this worker's stratum sessions; drop those stopped or taken over elsewhere, follow switches"""
+        while True:
+            await asyncio.sleep(STRATUM_POLL_INTERVAL)
+            users = list(self.stratum_clients)
+            if not users:
+                continue
+            try:
+                sessions = await state.get_many("mining_sessions", users)
+                held = {}
+                for user_address, session in zip(users, sessions):
+                    if user_address not in self.stratum_clients:
+                        continue  # disconnected while the sessions were read
+                    if session is None or session["status"] == "stopped" or session.get("stratum_worker") != self.worker_id:
+                        logger.info(f"Mining session of {user_address} was stopped or moved; closing its stratum connection")
+                        await self._disconnect_stratum(user_address)
+                        profit_engine.assign(user_address, None, None)
+                        continue
+                    if session["pool"] != self.stratum_pools.get(user_address):
+                        self.switch_stratum(user_address, session["coin"], session["pool"])
+                    held[user_address] = {"stratum_seen": time.time()}
+                if held:
+                    await state.update_many("mining_sessions", held)
+            except Exception as e:
+                logger.error(f"Failed to check stratum sessions: {e}")
+    
+    async def close(self) -> None:
+        """Disconnect every stratum session on shutdown"""
+        if self._stratum_watch is not None:
+            self._stratum_watch.cancel()
+            try:
+                await self._stratum_watch
+            except asyncio.CancelledError:
+                pass
+            self._stratum_watch = None
+        for user_address in list(self.stratum_clients):
+            await self._disconnect_stratum(user_address)
+    
+    def get_stratum_stats(self) -> Dict[str, Any]:
+        clients = list(self.stratum_clients.values())
+        totals = {key: sum(client.stats[key] for client in clients) for key in ("submitted", "accepted", "rejected", "lost", "reconnects", "failovers")}
+        return {
+            "enabled": STRATUM_ENABLED,
+            "sessions": len(clients),
+            "connected": sum(1 for client in clients if client.connected),
+            **totals
+        }
+    
     async def get_mining_status(self, user_address: str) -> MiningStatus:
         """Get current mining status"""
         try:
-            if user_address in mining_sessions:
-                session = mining_sessions[user_address]
+            session = await state.get("mining_sessions", user_address)
+            if session is not None:
                 if session["status"] == "running":
                     # Calculate uptime
                     start_time = datetime.fromisoformat(session["start_time"])
                     uptime_seconds = (datetime.now() - start_time).total_seconds()
                     uptime_str = str(timedelta(seconds=int(uptime_seconds)))
                     
-                    # Generate realistic mining metrics
-                    base_hashrate = 85.6
-                    hashrate = base_hashrate + (time.time() % 10) - 5  # Simulate fluctuation
+                    # Latest pushed telemetry (shared by all workers); zeros until the miner reports
+                    sample = session.get("telemetry") or dict.fromkeys(TELEMETRY_FIELDS, 0.0)
+                    # Rollups exist only on the worker recording the session; elsewhere this is empty
+                    recent = telemetry_store.history(session["session_id"], "1m", start=time.time() - 3600)
+                    hashrate = sample["hashrate"]
+                    power = sample["power_consumption"]
+                    # Shares acknowledged by the pool when the session holds a stratum connection
+                    client = self.stratum_clients.get(user_address)
+                    shares = client.stats if client is not None else {
+                        "accepted": sample["accepted_shares"],
+                        "rejected": sample["rejected_shares"]
+                    }
                     
                     return MiningStatus(
                         is_running=True,
@@ -616,13 +1185,13 @@ class MiningManager:
                         algorithm=session["algorithm"],
                         pool=session["pool"],
                         hashrate=round(hashrate, 2),
-                        target_hashrate=90.0,
-                        power_consumption=round(420 + (time.time() % 50), 1),
-                        efficiency=round(hashrate / 420, 3),
-                        temperature=round(68 + (time.time() % 8), 1),
-                        fan_speed=int(65 + (time.time() % 10)),
-                        accepted_shares=int(uptime_seconds / 30),
-                        rejected_shares=int((time.time() % 3)),
+                        target_hashrate=round(max(recent["hashrate"]["avg"], default=hashrate), 2),  # best minute this hour
+                        power_consumption=round(power, 1),
+                        efficiency=round(hashrate / power, 3) if power else 0.0,
+                        temperature=round(sample["temperature"], 1),
+                        fan_speed=int(sample["fan_speed"]),
+                        accepted_shares=int(shares["accepted"]),
+                        rejected_shares=int(shares["rejected"]),
                         uptime=uptime_str
                     )
             
@@ -651,8 +1220,8 @@ class MiningManager:
         """Calculate mining earnings"""
         try:
             # In production, calculate based on actual hashrate, pool data, and market prices
-            if user_address in mining_sessions:
-                session = mining_sessions[user_address]
+            session = await state.get("mining_sessions", user_address)
+            if session is not None:
                 if session["status"] == "running":
                     # Calculate earnings based on mining time
                     start_time = datetime.fromisoformat(session["start_time"])
@@ -686,88 +1255,61 @@ class MiningManager:
             raise HTTPException(status_code=400, detail=str(e))
     
     async def get_mining_pools(self) -> List[MiningPool]:
-        """Get available mining pools"""
+        """Get mining pools ranked by measured latency, fee and reject rate"""
         try:
-            # In production, fetch real pool data
-            pools = [
-                MiningPool(
-                    name="Ethermine",
-                    url="eth-us-east1.nanopool.org",
-                    port=9999,
-                    fee=1.0,
-                    miners=234567,
-                    hashrate=245.7,
-                    luck=103,
-                    last_block="2h 34m ago",
-                    algorithm="Ethash"
-                ),
-                MiningPool(
-                    name="2Miners",
-                    url="eth.2miners.com",
-                    port=2020,
-                    fee=1.0,
-                    miners=187432,
-                    hashrate=198.3,
-                    luck=97,
-                    last_block="1h 12m ago",
-                    algorithm="Ethash"
-                ),
-                MiningPool(
-                    name="F2Pool",
-                    url="eth.f2pool.com",
-                    port=6688,
-                    fee=2.5,
-                    miners=156789,
-                    hashrate=167.9,
-                    luck=108,
-                    last_block="3h 45m ago",
-                    algorithm="Ethash"
-                ),
-                MiningPool(
-                    name="NiceHash",
-                    url="stratum+tcp://daggerhashimoto.usa.nicehash.com",
-                    port=3353,
-                    fee=2.0,
-                    miners=98765,
-                    hashrate=123.4,
-                    luck=94,
-                    last_block="45m ago",
-                    algorithm="DaggerHashimoto"
-                )
+            return [
+                MiningPool(**pool, algorithm=profit_engine.algorithm_for(pool["coin"]) or "Unknown")
+                for pool in await pool_prober.ranking()
             ]
             
-            return pools
-            
         except Exception as e:
             logger.error(f"Error getting mining pools: {e}")
             raise HTTPException(status_code=500, detail="Failed to get mining pools")
     
-    async def benchmark_hardware(self, user_address: str) -> Dict[str, Any]:
-        """Run hardware benchmark"""
-        try:
-            # In production, run actual benchmark tests
-            logger.info(f"Starting benchmark for user {user_address}")
-            
-            # Simulate benchmark duration
-            await asyncio.sleep(2)
-            
-            benchmark_results = {
-                "ethash": round(85.6 + (time.time() % 10), 2),
-                "kawpow": round(62.3 + (time.time() % 8), 2),
-                "randomx": round(18.7 + (time.time() % 3), 2),
-                "timestamp": datetime.now().isoformat(),
-                "completed": True
-            }
-            
-            return {
-                "success": True,
-                "results": benchmark_results,
-                "message": "Benchmark completed successfully"
+    async def benchmark_hardware(self, user_address: str, mode: str = "cpu", progress=no_progress) -> Dict[str, Any]:
+        """Run hardware benchmark (runs as a background job)
+
+        ``cpu`` hashes the SHA-256d, scrypt and memory-hard kernels on every
+        core; ``simulated`` returns mock GPU rates for Ethash/KawPow/RandomX.
+        """
+        logger.info(f"Starting {mode} benchmark for user {user_address}")
+        
+        if mode == "cpu":
+            benchmark_results = await hash_benchmark.run(progress)
+            hashrates = profit_hashrates(benchmark_results)
+        else:
+            baselines = {"ethash": (85.6, 10), "kawpow": (62.3, 8), "randomx": (18.7, 3)}
+            benchmark_results = {"mode": "simulated"}
+            for index, (algorithm, (base, spread)) in enumerate(baselines.items()):
+                progress(100 * index / len(baselines), f"Benchmarking {algorithm}")
+                # Simulate benchmark duration
+                await asyncio.sleep(2 / len(baselines))
+                benchmark_results[algorithm] = round(base + (time.time() % spread), 2)
+            benchmark_results["timestamp"] = datetime.now().isoformat()
+            hashrates = {
+                BENCHMARK_ALGORITHMS[key][0]: benchmark_results[key] * BENCHMARK_ALGORITHMS[key][1]
+                for key in baselines
             }
-            
-        except Exception as e:
-            logger.error(f"Error running benchmark: {e}")
-            raise HTTPException(status_code=400, detail=str(e))
+        
+        benchmark_results.update({
+            "hashrates": hashrates,
+            "completed": True
+        })
+        await state.put("mining_benchmarks", user_address, benchmark_results)
+        if benchmark_store is not None:
+            benchmark_store.save(user_address, benchmark_results)
+        
+        # The benchmarked rig joins the profit-switching fleet
+        set_benchmarked_rig(user_address, benchmark_results)
+        session = await state.get("mining_sessions", user_address)
+        if session is not None and session["status"] == "running":
+            profit_engine.assign(user_address, session["coin"], session["pool"])
+        
+        return {
+            "success": True,
+            "results": benchmark_results,
+            "message": "Benchmark completed successfully"
+        }
     
     async def get_ai_recommendations(self, user_address: str) -> List[AIRecommendation]:
         """Get AI mining recommendations"""
@@ -775,8 +1317,8 @@ class MiningManager:
             recommendations = []
             
             # Check if user is mining
-            if user_address in mining_sessions:
-                session = mining_sessions[user_address]
+            session = await state.get("mining_sessions", user_address)
+            if session is not None:
                 if session["status"] == "running":
                     # Add optimization recommendations
                     recommendations.extend([
@@ -794,15 +1336,50 @@ class MiningManager:
                         )
                     ])
             
-            # Add profitability recommendations
-            recommendations.append(
-                AIRecommendation(
-                    type="profitability",
-                    message="Switch to Ravencoin mining for 15% higher profitability this week",
-                    confidence=78,
-                    action="switch_coin"
+            # Add profitability recommendations from the profit-switching engine
+            await sync_benchmarked_rig(user_address)
+            best = profit_engine.recommendation(user_address)
+            mining = session is not None and session["status"] == "running"
+            if best is None:
+                recommendations.append(
+                    AIRecommendation(
+                        type="profitability",
+                        message="Run a hardware benchmark to get coin and pool recommendations",
+                        confidence=None,
+                        action="run_benchmark"
+                    )
+                )
+            elif not mining and best["profit_per_day"] <= 0:
+                recommendations.append(
+                    AIRecommendation(
+                        type="profitability",
+                        message=f"Mining is unprofitable at ${ELECTRICITY_PRICE}/kWh; the best option, {best['coin']} on "
+                                f"{best['pool']}, would make ${best['profit_per_day']:.2f}/day",
+                        confidence=80,
+                        action=None
+                    )
+                )
+            elif not mining:
+                recommendations.append(
+                    AIRecommendation(
+                        type="profitability",
+                        message=f"Mine {best['coin']} on {best['pool']} for an expected ${best['profit_per_day']:.2f}/day",
+                        confidence=80,
+                        action="start_mining"
+                    )
+                )
+            elif best["switch"]:
+                gain = best["gain_percent"]
+                recommendations.append(
+                    AIRecommendation(
+                        type="profitability",
+                        message=f"Switch to {best['coin']} on {best['pool']} for "
+                                f"{f'{gain:.0f}% ' if gain is not None else ''}higher profitability "
+                                f"(${best['profit_per_day']:.2f}/day)",
+                        confidence=int(min(95, 60 + (gain or 10))),
+                        action="switch_coin"
+                    )
                 )
-            )
             
             return recommendations
             
@@ -812,18 +1389,23 @@ class MiningManager:
     
     def _get_algorithm_for_coin(self, coin: str) -> str:
         """Get mining algorithm for coin"""
-        algorithms = {
-            "ETC": "Ethash",
-            "RVN": "Kawpow", 
-            "XMR": "RandomX",
-            "BTC": "SHA-256",
-            "LTC": "Scrypt"
-        }
-        return algorithms.get(coin, "Ethash")
+        return profit_engine.algorithm_for(coin) or "Ethash"
 
 # Initialize mining manager
 mining_manager = MiningManager()
 
+# Bounded worker pool for long-running mining operations; jobs are mirrored
+# to shared state so any worker can report on or cancel them
+job_queue = JobQueue(
+    workers=JOB_WORKERS,
+    max_queued=JOB_QUEUE_SIZE,
+    max_per_user=JOB_MAX_PER_USER,
+    retention=JOB_RETENTION
+)
+shared_jobs = SharedJobs(
+    state, job_queue, max_per_user=JOB_MAX_PER_USER, poll_interval=JOB_POLL_INTERVAL, lease=JOB_LEASE
+)
+
 # Authentication dependency
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
     """Get current authenticated user"""
@@ -832,6 +1414,53 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Security(
         raise HTTPException(status_code=401, detail="Invalid authentication token")
     return address
 
+# Lifecycle hooks
+@app.on_event("startup")
+async def startup():
+    """Open shared outbound clients and start runtime monitors"""
+    await http_pool.start(COINGECKO_API_URL, ETH_RPC_URL)
+    loop_lag_monitor.start()
+    head_tracker.start()
+    if INDEXER_ENABLED:
+        if not INDEXER_DB:
+            logger.warning("INDEXER_DB is not set: indexed transfers are kept in memory and backfilled again on every restart")
+        transfer_indexer.start()
+    await load_price_alerts()
+    market_streamer.start()
+    signal_scheduler.start()
+    shared_jobs.start()
+    mining_manager.start()
+    await load_benchmarked_rigs()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop runtime monitors and close shared outbound clients"""
+    await market_streamer.stop()
+    await signal_scheduler.stop()
+    await shared_jobs.stop()
+    await mining_manager.close()
+    if benchmark_store is not None:
+        benchmark_store.close()
+    await exchange_manager.exchanges.aclose()
+    await head_tracker.stop()
+    await transfer_indexer.stop()
+    transfer_store.close()
+    await loop_lag_monitor.stop()
+    await http_pool.aclose()
+    trade_history.close()
+    await state.close()
+
+@app.middleware("http")
+async def record_endpoint_metrics(request, call_next):
+    """Record latency and event-loop blocked time per endpoint"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    end = time.perf_counter()
+    route = request.scope.get("route")
+    endpoint = f"{request.method} {route.path}" if route else "unmatched"
+    endpoint_metrics.record(endpoint, end - start, loop_lag_monitor.max_lag_between(start, end))
+    return response
+
 # API Routes
 @app.get("/")
 async def root():
@@ -857,7 +1486,7 @@ async def health():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "services": {
-            "web3": w3.is_connected(),
+            "web3": await rpc_client.is_connected(),
             "exchange_api": True,  # Check actual exchange connections
             "ai_engine": True
         }
@@ -875,7 +1504,7 @@ async def connect_wallet(request: WalletConnectionRequest):
         
         # Get wallet data
         wallet_data = await blockchain_manager.get_wallet_balance(request.address)
-        connected_wallets[request.address] = wallet_data
+        await state.put("connected_wallets", request.address, wallet_data.dict())
         
         # Create auth token
         auth_token = security_manager.create_auth_token(request.address)
@@ -896,13 +1525,33 @@ async def get_wallet_balance(current_user: str = Depends(get_current_user)):
     """Get current wallet balance and holdings"""
     try:
         wallet_data = await blockchain_manager.get_wallet_balance(current_user)
-        connected_wallets[current_user] = wallet_data
+        await state.put("connected_wallets", current_user, wallet_data.dict())
         return wallet_data
         
     except Exception as e:
         logger.error(f"Error getting wallet balance: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/api/v1/wallet/transactions")
+async def get_wallet_transactions(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    current_user: str = Depends(get_current_user)
+):
+    """Get indexed token transfers for the wallet, newest first, one page at a time"""
+    try:
+        transactions, next_cursor = await blockchain_manager.get_transaction_history(current_user, limit, cursor)
+        return {
+            "transactions": transactions,
+            "count": len(transactions),
+            "next_cursor": next_cursor,
+            "indexed_to_block": transfer_store.checkpoint()
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting wallet transactions: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
 @app.get("/api/v1/market-data")
 async def get_market_data():
     """Get current market data"""
@@ -914,6 +1563,120 @@ async def get_market_data():
         logger.error(f"Error getting market data: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch market data")
 
+@app.get("/api/v1/exchanges/{exchange_id}/ticker")
+async def get_exchange_ticker(exchange_id: str, symbol: str = Query(..., description="Market symbol, e.g. BTC/USDT")):
+    """Get a ticker from a configured exchange"""
+    try:
+        return await exchange_manager.get_ticker(exchange_id, symbol)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Exchange not configured: {exchange_id}")
+    except Exception as e:
+        logger.error(f"Error getting {exchange_id} ticker for {symbol}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to fetch ticker")
+
+@app.get("/api/v1/exchanges/{exchange_id}/orderbook")
+async def get_exchange_order_book(
+    exchange_id: str,
+    symbol: str = Query(..., description="Market symbol, e.g. BTC/USDT"),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000)
+):
+    """Get an order book from a configured exchange"""
+    try:
+        return await exchange_manager.get_order_book(exchange_id, symbol, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Exchange not configured: {exchange_id}")
+    except Exception as e:
+        logger.error(f"Error getting {exchange_id} order book for {symbol}: {e}")
+        raise HTTPException(status_code=502, detail="Failed to fetch order book")
+
+@app.get("/api/v1/trade/quote")
+async def get_trade_quote(
+    token_in: str,
+    token_out: str,
+    amount_in: float = Query(..., gt=0)
+):
+    """Best route for a trade across exchanges and DEX routers"""
+    try:
+        return await exchange_manager.best_route(token_in, token_out, amount_in)
+    except Exception as e:
+        logger.error(f"Error quoting {token_in}->{token_out}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to quote trade")
+
+@app.get("/api/v1/market-data/stream")
+async def stream_market_data(request: Request):
+    """Push market data as Server-Sent Events: a snapshot, then changed symbols"""
+    subscription = market_broadcaster.subscribe(initial=market_streamer.snapshot_message())
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await subscription.get(timeout=MARKET_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield f"data: {message}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/v1/market-data/ws")
+async def market_data_websocket(websocket: WebSocket):
+    """Push market data over a WebSocket: a snapshot, then changed symbols"""
+    await websocket.accept()
+    subscription = market_broadcaster.subscribe(initial=market_streamer.snapshot_message())
+    try:
+        async for message in subscription:
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+    if subscription.dropped > market_broadcaster.max_dropped:
+        await websocket.close(code=1013)
+
+@app.get("/api/v1/metrics")
+async def get_metrics():
+    """Get internal cache and performance counters"""
+    return {
+        "market_data_cache": exchange_manager.market_data_cache.get_stats(),
+        "exchanges": exchange_manager.exchanges.get_stats(),
+        "order_books": exchange_manager.order_book_stats(),
+        "routing": exchange_manager.router.get_stats(),
+        "http_pool": http_pool.get_stats(),
+        "rpc": rpc_client.get_stats(),
+        "price_alerts": alert_engine.get_stats(),
+        "state": state.get_stats(),
+        "transfer_indexer": transfer_indexer.get_stats(),
+        "balance_scanner": balance_scanner.get_stats(),
+        "wallet_behavior": ai_engine.wallet_behavior.get_stats(),
+        "trading_signals": signal_scheduler.get_stats(),
+        "jobs": shared_jobs.get_stats(),
+        "mining_telemetry": telemetry_store.get_stats(),
+        "profit_switching": profit_engine.get_stats(),
+        "hash_benchmark": hash_benchmark.get_stats(),
+        "pool_prober": pool_prober.get_stats(),
+        "stratum": mining_manager.get_stratum_stats(),
+        "trade_history": trade_history.get_stats(),
+        "portfolio_analytics": portfolio_analytics.get_stats(),
+        "market_stream": {**market_broadcaster.get_stats(), **market_streamer.get_stats()},
+        "balance_cache": {
+            **balance_cache.get_stats(),
+            "last_head_poll": datetime.fromtimestamp(head_tracker.last_poll_at).isoformat()
+            if head_tracker.last_poll_at else None
+        },
+        "event_loop_lag": loop_lag_monitor.get_stats(),
+        "endpoints": endpoint_metrics.get_stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.post("/api/v1/trade")
 async def execute_trade(
     trade_request: TradeRequest,
@@ -924,37 +1687,142 @@ async def execute_trade(
         if trade_request.wallet_address != current_user:
             raise HTTPException(status_code=403, detail="Unauthorized wallet address")
         
+        # Price against every configured venue and take the best route
+        route = await exchange_manager.best_route(
+            trade_request.token_in, trade_request.token_out, trade_request.amount_in
+        )
+        estimate = route["best"]
+        if estimate is None and any(venue["status"] == "partial" for venue in route["venues"].values()):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Insufficient liquidity for {trade_request.amount_in} {trade_request.token_in}"
+            )
+        if estimate is not None and estimate["slippage_pct"] > trade_request.slippage:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Estimated slippage {estimate['slippage_pct']:.3f}% on {estimate['venue']} "
+                       f"exceeds tolerance {trade_request.slippage}%"
+            )
+        
         # In production, implement actual DEX/CEX integration
         # For now, return mock response
         transaction_hash = "0x" + hashlib.sha256(
             f"{trade_request.token_in}{trade_request.token_out}{time.time()}".encode()
         ).hexdigest()
         
-        # Store trade history
-        if current_user not in trade_history:
-            trade_history[current_user] = []
-        
-        trade_history[current_user].append({
-            "transaction_hash": transaction_hash,
-            "token_in": trade_request.token_in,
-            "token_out": trade_request.token_out,
-            "amount_in": trade_request.amount_in,
-            "timestamp": datetime.now().isoformat(),
-            "status": "completed"
-        })
+        # Store trade history; without a venue quote analytics value the output at market price
+        await trade_history.append(
+            current_user,
+            transaction_hash=transaction_hash,
+            token_in=trade_request.token_in,
+            token_out=trade_request.token_out,
+            amount_in=trade_request.amount_in,
+            timestamp=time.time(),
+            status="completed",
+            amount_out=estimate["output"] if estimate else 0.0
+        )
         
         return TradeResponse(
             success=True,
             transaction_hash=transaction_hash,
             message="Trade executed successfully",
             estimated_gas=150000,
-            estimated_output=trade_request.amount_in * 0.998  # Mock slippage
+            estimated_output=estimate["output"] if estimate else trade_request.amount_in * 0.998,  # Mock slippage without a venue
+            estimated_slippage_pct=estimate["slippage_pct"] if estimate else None,
+            route={"venue": estimate["venue"], "latency_ms": estimate["latency_ms"], "venues": route["venues"]}
+            if estimate else None
         )
         
     except Exception as e:
         logger.error(f"Error executing trade: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/api/v1/trades/history")
+async def get_trade_history(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: str = Depends(get_current_user)
+):
+    """Get trade history, newest first, one page at a time"""
+    try:
+        trades, next_cursor = await trade_history.page(
+            current_user,
+            cursor=cursor,
+            limit=limit,
+            start=start.timestamp() if start else None,
+            end=end.timestamp() if end else None
+        )
+        return {
+            "trades": trades,
+            "count": len(trades),
+            "total": await trade_history.count(current_user),
+            "next_cursor": next_cursor
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting trade history: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def fetch_friend_wallet(address: str) -> Tuple[Optional[WalletData], Optional[List[Dict[str, Any]]]]:
+    """Load balance and history for one friend within FRIEND_FETCH_TIMEOUT; None for what did not arrive"""
+    balance_task = asyncio.ensure_future(blockchain_manager.get_wallet_balance(address))
+    history_task = asyncio.ensure_future(blockchain_manager.get_transaction_history(address))
+    done, pending = await asyncio.wait({balance_task, history_task}, timeout=FRIEND_FETCH_TIMEOUT)
+    for task in pending:
+        task.cancel()
+    
+    def result_or_none(task: asyncio.Future) -> Any:
+        if task not in done or task.exception() is not None:
+            if task in done:
+                logger.warning(f"Friend wallet {address} lookup failed: {task.exception()}")
+            return None
+        return task.result()
+    
+    wallet_data = result_or_none(balance_task)
+    history = result_or_none(history_task)
+    if pending:
+        logger.warning(f"Friend wallet {address} timed out after {FRIEND_FETCH_TIMEOUT}s, returning partial data")
+    return wallet_data, history[0] if history is not None else None
+
+async def load_friend_wallets(
+    addresses: List[str],
+    aliases: Optional[Dict[str, Optional[str]]] = None,
+    transaction_limit: int = 5
+) -> List[FriendWalletData]:
+    """Load friends concurrently (at most FRIEND_FETCH_CONCURRENCY at a time) and analyze them in one batch"""
+    semaphore = asyncio.Semaphore(FRIEND_FETCH_CONCURRENCY)
+    
+    async def fetch_bounded(address: str) -> Tuple[Optional[WalletData], Optional[List[Dict[str, Any]]]]:
+        async with semaphore:
+            return await fetch_friend_wallet(address)
+    
+    fetched = await asyncio.gather(*(fetch_bounded(address) for address in addresses))
+    histories = {
+        address: transactions
+        for address, (_, transactions) in zip(addresses, fetched)
+        if transactions is not None
+    }
+    insights = await ai_engine.analyze_wallets(histories) if histories else {}
+    
+    return [
+        FriendWalletData(
+            address=address,
+            alias=(aliases or {}).get(address),
+            total_value_usd=wallet_data.total_value_usd if wallet_data else 0.0,
+            daily_change_percent=wallet_data.daily_change_percent if wallet_data else 0.0,
+            weekly_change_percent=5.67,  # Mock data
+            monthly_change_percent=12.34,  # Mock data
+            top_tokens=wallet_data.tokens[:5] if wallet_data else [],
+            recent_transactions=(transactions or [])[:transaction_limit],
+            ai_insights=insights.get(address, "Unable to analyze wallet behavior at this time"),
+            last_updated=datetime.now().isoformat(),
+            partial=wallet_data is None or transactions is None
+        )
+        for address, (wallet_data, transactions) in zip(addresses, fetched)
+    ]
+
 @app.post("/api/v1/friend-wallet/add")
 async def add_friend_wallet(
     request: FriendWalletRequest,
@@ -967,29 +1835,12 @@ async def add_friend_wallet(
             raise HTTPException(status_code=400, detail="Invalid wallet address")
         
         # Add to friend list
-        if current_user not in friend_wallets:
-            friend_wallets[current_user] = []
-        
-        if request.wallet_address not in friend_wallets[current_user]:
-            friend_wallets[current_user].append(request.wallet_address)
+        await state.add_member("friend_wallets", current_user, request.wallet_address)
         
         # Get friend wallet data
-        wallet_data = await blockchain_manager.get_wallet_balance(request.wallet_address)
-        transactions = await blockchain_manager.get_transaction_history(request.wallet_address)
-        ai_insights = await ai_engine.analyze_wallet_behavior(request.wallet_address, transactions)
-        
-        friend_data = FriendWalletData(
-            address=request.wallet_address,
-            alias=request.alias,
-            total_value_usd=wallet_data.total_value_usd,
-            daily_change_percent=wallet_data.daily_change_percent,
-            weekly_change_percent=5.67,  # Mock data
-            monthly_change_percent=12.34,  # Mock data
-            top_tokens=wallet_data.tokens[:5],
-            recent_transactions=transactions[:10],
-            ai_insights=ai_insights,
-            last_updated=datetime.now().isoformat()
-        )
+        friend_data = (await load_friend_wallets(
+            [request.wallet_address], aliases={request.wallet_address: request.alias}, transaction_limit=10
+        ))[0]
         
         return {
             "success": True,
@@ -1005,33 +1856,16 @@ async def add_friend_wallet(
 async def get_friend_wallets(current_user: str = Depends(get_current_user)):
     """Get all tracked friend wallets"""
     try:
-        if current_user not in friend_wallets:
+        friend_addresses = await state.members("friend_wallets", current_user)
+        if not friend_addresses:
             return {"friends": [], "count": 0}
         
-        friend_data_list = []
-        for address in friend_wallets[current_user]:
-            wallet_data = await blockchain_manager.get_wallet_balance(address)
-            transactions = await blockchain_manager.get_transaction_history(address)
-            ai_insights = await ai_engine.analyze_wallet_behavior(address, transactions)
-            
-            friend_data = FriendWalletData(
-                address=address,
-                alias=None,
-                total_value_usd=wallet_data.total_value_usd,
-                daily_change_percent=wallet_data.daily_change_percent,
-                weekly_change_percent=5.67,  # Mock data
-                monthly_change_percent=12.34,  # Mock data
-                top_tokens=wallet_data.tokens[:5],
-                recent_transactions=transactions[:5],
-                ai_insights=ai_insights,
-                last_updated=datetime.now().isoformat()
-            )
-            
-            friend_data_list.append(friend_data)
+        friend_data_list = await load_friend_wallets(list(friend_addresses))
         
         return {
             "friends": friend_data_list,
-            "count": len(friend_data_list)
+            "count": len(friend_data_list),
+            "partial_count": sum(1 for friend in friend_data_list if friend.partial)
         }
         
     except Exception as e:
@@ -1039,19 +1873,14 @@ async def get_friend_wallets(current_user: str = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/v1/ai/trading-signals")
-async def get_trading_signals():
-    """Get AI-powered trading signals"""
-    try:
-        signals = await ai_engine.generate_trading_signals()
-        return {
-            "signals": signals,
-            "generated_at": datetime.now().isoformat(),
-            "disclaimer": "Trading signals are for informational purposes only. Always DYOR."
-        }
-        
-    except Exception as e:
-        logger.error(f"Error getting trading signals: {e}")
-        raise HTTPException(status_code=500, detail="Failed to generate trading signals")
+async def get_trading_signals(request: Request):
+    """Get the latest precomputed trading signals; 304 when If-None-Match has the current ETag"""
+    snapshot = signal_scheduler.snapshot
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if snapshot.etag in (tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 @app.post("/api/v1/alerts/price")
 async def create_price_alert(
@@ -1060,8 +1889,8 @@ async def create_price_alert(
 ):
     """Create price alert"""
     try:
-        if current_user not in price_alerts:
-            price_alerts[current_user] = []
+        if request.condition not in CONDITIONS:
+            raise HTTPException(status_code=400, detail="Condition must be 'above' or 'below'")
         
         alert = {
             "id": hashlib.md5(f"{current_user}{request.token}{time.time()}".encode()).hexdigest()[:8],
@@ -1072,7 +1901,12 @@ async def create_price_alert(
             "active": True
         }
         
-        price_alerts[current_user].append(alert)
+        await state.put("price_alerts", alert["id"], {**alert, "owner": current_user})
+        await state.add_member("price_alerts", current_user, alert["id"])
+        alert_engine.add(
+            alert["id"], request.token, request.condition, request.price_target,
+            payload=(current_user, request.token)
+        )
         
         return {
             "success": True,
@@ -1084,27 +1918,33 @@ async def create_price_alert(
         logger.error(f"Error creating price alert: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/api/v1/alerts")
+async def get_price_alerts(current_user: str = Depends(get_current_user)):
+    """List price alerts, active and triggered"""
+    alert_ids = await state.members("price_alerts", current_user)
+    alerts = [alert for alert in await state.get_many("price_alerts", alert_ids) if alert]
+    for alert in alerts:
+        alert.pop("owner", None)
+    return {
+        "alerts": alerts,
+        "count": len(alerts),
+        "active_count": sum(1 for alert in alerts if alert["active"])
+    }
+
+@app.delete("/api/v1/alerts/price/{alert_id}")
+async def delete_price_alert(alert_id: str, current_user: str = Depends(get_current_user)):
+    """Delete a price alert"""
+    if not await state.remove_member("price_alerts", current_user, alert_id):
+        raise HTTPException(status_code=404, detail="Price alert not found")
+    await state.delete("price_alerts", alert_id)
+    alert_engine.remove(alert_id)
+    return {"success": True, "message": "Price alert deleted"}
+
 @app.get("/api/v1/portfolio/analytics")
 async def get_portfolio_analytics(current_user: str = Depends(get_current_user)):
     """Get portfolio analytics and performance metrics"""
     try:
-        # In production, calculate real metrics from transaction history
-        analytics = {
-            "total_return_percent": 23.45,
-            "total_return_usd": 5432.10,
-            "best_performing_token": {"symbol": "SOL", "return": 89.4},
-            "worst_performing_token": {"symbol": "DOGE", "return": -12.3},
-            "total_trades": 47,
-            "win_rate": 68.1,
-            "avg_hold_time_hours": 72.5,
-            "sharpe_ratio": 1.23,
-            "max_drawdown_percent": -15.67,
-            "portfolio_diversity_score": 7.8,
-            "risk_score": "Medium",
-            "generated_at": datetime.now().isoformat()
-        }
-        
-        return analytics
+        return await compute_portfolio_analytics(current_user)
         
     except Exception as e:
         logger.error(f"Error getting portfolio analytics: {e}")
@@ -1131,21 +1971,40 @@ async def start_mining(
     request: MiningRequest,
     current_user: str = Depends(get_current_user)
 ):
-    """Start mining operation"""
+    """Start mining operation as a background job; poll /api/v1/jobs/{job_id}"""
     try:
         if request.wallet_address != current_user:
             raise HTTPException(status_code=403, detail="Unauthorized wallet address")
         
-        result = await mining_manager.start_mining(current_user, request.coin, request.pool)
-        return result
+        job = await shared_jobs.submit(
+            current_user, "mining_start", mining_manager.start_mining, current_user, request.coin, request.pool
+        )
+        return {
+            "success": True,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "message": f"Starting {request.coin} mining"
+        }
         
+    except JobLimitError as e:
+        raise HTTPException(status_code=429 if e.per_user else 503, detail=str(e))
     except Exception as e:
         logger.error(f"Error starting mining: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+async def raise_if_stratum_held_elsewhere(user_address: str) -> None:
+    """409 when another worker holds the user's stratum connection"""
+    session = await state.get("mining_sessions", user_address)
+    if session is not None and mining_manager.stratum_held_elsewhere(session):
+        raise HTTPException(
+            status_code=409,
+            detail="This session's pool connection is held by another backend worker; route mining requests with sticky sessions"
+        )
+
 @app.post("/api/v1/mining/stop")
 async def stop_mining(current_user: str = Depends(get_current_user)):
     """Stop mining operation"""
+    await raise_if_stratum_held_elsewhere(current_user)
     try:
         result = await mining_manager.stop_mining(current_user)
         return result
@@ -1165,6 +2024,115 @@ async def get_mining_status(current_user: str = Depends(get_current_user)):
         logger.error(f"Error getting mining status: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/v1/mining/telemetry")
+async def ingest_mining_telemetry(batch: TelemetryBatch, current_user: str = Depends(get_current_user)):
+    """Record hashrate, power, temperature and share samples pushed by the user's miner"""
+    session = await state.get("mining_sessions", current_user)
+    if session is None or session["status"] == "stopped":
+        raise HTTPException(status_code=409, detail="No active mining session")
+    if telemetry_held_elsewhere(session):
+        raise HTTPException(
+            status_code=409,
+            detail="Telemetry for this session is recorded by another backend worker; route mining requests with sticky sessions"
+        )
+    try:
+        now = time.time()
+        # The shared latest sample is the baseline, so a worker taking over the session counts shares correctly
+        previous = session.get("telemetry")
+        accepted = telemetry_store.ingest(
+            session["session_id"],
+            [sample.timestamp or now for sample in batch.samples],
+            [[getattr(sample, field) for field in TELEMETRY_FIELDS] for sample in batch.samples]
+        )
+        latest = telemetry_store.latest(session["session_id"])
+        await state.update("mining_sessions", current_user, {
+            "telemetry": latest,
+            "telemetry_worker": WORKER_ID,
+            "telemetry_seen": now
+        })
+        if accepted and latest is not None and session.get("stratum_worker") is None:
+            # Share counters are cumulative per session; the pool's reject rate takes the increase
+            pool_prober.record_shares(
+                session["pool"],
+                int(latest["accepted_shares"] - (previous["accepted_shares"] if previous else 0)),
+                int(latest["rejected_shares"] - (previous["rejected_shares"] if previous else 0))
+            )
+        return {
+            "success": True,
+            "accepted": accepted,
+            "late": len(batch.samples) - accepted
+        }
+        
+    except Exception as e:
+        logger.error(f"Error recording mining telemetry: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/api/v1/mining/job")
+async def get_mining_job(current_user: str = Depends(get_current_user)):
+    """Get the latest stratum job and difficulty for the user's miner"""
+    client = mining_manager.stratum_clients.get(current_user)
+    if client is None:
+        await raise_if_stratum_held_elsewhere(current_user)
+        raise HTTPException(status_code=404, detail="No stratum session (start mining with STRATUM_ENABLED)")
+    return {
+        "connected": client.connected,
+        "pool": mining_manager.stratum_pools.get(current_user),
+        "job": client.job,
+        "difficulty": client.difficulty,
+        "extranonce1": client.extranonce1,
+        "extranonce2_size": client.extranonce2_size
+    }
+
+@app.post("/api/v1/mining/shares")
+async def submit_mining_shares(batch: ShareBatch, current_user: str = Depends(get_current_user)):
+    """Submit shares found by the user's miner to the pool; all shares are in flight at once"""
+    client = mining_manager.stratum_clients.get(current_user)
+    if client is None:
+        await raise_if_stratum_held_elsewhere(current_user)
+    if client is None or not client.connected:
+        raise HTTPException(status_code=409, detail="Not connected to a pool")
+    outcomes = await asyncio.gather(
+        *(client.submit(share.job_id, share.extranonce2, share.ntime, share.nonce) for share in batch.shares),
+        return_exceptions=True
+    )
+    results = [
+        outcome if isinstance(outcome, dict)
+        else {"accepted": False, "error": str(outcome) or type(outcome).__name__, "latency_ms": None}
+        for outcome in outcomes
+    ]
+    accepted = sum(1 for result in results if result["accepted"])
+    return {
+        "results": results,
+        "accepted": accepted,
+        "rejected": len(results) - accepted
+    }
+
+@app.get("/api/v1/mining/history")
+async def get_mining_history(
+    resolution: str = Query(default="1m", description="raw, 1m, 1h or 1d"),
+    start: Optional[float] = Query(default=None, description="Unix time"),
+    end: Optional[float] = Query(default=None, description="Unix time"),
+    limit: Optional[int] = Query(default=None, ge=1, le=10000),
+    current_user: str = Depends(get_current_user)
+):
+    """Get the current mining session's telemetry, raw or as min/avg/max rollups"""
+    session = await state.get("mining_sessions", current_user)
+    if session is None:
+        raise HTTPException(status_code=404, detail="No mining session found")
+    if telemetry_held_elsewhere(session):
+        raise HTTPException(
+            status_code=409,
+            detail="Telemetry history for this session is held by another backend worker; route mining requests with sticky sessions"
+        )
+    try:
+        history = telemetry_store.history(session["session_id"], resolution, start, end, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "session_id": session["session_id"],
+        **history
+    }
+
 @app.get("/api/v1/mining/earnings")
 async def get_mining_earnings(current_user: str = Depends(get_current_user)):
     """Get mining earnings"""
@@ -1178,7 +2146,7 @@ async def get_mining_earnings(current_user: str = Depends(get_current_user)):
 
 @app.get("/api/v1/mining/pools")
 async def get_mining_pools():
-    """Get available mining pools"""
+    """Get mining pools ranked by probed stratum latency, fee and reject rate"""
     try:
         pools = await mining_manager.get_mining_pools()
         return {
@@ -1192,16 +2160,50 @@ async def get_mining_pools():
         raise HTTPException(status_code=500, detail="Failed to get mining pools")
 
 @app.post("/api/v1/mining/benchmark")
-async def benchmark_hardware(current_user: str = Depends(get_current_user)):
-    """Run hardware benchmark"""
+async def benchmark_hardware(
+    mode: str = Query(default="cpu", regex="^(cpu|simulated)$", description="cpu (hash kernels on every core) or simulated (mock GPU rates)"),
+    current_user: str = Depends(get_current_user)
+):
+    """Run hardware benchmark as a background job; poll /api/v1/jobs/{job_id}"""
     try:
-        result = await mining_manager.benchmark_hardware(current_user)
-        return result
+        job = await shared_jobs.submit(current_user, "benchmark", mining_manager.benchmark_hardware, current_user, mode)
+        return {
+            "success": True,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "message": "Benchmark queued"
+        }
         
+    except JobLimitError as e:
+        raise HTTPException(status_code=429 if e.per_user else 503, detail=str(e))
     except Exception as e:
         logger.error(f"Error running benchmark: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.get("/api/v1/mining/benchmark")
+async def get_benchmark_result(current_user: str = Depends(get_current_user)):
+    """Get the user's latest persisted benchmark result"""
+    result = await state.get("mining_benchmarks", current_user)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No benchmark has been run yet")
+    return result
+
+@app.get("/api/v1/mining/profitability")
+async def get_mining_profitability(current_user: str = Depends(get_current_user)):
+    """Get expected profit per coin and pool for the user's benchmarked rig"""
+    await sync_benchmarked_rig(current_user)
+    best = profit_engine.recommendation(current_user)
+    options = profit_engine.options(current_user)
+    if best is None and not options:
+        raise HTTPException(status_code=404, detail="Run a hardware benchmark first, or no mined coin has a price yet")
+    return {
+        "recommendation": best,
+        "options": options,
+        "electricity_price": ELECTRICITY_PRICE,
+        "auto_switch": PROFIT_AUTO_SWITCH,
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/v1/mining/ai-recommendations")
 async def get_ai_mining_recommendations(current_user: str = Depends(get_current_user)):
     """Get AI mining recommendations"""
@@ -1258,34 +2260,113 @@ async def get_supported_algorithms():
         logger.error(f"Error getting algorithms: {e}")
         raise HTTPException(status_code=500, detail="Failed to get algorithms")
 
+# Background job endpoints
+async def get_user_job(job_id: str, current_user: str) -> Dict[str, Any]:
+    """The user's job from whichever worker runs it, or 404"""
+    job = await shared_jobs.get(job_id, current_user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/v1/jobs")
+async def list_jobs(current_user: str = Depends(get_current_user)):
+    """Get the user's background jobs, newest first"""
+    jobs = await shared_jobs.jobs(current_user)
+    return {
+        "jobs": jobs,
+        "count": len(jobs)
+    }
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str, current_user: str = Depends(get_current_user)):
+    """Get a background job's status, progress and result"""
+    return await get_user_job(job_id, current_user)
+
+@app.get("/api/v1/jobs/{job_id}/stream")
+async def stream_job(job_id: str, request: Request, current_user: str = Depends(get_current_user)):
+    """Push a background job's progress as Server-Sent Events until it finishes"""
+    await get_user_job(job_id, current_user)
+
+    async def events():
+        async for job in shared_jobs.watch(job_id, current_user, heartbeat=MARKET_STREAM_HEARTBEAT):
+            if await request.is_disconnected():
+                break
+            yield f"data: {json.dumps(job)}\n\n" if job is not None else ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.delete("/api/v1/jobs/{job_id}")
+async def cancel_job(job_id: str, current_user: str = Depends(get_current_user)):
+    """Cancel a queued or running background job"""
+    job = await get_user_job(job_id, current_user)
+    if not await shared_jobs.cancel(job_id, current_user):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    return {
+        "success": True,
+        "message": "Job cancelled"
+    }
+
 # --- Crypto Pool System ---
-pools = {}
-pool_boosts = {}
+# Pools are "pools" documents with their members in the "pool_members" set;
+# sizes and trade counts change through atomic increments. Activity logs are
+# shared lists with the redis backend and in-process segments otherwise; both
+# compact the oldest segments past POOL_LOG_MAX_SEGMENTS into the summary
+if STATE_BACKEND == "redis":
+    pool_logs = SharedPoolActivityLog(state, segment_size=POOL_LOG_SEGMENT_SIZE, max_segments=POOL_LOG_MAX_SEGMENTS)
+else:
+    pool_logs = LocalPoolActivityLog(
+        PoolActivityLog(segment_size=POOL_LOG_SEGMENT_SIZE, max_segments=POOL_LOG_MAX_SEGMENTS)
+    )
+
+async def require_pool(pool_id: str) -> None:
+    """Raise 404 unless the pool exists"""
+    if await state.get("pools", pool_id) is None:
+        raise HTTPException(status_code=404, detail="Pool not found")
+
+async def pool_status_summary(pool_id: str) -> Dict[str, Any]:
+    """Pool projection with activity summary instead of the raw history"""
+    pool = await state.get("pools", pool_id)
+    if pool is None:
+        return {}
+    members = await state.members("pool_members", pool_id)
+    return {
+        **pool,
+        "members": members,
+        "member_count": len(members),
+        "activity": await pool_logs.summary(pool_id),
+        "recent_activity": await pool_logs.recent(pool_id, limit=10)
+    }
 
 @app.post("/api/v1/pools/create")
 async def create_pool(data: dict = Body(...)):
     """Create a new crypto pool"""
-    pool_id = str(len(pools) + 1)
-    pools[pool_id] = {
+    pool_id = str(await state.next_id("pools"))
+    await state.put("pools", pool_id, {
         "id": pool_id,
         "name": data.get("name", f"Pool {pool_id}"),
         "privacy": data.get("privacy", "private"),
         "split_mode": data.get("split_mode", "equal"),
-        "members": [data.get("creator")],
         "size": 0,
         "return_pct": 0,
-        "trades": [],
-        "logs": [],
-    }
-    return {"success": True, "pool_id": pool_id, "pool": pools[pool_id]}
+        "trade_count": 0,
+    })
+    if data.get("creator"):
+        await state.add_member("pool_members", pool_id, data["creator"])
+    await pool_logs.append(pool_id, "create", time.time(), address=data.get("creator"))
+    return {"success": True, "pool_id": pool_id, "pool": await pool_status_summary(pool_id)}
 
 @app.post("/api/v1/pools/invite")
 async def invite_to_pool(data: dict = Body(...)):
     """Invite a user to a pool"""
     pool_id = data["pool_id"]
     address = data["address"]
-    pools[pool_id]["members"].append(address)
-    pools[pool_id]["logs"].append({"action": "invite", "address": address})
+    await require_pool(pool_id)
+    await state.add_member("pool_members", pool_id, address)
+    await pool_logs.append(pool_id, "invite", time.time(), address=address)
     return {"success": True}
 
 @app.post("/api/v1/pools/join")
@@ -1293,22 +2374,24 @@ async def join_pool(data: dict = Body(...)):
     """Join a pool (public or with invite)"""
     pool_id = data["pool_id"]
     address = data["address"]
-    pools[pool_id]["members"].append(address)
-    pools[pool_id]["logs"].append({"action": "join", "address": address})
+    await require_pool(pool_id)
+    await state.add_member("pool_members", pool_id, address)
+    await pool_logs.append(pool_id, "join", time.time(), address=address)
     return {"success": True}
 
 @app.get("/api/v1/pools/status/{pool_id}")
 async def get_pool_status(pool_id: str):
-    """Get pool status (size, members, trades, P/L, payouts)"""
-    return pools.get(pool_id, {})
+    """Get pool status (size, members, trade count, activity summary)"""
+    return await pool_status_summary(pool_id)
 
 @app.post("/api/v1/pools/trade")
 async def execute_pool_trade(data: dict = Body(...)):
     """Execute a trade for the pool"""
     pool_id = data["pool_id"]
     trade = data["trade"]
-    pools[pool_id]["trades"].append(trade)
-    pools[pool_id]["logs"].append({"action": "trade", "trade": trade})
+    await require_pool(pool_id)
+    await state.increment("pools", pool_id, "trade_count")
+    await pool_logs.append(pool_id, "trade", time.time(), trade=trade)
     return {"success": True}
 
 @app.post("/api/v1/pools/deposit")
@@ -1316,8 +2399,9 @@ async def deposit_to_pool(data: dict = Body(...)):
     """Deposit funds to the pool"""
     pool_id = data["pool_id"]
     amount = data["amount"]
-    pools[pool_id]["size"] += amount
-    pools[pool_id]["logs"].append({"action": "deposit", "amount": amount})
+    await require_pool(pool_id)
+    await state.increment("pools", pool_id, "size", amount)
+    await pool_logs.append(pool_id, "deposit", time.time(), amount=amount)
     return {"success": True}
 
 @app.post("/api/v1/pools/withdraw")
@@ -1325,14 +2409,28 @@ async def withdraw_from_pool(data: dict = Body(...)):
     """Withdraw funds from the pool"""
     pool_id = data["pool_id"]
     amount = data["amount"]
-    pools[pool_id]["size"] -= amount
-    pools[pool_id]["logs"].append({"action": "withdraw", "amount": amount})
+    await require_pool(pool_id)
+    await state.increment("pools", pool_id, "size", -amount)
+    await pool_logs.append(pool_id, "withdraw", time.time(), amount=amount)
     return {"success": True}
 
 @app.get("/api/v1/pools/logs/{pool_id}")
-async def get_pool_logs(pool_id: str):
-    """Get full action log for the pool"""
-    return {"logs": pools.get(pool_id, {}).get("logs", [])}
+async def get_pool_logs(
+    pool_id: str,
+    cursor: Optional[int] = Query(default=None, ge=0),
+    limit: int = Query(default=100, ge=1, le=1000),
+    since: Optional[datetime] = None
+):
+    """Get the pool action log, oldest first, one page at a time"""
+    logs, next_cursor = await pool_logs.page(
+        pool_id, cursor=cursor, limit=limit, since=since.timestamp() if since else None
+    )
+    return {
+        "logs": logs,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor < await pool_logs.count(pool_id),
+        "compacted_before": await pool_logs.first_available(pool_id)
+    }
 
 # --- Boost Spinner Logic ---
 import random, time
@@ -1342,23 +2440,23 @@ async def spin_boost(data: dict = Body(...)):
     """Spin the boost wheel (host only, once per 14 days)"""
     pool_id = data["pool_id"]
     now = int(time.time())
-    last_spin = pool_boosts.get(pool_id, {}).get("last_spin", 0)
+    last_spin = (await state.get("pool_boosts", pool_id) or {}).get("last_spin", 0)
     if now - last_spin < 14 * 24 * 3600:
         return {"success": False, "error": "Spin not available yet"}
     boost_values = [250, 300, 450, 500]
     boost = random.choice(boost_values)
-    pool_boosts[pool_id] = {
+    await state.put("pool_boosts", pool_id, {
         "boost": boost,
         "last_spin": now,
         "boost_ends": now + 7 * 24 * 3600
-    }
-    pools[pool_id]["logs"].append({"action": "boost_spin", "boost": boost})
+    })
+    await pool_logs.append(pool_id, "boost_spin", time.time(), boost=boost)
     return {"success": True, "boost": boost}
 
 @app.get("/api/v1/pools/boost/status/{pool_id}")
 async def get_boost_status(pool_id: str):
     """Get current boost, countdown, and bonus generated"""
-    boost_info = pool_boosts.get(pool_id, {})
+    boost_info = await state.get("pool_boosts", pool_id) or {}
     now = int(time.time())
     countdown = max(0, (boost_info.get("last_spin", 0) + 14 * 24 * 3600) - now)
     boost_active = now < boost_info.get("boost_ends", 0)
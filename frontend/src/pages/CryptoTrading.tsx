@@ -416,7 +416,14 @@ const CryptoTrading: React.FC = () => {
                 <label className="block text-slate-400 text-sm mb-2">Mining Coin</label>
                 <select
                   value={selectedCoin}
-                  onChange={(e) => setSelectedCoin(e.target.value)}
+                  onChange={(e) => {
+                    const coin = e.target.value;
+                    setSelectedCoin(coin);
+                    // Keep the pool only if it also mines the new coin
+                    if (!miningPools.some(p => p.name === selectedPool && p.coin === coin)) {
+                      setSelectedPool('');
+                    }
+                  }}
                   className="w-full bg-slate-700/50 border border-slate-600 rounded-lg px-4 py-3 text-white focus:border-cyan-400 focus:outline-none"
                 >
                   <option value="">Auto-Select (AI Recommended)</option>
@@ -432,16 +439,23 @@ const CryptoTrading: React.FC = () => {
               <div className="mb-6">
                 <label className="block text-slate-400 text-sm mb-2">Mining Pool</label>
                 <select
-                  value={selectedPool}
-                  onChange={(e) => setSelectedPool(e.target.value)}
+                  value={selectedPool && selectedCoin ? `${selectedPool}/${selectedCoin}` : ''}
+                  onChange={(e) => {
+                    // Pools are listed once per coin, so an option selects both
+                    const [name, coin] = e.target.value.split('/');
+                    setSelectedPool(name);
+                    if (coin) setSelectedCoin(coin);
+                  }}
                   className="w-full bg-slate-700/50 border border-slate-600 rounded-lg px-4 py-3 text-white focus:border-cyan-400 focus:outline-none"
                 >
                   <option value="">Select Pool</option>
-                  {miningPools.map((pool, index) => (
-                    <option key={index} value={pool.name}>
-                      {pool.name} ({pool.fee}% fee)
-                    </option>
-                  ))}
+                  {miningPools
+                    .filter(pool => !selectedCoin || pool.coin === selectedCoin)
+                    .map(pool => (
+                      <option key={`${pool.name}/${pool.coin}`} value={`${pool.name}/${pool.coin}`}>
+                        {pool.name} - {pool.coin} ({pool.fee}% fee)
+                      </option>
+                    ))}
                 </select>
               </div>
 
@@ -673,7 +687,7 @@ const CryptoTrading: React.FC = () => {
               {selectedPool && miningPools.length > 0 && (
                 <div className="space-y-4">
                   {(() => {
-                    const pool = miningPools.find(p => p.name === selectedPool);
+                    const pool = miningPools.find(p => p.name === selectedPool && p.coin === selectedCoin);
                     return pool ? (
                       <>
                         <div className="grid grid-cols-2 gap-4">
@@ -682,28 +696,29 @@ const CryptoTrading: React.FC = () => {
                             <div className="text-white font-bold">{pool.fee}%</div>
                           </div>
                           <div className="text-center">
-                            <div className="text-slate-400 text-sm">Miners</div>
-                            <div className="text-white font-bold">{pool.miners.toLocaleString()}</div>
+                            <div className="text-slate-400 text-sm">Rank</div>
+                            <div className="text-white font-bold">{pool.rank ?? '—'}</div>
                           </div>
                         </div>
 
                         <div className="grid grid-cols-2 gap-4">
                           <div className="text-center">
-                            <div className="text-slate-400 text-sm">Pool Hashrate</div>
-                            <div className="text-white font-bold">{pool.hashrate} TH/s</div>
+                            <div className="text-slate-400 text-sm">Latency</div>
+                            <div className={`font-bold ${pool.reachable === false ? 'text-red-400' : 'text-white'}`}>
+                              {pool.reachable === false
+                                ? 'Unreachable'
+                                : pool.latency_ms != null && pool.connect_ms != null
+                                  ? `${(pool.connect_ms + pool.latency_ms).toFixed(0)} ms`
+                                  : '—'}
+                            </div>
                           </div>
                           <div className="text-center">
-                            <div className="text-slate-400 text-sm">Luck</div>
-                            <div className={`font-bold ${pool.luck >= 100 ? 'text-green-400' : 'text-yellow-400'}`}>
-                              {pool.luck}%
+                            <div className="text-slate-400 text-sm">Reject Rate</div>
+                            <div className={`font-bold ${(pool.reject_rate ?? 0) < 0.02 ? 'text-green-400' : 'text-yellow-400'}`}>
+                              {pool.reject_rate != null ? `${(pool.reject_rate * 100).toFixed(1)}%` : '—'}
                             </div>
                           </div>
                         </div>
-
-                        <div className="text-center">
-                          <div className="text-slate-400 text-sm">Last Block</div>
-                          <div className="text-white font-bold">{pool.lastBlock}</div>
-                        </div>
                       </>
                     ) : null;
                   })()}
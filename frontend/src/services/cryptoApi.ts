@@ -147,14 +147,21 @@ export interface MiningEarnings {
 
 export interface MiningPool {
   name: string;
+  coin?: string;
   url: string;
   port: number;
   fee: number;
-  miners: number;
-  hashrate: number;
-  luck: number;
-  lastBlock: string;
+  miners?: number;
+  hashrate?: number;
+  luck?: number;
+  lastBlock?: string;
   algorithm: string;
+  reachable?: boolean;
+  connect_ms?: number | null;
+  latency_ms?: number | null;
+  reject_rate?: number;
+  cost_pct?: number | null;
+  rank?: number;
 }
 
 export interface AIRecommendation {
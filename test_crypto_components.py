@@ -0,0 +1,2622 @@
+#!/usr/bin/env python3
+"""
+Unit tests for CoresAI Crypto Trading Backend components
+Runs without a live backend: python -m pytest -q test_crypto_components.py
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from crypto_alerts import PriceAlertEngine
+from crypto_analytics import PortfolioAnalytics, PriceHistory
+from crypto_behavior import FEATURES, WalletBehaviorClassifier, extract_features
+from crypto_cache import BlockAwareCache, SingleFlightCache
+from crypto_exchanges import ExchangePool
+from crypto_hashbench import KERNELS, BenchmarkStore, HashBenchmark, hash_for, profit_hashrates
+from crypto_http import HTTPClientPool, parse_host_timeouts
+from crypto_indexer import TransferIndexer, TransferStore, format_units
+from crypto_jobs import CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, JobLimitError, JobQueue
+from crypto_metrics import LoopLagMonitor, percentile
+from crypto_multicall import MULTICALL3_ADDRESS, MulticallBalanceScanner, decode_aggregate3, encode_aggregate3
+from crypto_orderbook import L2Book, OrderBookReplica, SequenceGap
+from crypto_pools import PoolProber, parse_pool_endpoints
+from crypto_profit import ProfitEngine
+from crypto_routing import DEFAULT_DEX_TOKENS, CexVenue, DexVenue, QuoteAggregator, encode_get_amounts_out
+from crypto_rpc import TRANSFER_TOPIC, AsyncRPCClient, HeadTracker, RPCError
+from crypto_signals import OHLCVCache, SignalScheduler, compute_indicators, ema
+from crypto_state import (
+    LocalPoolActivityLog,
+    LocalTradeHistory,
+    MemoryStateBackend,
+    RedisStateBackend,
+    SharedJobs,
+    SharedPoolActivityLog,
+    SharedTradeHistory,
+)
+from crypto_storage import PoolActivityLog, TradeHistoryStore
+from crypto_stratum import StratumClient
+from crypto_streaming import Broadcaster, MarketDataStreamer
+from crypto_telemetry import FIELDS as TELEMETRY_FIELDS, TelemetryStore
+
+
+# Market data cache
+def test_cache_coalesces_concurrent_misses():
+    """Concurrent misses for one key share a single upstream load"""
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["BTC", "ETH"]
+
+    async def run():
+        cache = SingleFlightCache(ttl=30)
+        results = await asyncio.gather(*(cache.get("markets", loader) for _ in range(200)))
+        assert all(result == ["BTC", "ETH"] for result in results)
+        assert calls == 1
+        stats = cache.get_stats()
+        assert stats["misses"] == 1
+        assert stats["coalesced"] == 199
+
+        await cache.get("markets", loader)
+        assert cache.get_stats()["hits"] == 1
+        assert calls == 1
+
+    asyncio.run(run())
+
+
+def test_cache_serves_stale_while_revalidating():
+    """Stale entries are returned immediately while one refresh runs"""
+    values = iter(["v1", "v2"])
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        return next(values)
+
+    async def run():
+        cache = SingleFlightCache(ttl=0.05, stale_ttl=10)
+        assert await cache.get("k", loader) == "v1"
+        await asyncio.sleep(0.06)
+
+        assert await cache.get("k", loader) == "v1"
+        assert await cache.get("k", loader) == "v1"
+        assert cache.get_stats()["refreshes"] == 1
+
+        await asyncio.sleep(0.03)
+        assert await cache.get("k", loader) == "v2"
+
+    asyncio.run(run())
+
+
+def test_cache_errors_propagate_and_keep_last_value():
+    """A failed load raises to waiters but leaves the last snapshot peekable"""
+    async def good():
+        return "snapshot"
+
+    async def bad():
+        raise RuntimeError("upstream 429")
+
+    async def run():
+        cache = SingleFlightCache(ttl=0.01)
+        await cache.get("k", good)
+        time.sleep(0.02)
+        try:
+            await cache.get("k", bad)
+            assert False, "expected loader error"
+        except RuntimeError:
+            pass
+        assert cache.peek("k") == "snapshot"
+        assert cache.get_stats()["errors"] == 1
+
+    asyncio.run(run())
+
+
+# Block-aware balance cache
+def test_block_cache_invalidates_touched_addresses():
+    """Only addresses touched by a new block are invalidated"""
+    cache = BlockAwareCache(max_entries=100, max_age_blocks=10)
+    cache.put("0xA", "stale", 1)
+    assert cache.get("0xa") is None  # no head yet, nothing cached
+
+    cache.on_new_block(100, None)
+    cache.put("0xA", "a@100", 100)
+    cache.put("0xB", "b@100", 100)
+    cache.on_new_block(101, {"0xa"})
+    assert cache.get("0xA") is None
+    assert cache.get("0xB") == "b@100"
+
+    # A read taken at 100 must not be stored if the address changed in 101
+    cache.put("0xA", "a@100-late", 100)
+    assert cache.get("0xA") is None
+
+    for block in range(102, 112):
+        cache.on_new_block(block, set())
+    assert cache.get("0xB") is None  # older than max_age_blocks
+
+    stats = cache.get_stats()
+    assert stats["invalidations"] == 1
+    assert stats["hits"] == 1
+    assert stats["head"] == 111
+
+
+def test_block_cache_lru_eviction():
+    """Memory stays bounded by evicting least recently used wallets"""
+    cache = BlockAwareCache(max_entries=3)
+    cache.on_new_block(1, None)
+    for address in ("0x1", "0x2", "0x3"):
+        cache.put(address, address, 1)
+    cache.get("0x1")
+    cache.put("0x4", "0x4", 1)
+    assert cache.get("0x2") is None
+    assert cache.get("0x1") == "0x1"
+    assert cache.get_stats()["evictions"] == 1
+
+
+# Price alert engine
+def test_alert_engine_fires_crossed_alerts_once():
+    """Each tick fires exactly the crossed alerts, and each alert only once"""
+    engine = PriceAlertEngine()
+    engine.add("a1", "eth", "above", 2500, payload="user1")
+    engine.add("a2", "ETH", "above", 2600, payload="user2")
+    engine.add("b1", "ETH", "below", 2300, payload="user3")
+    engine.add("b2", "ETH", "below", 2400, payload="user4")
+    engine.add("x1", "BTC", "above", 40000)
+
+    assert engine.evaluate("ETH", 2450) == []
+    assert sorted(engine.evaluate("ETH", 2550)) == [("a1", "user1")]
+    assert engine.evaluate("ETH", 2550) == []
+    assert sorted(engine.evaluate("ETH", 2300)) == [("b1", "user3"), ("b2", "user4")]
+    assert engine.evaluate_prices({"eth": 2600, "BTC": 39000}) == [("a2", "user2")]
+    assert len(engine) == 1
+
+
+def test_alert_engine_remove_and_matches_naive_scan():
+    """Indexed evaluation agrees with a full scan over random alerts"""
+    rng = random.Random(7)
+    engine = PriceAlertEngine()
+    alerts = {}
+    for i in range(2000):
+        alert = ("ETH", rng.choice(["above", "below"]), round(rng.uniform(1000, 3000), 2))
+        alerts[f"id{i}"] = alert
+        engine.add(f"id{i}", *alert)
+    for i in range(0, 2000, 3):
+        assert engine.remove(f"id{i}")
+        del alerts[f"id{i}"]
+    assert not engine.remove("id0")
+
+    for price in (1800, 2200, 1200, 2900, 2000):
+        expected = {
+            alert_id for alert_id, (_, condition, threshold) in alerts.items()
+            if (condition == "above" and price >= threshold) or (condition == "below" and price <= threshold)
+        }
+        fired = {alert_id for alert_id, _ in engine.evaluate("ETH", price)}
+        assert fired == expected
+        for alert_id in fired:
+            del alerts[alert_id]
+
+
+# Trade history store
+def append_trades(store, user, count, start_ts=1_700_000_000.0):
+    for i in range(count):
+        store.append(
+            user,
+            transaction_hash="0x" + f"{i:064x}",
+            token_in="ETH" if i % 2 else "USDC",
+            token_out="USDC" if i % 2 else "ETH",
+            amount_in=float(i),
+            timestamp=start_ts + i * 60,
+        )
+
+
+def test_trade_store_cursor_pagination_and_time_range():
+    """Pages walk newest to oldest without gaps and honour time ranges"""
+    store = TradeHistoryStore()
+    append_trades(store, "alice", 125)
+    append_trades(store, "bob", 3)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.page("alice", cursor=cursor, limit=50)
+        seen.extend(trade["seq"] for trade in page)
+        if cursor is None:
+            break
+    assert seen == list(range(124, -1, -1))
+    assert store.page("alice", limit=1)[0][0]["transaction_hash"] == "0x" + f"{124:064x}"
+
+    page, cursor = store.page("alice", start=1_700_000_000.0 + 10 * 60, end=1_700_000_000.0 + 20 * 60, limit=100)
+    assert [trade["seq"] for trade in page] == list(range(19, 9, -1))
+    assert cursor is None
+    assert store.count("bob") == 3
+    assert store.get_stats()["symbols"] == 2
+
+
+def test_trade_store_spills_to_sqlite():
+    """Old segments move to SQLite and stay queryable, also after reopening"""
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "trades.db")
+    store = TradeHistoryStore(segment_size=100, db_path=db_path)
+    append_trades(store, "alice", 450)
+    stats = store.get_stats()
+    assert stats["trades_on_disk"] == 300
+    assert stats["trades_in_memory"] == 150
+
+    page, cursor = store.page("alice", cursor="320", limit=40)
+    assert [trade["seq"] for trade in page] == list(range(319, 279, -1))
+    page, _ = store.page("alice", start=1_700_000_000.0 + 5 * 60, end=1_700_000_000.0 + 8 * 60)
+    assert [trade["amount_in"] for trade in page] == [7.0, 6.0, 5.0]
+    store.close()
+
+    reopened = TradeHistoryStore(segment_size=100, db_path=db_path)
+    assert reopened.count("alice") == 450
+    reopened.append("alice", "0x" + "f" * 64, "ETH", "BTC", 1.0, 1_800_000_000.0)
+    assert reopened.page("alice", limit=1)[0][0]["seq"] == 450
+    reopened.close()
+
+
+def test_trade_store_close_keeps_unspilled_trades():
+    """close() writes the in-memory tail of every user so a reopen loses nothing"""
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "trades.db")
+    store = TradeHistoryStore(segment_size=100, db_path=db_path)
+    append_trades(store, "alice", 130)
+    append_trades(store, "bob", 7)
+    assert store.get_stats()["trades_on_disk"] == 0
+    store.close()
+
+    reopened = TradeHistoryStore(segment_size=100, db_path=db_path)
+    assert reopened.count("alice") == 130
+    assert reopened.count("bob") == 7
+    newest = reopened.page("alice", limit=1)[0][0]
+    assert newest["seq"] == 129
+    assert newest["transaction_hash"] == "0x" + f"{129:064x}"
+    assert newest["amount_in"] == 129.0
+    assert reopened.get_stats()["trades_in_memory"] == 0
+    reopened.close()
+
+
+def test_trade_store_since_reads_spilled_rows_and_migrates_old_files():
+    """since() returns oldest-first tuples across disk and memory; old files gain amount_out"""
+    directory = tempfile.mkdtemp()
+    db_path = os.path.join(directory, "trades.db")
+    legacy = sqlite3.connect(db_path)
+    legacy.execute(
+        "CREATE TABLE trades (user TEXT NOT NULL, seq INTEGER NOT NULL, ts REAL NOT NULL, amount REAL NOT NULL, "
+        "token_in TEXT NOT NULL, token_out TEXT NOT NULL, status TEXT NOT NULL, tx_hash BLOB NOT NULL, "
+        "PRIMARY KEY (user, seq))"
+    )
+    legacy.execute("INSERT INTO trades VALUES ('alice', 0, 1.0, 2.0, 'USDC', 'ETH', 'completed', ?)", (bytes(32),))
+    legacy.commit()
+    legacy.close()
+
+    store = TradeHistoryStore(segment_size=10, db_path=db_path)
+    for i in range(1, 35):
+        store.append("alice", "0x" + f"{i:064x}", "ETH", "USDC", 1.0, 1.0 + i, amount_out=2000.0 + i)
+    assert store.get_stats()["trades_on_disk"] == 21
+
+    trades = store.since("alice", 0)
+    assert len(trades) == 35
+    assert trades[0] == (1.0, 2.0, 0.0, "USDC", "ETH", "completed")
+    assert [trade[2] for trade in trades[1:]] == [2000.0 + i for i in range(1, 35)]
+    assert store.since("alice", 30) == trades[30:]
+    assert store.page("alice", limit=1)[0][0]["amount_out"] == 2034.0
+    store.close()
+
+
+# Pool activity log
+def test_pool_log_pages_across_segments_with_since():
+    """Cursor pages span segments and since= skips older entries"""
+    log = PoolActivityLog(segment_size=10)
+    for i in range(35):
+        log.append("1", "deposit" if i % 2 else "trade", 1_700_000_000.0 + i, amount=i)
+
+    seqs, cursor = [], None
+    while True:
+        entries, cursor = log.page("1", cursor=cursor, limit=8)
+        if not entries:
+            break
+        seqs.extend(entry["seq"] for entry in entries)
+    assert seqs == list(range(35))
+    assert cursor == 35
+
+    entries, cursor = log.page("1", since=1_700_000_000.0 + 27, limit=100)
+    assert [entry["seq"] for entry in entries] == list(range(27, 35))
+    assert log.page("1", since=1_700_000_000.0 + 99)[0] == []
+    assert [entry["seq"] for entry in log.recent("1", limit=12)] == list(range(34, 22, -1))
+
+    summary = log.summary("1")
+    assert summary["entries"] == 35
+    assert summary["action_counts"] == {"trade": 18, "deposit": 17}
+    assert summary["deposited"] == sum(range(1, 35, 2))
+
+
+def test_pool_log_compaction_keeps_summary():
+    """Compacted segments disappear from pages but stay in the summary"""
+    log = PoolActivityLog(segment_size=10, max_segments=2)
+    for i in range(45):
+        log.append("1", "withdraw", 1_700_000_000.0 + i, amount=1)
+    assert log.first_available("1") == 30
+    entries, cursor = log.page("1", cursor=0, limit=100)
+    assert entries[0]["seq"] == 30 and cursor == 45
+    summary = log.summary("1")
+    assert summary["compacted_entries"] == 30
+    assert summary["withdrawn"] == 45
+
+
+# L2 order books
+def naive_walk(levels, amount, in_quote):
+    """Reference fill: consume (price, size) levels best-first one by one"""
+    base = quote = 0.0
+    for price, size in levels:
+        take = min(size, (amount - quote) / price) if in_quote else min(size, amount - base)
+        base += take
+        quote += take * price
+        if (quote if in_quote else base) >= amount - 1e-12:
+            return base, quote, True
+    return base, quote, False
+
+
+def test_order_book_diffs_and_vectorized_walk():
+    """Diffs insert/update/delete levels; walk matches a level-by-level fill"""
+    book = L2Book("ETH/USDT")
+    book.apply_snapshot([[99, 1], [98, 2], [97, 5]], [[101, 1], [102, 2], [103, 5]], sequence=10)
+    assert book.apply_diff([[99, 0], [98.5, 3]], [[100.5, 0.5], [103, 0]], last_sequence=12, first_sequence=11)
+    assert not book.apply_diff([[98.5, 9]], [], last_sequence=12)
+    assert book.best_bid() == (98.5, 3) and book.best_ask() == (100.5, 0.5)
+    assert book.to_dict(depth=2)["bids"] == [[98.5, 3], [98.0, 2]]
+    try:
+        book.apply_diff([], [[104, 1]], last_sequence=20, first_sequence=15)
+        raise AssertionError("gap not detected")
+    except SequenceGap:
+        assert not book.synced
+
+    buy = book.walk("buy", 2.0)
+    assert buy["filled_quote"] == 0.5 * 100.5 + 1 * 101 + 0.5 * 102 and buy["levels"] == 3 and buy["complete"]
+    assert not book.walk("sell", 100)["complete"]
+
+    rng = random.Random(7)
+    for _ in range(50):
+        bids = [[100 - i * 0.5, rng.uniform(0.1, 3)] for i in range(40)]
+        asks = [[100.5 + i * 0.5, rng.uniform(0.1, 3)] for i in range(40)]
+        book.apply_snapshot(bids, asks)
+        for side, levels in (("buy", asks), ("sell", bids)):
+            for in_quote in (False, True):
+                amount = rng.uniform(0.1, 90) * (100 if in_quote else 1)
+                result = book.walk(side, amount, in_quote=in_quote)
+                base, quote, complete = naive_walk(levels, amount, in_quote)
+                assert math.isclose(result["filled_base"], base, rel_tol=1e-9)
+                assert math.isclose(result["filled_quote"], quote, rel_tol=1e-9)
+                assert result["complete"] == complete
+
+
+def test_order_book_replica_buffers_and_resyncs_on_gap():
+    """Diffs before the first snapshot and after a gap are replayed over a fresh snapshot"""
+    async def scenario():
+        snapshots = [
+            {"bids": [[99, 1]], "asks": [[101, 1]], "nonce": 5},
+            {"bids": [[99, 1], [98, 4]], "asks": [[101, 2]], "nonce": 20},
+        ]
+        loads = []
+
+        async def loader(symbol):
+            loads.append(symbol)
+            await asyncio.sleep(0.01)
+            return snapshots[len(loads) - 1]
+
+        replica = OrderBookReplica(loader)
+        replica.apply_diff("BTC/USDT", [[99, 2]], [], last_sequence=5, first_sequence=4)  # older than snapshot
+        replica.apply_diff("BTC/USDT", [[97, 1]], [], last_sequence=7, first_sequence=6)
+        book = await replica.get("BTC/USDT")
+        assert book.sequence == 7 and book.best_bid() == (99, 1) and len(book.bids) == 2
+
+        replica.apply_diff("BTC/USDT", [], [[102, 1]], last_sequence=8)
+        replica.apply_diff("BTC/USDT", [], [[101, 0]], last_sequence=21, first_sequence=19)  # gap: 9..18 missing
+        book = await replica.get("BTC/USDT")
+        assert len(loads) == 2 and book.synced and book.sequence == 21
+        assert book.best_ask() is None and book.best_bid() == (99, 1)
+        return replica.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["snapshots"] == 2 and stats["gaps"] == 1 and stats["synced"] == 1
+
+
+# Market data stream
+def test_broadcaster_drops_oldest_and_disconnects_slow_consumers():
+    """A full subscriber queue loses its oldest messages, then the subscriber"""
+    async def scenario():
+        broadcaster = Broadcaster(queue_size=3, max_dropped=4)
+        fast = broadcaster.subscribe(initial="hello")
+        slow = broadcaster.subscribe()
+        received = [await fast.get()]
+        for i in range(5):
+            broadcaster.publish(str(i))
+            received.append(await fast.get())
+        assert received == ["hello", "0", "1", "2", "3", "4"]
+        assert [slow.queue.get_nowait() for _ in range(3)] == ["2", "3", "4"]
+        assert slow.dropped == 2 and len(broadcaster) == 2
+
+        for i in range(5, 11):
+            broadcaster.publish(str(i))
+        assert slow.closed and len(broadcaster) == 1
+        assert [message async for message in slow] == []
+        stats = broadcaster.get_stats()
+        assert stats["disconnected"] == 1 and stats["subscribers"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_streamer_publishes_snapshot_then_changed_symbols():
+    """One fetch per refresh regardless of subscribers; only changed rows are pushed"""
+    async def scenario():
+        prices = {"BTC": 100.0, "ETH": 10.0}
+        fetches = []
+
+        async def fetch():
+            fetches.append(1)
+            return [{"symbol": symbol, "price": price} for symbol, price in prices.items()]
+
+        broadcaster = Broadcaster()
+        streamer = MarketDataStreamer(fetch, broadcaster)
+        subscribers = [broadcaster.subscribe() for _ in range(50)]
+        await streamer.refresh()
+        first = json.loads(await subscribers[0].get())
+        assert first["type"] == "snapshot" and len(first["data"]) == 2
+
+        assert await streamer.refresh() == 0
+        prices["ETH"] = 11.0
+        assert await streamer.refresh() == 1
+        await subscribers[-1].get()  # initial snapshot
+        update = json.loads(await subscribers[-1].get())
+        assert update["type"] == "update" and update["data"] == [{"symbol": "ETH", "price": 11.0}]
+        assert len(fetches) == 3 and broadcaster.stats["published"] == 2
+
+        late = broadcaster.subscribe(initial=streamer.snapshot_message())
+        snapshot = json.loads(await late.get())
+        assert {row["symbol"]: row["price"] for row in snapshot["data"]} == prices
+
+    asyncio.run(scenario())
+
+
+def test_lagging_subscriber_is_resynced_with_a_snapshot():
+    """An overflowing queue is replaced by a snapshot, so missed updates are not lost"""
+    async def scenario():
+        prices = {"BTC": 100.0, "ETH": 10.0, "SOL": 1.0}
+
+        async def fetch():
+            return [{"symbol": symbol, "price": price} for symbol, price in prices.items()]
+
+        broadcaster = Broadcaster(queue_size=2)
+        streamer = MarketDataStreamer(fetch, broadcaster)
+        lagging = broadcaster.subscribe()
+        await streamer.refresh()
+        for symbol in ("BTC", "ETH", "SOL"):
+            prices[symbol] += 1  # one update per symbol, more than the queue holds
+            await streamer.refresh()
+
+        messages = [json.loads(lagging.queue.get_nowait()) for _ in range(lagging.queue.qsize())]
+        state = {}
+        for message in messages:
+            state.update({row["symbol"]: row["price"] for row in message["data"]})
+        assert messages[0]["type"] == "snapshot" and state == prices
+        assert lagging.dropped > 0 and not lagging.closed
+
+    asyncio.run(scenario())
+
+
+# Local stand-in servers
+async def start_http_stand_in(responder, connections: list = None):
+    """Minimal keep-alive HTTP/1.1 server; responder maps request body to a JSON-able reply"""
+    async def handle(reader, writer):
+        if connections is not None:
+            connections.append(writer.get_extra_info("peername"))
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            request_body = json.loads(await reader.readexactly(length)) if length else None
+            reply = responder(request_body)
+            if asyncio.iscoroutine(reply):
+                reply = await reply
+            body = json.dumps(reply).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+            )
+            await writer.drain()
+
+    async def safe_handle(reader, writer):
+        try:
+            await handle(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(safe_handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def json_rpc_stand_in(balances: dict, round_trips: list, delay: float = 0.0, handlers: dict = None):
+    """JSON-RPC responder serving eth_getBalance/eth_blockNumber plus extra handlers (single or batch).
+
+    A handler raising ``RPCError`` answers that request with a JSON-RPC error.
+    """
+    def answer(request):
+        if handlers and request["method"] in handlers:
+            try:
+                return {"jsonrpc": "2.0", "id": request["id"], "result": handlers[request["method"]](request["params"])}
+            except RPCError as e:
+                return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": e.code, "message": e.error_message}}
+        if request["method"] == "eth_getBalance":
+            return {"jsonrpc": "2.0", "id": request["id"], "result": hex(balances.get(request["params"][0], 0))}
+        if request["method"] == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": request["id"], "result": hex(1000)}
+        return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32601, "message": "method not found"}}
+
+    async def respond(body):
+        round_trips.append(body)
+        if delay:
+            await asyncio.sleep(delay)
+        if isinstance(body, list):
+            return [answer(request) for request in body]
+        return answer(body)
+
+    return respond
+
+
+async def start_redis_stand_in(commands: list = None):
+    """In-memory RESP2 server covering the Redis commands the state layer uses"""
+    hashes, sets, zsets, lists, counters = {}, {}, {}, {}, {}
+
+    def bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        value = value if isinstance(value, bytes) else str(value).encode()
+        return b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n"
+
+    def array(items):
+        return b"*" + str(len(items)).encode() + b"\r\n" + b"".join(items)
+
+    def integer(value):
+        return b":" + str(int(value)).encode() + b"\r\n"
+
+    def execute(name, args):
+        if name in ("CLIENT", "SELECT"):
+            return b"+OK\r\n"
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "HGETALL":
+            fields = hashes.get(args[0], {})
+            return array([bulk(item) for pair in fields.items() for item in pair])
+        if name == "HSET":
+            fields = hashes.setdefault(args[0], {})
+            added = sum(1 for field in args[1::2] if field not in fields)
+            fields.update(zip(args[1::2], args[2::2]))
+            return integer(added)
+        if name == "HINCRBYFLOAT":
+            fields = hashes.setdefault(args[0], {})
+            value = float(fields.get(args[1], "0")) + float(args[2])
+            fields[args[1]] = ("%.17g" % value).rstrip(".")
+            return bulk(fields[args[1]])
+        if name == "DEL":
+            return integer(sum(1 for key in args if any(store.pop(key, None) is not None
+                                                         for store in (hashes, sets, zsets, lists))))
+        if name == "SADD":
+            members = sets.setdefault(args[0], set())
+            before = len(members)
+            members.update(args[1:])
+            return integer(len(members) - before)
+        if name == "SREM":
+            members = sets.get(args[0], set())
+            removed = sum(1 for member in args[1:] if member in members)
+            members.difference_update(args[1:])
+            return integer(removed)
+        if name == "SMEMBERS":
+            return array([bulk(member) for member in sets.get(args[0], set())])
+        if name in ("INCR", "INCRBY"):
+            counters[args[0]] = counters.get(args[0], 0) + (int(args[1]) if args[1:] else 1)
+            return integer(counters[args[0]])
+        if name == "ZADD":
+            nx = args[1].upper() == "NX"
+            pairs = args[2:] if nx else args[1:]
+            members = zsets.setdefault(args[0], {})
+            added = 0
+            for score, member in zip(pairs[::2], pairs[1::2]):
+                if member not in members:
+                    added += 1
+                elif nx:
+                    continue
+                members[member] = float(score)
+            return integer(added)
+        if name == "ZREM":
+            members = zsets.get(args[0], {})
+            return integer(sum(1 for member in args[1:] if members.pop(member, None) is not None))
+        if name == "ZRANGE":
+            ordered = sorted(zsets.get(args[0], {}).items(), key=lambda item: (item[1], item[0]))
+            stop = int(args[2])
+            return array([bulk(member) for member, _ in ordered[int(args[1]):None if stop == -1 else stop + 1]])
+        if name == "RPUSH":
+            items = lists.setdefault(args[0], [])
+            items.extend(args[1:])
+            return integer(len(items))
+        if name == "LRANGE":
+            stop = int(args[2])
+            return array([bulk(item) for item in lists.get(args[0], [])[int(args[1]):None if stop == -1 else stop + 1]])
+        if name == "LLEN":
+            return integer(len(lists.get(args[0], [])))
+        if name == "LTRIM":
+            stop = int(args[2])
+            lists[args[0]] = lists.get(args[0], [])[int(args[1]):None if stop == -1 else stop + 1]
+            return b"+OK\r\n"
+        return b"-ERR unknown command '" + name.encode() + b"'\r\n"
+
+    async def read_command(reader):
+        count = int((await reader.readline())[1:])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args[0].upper(), args[1:]
+
+    async def handle(reader, writer):
+        queued = None
+        try:
+            while True:
+                name, args = await read_command(reader)
+                if commands is not None:
+                    commands.append(name)
+                if name == "MULTI":
+                    queued, reply = [], b"+OK\r\n"
+                elif name == "EXEC":
+                    reply = array([execute(*command) for command in queued])
+                    queued = None
+                elif queued is not None:
+                    queued.append((name, args))
+                    reply = b"+QUEUED\r\n"
+                else:
+                    reply = execute(name, args)
+                writer.write(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+async def start_stratum_stand_in(respond, delay: float = 0.0, connections: list = None):
+    """Line-delimited JSON-RPC stratum server.
+
+    ``respond(request)`` (plain or async) returns a reply dict, a list of
+    messages to send, or None to stay silent. Requests are answered
+    concurrently, each ``delay`` seconds after it arrives, so a slow reply
+    never holds back later ones. ``connections`` collects each client's writer.
+    """
+    async def answer(request, writer):
+        if delay:
+            await asyncio.sleep(delay)
+        reply = respond(request)
+        if asyncio.iscoroutine(reply):
+            reply = await reply
+        for message in reply if isinstance(reply, list) else [reply] if reply is not None else []:
+            writer.write(json.dumps(message).encode() + b"\n")
+
+    async def handle(reader, writer):
+        if connections is not None:
+            connections.append(writer)
+        answers = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                answers.append(asyncio.ensure_future(answer(json.loads(line), writer)))
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            for task in answers:
+                task.cancel()
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+# Shared HTTP client pool
+def test_http_pool_reuses_connections():
+    """Sequential requests to one host reuse a single keep-alive connection"""
+    async def run():
+        connections = []
+        server, url = await start_http_stand_in(lambda body: {"ok": True}, connections)
+        pool = HTTPClientPool(http2=False)
+        try:
+            for _ in range(20):
+                response = await pool.get(f"{url}/coins/markets")
+                assert response.json() == {"ok": True}
+            assert len(connections) == 1
+            assert pool.get_stats()["requests"] == {url: 20}
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_http_pool_host_timeouts():
+    """Per-host timeouts are parsed and applied to the host's client"""
+    timeouts = parse_host_timeouts("api.coingecko.com=4, bad, rpc.local=1.5")
+    assert timeouts == {"api.coingecko.com": 4.0, "rpc.local": 1.5}
+
+    async def run():
+        pool = HTTPClientPool(default_timeout=10, host_timeouts=timeouts, http2=False)
+        assert pool.client_for("https://api.coingecko.com/api/v3").timeout.read == 4.0
+        assert pool.client_for("https://example.com/").timeout.read == 10
+        assert pool.client_for("https://api.coingecko.com/x") is pool.client_for("https://api.coingecko.com/y")
+        await pool.aclose()
+
+    asyncio.run(run())
+
+
+# Non-blocking RPC and loop metrics
+def test_rpc_client_does_not_block_loop():
+    """Slow balance lookups leave the event loop free for other work"""
+    async def run():
+        round_trips = []
+        server, url = await start_http_stand_in(json_rpc_stand_in({"0xabc": 10 ** 18}, round_trips, delay=0.2))
+        pool = HTTPClientPool(http2=False)
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        try:
+            client = AsyncRPCClient(pool, url)
+            lookups = asyncio.gather(*(client.get_balance("0xabc") for _ in range(5)))
+            ticks = 0
+            while not lookups.done():
+                await asyncio.sleep(0.01)
+                ticks += 1
+            assert await lookups == [10 ** 18] * 5
+            assert ticks >= 10
+            assert monitor.get_stats()["max_ms"] < 100
+            assert await client.is_connected()
+            try:
+                await client.call("eth_unknown")
+                assert False, "expected RPC error"
+            except RPCError as e:
+                assert e.code == -32601
+        finally:
+            await monitor.stop()
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_rpc_batching_demultiplexes_results():
+    """N concurrent balance lookups cost ceil(N / batch) round trips"""
+    async def run():
+        balances = {f"0x{i:040x}": i * 10 ** 15 for i in range(95)}
+        round_trips = []
+        server, url = await start_http_stand_in(json_rpc_stand_in(balances, round_trips))
+        pool = HTTPClientPool(http2=False)
+        try:
+            client = AsyncRPCClient(pool, url, batch_window=0.01, max_batch_size=20)
+            addresses = list(balances)
+            results = await asyncio.gather(*(client.get_balance(address) for address in addresses))
+            assert results == [balances[address] for address in addresses]
+            assert len(round_trips) == math.ceil(95 / 20)
+            assert client.get_stats()["batched_calls"] == 95
+
+            mixed = await asyncio.gather(
+                client.get_balance(addresses[1]),
+                client.call("eth_unknown"),
+                return_exceptions=True
+            )
+            assert mixed[0] == balances[addresses[1]]
+            assert isinstance(mixed[1], RPCError)
+
+            unbatched = AsyncRPCClient(pool, url, max_batch_size=1)
+            round_trips.clear()
+            await asyncio.gather(*(unbatched.get_balance(address) for address in addresses[:10]))
+            assert len(round_trips) == 10
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_rpc_malformed_replies_fail_callers_instead_of_hanging():
+    """null, scalar or non-object batch replies fail every caller with RPCError"""
+    async def run():
+        replies = [None, 7, [None, "x"], None]
+        server, url = await start_http_stand_in(lambda body: replies.pop(0))
+        pool = HTTPClientPool(http2=False)
+        try:
+            client = AsyncRPCClient(pool, url, batch_window=0.01, max_batch_size=5)
+            for _ in range(3):
+                outcomes = await asyncio.wait_for(
+                    asyncio.gather(*(client.block_number() for _ in range(2)), return_exceptions=True), 2
+                )
+                assert all(isinstance(outcome, RPCError) for outcome in outcomes), outcomes
+            unbatched = AsyncRPCClient(pool, url, max_batch_size=1)
+            try:
+                await asyncio.wait_for(unbatched.block_number(), 2)
+                raise AssertionError("null reply accepted")
+            except RPCError as e:
+                assert "malformed" in str(e)
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_head_tracker_reports_touched_addresses():
+    """New heads publish tx participants, miner and Transfer log addresses"""
+    chain = {"head": 100}
+    sender, recipient, token_holder = "0x" + "1" * 40, "0x" + "2" * 40, "0x" + "3" * 40
+
+    def get_block(params):
+        return {
+            "number": params[0],
+            "miner": "0x" + "9" * 40,
+            "transactions": [{"from": sender, "to": recipient}],
+        }
+
+    def get_logs(params):
+        assert params[0]["topics"] == [TRANSFER_TOPIC]
+        return [{"topics": [TRANSFER_TOPIC, "0x" + "0" * 24 + sender[2:], "0x" + "0" * 24 + token_holder[2:]]}]
+
+    async def run():
+        round_trips = []
+        handlers = {
+            "eth_blockNumber": lambda params: hex(chain["head"]),
+            "eth_getBlockByNumber": get_block,
+            "eth_getLogs": get_logs,
+        }
+        server, url = await start_http_stand_in(json_rpc_stand_in({}, round_trips, handlers=handlers))
+        pool = HTTPClientPool(http2=False)
+        try:
+            tracker = HeadTracker(AsyncRPCClient(pool, url), max_catchup=5)
+            cache = BlockAwareCache()
+            events = []
+            tracker.subscribe(cache.on_new_block)
+            tracker.subscribe(lambda number, touched: events.append((number, touched)))
+
+            await tracker.poll_once()
+            assert events == [(100, None)]
+            cache.put(sender, "cached", 100)
+            cache.put("0x" + "4" * 40, "untouched", 100)
+
+            chain["head"] = 102
+            await tracker.poll_once()
+            assert [number for number, _ in events[1:]] == [101, 102]
+            assert {sender, recipient, token_holder} <= events[1][1]
+            assert cache.get(sender) is None
+            assert cache.get("0x" + "4" * 40) == "untouched"
+
+            chain["head"] = 200
+            await tracker.poll_once()
+            assert events[-1] == (200, None)
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_loop_lag_monitor_detects_blocking():
+    """A synchronous sleep on the loop shows up as lag in the blocked window"""
+    async def run():
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        start = time.perf_counter()
+        time.sleep(0.15)
+        await asyncio.sleep(0.02)
+        end = time.perf_counter()
+        await monitor.stop()
+        assert monitor.max_lag_between(start, end) >= 0.1
+        assert monitor.get_stats()["max_ms"] >= 100
+
+    asyncio.run(run())
+    assert percentile([1, 2, 3, 4], 50) == 2
+    assert percentile([], 99) == 0.0
+
+
+# Shared state layer
+async def exercise_state(state):
+    """Run every state primitive and return what each call observed"""
+    seen = []
+    await state.put("pools", "1", {"id": "1", "size": 0, "members": ["0xa"], "meta": {"tier": 2}})
+    seen.append(await state.get("pools", "1"))
+    await state.update("pools", "1", {"name": "alpha"})
+    seen.append(await state.increment("pools", "1", "size", 2.5))
+    seen.append(await state.increment("pools", "1", "size", -1))
+    seen.append(await state.increment("pools", "2", "trade_count"))
+    seen.append(await state.get_many("pools", ["1", "missing", "2"]))
+    seen.append(sorted(await state.keys("pools")))
+    seen.append(await state.delete("pools", "2"))
+    seen.append(await state.delete("pools", "2"))
+    seen.append(sorted(await state.keys("pools")))
+    seen.append([await state.next_id("pools") for _ in range(3)])
+    for member in ("0xc", "0xa", "0xb", "0xa"):
+        seen.append(await state.add_member("pool_members", "1", member))
+    seen.append(await state.remove_member("pool_members", "1", "0xa"))
+    seen.append(await state.remove_member("pool_members", "1", "0xz"))
+    seen.append(await state.members("pool_members", "1"))
+    seen.append([await state.append("trade_history", "u", [i, f"tx{i}"]) for i in range(5)])
+    seen.append(await state.slice("trade_history", "u", 1, 4))
+    seen.append(await state.slice("trade_history", "u", 4, 4))
+    seen.append(await state.length("trade_history", "u"))
+    return seen
+
+
+def test_redis_state_matches_memory_state():
+    """Both backends give the same answers; Redis reads of many keys are pipelined"""
+    async def scenario():
+        server, url = await start_redis_stand_in()
+        async with server:
+            state = RedisStateBackend(url)
+            redis_seen = await exercise_state(state)
+            await state.put("alerts", "a", {"active": True})
+            round_trips = state.stats["round_trips"]
+            await state.get_many("alerts", [str(i) for i in range(50)])
+            await state.update_many("alerts", {str(i): {"active": False} for i in range(50)})
+            assert state.stats["round_trips"] == round_trips + 2
+            assert len(await state.keys("alerts")) == 51
+            await state.close()
+        return redis_seen
+
+    memory_seen = asyncio.run(exercise_state(MemoryStateBackend()))
+    redis_seen = asyncio.run(scenario())
+    assert redis_seen == memory_seen
+    assert memory_seen[0] == {"id": "1", "size": 0, "members": ["0xa"], "meta": {"tier": 2}}
+    assert memory_seen[2] == 1.5
+
+
+def test_shared_trade_history_matches_local_store():
+    """State-backed trade history pages exactly like the columnar store"""
+    async def scenario():
+        server, url = await start_redis_stand_in()
+        async with server:
+            local = LocalTradeHistory(TradeHistoryStore())
+            histories = [local, SharedTradeHistory(MemoryStateBackend()), SharedTradeHistory(RedisStateBackend(url))]
+            for history in histories:
+                for i in range(23):
+                    await history.append(
+                        "u", "0x" + f"{i:064x}", "ETH", "USDC", float(i), 1_700_000_000.0 + i * 60
+                    )
+
+            queries = [{}, {"limit": 7}, {"start": 1_700_000_000.0 + 300, "end": 1_700_000_000.0 + 900, "limit": 4}]
+            for query in queries:
+                walks = []
+                for history in histories:
+                    rows, cursor, walk = [], None, []
+                    while True:
+                        rows, cursor = await history.page("u", cursor=cursor, **query)
+                        walk.append((rows, cursor))
+                        if cursor is None:
+                            break
+                    walks.append(walk)
+                assert walks[0] == walks[1] == walks[2]
+            assert [await history.count("u") for history in histories] == [23, 23, 23]
+            assert await histories[2].page("nobody") == ([], None)
+
+    asyncio.run(scenario())
+
+
+def test_shared_pool_log_matches_local_log():
+    """State-backed pool activity pages, summarizes and seeks by time like the in-process log"""
+    async def scenario():
+        server, url = await start_redis_stand_in()
+        async with server:
+            logs = [
+                LocalPoolActivityLog(PoolActivityLog(segment_size=10)),
+                SharedPoolActivityLog(MemoryStateBackend()),
+                SharedPoolActivityLog(RedisStateBackend(url)),
+            ]
+            for log in logs:
+                for i in range(35):
+                    action = ("trade", "deposit", "withdraw")[i % 3]
+                    await log.append("1", action, 1_700_000_000.0 + i, amount=i)
+
+            observed = []
+            for log in logs:
+                pages, cursor = [], None
+                while True:
+                    entries, cursor = await log.page("1", cursor=cursor, limit=8)
+                    if not entries:
+                        break
+                    pages.append(entries)
+                observed.append((
+                    pages,
+                    cursor,
+                    await log.page("1", since=1_700_000_000.0 + 27),
+                    await log.recent("1", limit=12),
+                    await log.summary("1"),
+                    await log.summary("missing"),
+                    await log.page("missing"),
+                    await log.count("1"),
+                ))
+            assert observed[0] == observed[1] == observed[2]
+            summary = observed[2][4]
+            assert summary["action_counts"] == {"trade": 12, "deposit": 12, "withdraw": 11}
+            assert summary["deposited"] == sum(range(1, 35, 3))
+
+    asyncio.run(scenario())
+
+
+def test_shared_pool_log_compacts_like_local_log_in_one_round_trip_per_append():
+    """max_segments trims the shared list and folds it into the summary; appends are one MULTI each"""
+    async def scenario():
+        commands = []
+        server, url = await start_redis_stand_in(commands)
+        async with server:
+            redis_state = RedisStateBackend(url)
+            logs = [
+                LocalPoolActivityLog(PoolActivityLog(segment_size=10, max_segments=2)),
+                SharedPoolActivityLog(MemoryStateBackend(), segment_size=10, max_segments=2),
+                SharedPoolActivityLog(redis_state, segment_size=10, max_segments=2),
+            ]
+            round_trips = []
+            for log in logs:
+                for i in range(45):
+                    before = redis_state.stats["round_trips"]
+                    action = ("trade", "deposit", "withdraw")[i % 3]
+                    await log.append("1", action, 1_700_000_000.0 + i, amount=i)
+                    round_trips.append(redis_state.stats["round_trips"] - before)
+
+            observed = []
+            for log in logs:
+                observed.append((
+                    await log.page("1", limit=100),
+                    await log.page("1", cursor=5, limit=3),
+                    await log.page("1", since=1_700_000_000.0 + 33, limit=4),
+                    await log.recent("1", limit=30),
+                    await log.summary("1"),
+                    await log.first_available("1"),
+                    await log.count("1"),
+                ))
+            assert observed[0] == observed[1] == observed[2]
+            entries, cursor = observed[2][0]
+            assert [entry["seq"] for entry in entries] == list(range(30, 45)) and cursor == 45
+            assert observed[2][4]["compacted_entries"] == 30 and observed[2][4]["entries"] == 45
+            assert await redis_state.length(SharedPoolActivityLog.NAMESPACE, "1") == 15
+
+            redis_rounds = round_trips[90:]
+            assert redis_rounds[0] == 2  # the first append also records first_activity
+            assert redis_rounds[20] == redis_rounds[30] == 2  # seq 20 and 30 trim the oldest segment
+            assert all(rounds == 1 for seq, rounds in enumerate(redis_rounds) if seq not in (0, 20, 30, 40))
+            assert commands.count("MULTI") >= 45
+            await redis_state.close()
+
+    asyncio.run(scenario())
+
+
+# Transfer indexer
+def synthetic_transfer_logs(wallets, tokens, blocks, seed=7):
+    """Transfer logs between wallets, dense in some blocks, plus ERC-721 noise"""
+    rng = random.Random(seed)
+    logs = []
+    for block in range(blocks):
+        count = rng.choice([0, 0, 1, 2, 40]) if block % 100 else 150
+        for log_index in range(count):
+            sender, recipient = rng.sample(wallets, 2)
+            topics = [TRANSFER_TOPIC, "0x" + "0" * 24 + sender[2:], "0x" + "0" * 24 + recipient[2:]]
+            if rng.random() < 0.05:
+                topics.append(hex(rng.randrange(10_000)))  # NFT transfer: token id indexed
+            logs.append({
+                "address": rng.choice(tokens),
+                "blockNumber": hex(block),
+                "logIndex": hex(log_index),
+                "transactionHash": "0x" + f"{block:032x}{log_index:032x}",
+                "topics": topics,
+                "data": hex(rng.randrange(1, 10 ** 24)),
+            })
+    return logs
+
+
+def test_transfer_indexer_adapts_ranges_and_pages_history():
+    """Ranges shrink on dense/rejected blocks and grow on sparse ones; history pages match the chain"""
+    wallets = [f"0x{i:040x}" for i in range(1, 21)]
+    tokens = ["0x" + "aa" * 20, "0x" + "bb" * 20, "0x" + "cc" * 20]
+    logs = synthetic_transfer_logs(wallets, tokens, blocks=1113)
+    queries, header_calls = [], []
+    chain = {"head": 1012}
+
+    def answer(request):
+        method, params = request["method"], request["params"]
+        if method == "eth_blockNumber":
+            result = hex(chain["head"])
+        elif method == "eth_getLogs":
+            low, high = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            queries.append((low, high))
+            result = [
+                log for log in logs
+                if low <= int(log["blockNumber"], 16) <= high and log["address"] in params[0]["address"]
+            ]
+            if len(result) > 300:  # hosted nodes cap results per query
+                error = {"code": -32005, "message": "query returned more than 300 results"}
+                return {"jsonrpc": "2.0", "id": request["id"], "error": error}
+        else:
+            header_calls.append(int(params[0], 16))
+            result = {"number": params[0], "timestamp": hex(1_700_000_000 + int(params[0], 16) * 12)}
+        return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+
+    async def respond(body):
+        return [answer(request) for request in body] if isinstance(body, list) else answer(body)
+
+    async def scenario():
+        server, url = await start_http_stand_in(respond)
+        pool = HTTPClientPool(http2=False)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "transfers.db")
+            try:
+                client = AsyncRPCClient(pool, url, batch_window=0.005)
+                store = TransferStore(path)
+                indexer = TransferIndexer(client, store, tokens=tokens[:2], start_block=0, confirmations=12,
+                                          initial_range=50, target_logs=200)
+                stored = await indexer.index_once()
+                stats = indexer.get_stats()
+
+                wallet = wallets[3]
+                pages, cursor = [], None
+                while True:
+                    page, cursor = await indexer.history(wallet, cursor=cursor, limit=37,
+                                                         token_info={tokens[0]: ("AAA", 18)})
+                    pages.append(page)
+                    if cursor is None:
+                        break
+                first_header_calls = len(header_calls)
+                await indexer.history(wallet, limit=37)
+                cached_headers = len(header_calls) == first_header_calls
+
+                # Restart on the same file after the chain advanced: only new blocks are fetched
+                store.close()
+                chain["head"] = 1112
+                queries.clear()
+                resumed = TransferIndexer(client, TransferStore(path), tokens=tokens[:2], start_block=0, confirmations=12)
+                await resumed.index_once()
+                resumed_queries = list(queries)
+                resumed.store.close()
+                return stored, stats, pages, cached_headers, resumed_queries
+            finally:
+                await pool.aclose()
+                server.close()
+                await server.wait_closed()
+
+    stored, stats, pages, cached_headers, resumed_queries = asyncio.run(scenario())
+    indexed = [
+        log for log in logs
+        if int(log["blockNumber"], 16) <= 1000 and len(log["topics"]) == 3 and log["address"] in tokens[:2]
+    ]
+    assert stored == len(indexed) and stats["checkpoint"] == 1000 and stats["lag_blocks"] == 0
+    assert stats["splits"] > 0 and stats["range_blocks"] > 1
+
+    wallet = wallets[3]
+    expected = sorted(
+        (log for log in indexed if wallet[2:] in log["topics"][1] + log["topics"][2]),
+        key=lambda log: (int(log["blockNumber"], 16), int(log["logIndex"], 16)),
+        reverse=True,
+    )
+    rows = [row for page in pages for row in page]
+    assert [row["hash"] for row in rows] == [log["transactionHash"] for log in expected]
+    assert all(len(page) == 37 for page in pages[:-1]) and len(pages) > 2
+    first = rows[0]
+    assert first["type"] == ("send" if first["from"] == wallet else "receive")
+    assert first["timestamp"] is not None and first["status"] == "success"
+    aaa = next(row for row in rows if row["token_address"] == tokens[0])
+    assert aaa["token"] == "AAA" and aaa["value"] == format_units(int(aaa["raw_value"]), 18)
+    assert cached_headers
+    assert resumed_queries and resumed_queries[0][0] == 1001 and resumed_queries[-1][1] == 1100
+
+
+def test_format_units_is_exact():
+    """Token amounts are scaled with integer arithmetic, no float rounding"""
+    assert format_units(1_500_000, 6) == "1.5"
+    assert format_units(10 ** 18, 18) == "1"
+    assert format_units(123456789012345678901234567890, 18) == "123456789012.34567890123456789"
+    assert format_units(7, 0) == "7"
+
+
+# Multicall balances
+def multicall_stand_in(tokens: dict, eth: dict, calls_seen: list, max_calls: int = 10_000):
+    """eth_call handler executing aggregate3 against in-memory tokens.
+
+    tokens maps address -> {"symbol": str or bytes32, "decimals": int, "balances": {wallet: int}};
+    a symbol of None makes the contract revert (not an ERC-20). Over max_calls reverts the whole
+    call like a node hitting its gas cap.
+    """
+    def word(value):
+        return value.to_bytes(32, "big")
+
+    def abi_bytes(data):
+        return word(len(data)) + data + bytes(-len(data) % 32)
+
+    def execute(target, data):
+        selector, argument = data[:4].hex(), "0x" + data[-20:].hex()
+        if target == MULTICALL3_ADDRESS.lower() and selector == "4d2301cc":
+            return True, word(eth.get(argument, 0))
+        token = tokens.get(target)
+        if token is None or token["symbol"] is None:
+            return False, b""
+        if selector == "70a08231":
+            return True, word(token["balances"].get(argument, 0))
+        if selector == "313ce567":
+            return True, word(token["decimals"])
+        if selector == "95d89b41":
+            symbol = token["symbol"]
+            if isinstance(symbol, bytes):
+                return True, symbol.ljust(32, b"\0")
+            return True, word(0x20) + abi_bytes(symbol.encode())
+        return False, b""
+
+    def eth_call(params):
+        data = bytes.fromhex(params[0]["data"][10:])
+        count = int.from_bytes(data[32:64], "big")
+        calls_seen.append(count)
+        if count > max_calls:
+            raise RPCError({"code": -32000, "message": "out of gas"})
+        base = 64
+        results = []
+        for index in range(count):
+            item = base + int.from_bytes(data[base + 32 * index:base + 32 * (index + 1)], "big")
+            target = "0x" + data[item + 12:item + 32].hex()
+            offset = item + int.from_bytes(data[item + 64:item + 96], "big")
+            length = int.from_bytes(data[offset:offset + 32], "big")
+            results.append(execute(target, data[offset + 32:offset + 32 + length]))
+        encoded = [word(int(success)) + word(0x40) + abi_bytes(ret) for success, ret in results]
+        offsets, position = [], 32 * len(encoded)
+        for item in encoded:
+            offsets.append(word(position))
+            position += len(item)
+        return "0x" + (word(0x20) + word(len(encoded)) + b"".join(offsets) + b"".join(encoded)).hex()
+
+    return eth_call
+
+
+def test_aggregate3_codec_round_trips():
+    """Hand-rolled aggregate3 encoding matches the stand-in's decoding and back"""
+    calls = [("0x" + "11" * 20, bytes.fromhex("70a08231") + bytes(32)), ("0x" + "22" * 20, b"\x01\x02\x03")]
+    seen = []
+    tokens = {"0x" + "11" * 20: {"symbol": "AAA", "decimals": 6, "balances": {"0x" + "00" * 20: 5}}}
+    result = multicall_stand_in(tokens, {}, seen)([{"to": MULTICALL3_ADDRESS, "data": encode_aggregate3(calls)}])
+    assert seen == [2]
+    assert decode_aggregate3(result) == [(True, (5).to_bytes(32, "big")), (False, b"")]
+
+
+def test_multicall_scanner_packs_balances_into_few_calls():
+    """Wallets x tokens balanceOf calls are chunked into aggregate3 calls; metadata is fetched once"""
+    rng = random.Random(11)
+    wallets = [f"0x{i:040x}" for i in range(1, 31)]
+    tokens = {
+        f"0x{0xabc000 + i:040x}": {
+            "symbol": f"T{i}" if i % 10 else b"MKR",
+            "decimals": 18 if i % 3 else 6,
+            "balances": {wallet: rng.randrange(10 ** 20) for wallet in wallets if rng.random() < 0.3},
+        }
+        for i in range(40)
+    }
+    tokens[f"0x{0xdead:040x}"] = {"symbol": None, "decimals": 0, "balances": {}}
+    eth = {wallet: rng.randrange(10 ** 19) for wallet in wallets}
+    token_list = list(tokens)
+
+    async def scenario():
+        calls_seen, round_trips = [], []
+        handler = multicall_stand_in(tokens, eth, calls_seen, max_calls=150)
+        server, url = await start_http_stand_in(json_rpc_stand_in({}, round_trips, handlers={"eth_call": handler}))
+        pool = HTTPClientPool(http2=False)
+        try:
+            client = AsyncRPCClient(pool, url, batch_window=0.005)
+            scanner = MulticallBalanceScanner(client, max_calls=200, batch_window=0.01)
+            metadata = await scanner.metadata(token_list)
+            metadata_calls = len(calls_seen)
+            await scanner.metadata(token_list)
+            assert len(calls_seen) == metadata_calls
+
+            calls_seen.clear()
+            balances = await scanner.balances(wallets, token_list)
+            scan_calls = list(calls_seen)
+
+            calls_seen.clear()
+            singles = await asyncio.gather(*(scanner.wallet_balances(wallet, token_list[:5]) for wallet in wallets[:10]))
+            return metadata, balances, scan_calls, list(calls_seen), singles, scanner.get_stats()
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    metadata, balances, scan_calls, single_calls, singles, stats = asyncio.run(scenario())
+    assert metadata[token_list[1]] == ("T1", 18) and metadata[token_list[3]] == ("T3", 6)
+    assert metadata[token_list[0]] == ("MKR", 6) and metadata[f"0x{0xdead:040x}"] is None
+    for wallet in wallets:
+        assert balances[wallet]["ETH"] == eth[wallet]
+        for token in token_list:
+            assert balances[wallet][token] == tokens[token]["balances"].get(wallet, 0)
+    # 30 wallets x (41 tokens + ETH) = 1260 sub-calls: six chunks of 200 hit the gas cap and are halved
+    assert sum(count for count in scan_calls if count <= 150) == 30 * 42
+    assert sorted(scan_calls) == [60] + [100] * 12 + [200] * 6 and stats["splits"] == 6
+    assert single_calls == [10 * 6] and singles[3] == {
+        "ETH": eth[wallets[3]], **{token: tokens[token]["balances"].get(wallets[3], 0) for token in token_list[:5]}
+    }
+    assert stats["tokens_known"] == 40 and stats["non_erc20"] == 1
+
+
+
+def test_multicall_raises_node_errors_instead_of_splitting():
+    """A rate-limited node fails the scan once; nothing is split, zeroed or cached as a non-token"""
+    wallets = [f"0x{i:040x}" for i in range(1, 5)]
+    token = f"0x{0xabc:040x}"
+    tokens = {token: {"symbol": "AAA", "decimals": 6, "balances": {wallets[0]: 7}}}
+    limited = [True]
+
+    async def scenario():
+        calls_seen, round_trips = [], []
+        handler = multicall_stand_in(tokens, {}, calls_seen)
+
+        def eth_call(params):
+            if limited[0]:
+                calls_seen.append("limited")
+                raise RPCError({"code": 429, "message": "daily request limit exceeded"})
+            return handler(params)
+
+        server, url = await start_http_stand_in(json_rpc_stand_in({}, round_trips, handlers={"eth_call": eth_call}))
+        pool = HTTPClientPool(http2=False)
+        try:
+            scanner = MulticallBalanceScanner(AsyncRPCClient(pool, url, batch_window=0.001), max_calls=2)
+            failures = []
+            for call in (scanner.balances(wallets, [token]), scanner.metadata([token])):
+                try:
+                    await call
+                except RPCError as e:
+                    failures.append(e.code)
+            limited_calls = list(calls_seen)
+            limited[0] = False
+            return failures, limited_calls, await scanner.metadata([token]), await scanner.balances(wallets[:1], [token]), scanner
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    failures, limited_calls, metadata, balances, scanner = asyncio.run(scenario())
+    assert failures == [429, 429]
+    assert len(limited_calls) == 4 + 1 and scanner.get_stats()["splits"] == 0  # one try per chunk, no halving
+    assert metadata == {token: ("AAA", 6)} and balances[wallets[0]][token] == 7
+
+# Exchange pool
+class FakeExchange:
+    """Stands in for an async ccxt client and records when each call reached it"""
+
+    rateLimit = 20  # ms between requests, as ccxt reports it
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.calls = []
+        self.closed = False
+
+    async def _record(self, method, *args):
+        self.calls.append((method, args, time.monotonic()))
+        await asyncio.sleep(self.latency)
+
+    async def fetch_ticker(self, symbol):
+        await self._record("fetch_ticker", symbol)
+        if symbol == "BAD/USDT":
+            raise ValueError("bad symbol")
+        return {"symbol": symbol, "last": 100.0}
+
+    async def fetch_order_book(self, symbol, limit=None):
+        await self._record("fetch_order_book", symbol, limit)
+        return {"symbol": symbol, "bids": [[99.0, 1.0]], "asks": [[101.0, 1.0]]}
+
+    async def create_order(self, symbol, order_type, side, amount, price=None):
+        await self._record("create_order", symbol, order_type, side, amount, price)
+        return {"id": str(len(self.calls)), "symbol": symbol, "side": side}
+
+    async def close(self):
+        self.closed = True
+
+
+def test_exchange_pool_respects_rate_limit_and_priorities():
+    """Calls are paced at the exchange's rate and queued orders jump queued tickers"""
+    async def scenario():
+        exchange = FakeExchange()
+        pool = ExchangePool(burst=1)
+        pool.add("fake", exchange)  # 50 requests/s from rateLimit
+        tickers = [asyncio.ensure_future(pool.fetch_ticker("fake", f"T{i}/USDT")) for i in range(10)]
+        await asyncio.sleep(0)
+        order = await pool.create_order("fake", "BTC/USDT", "limit", "buy", 1.0, 100.0)
+        await asyncio.gather(*tickers)
+        await pool.aclose()
+        return exchange, order, pool.get_stats()["fake"]
+
+    exchange, order, stats = asyncio.run(scenario())
+    methods = [method for method, _, _ in exchange.calls]
+    assert methods.index("create_order") <= 1 and order["side"] == "buy"
+    gaps = [later - earlier for (_, _, earlier), (_, _, later) in zip(exchange.calls, exchange.calls[1:])]
+    assert min(gaps) >= 0.015 and exchange.calls[-1][2] - exchange.calls[0][2] >= 0.18
+    assert stats["sent"] == 11 and stats["pending"] == 0 and exchange.closed
+
+
+def test_exchange_pool_coalesces_duplicate_reads():
+    """Identical ticker/order book requests share one exchange call; errors reach every waiter"""
+    async def scenario():
+        exchange = FakeExchange(latency=0.05)
+        pool = ExchangePool(burst=5)
+        pool.add("fake", exchange, rate=1000)
+        tickers = await asyncio.gather(*(pool.fetch_ticker("fake", "ETH/USDT") for _ in range(20)))
+        books = await asyncio.gather(*(pool.fetch_order_book("fake", "ETH/USDT", 10) for _ in range(5)))
+        await pool.fetch_order_book("fake", "ETH/USDT", 20)
+        errors = await asyncio.gather(*(pool.fetch_ticker("fake", "BAD/USDT") for _ in range(3)), return_exceptions=True)
+        try:
+            await pool.fetch_ticker("missing", "ETH/USDT")
+            raise AssertionError("unknown exchange accepted")
+        except KeyError:
+            pass
+        return exchange, tickers, books, errors, pool.get_stats()["fake"]
+
+    exchange, tickers, books, errors, stats = asyncio.run(scenario())
+    assert [method for method, _, _ in exchange.calls] == [
+        "fetch_ticker", "fetch_order_book", "fetch_order_book", "fetch_ticker"
+    ]
+    assert all(ticker["last"] == 100.0 for ticker in tickers) and len(books) == 5
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert stats["coalesced"] == 19 + 4 + 2 and stats["errors"] == 1
+
+
+# Trade routing
+class FakeVenue:
+    """Quotes a fixed price after a delay; price None means it does not list the pair"""
+
+    def __init__(self, name, price, delay=0.0, error=None, liquidity=float("inf")):
+        self.name = name
+        self.price = price
+        self.delay = delay
+        self.error = error
+        self.liquidity = liquidity
+        self.calls = 0
+        self.cancelled = 0
+
+    async def quote(self, token_in, token_out, amount_in):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        if self.price is None:
+            return None
+        return {"output": amount_in * self.price, "complete": amount_in <= self.liquidity, "slippage_pct": 0.1}
+
+
+def test_aggregator_picks_best_quote_within_deadline():
+    """Late venues are cancelled and skipped; errors, unlisted and thin venues never win"""
+    venues = [
+        FakeVenue("cex_a", 2000.0, delay=0.01),
+        FakeVenue("cex_b", 2010.0, delay=0.02),
+        FakeVenue("dex_slow", 2100.0, delay=1.0),
+        FakeVenue("dex_thin", 2050.0, liquidity=0.5),
+        FakeVenue("broken", 2200.0, error=RuntimeError("venue down")),
+        FakeVenue("unlisted", None),
+    ]
+
+    async def scenario():
+        aggregator = QuoteAggregator(venues, deadline=0.1, cache_ttl=0.2)
+        started = time.perf_counter()
+        route = await aggregator.best_route("eth", "usdt", 1.0)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0)
+        # Same pair and size bucket: served from cache, rescaled to the new amount
+        cached = await aggregator.best_route("ETH", "USDT", 1.02)
+        other_bucket = await aggregator.best_route("ETH", "USDT", 2.0)
+        await asyncio.sleep(0.25)
+        expired = await aggregator.best_route("ETH", "USDT", 1.0)
+        return aggregator, route, elapsed, cached, other_bucket, expired
+
+    aggregator, route, elapsed, cached, other_bucket, expired = asyncio.run(scenario())
+    assert elapsed < 0.15
+    assert route["best"]["venue"] == "cex_b" and route["best"]["output"] == 2010.0
+    assert [quote["venue"] for quote in route["quotes"]] == ["cex_b", "cex_a"]
+    statuses = {name: venue["status"] for name, venue in route["venues"].items()}
+    assert statuses == {"cex_a": "ok", "cex_b": "ok", "dex_slow": "late", "dex_thin": "partial",
+                        "broken": "error", "unlisted": "no_quote"}
+    assert 10 <= route["venues"]["cex_a"]["latency_ms"] < route["venues"]["cex_b"]["latency_ms"] < 100
+    assert route["venues"]["broken"]["error"] == "venue down" and not route["cached"]
+    assert venues[2].cancelled >= 1
+    assert cached["cached"] and abs(cached["best"]["output"] - 2010.0 * 1.02) < 1e-6
+    assert not other_bucket["cached"] and not expired["cached"]
+    stats = aggregator.get_stats()
+    assert stats["fanouts"] == 3 and stats["routes"] == 4 and stats["late"] == 3 and stats["errors"] == 3
+
+
+def test_aggregator_deadline_holds_under_load():
+    """Hundreds of concurrent routes with a hung venue all return by the deadline"""
+    venues = [FakeVenue(f"fast_{i}", 100.0 + i, delay=random.uniform(0.001, 0.02)) for i in range(8)]
+    venues.append(FakeVenue("hung", 1000.0, delay=30))
+
+    async def scenario():
+        aggregator = QuoteAggregator(venues, deadline=0.3, cache_ttl=1.0)
+
+        async def timed(pair, amount):
+            started = time.perf_counter()
+            route = await aggregator.best_route(pair, "USDT", amount)
+            return route, time.perf_counter() - started
+
+        started = time.perf_counter()
+        # 100 distinct (pair, bucket) keys, each requested 5 times at once
+        results = await asyncio.gather(*(
+            timed(f"T{i % 20}", 1.5 ** (i // 20)) for i in range(100) for _ in range(5)
+        ))
+        return aggregator, results, time.perf_counter() - started
+
+    aggregator, results, total = asyncio.run(scenario())
+    # The hung venue takes 30s, so finishing at all proves the deadline cut it off; the bounds are loose
+    # enough that a garbage collection pause inside the timed window cannot fail the test
+    assert total < 5.0
+    assert max(latency for _, latency in results) < 2.0
+    routed = [route for route, _ in results if route["best"] is not None]
+    assert len(routed) >= 400 and all(route["best"]["venue"] == "fast_7" for route in routed)
+    assert all(route["venues"]["hung"]["status"] == "late" for route, _ in results)
+    assert aggregator.get_stats()["fanouts"] == 100 and venues[-1].calls == 100
+
+
+def test_dex_venue_quotes_router_with_batched_eth_calls():
+    """getAmountsOut is encoded by hand; both quotes share one batched round trip"""
+    weth, usdc = DEFAULT_DEX_TOKENS["WETH"][0], DEFAULT_DEX_TOKENS["USDC"][0]
+    reserve_in, reserve_out = 1000 * 10 ** 18, 2_000_000 * 10 ** 6  # 2000 USDC per WETH
+
+    def eth_call(params):
+        data = params[0]["data"]
+        assert data[:10] == "0xd06ca61f" and params[0]["to"] == "0x" + "ab" * 20
+        amount_in = int(data[10:74], 16)
+        path = [int(data[10 + 64 * (3 + i):10 + 64 * (4 + i)], 16) for i in range(2)]
+        assert path == [int(weth, 16), int(usdc, 16)]
+        amount_out = amount_in * 997 * reserve_out // (reserve_in * 1000 + amount_in * 997)
+        return "0x" + "".join(f"{word:064x}" for word in (0x20, 2, amount_in, amount_out))
+
+    async def scenario():
+        round_trips = []
+        server, url = await start_http_stand_in(json_rpc_stand_in({}, round_trips, handlers={"eth_call": eth_call}))
+        pool = HTTPClientPool(http2=False)
+        try:
+            client = AsyncRPCClient(pool, url, batch_window=0.01)
+            venue = DexVenue("uniswap_v2", client, "0x" + "ab" * 20)
+            quote = await venue.quote("ETH", "USDC", 10.0)
+            assert await venue.quote("ETH", "DOGE", 10.0) is None
+            assert await venue.quote("ETH", "WETH", 10.0) is None
+            return quote, round_trips
+        finally:
+            await pool.aclose()
+            server.close()
+            await server.wait_closed()
+
+    quote, round_trips = asyncio.run(scenario())
+    assert len(round_trips) == 1 and len(round_trips[0]) == 2
+    assert 19_600 < quote["output"] < 19_800 and 0.9 < quote["slippage_pct"] < 1.1
+    assert encode_get_amounts_out(1, [weth, usdc]).startswith("0xd06ca61f" + "0" * 63 + "1")
+
+
+def test_cex_venue_wraps_order_book_estimates():
+    """CEX venues pass through order-book walks and flag partial fills"""
+    async def estimate(token_in, token_out, amount_in):
+        if token_out == "DOGE":
+            return None
+        return {"symbol": "ETH/USDT", "side": "sell", "output": amount_in * 1990.0,
+                "complete": amount_in < 5, "slippage_pct": 0.2}
+
+    async def scenario():
+        aggregator = QuoteAggregator([CexVenue("fake", estimate)], deadline=0.1)
+        return (await aggregator.best_route("ETH", "USDT", 1.0), await aggregator.best_route("ETH", "USDT", 10.0),
+                await aggregator.best_route("ETH", "DOGE", 1.0))
+
+    small, large, unlisted = asyncio.run(scenario())
+    assert small["best"]["output"] == 1990.0 and small["best"]["symbol"] == "ETH/USDT"
+    assert large["best"] is None and large["venues"]["fake"]["status"] == "partial"
+    assert unlisted["best"] is None and unlisted["venues"]["fake"]["status"] == "no_quote"
+
+
+# Portfolio analytics
+DAY = 24 * 3600.0
+
+
+def test_portfolio_analytics_matches_hand_computed_metrics():
+    """Returns, win rate, hold time and drawdown for a small history worked out by hand"""
+    now = 1_700_000_000.0
+    prices = PriceHistory()
+    engine = PortfolioAnalytics(prices, aliases={"WETH": "ETH"}, bucket_seconds=3600)
+    engine.ingest("alice", [
+        (now - 10 * DAY, 2000.0, 1.0, "USDT", "ETH", "completed"),
+        (now - 8 * DAY, 1.0, 2200.0, "ETH", "USDT", "completed"),  # +10%
+        (now - 6 * DAY, 1000.0, 10.0, "USDT", "SOL", "completed"),
+    ])
+    engine.ingest("alice", [
+        (now - 4 * DAY, 5.0, 400.0, "SOL", "USDT", "completed"),  # 10 SOL bought at 100, exit at 80: -20%
+        (now - 2 * DAY, 1000.0, 0.5, "USDT", "WETH", "completed"),  # still open
+        (now - 1 * DAY, 5.0, 0.0, "USDT", "ETH", "failed"),
+    ])
+    prices.record({"ETH": 2100.0, "SOL": 60.0}, now - 3600)
+
+    result = engine.analytics("alice", now=now)
+    # 2000 USDT at the start; 600 USDT + 0.5 ETH at 2100 + 5 SOL at 60 now
+    assert result["portfolio_value_usd"] == 1950.0
+    assert result["total_return_usd"] == -50.0
+    assert result["total_return_percent"] == -2.5
+    assert result["total_trades"] == 6
+    assert result["win_rate"] == 66.7  # 2 of 3 positions, the open WETH one marked at 2100
+    assert result["avg_hold_time_hours"] == 48.0
+    assert result["best_performing_token"] == {"symbol": "ETH", "return": 10.0}  # WETH is its own position
+    assert result["worst_performing_token"] == {"symbol": "SOL", "return": -20.0}
+    # Peak 2200 after the ETH sale, trough 1950 at the end
+    assert result["max_drawdown_percent"] == round((1950 / 2200 - 1) * 100, 2)
+    assert 0 < result["portfolio_diversity_score"] < 10
+    assert engine.analytics("alice", now=now) is result
+    assert engine.get_stats()["cache_hits"] == 1
+
+
+def test_portfolio_analytics_incremental_matches_batch():
+    """Ingesting trades a few at a time gives the same metrics as one batch"""
+    rng = random.Random(3)
+    tokens = ["ETH", "BTC", "SOL"]
+    prices = {"ETH": 2000.0, "BTC": 40000.0, "SOL": 60.0}
+    start = 1_700_000_000.0
+    trades = []
+    for i in range(400):
+        token = rng.choice(tokens)
+        prices[token] *= math.exp(rng.gauss(0, 0.01))
+        usd = rng.uniform(10, 100)
+        if rng.random() < 0.5:
+            trades.append((start + i * 600, usd, usd / prices[token], "USDC", token, "completed"))
+        else:
+            trades.append((start + i * 600, usd / prices[token], usd, token, "USDC", "completed"))
+    now = trades[-1][0] + 3600  # a later bucket than any incremental call
+
+    batch = PortfolioAnalytics(PriceHistory(), bucket_seconds=1800)
+    batch.ingest("bob", trades)
+    incremental = PortfolioAnalytics(PriceHistory(), bucket_seconds=1800)
+    for offset in range(0, len(trades), 7):
+        incremental.ingest("bob", trades[offset:offset + 7])
+        incremental.analytics("bob", now=trades[min(offset + 6, len(trades) - 1)][0])
+
+    expected, actual = batch.analytics("bob", now=now), incremental.analytics("bob", now=now)
+    for key in ("total_return_usd", "win_rate", "avg_hold_time_hours", "sharpe_ratio", "max_drawdown_percent",
+                "portfolio_diversity_score", "best_performing_token", "worst_performing_token"):
+        assert actual[key] == expected[key], key
+    assert incremental.trade_count("bob") == 400
+    assert expected["sharpe_ratio"] != 0
+
+
+# Wallet behavior
+def transfer(index, token, value, kind, timestamp, tx_hash=None):
+    return {
+        "hash": tx_hash or f"0x{index:064x}",
+        "log_index": 0,
+        "token": token,
+        "value": value,
+        "type": kind,
+        "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+    }
+
+
+def test_wallet_features_are_computed_per_wallet_in_one_batch():
+    """Frequency, sizes, diversity, swaps and holding periods match hand-computed values"""
+    now = 1_700_000_000.0
+    swapper = [  # newest first, as history pages are
+        transfer(3, "USDC", "100", "send", now - 1 * DAY, tx_hash="0xswap"),
+        transfer(4, "ETH", "0.05", "receive", now - 1 * DAY, tx_hash="0xswap"),
+        transfer(2, "ETH", "1", "send", now - 2 * DAY),
+        transfer(1, "ETH", "1", "receive", now - 3 * DAY),
+    ]
+    holder = [transfer(9, "UNKNOWN", "5", "receive", now - 4 * DAY)]
+    matrix = extract_features({"0xa": swapper, "0xb": holder, "0xc": []}, prices={"ETH": 2000.0, "USDC": 1.0}, now=now)
+    a, b, empty = (dict(zip(FEATURES, row)) for row in matrix)
+
+    assert math.isclose(a["log_tx_per_day"], math.log1p(4 / 2))  # 4 transfers over 2 days
+    sizes = [math.log10(101), math.log10(101), math.log10(2001), math.log10(2001)]
+    assert math.isclose(a["log_size_usd"], sum(sizes) / 4)
+    assert a["large_share"] == 0
+    assert math.isclose(a["log_tokens"], math.log1p(2))
+    assert math.isclose(a["token_concentration"], 0.75 ** 2 + 0.25 ** 2)
+    assert math.isclose(a["swap_ratio"], 1 / 3)  # one of three transactions sends and receives
+    assert a["send_share"] == 0.5
+    # ETH received 3 days ago is sent a day later; the swapped ETH is still held after a day
+    assert math.isclose(a["log_hold_hours"], (math.log1p(24) + math.log1p(24)) / 2)
+    assert a["held_share"] == 0.5
+
+    assert math.isclose(b["log_tx_per_day"], math.log1p(1))
+    assert math.isnan(b["log_size_usd"])  # no price for the token
+    assert math.isclose(b["log_hold_hours"], math.log1p(96))
+    assert all(math.isnan(value) for value in empty.values())
+
+
+def test_wallet_classifier_batches_and_reuses_unchanged_wallets():
+    """Distinct behaviors get distinct profiles; only wallets with new transfers are re-extracted"""
+    now = 1_700_000_000.0
+    trader = []
+    for i in range(120):
+        swap = f"0x{i:064x}"
+        trader.append(transfer(2 * i, "USDC", "500", "send", now - i * 1800, tx_hash=swap))
+        trader.append(transfer(2 * i + 1, "ETH", "0.25", "receive", now - i * 1800, tx_hash=swap))
+    holder = [transfer(i, "ETH", "3", "receive", now - (i + 1) * 30 * DAY) for i in range(8)]
+    histories = {"0xtrader": trader, "0xholder": holder, "0xnew": holder[:2]}
+    prices = {"ETH": 2000.0, "USDC": 1.0}
+
+    classifier = WalletBehaviorClassifier(min_transactions=5)
+    results = classifier.classify(histories, prices, now=now)
+    assert results["0xtrader"]["profile"] == "high_frequency"
+    assert results["0xholder"]["profile"] == "hodler"
+    assert results["0xnew"]["profile"] == "minimal_activity"
+    assert 0 < results["0xtrader"]["confidence"] <= 1
+
+    histories["0xholder"] = [transfer(99, "ETH", "1", "send", now)] + holder
+    classifier.classify(histories, prices, now=now)
+    stats = classifier.get_stats()
+    assert stats["batches"] == 2
+    assert stats["extracted"] == 4  # three wallets, then only the one with a new transfer
+    assert stats["cache_hits"] == 2
+
+
+# Trading signals
+def synthetic_candles(count, drift, seed, start_ms=1_700_000_000_000, step_ms=3_600_000):
+    rng = random.Random(seed)
+    close, rows = 100.0, []
+    for i in range(count):
+        close *= math.exp(drift + rng.gauss(0, 0.01))
+        rows.append([start_ms + i * step_ms, close * 0.999, close * 1.004, close * 0.996, close, 1000.0 + i])
+    return rows
+
+
+def test_indicators_for_many_symbols_match_one_at_a_time():
+    """Vectorized indicators over ragged histories equal per-symbol results"""
+    cache = OHLCVCache(bars=120)
+    histories = {"A": synthetic_candles(120, 0.002, 1), "B": synthetic_candles(60, -0.002, 2), "C": synthetic_candles(90, 0, 3)}
+    for symbol, rows in histories.items():
+        cache.merge(symbol, rows)
+    together = compute_indicators(cache.matrix(list(histories)))
+    for index, symbol in enumerate(histories):
+        alone = compute_indicators(cache.matrix([symbol]))
+        for name, values in together.items():
+            assert math.isclose(values[index], alone[name][0], rel_tol=1e-9, abs_tol=1e-12), (symbol, name)
+
+    closes = [row[4] for row in histories["A"]]
+    expected = closes[0]
+    for close in closes[1:]:
+        expected = close * 2 / 13 + expected * 11 / 13
+    assert math.isclose(ema(cache.matrix(["A"])[:, :, 4], 12)[0, -1], expected)
+
+    rising = OHLCVCache(bars=40)
+    rising.merge("UP", [[i, i + 1, i + 2, i, i + 1, 1.0] for i in range(40)])
+    assert compute_indicators(rising.matrix(["UP"]))["rsi"][0] == 100.0
+
+
+def test_signal_scheduler_fetches_incrementally_and_versions_snapshots():
+    """Cycles fetch only new candles, and the version and ETag change only with the signals"""
+    candles = {"ETH": synthetic_candles(80, 0.003, 4), "BTC": synthetic_candles(80, -0.003, 5), "NEW": synthetic_candles(5, 0, 6)}
+    requests = []
+
+    async def fetch(symbol, timeframe, since, limit):
+        requests.append((symbol, since))
+        if symbol == "BAD":
+            raise RuntimeError("exchange down")
+        rows = [row for row in candles[symbol] if since is None or row[0] >= since]
+        return rows[-limit:]
+
+    async def run():
+        scheduler = SignalScheduler(fetch, ["eth", "btc", "new", "bad"], timeframe="1h", bars=60, interval=60)
+        first = await scheduler.refresh()
+        assert first.version == 1
+        assert {signal["token"] for signal in first.signals} == {"ETH", "BTC"}  # NEW has too few candles
+        assert json.loads(first.body)["signals"] == first.signals
+
+        assert await scheduler.refresh() is first  # nothing new: same snapshot, same ETag
+        assert ("ETH", candles["ETH"][-1][0]) in requests[-4:]
+
+        candles["ETH"][-1][4] *= 1.2  # the forming candle closes much higher
+        third = await scheduler.refresh()
+        assert third.version == 2 and third.etag != first.etag
+        assert scheduler.cache.count("ETH") == 60
+
+        stats = scheduler.get_stats()
+        assert stats["cycles"] == 3
+        assert stats["fetch_errors"] == 3
+        assert stats["last_compute_ms"] > 0 and stats["version"] == 2
+
+    asyncio.run(run())
+
+
+def test_price_history_resamples_into_candles():
+    """Recorded market prices become OHLC candles per timeframe bucket"""
+    prices = PriceHistory(min_interval=0)
+    for minute, price in enumerate([10, 12, 9, 11, 20, 18]):
+        prices.record({"ETH": price}, 3600 * 100 + minute * 20 * 60)
+    assert prices.candles("eth", 3600) == [
+        [360_000_000.0, 10.0, 12.0, 9.0, 9.0, 0.0],
+        [363_600_000.0, 11.0, 20.0, 11.0, 18.0, 0.0],
+    ]
+    assert prices.candles("ETH", 3600, since=363_600_000) == [[363_600_000.0, 11.0, 20.0, 11.0, 18.0, 0.0]]
+    assert prices.candles("BTC", 3600) == []
+
+
+# Background jobs
+def test_job_queue_runs_jobs_in_background_with_progress_and_limits():
+    """Submitting returns at once; workers report progress and results, and limits refuse extra jobs"""
+    async def work(seconds, fail=False, progress=None):
+        progress(50, "halfway")
+        await asyncio.sleep(seconds)
+        if fail:
+            raise ValueError("boom")
+        return {"slept": seconds}
+
+    async def run():
+        queue = JobQueue(workers=1, max_queued=3, max_per_user=2)
+        queue.start()
+        first = queue.submit("alice", "work", work, 0.05)
+        failing = queue.submit("alice", "work", work, 0, True)
+        assert first.status == QUEUED and failing.status == QUEUED
+        try:
+            queue.submit("alice", "work", work, 0)
+            assert False, "per-user limit not enforced"
+        except JobLimitError as e:
+            assert e.per_user
+        queue.submit("bob", "work", work, 0)  # third queued job: the queue is now full
+        try:
+            queue.submit("carol", "work", work, 0)
+            assert False, "queue size not enforced"
+        except JobLimitError as e:
+            assert not e.per_user
+
+        await asyncio.sleep(0.01)
+        assert first.status == RUNNING and first.progress == 50 and first.message == "halfway"
+        assert await first.wait_changed(timeout=1)
+        assert first.status == COMPLETED and first.progress == 100 and first.result == {"slept": 0.05}
+        await asyncio.sleep(0.01)
+        assert failing.status == FAILED and failing.error == "boom"
+
+        assert queue.get(first.id, "bob") is None  # other users cannot see it
+        assert [job.id for job in queue.jobs("alice")] == [failing.id, first.id]
+        queue.submit("alice", "work", work, 0)  # finished jobs free the user's slots
+        await queue.stop()
+        stats = queue.get_stats()
+        assert stats["completed"] >= 2 and stats["failed"] == 1 and stats["rejected"] == 2
+
+    asyncio.run(run())
+
+
+def test_job_queue_cancels_queued_and_running_jobs():
+    """Cancelling a running job interrupts its body; a cancelled queued job never starts"""
+    cleaned = []
+
+    async def work(name, progress=None):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cleaned.append(name)
+            raise
+
+    async def run():
+        queue = JobQueue(workers=1, max_per_user=5, retention=0.05)
+        queue.start()
+        running = queue.submit("alice", "work", work, "running")
+        waiting = queue.submit("alice", "work", work, "waiting")
+        await asyncio.sleep(0.01)
+        assert queue.cancel(running.id, "alice")
+        assert queue.cancel(waiting.id, "alice")
+        assert waiting.status == CANCELLED
+        await asyncio.sleep(0.01)
+        assert running.status == CANCELLED and cleaned == ["running"]
+        assert not queue.cancel(running.id, "alice")
+
+        leftover = queue.submit("alice", "work", work, "leftover")
+        await asyncio.sleep(0.01)
+        await queue.stop()
+        assert leftover.status == CANCELLED and cleaned == ["running", "leftover"]
+        await asyncio.sleep(0.06)
+        assert queue.get(running.id) is None  # expired after the retention period
+        assert queue.get_stats()["cancelled"] == 3
+
+    asyncio.run(run())
+
+
+def test_shared_jobs_are_visible_and_cancellable_from_every_worker():
+    """A job accepted by one worker is listed, streamed and cancelled from another; limits span workers"""
+    cleaned = []
+
+    async def work(seconds, progress=None):
+        progress(50, "halfway")
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            cleaned.append(seconds)
+            raise
+        return {"slept": seconds}
+
+    async def scenario():
+        server, url = await start_redis_stand_in()
+        async with server:
+            workers = [
+                SharedJobs(RedisStateBackend(url), JobQueue(workers=2), max_per_user=2, poll_interval=0.02)
+                for _ in range(2)
+            ]
+            first, second = workers
+            for worker in workers:
+                worker.start()
+            quick = await first.submit("alice", "work", work, 0.1)
+            slow = await first.submit("alice", "work", work, 10)
+            try:
+                await second.submit("alice", "work", work, 0)
+                raise AssertionError("per-user limit not shared between workers")
+            except JobLimitError as e:
+                assert e.per_user
+
+            updates = [job async for job in second.watch(quick["job_id"], "alice", heartbeat=0.05)]
+            assert updates[-1]["status"] == COMPLETED and updates[-1]["result"] == {"slept": 0.1}
+            assert [job["job_id"] for job in await second.jobs("alice")] == [slow["job_id"], quick["job_id"]]
+            assert (await second.get(slow["job_id"], "alice"))["message"] == "halfway"
+            assert await second.get(slow["job_id"], "bob") is None
+
+            assert await second.cancel(slow["job_id"], "alice")
+            await asyncio.sleep(0.1)
+            assert (await second.get(slow["job_id"], "alice"))["status"] == CANCELLED and cleaned == [10]
+            assert not await second.cancel(slow["job_id"], "alice")
+            await second.submit("alice", "work", work, 0)  # finished jobs free the user's slots everywhere
+            for worker in workers:
+                await worker.stop()
+                await worker.state.close()
+            return first.get_stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["remote_cancels"] == 1 and stats["completed"] == 1 and stats["cancelled"] == 1
+    assert stats["publish_errors"] == 0 and stats["backend"] == "redis"
+
+
+def test_shared_jobs_free_slots_after_failed_publishes_and_dead_workers():
+    """A failed final publish is retried, and a dead worker's jobs stop counting once their lease lapses"""
+    async def work(seconds, progress=None):
+        await asyncio.sleep(seconds)
+        return seconds
+
+    class FlakyState(MemoryStateBackend):
+        failures = 0
+
+        async def update(self, namespace, key, fields):
+            if self.failures and fields.get("status") == COMPLETED:
+                self.failures -= 1
+                raise ConnectionError("state unavailable")
+            await super().update(namespace, key, fields)
+
+    async def scenario():
+        state = FlakyState()
+        jobs = SharedJobs(state, JobQueue(workers=2), max_per_user=1, poll_interval=0.02, lease=0.2)
+        jobs.start()
+        state.failures = 1
+        job = await jobs.submit("alice", "work", work, 0.05)
+        await asyncio.sleep(0.2)
+        assert jobs.stats["publish_errors"] == 1
+        assert (await state.get(SharedJobs.NAMESPACE, job["job_id"]))["status"] == COMPLETED
+        assert await jobs.active("alice") == 0
+        await jobs.submit("alice", "work", work, 0)
+
+        ghost = {"job_id": "ghost", "kind": "work", "status": RUNNING, "created_at": "2024-01-01T00:00:00",
+                 "version": 1, "owner": "bob", "lease_until": time.time() + 0.1}
+        await state.put(SharedJobs.NAMESPACE, "ghost", ghost)
+        await state.add_member(SharedJobs.OWNERS, "bob", "ghost")
+        try:
+            await jobs.submit("bob", "work", work, 0)
+            raise AssertionError("a live remote job did not count against its owner")
+        except JobLimitError:
+            pass
+        await asyncio.sleep(0.15)
+        assert (await jobs.get("ghost", "bob"))["status"] == FAILED
+        await jobs.submit("bob", "work", work, 0)
+        await jobs.stop()
+
+    asyncio.run(scenario())
+
+
+# Mining telemetry
+def telemetry_samples(count, seed, start=1_700_006_400.0):
+    rng = random.Random(seed)
+    times, rows, now = [], [], start
+    for index in range(count):
+        now += rng.choice((0.5, 1, 1, 2, 7))
+        times.append(now)
+        rows.append([rng.uniform(80, 90), rng.uniform(380, 420), rng.uniform(60, 75), 65, index // 30, index // 900])
+    return times, rows
+
+
+def test_telemetry_rollups_match_a_direct_aggregation_of_all_samples():
+    """Min/avg/max per 1m and 1h bucket equal grouping every sample, however samples are batched"""
+    times, rows = telemetry_samples(12_000, 7)
+    batched, single = TelemetryStore(raw_points=500), TelemetryStore(raw_points=500)
+    rng = random.Random(8)
+    index = 0
+    while index < len(times):
+        size = rng.randint(1, 400)
+        batched.ingest("s", times[index:index + size], rows[index:index + size])
+        index += size
+    for sample_time, row in zip(times, rows):
+        single.ingest("s", [sample_time], [row])
+
+    for resolution, seconds in (("1m", 60), ("1h", 3600)):
+        groups = {}
+        for sample_time, row in zip(times, rows):
+            groups.setdefault(sample_time // seconds * seconds, []).append(row[0])
+        history = batched.history("s", resolution)
+        assert history == single.history("s", resolution)
+        assert history["timestamps"] == sorted(groups)
+        assert history["samples"] == [len(groups[bucket]) for bucket in sorted(groups)]
+        for position, bucket in enumerate(sorted(groups)):
+            values = groups[bucket]
+            assert math.isclose(history["hashrate"]["avg"][position], sum(values) / len(values), abs_tol=1e-3)
+            assert math.isclose(history["hashrate"]["min"][position], min(values), rel_tol=1e-6)
+            assert math.isclose(history["hashrate"]["max"][position], max(values), rel_tol=1e-6)
+
+    raw = batched.history("s", "raw")
+    assert raw["timestamps"] == times[-500:]  # raw samples are a fixed-size window
+    latest = batched.latest("s")
+    assert latest["timestamp"] == times[-1]
+    for field, value in zip(TELEMETRY_FIELDS, rows[-1]):
+        assert math.isclose(latest[field], value, rel_tol=1e-6)
+
+
+def test_telemetry_store_windows_late_samples_and_fixed_memory():
+    """Range queries across the ring wrap, late samples are dropped and memory does not grow"""
+    store = TelemetryStore(raw_points=100, rollup_points={"1m": 10}, max_sessions=2)
+    start = 1_700_006_400.0
+    store.ingest("a", [start + i for i in range(150)], [[i, 0, 0, 0, 0, 0] for i in range(150)])
+    memory = store.get_stats()["memory_bytes"]
+    window = store.history("a", "raw", start=start + 95, end=start + 105)
+    assert window["timestamps"] == [start + i for i in range(95, 106)]
+    assert window["hashrate"] == [float(i) for i in range(95, 106)]
+    assert store.history("a", "raw", limit=3)["hashrate"] == [147.0, 148.0, 149.0]
+    assert store.history("a", "1m", start=start + 61)["timestamps"] == [start + 60, start + 120]
+
+    assert store.ingest("a", [start + 10, start + 150], [[1] * 6, [150, 0, 0, 0, 0, 0]]) == 1
+    store.ingest("a", [start + 151 + i for i in range(5000)], [[1, 0, 0, 0, 0, 0]] * 5000)
+    assert store.get_stats()["memory_bytes"] == memory
+    assert len(store.history("a", "1m")["timestamps"]) == 10
+
+    store.ingest("b", [start], [[1] * 6])
+    store.ingest("a", [start + 6000], [[1] * 6])  # a becomes the most recently updated
+    store.ingest("c", [start], [[1] * 6])
+    assert store.latest("b") is None and store.latest("a") is not None
+    stats = store.get_stats()
+    assert stats["late"] == 1 and stats["evicted"] == 1 and stats["sessions"] == 2
+    try:
+        store.history("a", "5m")
+        assert False, "unknown resolution accepted"
+    except ValueError:
+        pass
+
+
+# Profit switching
+def test_profit_matrix_matches_the_per_device_formula():
+    """Every (device, pool) profit equals revenue minus power cost; unmineable or unpriced pools are -inf"""
+    coins = {"AAA": ("Alpha", 2.0, 1e12, 1), "BBB": ("Beta", 50.0, 4e3, 2 ** 32)}
+    pools = [("PoolOne", "AAA", 1.0), ("PoolTwo", "AAA", 3.0), ("PoolOne", "BBB", 2.0)]
+    engine = ProfitEngine(coins=coins, pools=pools, electricity_price=0.1)
+    rng = random.Random(9)
+    devices = {}
+    for index in range(20):
+        hashrates = {"Alpha": rng.uniform(1e7, 1e8)}
+        if index % 4:
+            hashrates["Beta"] = rng.uniform(1e6, 1e7)
+        watts = {algorithm: rng.uniform(100, 400) for algorithm in hashrates}
+        devices[f"rig{index}"] = (hashrates, watts)
+        engine.set_device(f"rig{index}", hashrates, watts)
+    engine.set_prices({"AAA": 30.0, "ZZZ": 1.0})
+
+    profits = engine.profits()
+    for row, (hashrates, watts) in enumerate(devices.values()):
+        for column, (_, coin, fee) in enumerate(pools):
+            algorithm, reward, difficulty, unit = coins[coin]
+            if coin == "BBB" or algorithm not in hashrates:
+                assert profits[row, column] == -math.inf
+                continue
+            revenue = hashrates[algorithm] * reward / (difficulty * unit) * 30.0 * (1 - fee / 100) * 86400
+            cost = watts[algorithm] * 24 / 1000 * 0.1
+            assert math.isclose(profits[row, column], revenue - cost, rel_tol=1e-9)
+
+    engine.set_prices({"BBB": 2.0})
+    best = engine.recommendation("rig1")
+    assert best["profit_per_day"] == max(option["profit_per_day"] for option in engine.options("rig1"))
+    assert {option["coin"] for option in engine.options("rig0")} == {"AAA"}  # rig0 cannot mine Beta
+    assert engine.algorithm_for("bbb") == "Beta" and engine.algorithm_for("XYZ") is None
+
+
+def test_profit_switching_waits_for_a_margin_and_the_dwell_time():
+    """Switches need the threshold gain and min_dwell on the current pool; applying restarts the dwell"""
+    coins = {"AAA": ("Alpha", 1.0, 1e6, 1), "BBB": ("Alpha", 1.0, 1e6, 1)}
+    engine = ProfitEngine(coins=coins, pools=[("P", "AAA", 0), ("P", "BBB", 0)], electricity_price=0, min_dwell=600)
+    engine.set_device("rig", {"Alpha": 1.0}, {"Alpha": 0})
+    engine.set_device("idle", {"Alpha": 1.0}, {"Alpha": 0})
+    engine.assign("rig", "AAA", "P", now=0)
+
+    assert engine.on_prices({"AAA": 100.0, "BBB": 104.0}, now=1000) == []  # 4% better: inside the 5% band
+    assert engine.on_prices({"BBB": 110.0}, now=300) == []  # better, but only 300s on the current pool
+    switches = engine.on_prices({}, now=1000)
+    assert switches == [("rig", "BBB", "P")]  # the idle rig is never switched
+    assert engine.recommendation("rig")["switch"] and engine.recommendation("idle")["coin"] == "BBB"
+
+    engine.apply(switches, now=1000)
+    assert engine.on_prices({"AAA": 200.0}, now=1200) == []  # dwell restarted by the switch
+    assert engine.on_prices({}, now=1600) == [("rig", "AAA", "P")]
+    engine.assign("rig", None, None, now=1700)
+    assert engine.on_prices({}, now=5000) == []
+    stats = engine.get_stats()
+    assert stats["switches_applied"] == 1 and stats["devices"] == 2 and stats["priced_coins"] == 2
+
+
+# CPU hash benchmark
+def test_hash_benchmark_measures_every_kernel_with_repeated_trials():
+    """Each kernel reports per-core and aggregate rates over the configured trials; progress only rises"""
+    for kernel in KERNELS:
+        hashes, elapsed = hash_for(kernel, 0.01)
+        assert hashes > 0 and elapsed >= 0.01
+
+    benchmark = HashBenchmark(processes=2, kernels=["sha256d", "scrypt"], trials=2, trial_seconds=0.05, warmup=0.01)
+    seen = []
+    result = asyncio.run(benchmark.run(lambda percent, message="": seen.append(percent)))
+
+    assert result["mode"] == "cpu" and result["processes"] == 2 and set(result["kernels"]) == {"sha256d", "scrypt"}
+    for kernel, entry in result["kernels"].items():
+        assert entry["algorithm"] == KERNELS[kernel][1]
+        for summary in (entry["per_core_hps"], entry["aggregate_hps"]):
+            assert len(summary["trials"]) == 2 and summary["mean"] > 0
+            assert summary["stdev"] >= 0 and summary["cv"] >= 0
+        assert entry["scaling"] > 0
+    assert result["kernels"]["sha256d"]["per_core_hps"]["mean"] > result["kernels"]["scrypt"]["per_core_hps"]["mean"]
+    assert seen == sorted(seen) and len(seen) == 2 * (1 + 2 * 2)
+    assert benchmark.get_stats()["runs"] == 1
+
+    result["kernels"]["memory_hard"] = dict(result["kernels"]["scrypt"], algorithm=None)
+    hashrates = profit_hashrates(result)
+    assert set(hashrates) == {"SHA-256", "Scrypt"}  # the memory-hard stand-in is never priced as RandomX
+    assert hashrates["Scrypt"] == result["kernels"]["scrypt"]["aggregate_hps"]["mean"]
+
+
+def test_benchmark_store_keeps_the_latest_result_across_reopen():
+    """Results are stored per device, replaced on re-run and survive closing the database"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        store = BenchmarkStore(path)
+        assert store.get("rig") is None
+        store.save("rig", {"hashrates": {"SHA-256": 1.0}})
+        store.save("rig", {"hashrates": {"SHA-256": 2.0}})
+        store.save("other", {"hashrates": {"Scrypt": 3.0}})
+        store.close()
+
+        reopened = BenchmarkStore(path)
+        assert reopened.get("rig") == {"hashrates": {"SHA-256": 2.0}}
+        assert set(reopened.all()) == {"rig", "other"}
+        reopened.close()
+
+
+# Pool prober
+def subscribe_reply(request):
+    return {"id": request["id"], "result": [[["mining.notify", "ae6812eb4cd7735a302a8a9dd95cf71f"]], "08000002", 4], "error": None}
+
+
+def test_pool_prober_ranks_by_latency_fee_and_rejects():
+    """Slow, silent and closed endpoints are told apart; cost adds fee, rejects and latency"""
+    async def scenario():
+        fast, fast_port = await start_stratum_stand_in(subscribe_reply)
+        slow, slow_port = await start_stratum_stand_in(subscribe_reply, delay=0.15)
+        silent, silent_port = await start_stratum_stand_in(lambda request: None)
+        closed, closed_port = await start_stratum_stand_in(subscribe_reply)
+        closed.close()
+        await closed.wait_closed()
+        endpoints = parse_pool_endpoints(
+            f"Fast/etc=127.0.0.1:{fast_port}/2.0, Slow/ETC=127.0.0.1:{slow_port}/0.5,"
+            f"Silent/rvn=127.0.0.1:{silent_port}, Closed/LTC=127.0.0.1:{closed_port}/1"
+        )
+        prober = PoolProber(endpoints, rounds=2, timeout=0.4, job_interval=1.0, cache_ttl=60)
+        started = time.perf_counter()
+        ranked = await prober.ranking()
+        elapsed = time.perf_counter() - started
+        again = await prober.ranking()
+        prober.record_shares("Fast", 70, 30)
+        reranked = await prober.probe()
+        for server in (fast, slow, silent):
+            server.close()
+        return prober, ranked, again, reranked, elapsed
+
+    prober, ranked, again, reranked, elapsed = asyncio.run(scenario())
+    assert elapsed < 2 * 0.4 + 0.3  # endpoints are probed concurrently, rounds one after another
+    by_name = {entry["name"]: entry for entry in ranked}
+    assert [entry["name"] for entry in ranked][:2] == ["Fast", "Slow"] and [entry["rank"] for entry in ranked] == [1, 2, 3, 4]
+    assert by_name["Slow"]["latency_ms"] > 100 > by_name["Fast"]["latency_ms"]
+    slow_latency = (by_name["Slow"]["connect_ms"] + by_name["Slow"]["latency_ms"]) / 1000
+    assert math.isclose(by_name["Slow"]["cost_pct"], 0.5 + 100 * slow_latency, abs_tol=0.01)
+    assert not by_name["Silent"]["reachable"] and "0.4s" in by_name["Silent"]["error"]
+    assert not by_name["Closed"]["reachable"] and by_name["Closed"]["cost_pct"] is None
+    assert by_name["Fast"]["coin"] == "ETC" and by_name["Silent"]["fee"] == 0.0
+    assert again == ranked  # served from cache
+
+    assert [entry["name"] for entry in reranked][:2] == ["Slow", "Fast"]  # 30% rejects outweigh 150ms of latency
+    assert reranked[1]["reject_rate"] == 0.3
+    stats = prober.get_stats()
+    assert stats["runs"] == 2 and stats["cache"]["hits"] == 1
+    assert stats["probes"] == 16 and stats["failures"] == 8 and stats["timeouts"] == 4
+
+
+def test_pool_endpoint_spec_is_validated():
+    """pool/coin=host:port/fee entries parse; entries missing the coin or a numeric port are refused"""
+    assert parse_pool_endpoints("A/btc=pool.example:3333/1.5,") == [("A", "BTC", "pool.example", 3333, 1.5)]
+    for spec in ("A=host:1", "A/BTC=host", "A/BTC=host:port"):
+        try:
+            parse_pool_endpoints(spec)
+            raise AssertionError(f"accepted {spec}")
+        except ValueError:
+            pass
+
+
+# Stratum client
+NOTIFY = ["job1", "00" * 32, "01", "02", [], "20000000", "1d00ffff", "5f5e1000", True]
+
+
+def stratum_pool(submit=None, log: list = None):
+    """Responder for a pool that sends a difficulty and a job after authorize; ``submit(params)`` answers shares"""
+    async def respond(request):
+        if log is not None:
+            log.append(request["method"])
+        if request["method"] == "mining.subscribe":
+            return subscribe_reply(request)
+        if request["method"] == "mining.authorize":
+            return [
+                {"id": request["id"], "result": request["params"][0] != "banned", "error": None},
+                {"id": None, "method": "mining.set_difficulty", "params": [16]},
+                {"id": None, "method": "mining.notify", "params": NOTIFY},
+            ]
+        if request["method"] == "mining.submit":
+            if submit is None:
+                return None
+            result = submit(request["params"])
+            if asyncio.iscoroutine(result):
+                result = await result
+            if isinstance(result, bool):
+                return {"id": request["id"], "result": result, "error": None}
+            return {"id": request["id"], "result": None, "error": result}
+    return respond
+
+
+def test_stratum_client_pipelines_share_submission():
+    """One slow ack does not hold back the shares written after it; rejects carry the pool's reason"""
+    async def submit(params):
+        nonce = params[4]
+        if nonce == "slow":
+            await asyncio.sleep(0.5)
+        if nonce == "low":
+            return [23, "Low difficulty share", None]
+        return nonce != "stale"
+
+    async def scenario():
+        server, port = await start_stratum_stand_in(stratum_pool(submit))
+        jobs = []
+        client = StratumClient([("127.0.0.1", port)], "0xminer", timeout=2, on_job=jobs.append)
+        client.start()
+        assert await client.wait_ready(2)
+        while client.job is None:
+            await asyncio.sleep(0.01)
+        started = time.perf_counter()
+        finished = {}
+
+        async def one(nonce):
+            result = await client.submit("job1", "00000000", "5f5e1000", nonce)
+            finished[nonce] = time.perf_counter() - started
+            return result
+
+        nonces = ["slow"] + [f"{index:08x}" for index in range(18)] + ["low", "stale"]
+        results = dict(zip(nonces, await asyncio.gather(*(one(nonce) for nonce in nonces))))
+        await client.stop()
+        server.close()
+        return client, jobs, results, finished
+
+    client, jobs, results, finished = asyncio.run(scenario())
+    assert client.difficulty == 16 and client.extranonce1 == "08000002" and client.extranonce2_size == 4
+    assert jobs[0]["job_id"] == "job1" and jobs[0]["clean_jobs"]
+    assert max(elapsed for nonce, elapsed in finished.items() if nonce != "slow") < 0.25 <= finished["slow"]
+    assert results["slow"]["accepted"] and results["00000000"]["accepted"]
+    assert not results["low"]["accepted"] and results["low"]["error"] == "Low difficulty share"
+    assert not results["stale"]["accepted"] and results["stale"]["error"] == "rejected"
+    stats = client.get_stats()
+    assert (stats["submitted"], stats["accepted"], stats["rejected"], stats["lost"]) == (21, 19, 2, 0)
+    assert stats["ack_p99_ms"] >= 250 and stats["ack_p50_ms"] < 250 and not stats["connected"]
+
+
+def test_stratum_client_fails_over_and_reconnects():
+    """A dead primary fails over to the backup; a dropped connection loses pending shares and reconnects"""
+    async def scenario():
+        dead, dead_port = await start_stratum_stand_in(lambda request: None)
+        dead.close()
+        await dead.wait_closed()
+        log, connections = [], []
+        backup, backup_port = await start_stratum_stand_in(stratum_pool(log=log), connections=connections)
+        client = StratumClient(
+            [("127.0.0.1", dead_port), ("127.0.0.1", backup_port)], "0xminer", timeout=1, retries=2, backoff=0.01
+        )
+        client.start()
+        assert await client.wait_ready(2)
+        failed_over = client.get_stats()
+
+        pending = asyncio.ensure_future(client.submit("job1", "00000000", "5f5e1000", "unanswered"))
+        await asyncio.sleep(0.05)
+        connections[-1].close()  # the pool drops the connection with the share unacknowledged
+        try:
+            await pending
+            raise AssertionError("pending share survived the disconnect")
+        except ConnectionError:
+            pass
+        assert await client.wait_ready(2)
+        await client.stop()
+        backup.close()
+        return client, failed_over, log
+
+    client, failed_over, log = asyncio.run(scenario())
+    assert failed_over["failovers"] == 1 and failed_over["endpoint"].endswith(str(client.endpoints[1][1]))
+    assert failed_over["connects"] == 1 and failed_over["reconnects"] == 2
+    stats = client.get_stats()
+    assert stats["lost"] == 1 and stats["connects"] == 2 and stats["failovers"] == 1
+    assert log.count("mining.subscribe") == 2 and log.count("mining.authorize") == 2
+
+
+def test_stratum_client_retries_refused_authorization():
+    """A refused login is a failed attempt: the client backs off and never reports ready"""
+    async def scenario():
+        server, port = await start_stratum_stand_in(stratum_pool())
+        client = StratumClient([("127.0.0.1", port)], "banned", timeout=1, backoff=0.05)
+        client.start()
+        ready = await client.wait_ready(0.3)
+        await client.stop()
+        server.close()
+        return client, ready
+
+    client, ready = asyncio.run(scenario())
+    stats = client.get_stats()
+    assert not ready and "authorization refused" in stats["last_error"]
+    assert 2 <= stats["connects"] <= 4  # 0.05s, 0.1s, 0.2s backoff within 0.3s
+
+
+def test_stratum_client_survives_malformed_pool_replies():
+    """A null or short subscribe result and a non-object line each end one session, not the client"""
+    broken = [
+        lambda request: {"id": request["id"], "result": None, "error": None},
+        lambda request: {"id": request["id"], "result": [[], "08000002"], "error": None},
+        lambda request: [["not", "an", "object"]],
+    ]
+    healthy = stratum_pool()
+
+    def respond(request):
+        if request["method"] == "mining.subscribe" and broken:
+            return broken.pop(0)(request)
+        return healthy(request)
+
+    async def scenario():
+        server, port = await start_stratum_stand_in(respond)
+        client = StratumClient([("127.0.0.1", port)], "0xminer", timeout=1, retries=10, backoff=0.01)
+        client.start()
+        ready = await client.wait_ready(2)
+        await client.stop()
+        server.close()
+        return client, ready
+
+    client, ready = asyncio.run(scenario())
+    stats = client.get_stats()
+    assert ready and stats["connects"] == 4 and stats["reconnects"] == 3
+    assert client.extranonce1 == "08000002" and stats["last_error"] is None
+
+
+# Backend request paths
+def load_backend():
+    """Import the API module without the transfer indexer's background scan"""
+    os.environ.setdefault("INDEXER_ENABLED", "false")
+    import crypto_trading_backend
+    return crypto_trading_backend
+
+
+def test_friend_wallets_load_concurrently_with_cap_and_timeout():
+    """Fan-out latency follows the slowest friend, respects the cap, and a stuck friend comes back partial"""
+    backend = load_backend()
+    delays = {"0xslow": 0.6, "0xstuck": 30.0}
+    in_flight = {"now": 0, "peak": 0}
+
+    class FakeChain:
+        async def get_wallet_balance(self, address):
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            try:
+                await asyncio.sleep(min(delays.get(address, 0.3), 0.3))
+            finally:
+                in_flight["now"] -= 1
+            return backend.WalletData(
+                address=address, total_value_usd=10.0, daily_change_percent=1.0, tokens=[], last_updated="now"
+            )
+
+        async def get_transaction_history(self, address, limit=50, cursor=None):
+            await asyncio.sleep(delays.get(address, 0.3))
+            return [{"hash": address}], None
+
+    class FakeAI:
+        async def analyze_wallets(self, histories):
+            return {address: "steady" for address in histories}
+
+    saved = (backend.blockchain_manager, backend.ai_engine, backend.FRIEND_FETCH_CONCURRENCY, backend.FRIEND_FETCH_TIMEOUT)
+    backend.blockchain_manager, backend.ai_engine = FakeChain(), FakeAI()
+    try:
+        backend.FRIEND_FETCH_CONCURRENCY, backend.FRIEND_FETCH_TIMEOUT = 10, 5.0
+        started = time.perf_counter()
+        friends = asyncio.run(backend.load_friend_wallets(["0xa", "0xb", "0xc", "0xslow"]))
+        elapsed = time.perf_counter() - started
+        assert 0.6 <= elapsed < 1.2  # slowest friend is 0.6s; one after another would be 1.5s
+        assert not any(friend.partial for friend in friends)
+
+        backend.FRIEND_FETCH_CONCURRENCY = 2
+        in_flight["peak"] = 0
+        friends = asyncio.run(backend.load_friend_wallets([f"0x{i}" for i in range(6)]))
+        assert in_flight["peak"] == 2 and len(friends) == 6
+
+        backend.FRIEND_FETCH_CONCURRENCY, backend.FRIEND_FETCH_TIMEOUT = 10, 0.5
+        started = time.perf_counter()
+        friends = asyncio.run(backend.load_friend_wallets(["0xa", "0xstuck"]))
+        assert time.perf_counter() - started < 3
+        fine, stuck = friends
+        assert not fine.partial and fine.recent_transactions == [{"hash": "0xa"}]
+        assert stuck.partial and stuck.total_value_usd == 10.0 and stuck.recent_transactions == []
+    finally:
+        (backend.blockchain_manager, backend.ai_engine,
+         backend.FRIEND_FETCH_CONCURRENCY, backend.FRIEND_FETCH_TIMEOUT) = saved
+
+
+def test_benchmark_results_are_served_and_priced_by_every_worker():
+    """A rig benchmarked on one worker is read from state and joins another worker's profit fleet"""
+    backend = load_backend()
+    rig = "0xrig-benchmarked-elsewhere"
+    result = {"mode": "simulated", "ethash": 85.6, "hashrates": {"Ethash": 85.6e6}, "completed": True}
+    saved_engine = backend.profit_engine
+
+    async def scenario():
+        await backend.state.put("mining_benchmarks", rig, result)
+        backend.profit_engine = ProfitEngine(electricity_price=backend.ELECTRICITY_PRICE)  # this worker never ran it
+        backend.profit_engine.set_prices({"ETC": 20.0})
+        try:
+            assert await backend.get_benchmark_result(current_user=rig) == result
+            profitability = await backend.get_mining_profitability(current_user=rig)
+            assert profitability["recommendation"]["coin"] == "ETC"
+            assert {option["coin"] for option in profitability["options"]} == {"ETC"}
+            assert backend.profit_engine.has_device(rig)
+        finally:
+            backend.profit_engine = saved_engine
+            await backend.state.delete("mining_benchmarks", rig)
+
+    asyncio.run(scenario())
+
+
+def test_profitability_follows_the_shared_benchmark_and_session():
+    """A re-benchmark or session change on another worker replaces this worker's stale profit row"""
+    backend = load_backend()
+    rig = "0xrig-rebenchmarked-elsewhere"
+    saved_engine = backend.profit_engine
+
+    async def scenario():
+        backend.profit_engine = ProfitEngine(electricity_price=backend.ELECTRICITY_PRICE)
+        backend.profit_engine.set_prices({"ETC": 20.0, "RVN": 0.03})
+        try:
+            await backend.state.put("mining_benchmarks", rig, {
+                "mode": "simulated", "hashrates": {"Ethash": 85.6e6}, "timestamp": "2024-01-01T00:00:00"
+            })
+            first = await backend.get_mining_profitability(current_user=rig)
+            assert {option["coin"] for option in first["options"]} == {"ETC"}
+            assert first["recommendation"]["current_profit_per_day"] is None
+
+            await backend.state.put("mining_benchmarks", rig, {
+                "mode": "simulated", "hashrates": {"KawPow": 62.3e6}, "timestamp": "2024-01-02T00:00:00"
+            })
+            await backend.state.put("mining_sessions", rig, {"status": "running", "coin": "RVN", "pool": "NiceHash"})
+            second = await backend.get_mining_profitability(current_user=rig)
+            assert {option["coin"] for option in second["options"]} == {"RVN"}
+            assert second["recommendation"]["pool"] == "2Miners"  # lower fee than the current NiceHash
+            assert second["recommendation"]["current_profit_per_day"] is not None
+
+            await backend.state.update("mining_sessions", rig, {"status": "stopped"})
+            third = await backend.get_mining_profitability(current_user=rig)
+            assert third["recommendation"]["current_profit_per_day"] is None
+        finally:
+            backend.profit_engine = saved_engine
+            await backend.state.delete("mining_benchmarks", rig)
+            await backend.state.delete("mining_sessions", rig)
+
+    asyncio.run(scenario())
+
+
+def test_stratum_sessions_are_owned_by_one_worker():
+    """Only the worker holding a stratum connection stops or uses it; it drops sessions stopped elsewhere"""
+    from fastapi import HTTPException
+
+    backend = load_backend()
+    miner = "0xminer-on-two-workers"
+    saved = (backend.mining_manager, backend.pool_prober.endpoints, backend.STRATUM_ENABLED,
+             backend.STRATUM_POLL_INTERVAL, backend.STRATUM_CLAIM_TTL)
+
+    async def expect_conflict(call):
+        try:
+            await call
+            raise AssertionError("a worker without the stratum connection answered")
+        except HTTPException as e:
+            assert e.status_code == 409, e.detail
+
+    async def scenario():
+        server, port = await start_stratum_stand_in(stratum_pool())
+        backend.pool_prober.endpoints = [("Local", "ETC", "127.0.0.1", port, 1.0)]
+        backend.STRATUM_ENABLED, backend.STRATUM_POLL_INTERVAL, backend.STRATUM_CLAIM_TTL = True, 0.02, 0.3
+        owner, other = backend.MiningManager("worker-a"), backend.MiningManager("worker-b")
+        owner.start()
+        other.start()
+        shares = backend.ShareBatch(shares=[{"job_id": "job1", "extranonce2": "00000000", "ntime": "5f5e1000", "nonce": "01"}])
+        try:
+            backend.mining_manager = owner
+            await owner.start_mining(miner, "ETC", "Local")
+            assert (await backend.get_mining_job(current_user=miner))["job"]["job_id"] == "job1"
+
+            backend.mining_manager = other
+            await expect_conflict(backend.stop_mining(current_user=miner))
+            await expect_conflict(backend.get_mining_job(current_user=miner))
+            await expect_conflict(backend.submit_mining_shares(shares, current_user=miner))
+            assert (await backend.state.get("mining_sessions", miner))["status"] == "running"
+
+            backend.mining_manager = owner
+            assert (await backend.stop_mining(current_user=miner))["success"]
+            assert miner not in owner.stratum_clients
+
+            await owner.start_mining(miner, "ETC", "Local")
+            await backend.state.update("mining_sessions", miner, {"status": "stopped"})  # e.g. stopped after a failover
+            await asyncio.sleep(0.1)
+            assert miner not in owner.stratum_clients
+
+            await owner.start_mining(miner, "ETC", "Local")
+            await owner.close()  # the owning worker goes away and stops checking in
+            await asyncio.sleep(0.35)
+            backend.mining_manager = other
+            assert (await backend.stop_mining(current_user=miner))["success"]
+        finally:
+            await owner.close()
+            await other.close()
+            server.close()
+            (backend.mining_manager, backend.pool_prober.endpoints, backend.STRATUM_ENABLED,
+             backend.STRATUM_POLL_INTERVAL, backend.STRATUM_CLAIM_TTL) = saved
+            await backend.state.delete("mining_sessions", miner)
+
+    asyncio.run(scenario())
+
+
+def main():
+    """Run all component tests"""
+    print("🧪 CoresAI Crypto Component Tests")
+    print("=" * 60)
+    failed = 0
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {name}: {e!r}")
+    print("=" * 60)
+    print("🎉 All tests passed!" if not failed else f"⚠️ {failed} test(s) failed")
+
+
+if __name__ == "__main__":
+    main()
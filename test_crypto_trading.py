@@ -89,6 +89,40 @@ class CryptoTradingTester:
             print(f"❌ Market data failed: {e}")
             return {}
     
+    def test_market_data_stream(self) -> Dict[str, Any]:
+        """Test the Server-Sent Events market data stream"""
+        print("🔍 Testing market data stream...")
+        try:
+            with self.session.get(f"{self.base_url}/api/v1/market-data/stream", stream=True, timeout=30) as response:
+                assert response.status_code == 200
+                assert response.headers["content-type"].startswith("text/event-stream")
+                for line in response.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data: "):
+                        message = json.loads(line[len("data: "):])
+                        break
+            print(f"✅ Market data stream passed: {message['type']} with {len(message['data'])} tokens")
+            return message
+        except Exception as e:
+            print(f"❌ Market data stream failed: {e}")
+            return {}
+    
+    def test_trade_quote(self) -> Dict[str, Any]:
+        """Test the multi-venue trade quote endpoint"""
+        print("🔍 Testing trade quote...")
+        try:
+            response = self.session.get(
+                f"{self.base_url}/api/v1/trade/quote",
+                params={"token_in": "ETH", "token_out": "USDT", "amount_in": 1}
+            )
+            assert response.status_code == 200
+            data = response.json()
+            best = data["best"]["venue"] if data["best"] else "no route"
+            print(f"✅ Trade quote passed: {best} in {data['elapsed_ms']:.0f}ms across {len(data['venues'])} venues")
+            return data
+        except Exception as e:
+            print(f"❌ Trade quote failed: {e}")
+            return {}
+    
     def test_trading_signals(self) -> Dict[str, Any]:
         """Test AI trading signals endpoint"""
         print("🔍 Testing AI trading signals...")
@@ -128,6 +162,33 @@ class CryptoTradingTester:
             print(f"❌ Wallet balance failed: {e}")
             return {}
     
+    def test_wallet_transactions(self) -> Dict[str, Any]:
+        """Test indexed wallet transaction history (requires auth)"""
+        if not self.auth_token:
+            print("⚠️ Skipping wallet transactions test - no auth token")
+            return {}
+        
+        print("🔍 Testing wallet transactions...")
+        try:
+            headers = {"Authorization": f"Bearer {self.auth_token}"}
+            response = self.session.get(
+                f"{self.base_url}/api/v1/wallet/transactions",
+                params={"limit": 10},
+                headers=headers
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                print(f"✅ Wallet transactions passed: {data['count']} transfers (indexed to block {data['indexed_to_block']})")
+                return data
+            else:
+                print(f"❌ Wallet transactions failed: {response.status_code}")
+                return {}
+                
+        except Exception as e:
+            print(f"❌ Wallet transactions failed: {e}")
+            return {}
+    
     def test_friend_wallet_add(self) -> bool:
         """Test adding friend wallet (requires auth)"""
         if not self.auth_token:
@@ -160,6 +221,35 @@ class CryptoTradingTester:
             print(f"❌ Friend wallet add failed: {e}")
             return False
     
+    def test_friend_wallets(self) -> Dict[str, Any]:
+        """Test listing tracked friend wallets (requires auth)"""
+        if not self.auth_token:
+            print("⚠️ Skipping friend wallets test - no auth token")
+            return {}
+        
+        print("🔍 Testing friend wallets list...")
+        try:
+            headers = {"Authorization": f"Bearer {self.auth_token}"}
+            start = time.time()
+            response = self.session.get(
+                f"{self.base_url}/api/v1/friend-wallets",
+                headers=headers
+            )
+            elapsed = time.time() - start
+            
+            if response.status_code == 200:
+                data = response.json()
+                print(f"✅ Friend wallets passed: {data['count']} friends "
+                      f"({data.get('partial_count', 0)} partial) in {elapsed:.2f}s")
+                return data
+            else:
+                print(f"❌ Friend wallets failed: {response.status_code}")
+                return {}
+                
+        except Exception as e:
+            print(f"❌ Friend wallets failed: {e}")
+            return {}
+    
     def test_portfolio_analytics(self) -> Dict[str, Any]:
         """Test portfolio analytics endpoint (requires auth)"""
         if not self.auth_token:
@@ -457,6 +547,8 @@ class CryptoTradingTester:
         self.test_health_check()
         self.test_root_endpoint()
         self.test_market_data()
+        self.test_market_data_stream()
+        self.test_trade_quote()
         self.test_trading_signals()
         
         print("\n" + "🔧 Testing Mining Module (No Auth)" + "=" * 35)
@@ -476,7 +568,9 @@ class CryptoTradingTester:
         # Test authenticated endpoints
         if wallet_connected:
             self.test_wallet_balance()
+            self.test_wallet_transactions()
             self.test_friend_wallet_add()
+            self.test_friend_wallets()
             self.test_portfolio_analytics()
             self.test_price_alert()
             